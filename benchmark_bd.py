@@ -0,0 +1,801 @@
+import asyncio
+import contextlib
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from implementacao_btree_bd import BPlusTree, MODOS_BUSCA
+from implementacao_linearhash_bd import HashLinear, POLITICAS_COLISAO, INT_SIZE
+from hash_numpy_bd import HashLinearNumPy, np
+from wal_bd import IndiceDuravel
+from servidor_bd import ServidorIndice, gerar_carga, criar_estrutura
+from replay_paralelo_bd import replay_paralelo
+from gerador_carga_bd import gerar_csv
+from replay_bd import processar_csv, SILENCIOSO, RESUMO, AMOSTRA, DETALHADO
+
+# --- Constantes de Configuração ---
+NUM_CAMPOS = 3
+SEMENTE = 42  # Semente fixa para que as execuções sejam reprodutíveis
+
+# *********************************************************************************
+# BENCHMARK: CUSTO DA BUSCA POR TAMANHO DE PÁGINA
+# Mede o tempo médio de buscar() para cada estratégia de busca dentro dos nós.
+# Páginas maiores significam nós com mais chaves: a busca linear cresce com m,
+# enquanto a binária e a interpolação crescem com log m (ou menos).
+# *********************************************************************************
+def benchmark_busca_por_pagina(tamanhos_pagina=(256, 1024, 4096, 16384, 65536, 262144),
+                               num_registros=20000, num_buscas=5000, modos=None):
+    modos = modos or list(MODOS_BUSCA)
+    rnd = random.Random(SEMENTE)
+
+    # Chaves espaçadas uniformemente (com ruído) e inseridas em ordem aleatória
+    chaves = [i * 10 + rnd.randrange(10) for i in range(num_registros)]
+    rnd.shuffle(chaves)
+    consultas = [rnd.choice(chaves) for _ in range(num_buscas)]
+
+    print("=" * 60)
+    print("BENCHMARK: BUSCA POR IGUALDADE x TAMANHO DA PÁGINA")
+    print("=" * 60)
+    print(f"Registros: {num_registros} | Buscas: {num_buscas} | Campos: {NUM_CAMPOS}\n")
+    print(f"{'Página (B)':>10} | " + " | ".join(f"{m:>14}" for m in modos))
+
+    resultados = []
+    for tamanho in tamanhos_pagina:
+        linha = {}
+        for modo in modos:
+            arvore = BPlusTree(NUM_CAMPOS, tamanho, busca=modo, verboso=False)
+            for chave in chaves:
+                arvore.inserir((chave, chave, chave))
+
+            inicio = time.perf_counter()
+            for chave in consultas:
+                arvore.buscar(chave)
+            fim = time.perf_counter()
+            linha[modo] = (fim - inicio) / num_buscas
+
+        resultados.append((tamanho, linha))
+        print(f"{tamanho:>10} | " + " | ".join(f"{linha[m]*1e6:>11.2f} µs" for m in modos))
+
+    print("=" * 60)
+    return resultados
+
+
+class _BPlusTreeOrdenacao(BPlusTree):
+    """Árvore com a inserção na folha original (reordena a página inteira a cada inserção)."""
+    def _inserir_na_folha(self, folha, chave, registro):
+        if not folha.keys:
+            folha.keys.append(chave)
+            folha.children.append(registro)
+        else:
+            pares_existentes = list(zip(folha.keys, folha.children))
+            pares_existentes.append((chave, registro))
+            pares_ordenados = sorted(pares_existentes, key=lambda x: x[0])
+            self._preencher_folha(folha, [p[0] for p in pares_ordenados], [p[1] for p in pares_ordenados])
+
+# *********************************************************************************
+# BENCHMARK: VAZÃO DE INSERÇÃO (REORDENAÇÃO x INSERÇÃO NO SLOT)
+# Compara a inserção original (sorted() na folha inteira) com a inserção direta
+# no slot encontrado por busca, para chaves aleatórias e sequenciais.
+# *********************************************************************************
+def benchmark_insercao(tamanhos_pagina=(256, 4096, 65536), num_registros=20000):
+    rnd = random.Random(SEMENTE)
+    fluxos = {
+        'aleatório': rnd.sample(range(num_registros * 10), num_registros),
+        'sequencial': list(range(num_registros)),
+    }
+    implementacoes = {
+        'reordenação': _BPlusTreeOrdenacao,
+        'slot': BPlusTree,
+    }
+
+    print("=" * 60)
+    print("BENCHMARK: VAZÃO DE INSERÇÃO (inserções/s)")
+    print("=" * 60)
+    print(f"Registros por execução: {num_registros} | Campos: {NUM_CAMPOS}\n")
+    print(f"{'Página (B)':>10} | {'Fluxo':>10} | " + " | ".join(f"{n:>12}" for n in implementacoes) + " | Ganho")
+
+    resultados = []
+    for tamanho in tamanhos_pagina:
+        for nome_fluxo, chaves in fluxos.items():
+            vazoes = {}
+            for nome, classe in implementacoes.items():
+                arvore = classe(NUM_CAMPOS, tamanho, verboso=False)
+                inicio = time.perf_counter()
+                for chave in chaves:
+                    arvore.inserir((chave, chave, chave))
+                fim = time.perf_counter()
+                vazoes[nome] = num_registros / (fim - inicio)
+
+            resultados.append((tamanho, nome_fluxo, vazoes))
+            ganho = vazoes['slot'] / vazoes['reordenação']
+            print(f"{tamanho:>10} | {nome_fluxo:>10} | " +
+                  " | ".join(f"{vazoes[n]:>12.0f}" for n in implementacoes) + f" | {ganho:.1f}x")
+
+    print("=" * 60)
+    return resultados
+
+
+# *********************************************************************************
+# BENCHMARK: POLÍTICA DE COLISÃO DA HASH (LINEAR x ROBIN HOOD)
+# Para cada fator de carga, enche uma tabela de tamanho fixo com chaves aleatórias,
+# passa por uma fase de remoções/reinserções (que deixa TOMBSTONES na sondagem
+# linear) e mede o comprimento médio e máximo das sondagens e o tempo médio de
+# buscas bem-sucedidas e malsucedidas.
+# *********************************************************************************
+def benchmark_robin_hood(fatores_carga=(0.5, 0.7, 0.8, 0.9, 0.95), capacidade=20000,
+                         num_buscas=10000):
+    rnd = random.Random(SEMENTE)
+    tamanho_total = capacidade * NUM_CAMPOS * INT_SIZE
+
+    print("=" * 78)
+    print("BENCHMARK: SONDAGEM LINEAR x ROBIN HOOD (HashLinear)")
+    print("=" * 78)
+    print(f"Capacidade: {capacidade} | Buscas por tipo: {num_buscas} | Campos: {NUM_CAMPOS}\n")
+    print(f"{'Carga':>5} | {'Política':>10} | {'Sond. média':>11} | {'Sond. máx':>9} | "
+          f"{'Acerto':>10} | {'Falha':>10} | {'Sond. falha':>11}")
+
+    resultados = []
+    for fator in fatores_carga:
+        quantidade = int(capacidade * fator)
+        universo = rnd.sample(range(capacidade * 100), quantidade * 2)
+        chaves, ausentes = universo[:quantidade], universo[quantidade:]
+        # Rotatividade: remove um quarto das chaves e insere outras tantas novas
+        rotatividade = quantidade // 4
+        removidas = rnd.sample(chaves, rotatividade)
+        novas = ausentes[:rotatividade]
+        ausentes = ausentes[rotatividade:]
+        presentes = list(set(chaves) - set(removidas)) + novas
+        consultas = [rnd.choice(presentes) for _ in range(num_buscas)]
+        falhas = [rnd.choice(ausentes) for _ in range(num_buscas)]
+
+        for politica in POLITICAS_COLISAO:
+            # Tamanho fixo e sem compactação: isola o efeito da política de colisão
+            tabela = HashLinear(NUM_CAMPOS, tamanho_total, fator_carga_max=None,
+                                limite_tombstones=None, politica=politica, verboso=False)
+            for chave in chaves:
+                tabela.inserir((chave, chave, chave))
+            for chave in removidas:
+                tabela.remover(chave)
+            for chave in novas:
+                tabela.inserir((chave, chave, chave))
+
+            sondagens = []
+            inicio = time.perf_counter()
+            for chave in consultas:
+                antes = tabela.io.sondagens
+                tabela.buscar(chave)
+                sondagens.append(tabela.io.sondagens - antes)
+            tempo_acerto = (time.perf_counter() - inicio) / num_buscas
+
+            antes = tabela.io.sondagens
+            inicio = time.perf_counter()
+            for chave in falhas:
+                tabela.buscar(chave)
+            tempo_falha = (time.perf_counter() - inicio) / num_buscas
+            media_falha = (tabela.io.sondagens - antes) / num_buscas
+
+            media = sum(sondagens) / num_buscas
+            resultados.append((fator, politica, media, max(sondagens), tempo_acerto, tempo_falha, media_falha))
+            print(f"{fator:>5.2f} | {politica:>10} | {media:>11.2f} | {max(sondagens):>9} | "
+                  f"{tempo_acerto*1e6:>7.2f} µs | {tempo_falha*1e6:>7.2f} µs | {media_falha:>11.2f}")
+
+    print("=" * 78)
+    return resultados
+
+
+# *********************************************************************************
+# BENCHMARK: HASH EM LISTA DE TUPLAS x HASH EM VETORES NUMPY
+# Compara a memória ocupada pela tabela e a vazão de inserção/busca de n chaves:
+# HashLinear (uma chamada por chave) x HashLinearNumPy (inserir_lote/buscar_lote).
+# *********************************************************************************
+def benchmark_hash_numpy(quantidades=(10000, 100000, 1000000)):
+    if np is None:
+        print("Benchmark 'hash_numpy' ignorado: o pacote 'numpy' não está instalado.")
+        return []
+    rnd = random.Random(SEMENTE)
+
+    print("=" * 78)
+    print("BENCHMARK: HashLinear (tuplas) x HashLinearNumPy (lote vetorizado)")
+    print("=" * 78)
+    print(f"{'Registros':>10} | {'Estrutura':>15} | {'Memória (MB)':>12} | {'Inserções/s':>12} | {'Buscas/s':>12}")
+
+    resultados = []
+    for quantidade in quantidades:
+        chaves = rnd.sample(range(quantidade * 10), quantidade)
+        consultas = [rnd.choice(chaves) for _ in range(quantidade)]
+        # Capacidade para ~50% de ocupação, sem crescimento durante a medição
+        tamanho_total = 2 * quantidade * NUM_CAMPOS * INT_SIZE
+
+        tracemalloc.start()
+        tabela = HashLinear(NUM_CAMPOS, tamanho_total, verboso=False)
+        inicio = time.perf_counter()
+        for chave in chaves:
+            tabela.inserir((chave, chave, chave))
+        tempo_insercao = time.perf_counter() - inicio
+        memoria = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        inicio = time.perf_counter()
+        for chave in consultas:
+            tabela.buscar(chave)
+        tempo_busca = time.perf_counter() - inicio
+        linha_lista = (memoria, quantidade / tempo_insercao, quantidade / tempo_busca)
+        del tabela
+
+        registros = np.array(chaves, dtype=np.int32).repeat(NUM_CAMPOS).reshape(-1, NUM_CAMPOS)
+        vetor_consultas = np.array(consultas, dtype=np.int64)
+        tabela = HashLinearNumPy(NUM_CAMPOS, tamanho_total, verboso=False)
+        inicio = time.perf_counter()
+        tabela.inserir_lote(registros)
+        tempo_insercao = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        tabela.buscar_lote(vetor_consultas)
+        tempo_busca = time.perf_counter() - inicio
+        linha_numpy = (tabela.memoria_bytes(), quantidade / tempo_insercao, quantidade / tempo_busca)
+
+        for nome, (memoria, vazao_insercao, vazao_busca) in (('HashLinear', linha_lista),
+                                                             ('HashLinearNumPy', linha_numpy)):
+            resultados.append((quantidade, nome, memoria, vazao_insercao, vazao_busca))
+            print(f"{quantidade:>10} | {nome:>15} | {memoria / 2**20:>12.2f} | "
+                  f"{vazao_insercao:>12.0f} | {vazao_busca:>12.0f}")
+
+    print("=" * 78)
+    return resultados
+
+
+# *********************************************************************************
+# BENCHMARK: OPERAÇÕES INDIVIDUAIS x OPERAÇÕES EM LOTE NA B+
+# Mede a vazão (chaves/s) de inserir/buscar/remover chamados chave a chave e das
+# versões em lote, que ordenam as chaves e descem uma vez por folha distinta.
+# *********************************************************************************
+def benchmark_lote(tamanho_pagina=4096, tamanhos_lote=(10000, 100000)):
+    rnd = random.Random(SEMENTE)
+
+    print("=" * 70)
+    print("BENCHMARK: B+ INDIVIDUAL x EM LOTE (chaves/s)")
+    print("=" * 70)
+    print(f"Página: {tamanho_pagina} B | Campos: {NUM_CAMPOS}\n")
+    print(f"{'Lote':>8} | {'Operação':>9} | {'Individual':>12} | {'Em lote':>12} | Ganho")
+
+    resultados = []
+    for tamanho in tamanhos_lote:
+        chaves = rnd.sample(range(tamanho * 10), tamanho)
+        registros = [(chave, chave, chave) for chave in chaves]
+        consultas = [rnd.choice(chaves) for _ in range(tamanho)]
+
+        individual = BPlusTree(NUM_CAMPOS, tamanho_pagina, verboso=False)
+        lote = BPlusTree(NUM_CAMPOS, tamanho_pagina, verboso=False)
+        etapas = (
+            ('inserir', lambda: [individual.inserir(r) for r in registros],
+                        lambda: lote.inserir_lote(registros)),
+            ('buscar', lambda: [individual.buscar(c) for c in consultas],
+                       lambda: lote.buscar_lote(consultas)),
+            ('remover', lambda: [individual.remover(c) for c in chaves],
+                        lambda: lote.remover_lote(chaves)),
+        )
+        for nome, por_chave, em_lote in etapas:
+            inicio = time.perf_counter()
+            por_chave()
+            vazao_individual = tamanho / (time.perf_counter() - inicio)
+            inicio = time.perf_counter()
+            em_lote()
+            vazao_lote = tamanho / (time.perf_counter() - inicio)
+            resultados.append((tamanho, nome, vazao_individual, vazao_lote))
+            print(f"{tamanho:>8} | {nome:>9} | {vazao_individual:>12.0f} | {vazao_lote:>12.0f} | "
+                  f"{vazao_lote / vazao_individual:.1f}x")
+
+    print("=" * 70)
+    return resultados
+
+
+# *********************************************************************************
+# BENCHMARK: DURABILIDADE (WAL) x TAMANHO DO GROUP COMMIT
+# Vazão de inserções/remoções duráveis para vários tamanhos de lote de commit
+# (operações por fsync), comparada com a estrutura sem log.
+# *********************************************************************************
+def benchmark_wal(lotes_commit=(1, 8, 64, 512), num_operacoes=5000, tamanho_pagina=4096):
+    rnd = random.Random(SEMENTE)
+    operacoes = []
+    presentes = []
+    novas = iter(rnd.sample(range(num_operacoes * 10), num_operacoes))
+    for _ in range(num_operacoes):
+        if presentes and rnd.random() < 0.3:
+            operacoes.append(('remover', presentes.pop(rnd.randrange(len(presentes)))))
+        else:
+            chave = next(novas)
+            presentes.append(chave)
+            operacoes.append(('inserir', (chave, chave, chave)))
+
+    def executar(indice):
+        inicio = time.perf_counter()
+        for nome, argumento in operacoes:
+            getattr(indice, nome)(argumento)
+        return num_operacoes / (time.perf_counter() - inicio)
+
+    print("=" * 60)
+    print("BENCHMARK: WAL COM GROUP COMMIT (operações/s)")
+    print("=" * 60)
+    print(f"Operações: {num_operacoes} (70% inserções) | Página: {tamanho_pagina} B\n")
+    print(f"{'Estrutura':>10} | {'Commit a cada':>13} | {'Ops/s':>10} | {'fsyncs':>7}")
+
+    resultados = []
+    estruturas = (('B+', BPlusTree, (NUM_CAMPOS, tamanho_pagina)),
+                  ('Hash', HashLinear, (NUM_CAMPOS, num_operacoes * NUM_CAMPOS * INT_SIZE)))
+    for nome, classe, argumentos in estruturas:
+        vazao = executar(classe(*argumentos, verboso=False))
+        resultados.append((nome, None, vazao, 0))
+        print(f"{nome:>10} | {'sem log':>13} | {vazao:>10.0f} | {0:>7}")
+        for lote in lotes_commit:
+            diretorio = tempfile.mkdtemp(prefix='wal_bd_')
+            try:
+                indice = IndiceDuravel(diretorio, classe, *argumentos, lote_commit=lote, intervalo_checkpoint=0)
+                vazao = executar(indice)
+                indice.confirmar()
+                fsyncs = indice.log.sincronizacoes
+                indice.fechar(checkpoint=False)
+            finally:
+                shutil.rmtree(diretorio)
+            resultados.append((nome, lote, vazao, fsyncs))
+            print(f"{nome:>10} | {lote:>13} | {vazao:>10.0f} | {fsyncs:>7}")
+
+    print("=" * 60)
+    return resultados
+
+
+# *********************************************************************************
+# BENCHMARK: CONCORRÊNCIA (latch crabbing)
+# Várias threads executam uma mistura de buscas, inserções e remoções na mesma árvore
+# em modo concorrente. Mede a vazão total por número de threads e o custo dos latches
+# em relação à árvore comum com uma única thread. No CPython, a GIL limita o ganho de
+# vazão; o teste verifica sobretudo que a árvore permanece correta sob disputa.
+# *********************************************************************************
+def benchmark_concorrencia(num_threads=(1, 2, 4, 8), operacoes_por_thread=20000,
+                           fracao_escritas=0.2, tamanho_pagina=512):
+    num_chaves = 50000
+    rnd = random.Random(SEMENTE)
+    iniciais = rnd.sample(range(num_chaves * 10), num_chaves)
+
+    def preparar(concorrente):
+        arvore = BPlusTree(NUM_CAMPOS, tamanho_pagina, verboso=False, concorrente=concorrente)
+        arvore.carregar_em_lote((chave, chave, chave) for chave in sorted(iniciais))
+        return arvore
+
+    def roteiro(semente):
+        # Cada thread só insere/remove chaves do seu próprio resíduo (chave % 8), para
+        # que as threads não disputem as mesmas chaves (as buscas são livres)
+        r = random.Random(semente)
+        operacoes = []
+        for _ in range(operacoes_por_thread):
+            if r.random() < fracao_escritas:
+                chave = r.randrange(num_chaves * 10) // 8 * 8 + semente % 8
+                operacoes.append(('inserir' if r.random() < 0.5 else 'remover', chave))
+            else:
+                operacoes.append(('buscar', r.choice(iniciais)))
+        return operacoes
+
+    def trabalhador(arvore, operacoes):
+        for nome, chave in operacoes:
+            if nome == 'buscar':
+                arvore.buscar(chave)
+            elif nome == 'inserir':
+                if arvore.buscar(chave) is None:
+                    arvore.inserir((chave, chave, chave))
+            else:
+                arvore.remover(chave)
+
+    print("=" * 60)
+    print("BENCHMARK: CONCORRÊNCIA COM LATCH CRABBING (operações/s)")
+    print("=" * 60)
+    print(f"Registros iniciais: {num_chaves} | Página: {tamanho_pagina} B | "
+          f"Escritas: {fracao_escritas:.0%} | Ops por thread: {operacoes_por_thread}\n")
+    print(f"{'Threads':>9} | {'Ops/s':>10} | {'vs. sem latches':>15}")
+
+    arvore = preparar(concorrente=False)
+    operacoes = roteiro(SEMENTE)
+    inicio = time.perf_counter()
+    trabalhador(arvore, operacoes)
+    base = len(operacoes) / (time.perf_counter() - inicio)
+    print(f"{'1 (comum)':>9} | {base:>10.0f} | {1:>14.2f}x")
+
+    resultados = [(0, base)]
+    for quantidade in num_threads:
+        arvore = preparar(concorrente=True)
+        roteiros = [roteiro(SEMENTE + i) for i in range(quantidade)]
+        threads = [threading.Thread(target=trabalhador, args=(arvore, ops)) for ops in roteiros]
+        inicio = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        vazao = quantidade * operacoes_por_thread / (time.perf_counter() - inicio)
+        resultados.append((quantidade, vazao))
+        print(f"{quantidade:>9} | {vazao:>10.0f} | {vazao / base:>14.2f}x")
+
+        # Sanidade: as chaves continuam ordenadas e únicas após a disputa
+        chaves = [registro[0] for registro in arvore.iterar_intervalo(0, num_chaves * 10)]
+        if chaves != sorted(set(chaves)):
+            print(f"ERRO: árvore inconsistente após {quantidade} threads.")
+        _verificar_duplicadas_concorrente(quantidade, tamanho_pagina)
+
+    print("=" * 60)
+    return resultados
+
+
+def _verificar_duplicadas_concorrente(num_threads, tamanho_pagina, copias=300, num_chaves=200):
+    # Sanidade com chaves repetidas (duplicadas='permitir', o padrão): as threads gravam
+    # várias cópias de poucas chaves "quentes", que se espalham por muitas folhas,
+    # enquanto outras varrem intervalos nos dois sentidos. Cada varredura deve sair
+    # ordenada e, ao final, as varreduras devem ver todas as cópias.
+    arvore = BPlusTree(NUM_CAMPOS, tamanho_pagina, verboso=False, concorrente=True)
+    quentes = (num_chaves // 4, num_chaves // 2)
+    erros = []
+
+    def escritor(semente):
+        r = random.Random(semente)
+        for n in range(copias):
+            arvore.inserir((quentes[n % len(quentes)], semente, n))
+            arvore.inserir((r.randrange(num_chaves), semente, n))
+
+    def leitor():
+        for reverso in (False, True) * 10:
+            chaves = [registro[0] for registro in arvore.iterar_intervalo(0, num_chaves, reverso=reverso)]
+            if chaves != sorted(chaves, reverse=reverso):
+                erros.append(reverso)
+
+    threads = [threading.Thread(target=escritor, args=(SEMENTE + i,)) for i in range(num_threads)]
+    threads.append(threading.Thread(target=leitor))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    esperado = num_threads * copias * 2
+    for reverso in (False, True):
+        if len(list(arvore.iterar_intervalo(0, num_chaves, reverso=reverso))) != esperado:
+            erros.append(f"contagem ({'decrescente' if reverso else 'crescente'})")
+    for chave in quentes:
+        if len(arvore.buscar_intervalo(chave, chave)) < num_threads * copias // len(quentes):
+            erros.append(f"cópias da chave {chave}")
+    if erros:
+        print(f"ERRO: varreduras inconsistentes com chaves repetidas e {num_threads} threads: {erros}")
+
+
+# *********************************************************************************
+# BENCHMARK: SERVIDOR TCP (pipelining e buscas em lote)
+# Sobe um ServidorIndice local e mede a vazão e a latência vistas pelo gerador de carga
+# para diferentes profundidades de pipeline (janela) por conexão. Com janela=1 cada
+# requisição espera a anterior; janelas maiores enchem a fila do servidor, e as buscas
+# enfileiradas são resolvidas juntas. Servidor e carga dividem o mesmo processo.
+# *********************************************************************************
+def benchmark_servidor(janelas=(1, 8, 64), conexoes=4, requisicoes=20000):
+    async def medir(nome, janela):
+        servidor = ServidorIndice(criar_estrutura(nome, NUM_CAMPOS))
+        soquete = await servidor.iniciar(porta=0)
+        porta = soquete.sockets[0].getsockname()[1]
+        # Popula metade da faixa de chaves para que as buscas encontrem registros
+        await gerar_carga(porta=porta, conexoes=1, janela=64, requisicoes=20000, fracao_escritas=1.0,
+                          faixa_chaves=40000, semente=SEMENTE, verboso=False)
+        resultado = await gerar_carga(porta=porta, conexoes=conexoes, janela=janela,
+                                      requisicoes=requisicoes, faixa_chaves=40000,
+                                      semente=SEMENTE, verboso=False)
+        soquete.close()
+        await soquete.wait_closed()
+        media_lote = servidor.buscas_em_lote / servidor.lotes_busca if servidor.lotes_busca else 1
+        return resultado, media_lote
+
+    print("=" * 60)
+    print("BENCHMARK: SERVIDOR TCP COM PIPELINING (requisições/s)")
+    print("=" * 60)
+    print(f"Conexões: {conexoes} | Requisições: {requisicoes} (90% buscas)\n")
+    print(f"{'Estrutura':>9} | {'Janela':>6} | {'Req/s':>8} | {'p50 ms':>7} | {'p99 ms':>7} | {'Lote médio':>10}")
+
+    resultados = []
+    for nome in ('btree', 'hash'):
+        for janela in janelas:
+            resultado, media_lote = asyncio.run(medir(nome, janela))
+            resultados.append((nome, janela, resultado))
+            print(f"{nome:>9} | {janela:>6} | {resultado['vazao']:>8.0f} | {resultado['p50']:>7.3f} | "
+                  f"{resultado['p99']:>7.3f} | {media_lote:>10.1f}")
+
+    print("=" * 60)
+    return resultados
+
+
+def _gerar_arquivo_operacoes(num_operacoes):
+    # Arquivo temporário de operações no formato do CSV: 50% inserções, 20% remoções
+    # de chaves presentes e 30% buscas de chaves presentes. Retorna o caminho.
+    descritor, caminho = tempfile.mkstemp(prefix='replay_bd_', suffix='.csv')
+    os.close(descritor)
+    gerar_csv(caminho, num_operacoes, mistura={'+': 0.5, '-': 0.2, '?': 0.3},
+              fracao_acertos=1.0, semente=SEMENTE)
+    return caminho
+
+
+# *********************************************************************************
+# BENCHMARK: REPLAY PARALELO POR SHARDS
+# Gera um arquivo de operações e o executa com replay_paralelo() variando o número de
+# processos. O ganho depende dos núcleos disponíveis (os.cpu_count()).
+# *********************************************************************************
+def benchmark_replay_paralelo(processos=(1, 2, 4, 8), num_operacoes=200000, tamanho_pagina=4096):
+    caminho = _gerar_arquivo_operacoes(num_operacoes)
+
+    print("=" * 60)
+    print("BENCHMARK: REPLAY PARALELO POR SHARDS (operações/s)")
+    print("=" * 60)
+    print(f"Operações: {num_operacoes} | Núcleos: {os.cpu_count()} | Partição por hash\n")
+    print(f"{'Estrutura':>9} | {'Processos':>9} | {'Ops/s':>10} | Ganho")
+
+    resultados = []
+    estruturas = (('B+', BPlusTree, (NUM_CAMPOS, tamanho_pagina)),
+                  ('Hash', HashLinear, (NUM_CAMPOS, num_operacoes * NUM_CAMPOS * INT_SIZE)))
+    try:
+        for nome, classe, argumentos in estruturas:
+            base = None
+            for quantidade in processos:
+                total, _ = replay_paralelo(caminho, classe, *argumentos, num_processos=quantidade,
+                                           verboso=False)
+                vazao = total.ops_por_segundo()
+                base = base or vazao
+                resultados.append((nome, quantidade, vazao))
+                print(f"{nome:>9} | {quantidade:>9} | {vazao:>10.0f} | {vazao / base:.2f}x")
+    finally:
+        os.remove(caminho)
+
+    print("=" * 60)
+    return resultados
+
+
+# *********************************************************************************
+# BENCHMARK: CUSTO DO LOG NO REPLAY (processar_csv)
+# Mesmo arquivo de operações executado em cada nível de verbosidade, com a saída
+# descartada: mostra quanto do tempo de um replay detalhado é só formatação de log.
+# *********************************************************************************
+def benchmark_replay(num_operacoes=200000, tamanho_pagina=4096):
+    caminho = _gerar_arquivo_operacoes(num_operacoes)
+    niveis = (('silencioso', SILENCIOSO), ('resumo', RESUMO), ('amostra', AMOSTRA), ('detalhado', DETALHADO))
+
+    print("=" * 60)
+    print("BENCHMARK: REPLAY POR NÍVEL DE VERBOSIDADE (operações/s)")
+    print("=" * 60)
+    print(f"Operações: {num_operacoes} | Saída descartada\n")
+    print(f"{'Estrutura':>9} | {'Verbosidade':>11} | {'Ops/s':>10} | {'Tempo (s)':>9}")
+
+    resultados = []
+    estruturas = (('B+', BPlusTree, (NUM_CAMPOS, tamanho_pagina)),
+                  ('Hash', HashLinear, (NUM_CAMPOS, num_operacoes * NUM_CAMPOS * INT_SIZE)))
+    try:
+        for nome, classe, argumentos in estruturas:
+            for rotulo, nivel in niveis:
+                estrutura = classe(*argumentos, verboso=False)
+                inicio = time.perf_counter()
+                with open(os.devnull, 'w') as nulo, contextlib.redirect_stdout(nulo):
+                    processar_csv(caminho, estrutura, verbosidade=nivel)
+                duracao = time.perf_counter() - inicio
+                resultados.append((nome, rotulo, num_operacoes / duracao))
+                print(f"{nome:>9} | {rotulo:>11} | {num_operacoes / duracao:>10.0f} | {duracao:>9.3f}")
+    finally:
+        os.remove(caminho)
+
+    print("=" * 60)
+    return resultados
+
+
+# *********************************************************************************
+# BENCHMARK: MEMÓRIA DA ÁRVORE (FOLHAS EM LISTAS x FOLHAS COMPACTAS)
+# Carrega N registros pela carga em lote e mede com tracemalloc os bytes que a árvore
+# mantém alocados. Cada medida roda num processo novo, para começar do zero e para que
+# uma configuração que não caiba na RAM só falhe a própria linha.
+# *********************************************************************************
+def _medir_memoria_arvore(fila, num_registros, tamanho_pagina, compactas):
+    rnd = random.Random(SEMENTE)
+    # Campos além da chave fora do cache de inteiros pequenos, como em dados reais
+    registros = ((chave,) + tuple(rnd.randrange(1 << 20) for _ in range(NUM_CAMPOS - 1))
+                 for chave in range(num_registros))
+    tracemalloc.start()
+    arvore = BPlusTree(NUM_CAMPOS, tamanho_pagina, verboso=False, folhas_compactas=compactas)
+    inicio = time.perf_counter()
+    arvore.carregar_em_lote(registros)
+    duracao = time.perf_counter() - inicio
+    memoria = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    fila.put((memoria, duracao, arvore.estatisticas()['folhas']))
+
+
+def benchmark_memoria(volumes=(1000000, 10000000), tamanho_pagina=4096):
+    print("=" * 78)
+    print("BENCHMARK: MEMÓRIA DA ÁRVORE B+ (listas x compactas)")
+    print("=" * 78)
+    print(f"Página: {tamanho_pagina} B | Campos: {NUM_CAMPOS} | Carga em lote (folhas cheias)\n")
+    print(f"{'Registros':>10} | {'Folhas':>10} | {'Páginas':>7} | {'MiB':>9} | {'B/registro':>10} | "
+          f"{'Carga (s)':>9} | Economia")
+
+    resultados = []
+    for volume in volumes:
+        medidas = {}
+        for nome, compactas in (('listas', False), ('compactas', True)):
+            fila = multiprocessing.Queue()
+            processo = multiprocessing.Process(target=_medir_memoria_arvore,
+                                               args=(fila, volume, tamanho_pagina, compactas))
+            processo.start()
+            processo.join()
+            medida = fila.get() if processo.exitcode == 0 else None
+            medidas[nome] = medida
+            if medida is None:
+                print(f"{volume:>10} | {nome:>10} | falhou (código {processo.exitcode}, falta de memória?)")
+                continue
+            memoria, duracao, paginas = medida
+            economia = ""
+            if nome == 'compactas' and medidas['listas']:
+                economia = f"{medidas['listas'][0] / memoria:.1f}x"
+            print(f"{volume:>10} | {nome:>10} | {paginas:>7} | {memoria / 2**20:>9.1f} | "
+                  f"{memoria / volume:>10.1f} | {duracao:>9.2f} | {economia}")
+        resultados.append((volume, medidas))
+
+    print("=" * 78)
+    return resultados
+
+
+# *********************************************************************************
+# BENCHMARK: UPSERT EM UMA DESCIDA x BUSCAR + REMOVER + INSERIR
+# Fluxo de atualizações sobre chaves já carregadas (com uma fração de chaves novas):
+# a emulação faz três descidas e pode fundir e dividir a mesma folha; upsert() desce
+# uma vez e sobrescreve o registro na própria folha.
+# *********************************************************************************
+def benchmark_upsert(num_registros=100000, num_atualizacoes=100000, fracao_novas=0.1,
+                     tamanho_pagina=4096):
+    rnd = random.Random(SEMENTE)
+    registros = [(chave, chave, chave) for chave in range(0, num_registros * 2, 2)]
+    atualizacoes = []
+    for _ in range(num_atualizacoes):
+        if rnd.random() < fracao_novas:
+            chave = rnd.randrange(num_registros * 2) | 1  # Ímpar: ainda não existe
+        else:
+            chave = rnd.randrange(num_registros) * 2
+        atualizacoes.append((chave, rnd.randrange(1 << 20), rnd.randrange(1 << 20)))
+
+    def emulado(arvore):
+        for registro in atualizacoes:
+            if arvore.buscar(registro[0]) is not None:
+                arvore.remover(registro[0])
+            arvore.inserir(registro)
+
+    def direto(arvore):
+        for registro in atualizacoes:
+            arvore.upsert(registro)
+
+    print("=" * 70)
+    print("BENCHMARK: UPSERT x BUSCAR + REMOVER + INSERIR")
+    print("=" * 70)
+    print(f"Registros: {num_registros} | Atualizações: {num_atualizacoes} "
+          f"({fracao_novas:.0%} chaves novas) | Página: {tamanho_pagina} B\n")
+    print(f"{'Método':>24} | {'Ops/s':>10} | {'Págs lidas/op':>13} | {'Splits':>6} | {'Merges':>6}")
+
+    resultados = []
+    for nome, aplicar in (('buscar+remover+inserir', emulado), ('upsert', direto)):
+        arvore = BPlusTree(NUM_CAMPOS, tamanho_pagina, verboso=False)
+        arvore.carregar_em_lote(registros)
+        arvore.io.zerar()
+        inicio = time.perf_counter()
+        aplicar(arvore)
+        vazao = num_atualizacoes / (time.perf_counter() - inicio)
+        lidas = arvore.io.leituras / num_atualizacoes
+        resultados.append((nome, vazao, lidas, arvore.io.splits, arvore.io.merges))
+        print(f"{nome:>24} | {vazao:>10.0f} | {lidas:>13.2f} | {arvore.io.splits:>6} | {arvore.io.merges:>6}")
+
+    print("=" * 70)
+    return resultados
+
+
+# *********************************************************************************
+# BENCHMARK: FOLHAS COMPRIMIDAS (FRAME-OF-REFERENCE + BIT-PACKING)
+# Chaves densas e campos pequenos: compara páginas, altura, páginas lidas por busca,
+# memória e tempo de busca entre folhas compactas (4 bytes por inteiro) e comprimidas.
+# *********************************************************************************
+def benchmark_compressao(num_registros=200000, num_buscas=20000, tamanho_pagina=4096):
+    rnd = random.Random(SEMENTE)
+    chaves = sorted(rnd.sample(range(num_registros * 2), num_registros))
+    registros = [(chave, rnd.randrange(16), rnd.randrange(1000)) for chave in chaves]
+    consultas = [rnd.choice(chaves) for _ in range(num_buscas)]
+
+    print("=" * 78)
+    print("BENCHMARK: FOLHAS COMPACTAS x COMPRIMIDAS")
+    print("=" * 78)
+    print(f"Registros: {num_registros} (chaves densas, campos < 1000) | Buscas: {num_buscas} | "
+          f"Página: {tamanho_pagina} B\n")
+    print(f"{'Folhas':>11} | {'Páginas':>7} | {'Altura':>6} | {'Págs lidas/busca':>16} | "
+          f"{'MiB':>6} | {'Buscas/s':>9}")
+
+    resultados = []
+    for nome, comprimidas in (('compactas', False), ('comprimidas', True)):
+        tracemalloc.start()
+        arvore = BPlusTree(NUM_CAMPOS, tamanho_pagina, verboso=False, folhas_compactas=True,
+                           folhas_comprimidas=comprimidas)
+        arvore.carregar_em_lote(registros)
+        memoria = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        estatisticas = arvore.estatisticas()
+        arvore.io.zerar()
+        inicio = time.perf_counter()
+        for chave in consultas:
+            arvore.buscar(chave)
+        vazao = num_buscas / (time.perf_counter() - inicio)
+        lidas = arvore.io.leituras / num_buscas
+        resultados.append((nome, estatisticas['folhas'], estatisticas['altura'], lidas, memoria, vazao))
+        print(f"{nome:>11} | {estatisticas['folhas']:>7} | {estatisticas['altura']:>6} | {lidas:>16.2f} | "
+              f"{memoria / 2**20:>6.1f} | {vazao:>9.0f}")
+
+    print("=" * 78)
+    return resultados
+
+
+# *********************************************************************************
+# BENCHMARK: INSERÇÃO SEQUENCIAL (DICA DA ÚLTIMA FOLHA E SPLIT ENVIESADO)
+# Insere chaves crescentes (e, para comparação, aleatórias) com e sem o caminho rápido:
+# descidas evitadas aparecem nas páginas lidas por inserção; o split 90/10, no número
+# de folhas e na ocupação.
+# *********************************************************************************
+def benchmark_sequencial(num_registros=200000, tamanho_pagina=4096):
+    rnd = random.Random(SEMENTE)
+    cargas = {
+        'crescente': list(range(num_registros)),
+        'aleatória': rnd.sample(range(num_registros * 10), num_registros),
+    }
+
+    print("=" * 78)
+    print("BENCHMARK: INSERÇÃO SEQUENCIAL (dica da última folha + split 90/10)")
+    print("=" * 78)
+    print(f"Registros: {num_registros} | Página: {tamanho_pagina} B | Campos: {NUM_CAMPOS}\n")
+    print(f"{'Chaves':>10} | {'Caminho rápido':>14} | {'Inserções/s':>11} | {'Págs lidas/op':>13} | "
+          f"{'Folhas':>6} | {'Ocupação':>8}")
+
+    resultados = []
+    for nome, chaves in cargas.items():
+        for sequencial in (False, True):
+            arvore = BPlusTree(NUM_CAMPOS, tamanho_pagina, verboso=False, insercao_sequencial=sequencial)
+            inicio = time.perf_counter()
+            for chave in chaves:
+                arvore.inserir((chave, chave, chave))
+            vazao = num_registros / (time.perf_counter() - inicio)
+            lidas = arvore.io.leituras / num_registros
+            estatisticas = arvore.estatisticas()
+            resultados.append((nome, sequencial, vazao, lidas, estatisticas['folhas'],
+                               estatisticas['ocupacao_folhas']))
+            print(f"{nome:>10} | {'sim' if sequencial else 'não':>14} | {vazao:>11.0f} | {lidas:>13.2f} | "
+                  f"{estatisticas['folhas']:>6} | {estatisticas['ocupacao_folhas']:>8.2f}")
+
+    print("=" * 78)
+    return resultados
+
+
+BENCHMARKS = {
+    'busca': benchmark_busca_por_pagina,
+    'insercao': benchmark_insercao,
+    'robin_hood': benchmark_robin_hood,
+    'hash_numpy': benchmark_hash_numpy,
+    'lote': benchmark_lote,
+    'wal': benchmark_wal,
+    'concorrencia': benchmark_concorrencia,
+    'servidor': benchmark_servidor,
+    'replay_paralelo': benchmark_replay_paralelo,
+    'replay': benchmark_replay,
+    'memoria': benchmark_memoria,
+    'upsert': benchmark_upsert,
+    'compressao': benchmark_compressao,
+    'sequencial': benchmark_sequencial,
+}
+
+# --- PROGRAMA PRINCIPAL ---
+if __name__ == "__main__":
+    # Uso: python benchmark_bd.py [nome ...]  (sem argumentos executa todos)
+    nomes = sys.argv[1:] or list(BENCHMARKS)
+    for nome in nomes:
+        if nome not in BENCHMARKS:
+            print(f"ERRO: Benchmark '{nome}' desconhecido. Opções: {', '.join(BENCHMARKS)}")
+            continue
+        BENCHMARKS[nome]()
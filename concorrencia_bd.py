@@ -0,0 +1,48 @@
+import threading
+
+
+class LatchLeituraEscrita:
+    """
+    Latch de leitura/escrita de um nó: vários leitores ou um único escritor.
+    Escritores à espera têm prioridade sobre novos leitores, para que uma sequência
+    contínua de buscas não impeça inserções e remoções de avançar.
+    Não é reentrante: a mesma thread não pode adquiri-lo duas vezes.
+    """
+    def __init__(self):
+        self._condicao = threading.Condition(threading.Lock())
+        self._leitores = 0
+        self._escritor = False
+        self._escritores_esperando = 0
+
+    def adquirir_leitura(self):
+        with self._condicao:
+            while self._escritor or self._escritores_esperando:
+                self._condicao.wait()
+            self._leitores += 1
+
+    def tentar_leitura(self):
+        """Adquire para leitura só se não precisar esperar; retorna se conseguiu."""
+        with self._condicao:
+            if self._escritor or self._escritores_esperando:
+                return False
+            self._leitores += 1
+            return True
+
+    def liberar_leitura(self):
+        with self._condicao:
+            self._leitores -= 1
+            if not self._leitores:
+                self._condicao.notify_all()
+
+    def adquirir_escrita(self):
+        with self._condicao:
+            self._escritores_esperando += 1
+            while self._escritor or self._leitores:
+                self._condicao.wait()
+            self._escritores_esperando -= 1
+            self._escritor = True
+
+    def liberar_escrita(self):
+        with self._condicao:
+            self._escritor = False
+            self._condicao.notify_all()
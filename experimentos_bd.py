@@ -0,0 +1,138 @@
+import csv
+import itertools
+import json
+import sys
+import time
+
+from implementacao_btree_bd import BPlusTree, INT_SIZE
+from implementacao_linearhash_bd import HashLinear
+from instrumentacao_bd import CAMPOS_IO
+from gerador_carga_bd import GeradorCarga
+from replay_bd import ROTULOS_OPERACAO, SILENCIOSO, executar_operacoes
+
+# --- Fatores padrão (os mesmos níveis da bateria do relatório) ---
+TAMANHOS_PAGINA = (256, 512, 1024, 2048)
+NUM_CAMPOS = (3, 5, 10)
+VOLUMES = (1000, 10000, 100000)
+ESTRUTURAS = ('btree', 'hash')
+FOLGA_HASH = 2  # Espaço inicial da Hash: 'FOLGA_HASH' vezes o necessário para o volume
+
+COLUNAS_FORMA = ['registros', 'altura', 'folhas', 'nos_internos', 'ocupacao_folhas', 'ocupacao_internos',
+                 'capacidade', 'fator_carga', 'taxa_tombstones', 'agrupamento_medio', 'sondagens_media',
+                 'rehashes']
+COLUNAS = (['estrutura', 'distribuicao', 'mistura', 'tamanho_pagina', 'num_campos', 'volume',
+            'fase', 'operacoes', 'invalidas', 'duracao_s', 'ops_por_s']
+           + [f"{tipo}_{medida}" for tipo in ROTULOS_OPERACAO
+              for medida in ('n', 'tempo_medio_ms', 'p50_ms', 'p99_ms', 'leituras_media', 'escritas_media')]
+           + [f"{campo}_total" for campo in CAMPOS_IO]
+           + COLUNAS_FORMA)
+
+
+# *********************************************************************************
+# ESTRUTURAS E FORMA
+# *********************************************************************************
+def criar_estrutura(nome, tamanho_pagina, num_campos, volume):
+    if nome == 'btree':
+        return BPlusTree(num_campos, tamanho_pagina, verboso=False)
+    if nome == 'hash':
+        return HashLinear(num_campos, FOLGA_HASH * volume * num_campos * INT_SIZE, tamanho_pagina, verboso=False)
+    raise ValueError(f"Estrutura inválida: '{nome}'. Opções: {', '.join(ESTRUTURAS)}")
+
+
+def forma_estrutura(estrutura):
+    """Colunas de forma a partir de estatisticas(): altura/folhas/ocupação (B+) ou capacidade/carga (Hash)."""
+    estatisticas = estrutura.estatisticas()
+    return {coluna: round(valor, 4) if isinstance(valor, float) else valor
+            for coluna, valor in estatisticas.items() if coluna in COLUNAS_FORMA}
+
+
+# *********************************************************************************
+# EXECUÇÃO DE UMA FASE
+# *********************************************************************************
+def medir_fase(estrutura, linhas):
+    """Executa as linhas em modo silencioso e devolve as métricas da fase (uma linha de resultado)."""
+    antes = estrutura.io.totais()
+    inicio = time.perf_counter()
+    estatisticas = executar_operacoes(linhas, estrutura, SILENCIOSO)
+    duracao = time.perf_counter() - inicio
+    depois = estrutura.io.totais()
+
+    linha = {'operacoes': estatisticas.linhas, 'invalidas': estatisticas.invalidas,
+             'duracao_s': round(duracao, 6),
+             'ops_por_s': round(estatisticas.linhas / duracao, 1) if duracao else 0.0}
+    for tipo in ROTULOS_OPERACAO:
+        n = estatisticas.sucessos[tipo]
+        io = estatisticas.io_por_tipo(tipo)
+        linha[f"{tipo}_n"] = n
+        linha[f"{tipo}_tempo_medio_ms"] = round(estatisticas.tempos[tipo][0] / n * 1000, 6) if n else None
+        percentis = estatisticas.latencias[tipo].percentis()
+        linha[f"{tipo}_p50_ms"] = round(percentis['p50'] * 1000, 6) if n else None
+        linha[f"{tipo}_p99_ms"] = round(percentis['p99'] * 1000, 6) if n else None
+        linha[f"{tipo}_leituras_media"] = round(io['leituras'] / n, 4) if n else None
+        linha[f"{tipo}_escritas_media"] = round(io['escritas'] / n, 4) if n else None
+    for campo in CAMPOS_IO:
+        linha[f"{campo}_total"] = depois[campo] - antes[campo]  # Todas as operações, inclusive sem sucesso
+    linha.update(forma_estrutura(estrutura))
+    return linha
+
+
+def executar_experimentos(tamanhos_pagina=TAMANHOS_PAGINA, num_campos=NUM_CAMPOS, volumes=VOLUMES,
+                          estruturas=ESTRUTURAS, distribuicoes=('uniforme',), mistura='balanceada',
+                          semente=42, verboso=True):
+    """
+    Experimento fatorial: para cada combinação de estrutura, distribuição, tamanho de
+    página, número de campos e volume, uma estrutura nova passa por duas fases com a
+    mesma carga gerada por GeradorCarga:
+    - 'carga': 'volume' inserções
+    - 'mista': 'volume' operações da 'mistura' sobre as chaves carregadas
+    A carga depende só de (distribuição, campos, volume, semente), então todas as
+    estruturas e páginas recebem exatamente as mesmas operações. Buscas por intervalo
+    são retiradas da carga das estruturas sem buscar_intervalo (Hash).
+    Retorna a lista de resultados (um dicionário por fase, chaves em COLUNAS).
+    """
+    resultados = []
+    for distribuicao, campos, volume in itertools.product(distribuicoes, num_campos, volumes):
+        gerador = GeradorCarga(campos, distribuicao, faixa_chaves=10 * 2 * volume, semente=semente)
+        fases = {'carga': list(gerador.operacoes(volume, 'carga')),
+                 'mista': list(gerador.operacoes(volume, mistura))}
+        sem_intervalo = {fase: [l for l in linhas if l[0] != '~'] for fase, linhas in fases.items()}
+
+        for nome, tamanho_pagina in itertools.product(estruturas, tamanhos_pagina):
+            estrutura = criar_estrutura(nome, tamanho_pagina, campos, volume)
+            cargas = fases if hasattr(estrutura, 'buscar_intervalo') else sem_intervalo
+            for fase, linhas in cargas.items():
+                linha = dict.fromkeys(COLUNAS)
+                linha.update(estrutura=nome, distribuicao=distribuicao,
+                             mistura=mistura if fase == 'mista' else 'carga',
+                             tamanho_pagina=tamanho_pagina, num_campos=campos, volume=volume, fase=fase)
+                linha.update(medir_fase(estrutura, linhas))
+                resultados.append(linha)
+                if verboso:
+                    print(f"{nome:<6} {distribuicao:<10} pág {tamanho_pagina:>5} | {campos:>2} campos | "
+                          f"{volume:>8} | {fase:<5} | {linha['ops_por_s']:>10.0f} ops/s | "
+                          f"registros {linha['registros']}")
+    return resultados
+
+
+def salvar_resultados(resultados, prefixo='resultados_experimentos'):
+    """Grava os resultados em '<prefixo>.csv' e '<prefixo>.json' (prontos para o pandas)."""
+    with open(f"{prefixo}.csv", 'w', newline='', encoding='utf-8') as arquivo:
+        escritor = csv.DictWriter(arquivo, fieldnames=COLUNAS)
+        escritor.writeheader()
+        escritor.writerows(resultados)
+    with open(f"{prefixo}.json", 'w', encoding='utf-8') as arquivo:
+        json.dump(resultados, arquivo, ensure_ascii=False, indent=1)
+    return f"{prefixo}.csv", f"{prefixo}.json"
+
+
+# --- PROGRAMA PRINCIPAL ---
+if __name__ == "__main__":
+    # Uso: python experimentos_bd.py [prefixo] [volumes] [distribuicoes]
+    #   ex.: python experimentos_bd.py resultados 1000,10000,100000 uniforme,zipf
+    prefixo = sys.argv[1] if len(sys.argv) > 1 else 'resultados_experimentos'
+    volumes = tuple(int(v) for v in sys.argv[2].split(',')) if len(sys.argv) > 2 else VOLUMES
+    distribuicoes = tuple(sys.argv[3].split(',')) if len(sys.argv) > 3 else ('uniforme',)
+
+    resultados = executar_experimentos(volumes=volumes, distribuicoes=distribuicoes)
+    caminhos = salvar_resultados(resultados, prefixo)
+    print(f"\n{len(resultados)} resultados gravados em {' e '.join(caminhos)}")
@@ -0,0 +1,223 @@
+import math
+import random
+import sys
+from bisect import bisect_right
+from itertools import accumulate
+
+# --- Constantes de Configuração ---
+DISTRIBUICOES = ('uniforme', 'sequencial', 'zipf', 'agrupada')
+OPERACOES = ('+', '-', '?', '~')
+
+# Misturas prontas (fração de cada operação); também aceita um dicionário próprio
+MISTURAS = {
+    'carga': {'+': 1.0},
+    'leitura': {'?': 0.9, '+': 0.05, '~': 0.05},
+    'balanceada': {'+': 0.4, '?': 0.4, '-': 0.1, '~': 0.1},
+    'escrita': {'+': 0.6, '-': 0.3, '?': 0.1},
+}
+
+THETA_ZIPF = 0.99            # Assimetria da Zipf (a mesma do YCSB); precisa ser < 1
+MULTIPLICADOR_ZIPF = 2654435761  # Primo: espalha os postos mais populares pela faixa de chaves
+TENTATIVAS_CHAVE_NOVA = 16   # Sorteios antes de procurar linearmente uma chave livre
+VALOR_MAXIMO = 1000          # Demais campos do registro: inteiros em [0, VALOR_MAXIMO)
+
+
+# *********************************************************************************
+# DISTRIBUIÇÃO ZIPF
+# Gerador de Gray et al. (o do YCSB): sorteia o posto em O(1) depois de calcular
+# zeta(n) uma única vez. O posto 0 é o mais popular.
+# *********************************************************************************
+class _Zipf:
+    def __init__(self, n, theta, rnd):
+        if not 0 < theta < 1:
+            raise ValueError(f"theta da Zipf deve estar em (0, 1), recebido {theta}")
+        self.n = n
+        self.theta = theta
+        self.rnd = rnd
+        self.zeta_n = math.fsum(i ** -theta for i in range(1, n + 1))
+        zeta_2 = 1 + 2 ** -theta
+        self.alfa = 1 / (1 - theta)
+        self.eta = (1 - (2 / n) ** (1 - theta)) / (1 - zeta_2 / self.zeta_n) if n > 2 else 0.0
+        self.limite_1 = 1 + 0.5 ** theta
+
+    def posto(self):
+        u = self.rnd.random()
+        uz = u * self.zeta_n
+        if uz < 1:
+            return 0
+        if uz < self.limite_1:
+            return 1 % self.n
+        return min(self.n - 1, int(self.n * (self.eta * u - self.eta + 1) ** self.alfa))
+
+
+# *********************************************************************************
+# GERADOR DE CARGA
+# *********************************************************************************
+class GeradorCarga:
+    """
+    Gera linhas de operações no formato do CSV ('+,v1,v2,..', '-,k', '?,k', '~,ini,fim')
+    com chaves em [0, faixa_chaves) segundo uma distribuição:
+    - uniforme: todas as chaves com a mesma chance
+    - sequencial: inserções em ordem crescente; buscas/remoções percorrem as chaves
+      presentes em ordem de inserção
+    - zipf: poucas chaves concentram a maior parte dos acessos (as mais populares
+      ficam espalhadas pela faixa, não agrupadas no início)
+    - agrupada: chaves concentradas em 'num_grupos' regiões da faixa
+    O gerador guarda as chaves presentes: inserções usam sempre chaves novas,
+    remoções sempre atingem chaves presentes e uma fração 'fracao_acertos' das buscas
+    procura chaves presentes (as demais, chaves sorteadas que podem não existir).
+    Buscas por intervalo começam numa chave presente e cobrem 'largura_intervalo' chaves.
+    """
+    def __init__(self, num_campos=3, distribuicao='uniforme', faixa_chaves=1000000,
+                 fracao_acertos=0.9, largura_intervalo=100, theta_zipf=THETA_ZIPF,
+                 num_grupos=16, semente=42):
+        if distribuicao not in DISTRIBUICOES:
+            raise ValueError(f"Distribuição inválida: '{distribuicao}'. Opções: {', '.join(DISTRIBUICOES)}")
+        if num_campos < 1:
+            raise ValueError(f"num_campos deve ser >= 1, recebido {num_campos}")
+        if faixa_chaves < 1:
+            raise ValueError(f"faixa_chaves deve ser >= 1, recebido {faixa_chaves}")
+        self.num_campos = num_campos
+        self.distribuicao = distribuicao
+        self.faixa_chaves = faixa_chaves
+        self.fracao_acertos = fracao_acertos
+        self.largura_intervalo = largura_intervalo
+        self.rnd = random.Random(semente)
+
+        # Chaves presentes: lista (sorteio em O(1)) + posição de cada chave (remoção em O(1))
+        self.presentes = []
+        self._posicoes = {}
+        self._proxima_sequencial = 0
+        self._cursor_presentes = 0
+
+        self._zipf = _Zipf(faixa_chaves, theta_zipf, self.rnd) if distribuicao == 'zipf' else None
+        if distribuicao == 'agrupada':
+            self._centros = [self.rnd.randrange(faixa_chaves) for _ in range(num_grupos)]
+            self._desvio = max(1.0, faixa_chaves / (num_grupos * 20))
+
+    # --- Sorteio de chaves ---
+    def _sortear_chave(self):
+        # Uma chave da faixa segundo a distribuição (pode ou não estar presente)
+        if self.distribuicao == 'uniforme':
+            return self.rnd.randrange(self.faixa_chaves)
+        if self.distribuicao == 'sequencial':
+            chave = self._proxima_sequencial % self.faixa_chaves
+            self._proxima_sequencial += 1
+            return chave
+        if self.distribuicao == 'zipf':
+            return (self._zipf.posto() * MULTIPLICADOR_ZIPF) % self.faixa_chaves
+        centro = self.rnd.choice(self._centros)
+        return min(self.faixa_chaves - 1, max(0, int(self.rnd.gauss(centro, self._desvio))))
+
+    def _sortear_presente(self):
+        # Uma chave presente; com zipf, as mais antigas são as mais acessadas
+        n = len(self.presentes)
+        if self.distribuicao == 'sequencial':
+            self._cursor_presentes = (self._cursor_presentes + 1) % n
+            return self.presentes[self._cursor_presentes]
+        if self.distribuicao == 'zipf':
+            return self.presentes[self._zipf.posto() % n]
+        return self.presentes[self.rnd.randrange(n)]
+
+    def _chave_nova(self):
+        for _ in range(TENTATIVAS_CHAVE_NOVA):
+            chave = self._sortear_chave()
+            if chave not in self._posicoes:
+                return chave
+        # Região da faixa já muito ocupada: a próxima chave livre depois da sorteada
+        if len(self.presentes) >= self.faixa_chaves:
+            return None
+        while chave in self._posicoes:
+            chave = (chave + 1) % self.faixa_chaves
+        return chave
+
+    def _adicionar(self, chave):
+        self._posicoes[chave] = len(self.presentes)
+        self.presentes.append(chave)
+
+    def _retirar(self, chave):
+        posicao = self._posicoes.pop(chave)
+        ultima = self.presentes.pop()
+        if ultima != chave:
+            self.presentes[posicao] = ultima
+            self._posicoes[ultima] = posicao
+
+    # --- Operações ---
+    def operacoes(self, quantidade, mistura='balanceada'):
+        """Gera 'quantidade' linhas (terminadas em '\\n') com a mistura de operações pedida."""
+        if isinstance(mistura, str):
+            if mistura not in MISTURAS:
+                raise ValueError(f"Mistura inválida: '{mistura}'. Opções: {', '.join(MISTURAS)}")
+            mistura = MISTURAS[mistura]
+        desconhecidas = set(mistura) - set(OPERACOES)
+        if desconhecidas or not mistura or sum(mistura.values()) <= 0:
+            raise ValueError(f"Mistura deve ter pesos positivos para operações em {OPERACOES}")
+        tipos = list(mistura)
+        acumulado = list(accumulate(mistura[op] for op in tipos))
+        total = acumulado[-1]
+
+        rnd = self.rnd
+        for _ in range(quantidade):
+            op = tipos[bisect_right(acumulado, rnd.random() * total)]
+            if op != '+' and not self.presentes:
+                op = '+'  # Sem chaves presentes, só inserções fazem sentido
+            yield self._linha(op)
+
+    def _linha(self, op):
+        if op == '+':
+            chave = self._chave_nova()
+            if chave is None:
+                return f"?,{self._sortear_chave()}\n"  # Faixa cheia: vira uma busca
+            self._adicionar(chave)
+            valores = [chave] + [self.rnd.randrange(VALOR_MAXIMO) for _ in range(self.num_campos - 1)]
+            return "+," + ",".join(map(str, valores)) + "\n"
+        if op == '-':
+            chave = self._sortear_presente()
+            self._retirar(chave)
+            return f"-,{chave}\n"
+        if op == '?':
+            if self.rnd.random() < self.fracao_acertos:
+                return f"?,{self._sortear_presente()}\n"
+            return f"?,{self._sortear_chave()}\n"
+        inicio = self._sortear_presente()
+        return f"~,{inicio},{inicio + self.largura_intervalo - 1}\n"
+
+    def cabecalho(self):
+        return "OP," + ",".join(f"A{i}" for i in range(1, self.num_campos + 1)) + "\n"
+
+
+def gerar_csv(caminho, num_operacoes, num_campos=3, distribuicao='uniforme', mistura='balanceada',
+              carga_inicial=0, faixa_chaves=None, semente=42, **kwargs):
+    """
+    Escreve em 'caminho' um CSV de operações (com cabeçalho OP,A1,..): primeiro
+    'carga_inicial' inserções e depois 'num_operacoes' operações da 'mistura'.
+    Por padrão a faixa de chaves tem 10x o número de chaves que podem ser inseridas.
+    Os demais argumentos vão para GeradorCarga. Retorna o gerador (chaves presentes).
+    """
+    faixa_chaves = faixa_chaves or 10 * max(1, carga_inicial + num_operacoes)
+    gerador = GeradorCarga(num_campos, distribuicao, faixa_chaves, semente=semente, **kwargs)
+    with open(caminho, 'w', encoding='utf-8') as arquivo:
+        arquivo.write(gerador.cabecalho())
+        arquivo.writelines(gerador.operacoes(carga_inicial, 'carga'))
+        arquivo.writelines(gerador.operacoes(num_operacoes, mistura))
+    return gerador
+
+
+# --- PROGRAMA PRINCIPAL ---
+if __name__ == "__main__":
+    # Uso: python gerador_carga_bd.py saida.csv operacoes [distribuicao] [mistura] [num_campos] [carga_inicial]
+    if len(sys.argv) < 3:
+        print("Uso: python gerador_carga_bd.py saida.csv operacoes [distribuicao] [mistura] "
+              "[num_campos] [carga_inicial]")
+        print(f"  distribuições: {', '.join(DISTRIBUICOES)} | misturas: {', '.join(MISTURAS)}")
+        sys.exit(1)
+    caminho = sys.argv[1]
+    num_operacoes = int(sys.argv[2])
+    distribuicao = sys.argv[3] if len(sys.argv) > 3 else 'uniforme'
+    mistura = sys.argv[4] if len(sys.argv) > 4 else 'balanceada'
+    num_campos = int(sys.argv[5]) if len(sys.argv) > 5 else 3
+    carga_inicial = int(sys.argv[6]) if len(sys.argv) > 6 else 0
+
+    gerador = gerar_csv(caminho, num_operacoes, num_campos, distribuicao, mistura, carga_inicial)
+    print(f"{carga_inicial + num_operacoes} operações ({distribuicao}, {mistura}) gravadas em "
+          f"'{caminho}'; {len(gerador.presentes)} chaves presentes ao final.")
@@ -0,0 +1,295 @@
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # NumPy é opcional: só é exigido por quem usa HashLinearNumPy
+    np = None
+
+from implementacao_linearhash_bd import INT_SIZE, TAMANHO_PAGINA_PADRAO, VAZIO, OCUPADO, REMOVIDO
+from instrumentacao_bd import ContadorIO
+
+
+class HashLinearNumPy:
+    """
+    Tabela Hash com sondagem linear armazenada em vetores NumPy contíguos:
+    - dados:   int32 de forma (capacidade, num_campos), o registro "como no disco"
+    - estados: uint8 de tamanho capacidade (VAZIO, OCUPADO ou REMOVIDO)
+    Cada registro ocupa exatamente num_campos * 4 bytes (+1 byte de estado), em vez
+    de uma tupla de objetos Python por posição.
+
+    Além da interface da HashLinear (inserir, remover, buscar, exibir), oferece
+    buscar_lote() e inserir_lote(), que calculam o hash e sondam vetores inteiros de
+    chaves em rodadas: a cada rodada todas as chaves ainda pendentes examinam a sua
+    posição atual de uma só vez e avançam uma posição.
+
+    Crescimento e compactação seguem os mesmos limites da HashLinear, mas a
+    reconstrução é feita de uma vez (também vetorizada), não de forma incremental.
+    Chaves e campos precisam caber em int32.
+    """
+    def __init__(self, num_campos, tamanho_total_bytes, tamanho_pagina=TAMANHO_PAGINA_PADRAO,
+                 fator_carga_max=0.9, limite_tombstones=0.25, verboso=True):
+        if np is None:
+            raise ImportError("HashLinearNumPy requer o pacote 'numpy' (pip install numpy).")
+        self.num_fields = num_campos
+        self.page_size = tamanho_pagina
+        self.record_size = num_campos * INT_SIZE
+        self.capacity = max(1, tamanho_total_bytes // self.record_size)
+        self.total_bytes = self.capacity * self.record_size
+        self.slots_por_pagina = max(1, tamanho_pagina // self.record_size)
+
+        self.dados = np.zeros((self.capacity, num_campos), dtype=np.int32)
+        self.estados = np.zeros(self.capacity, dtype=np.uint8)
+        self.count = 0
+        self.tombstones = 0
+
+        self.fator_carga_max = fator_carga_max
+        self.limite_tombstones = limite_tombstones
+        self.rehashes = 0
+
+        self.io = ContadorIO()
+
+        if verboso:
+            print(f"--- Hash Linear (NumPy) Inicializada ---")
+            print(f"Espaço Total: {self.total_bytes} bytes | Campos por registro: {num_campos}")
+            print(f"Capacidade da Tabela: {self.capacity} registros")
+
+    def fator_carga(self):
+        return self.count / self.capacity
+
+    def _contabilizar_lote(self, inicio, sondagens):
+        # Páginas distintas lidas por chave (a sondagem pode dar a volta na tabela)
+        sondadas = sondagens > 0
+        pagina_inicial = inicio // self.slots_por_pagina
+        pagina_final = (inicio + sondagens - 1) // self.slots_por_pagina
+        total_paginas = -(-self.capacity // self.slots_por_pagina)
+        paginas = np.minimum(pagina_final - pagina_inicial + 1, total_paginas)
+        self.io.leituras += int(paginas[sondadas].sum())
+        self.io.sondagens += int(sondagens.sum())
+
+    # *********************************************************************************
+    # SONDAGEM VETORIZADA
+    # *********************************************************************************
+    def _sondar_lote(self, chaves):
+        """
+        Devolve (posicoes, livres): a posição de cada chave na tabela (-1 se ausente)
+        e o primeiro slot VAZIO ou REMOVIDO encontrado no caminho (-1 se nenhum).
+        """
+        n = len(chaves)
+        inicio = chaves % self.capacity
+        pos = inicio.copy()
+        posicoes = np.full(n, -1, dtype=np.int64)
+        livres = np.full(n, -1, dtype=np.int64)
+        sondagens = np.zeros(n, dtype=np.int64)
+        pendentes = np.arange(n)
+
+        for _ in range(self.capacity):
+            if not pendentes.size:
+                break
+            p = pos[pendentes]
+            estado = self.estados[p]
+            sondagens[pendentes] += 1
+
+            # Guarda o primeiro slot reaproveitável visto por cada chave
+            sem_livre = (estado != OCUPADO) & (livres[pendentes] < 0)
+            livres[pendentes[sem_livre]] = p[sem_livre]
+
+            achou = (estado == OCUPADO) & (self.dados[p, 0] == chaves[pendentes])
+            posicoes[pendentes[achou]] = p[achou]
+
+            # Continua quem não achou e ainda não chegou a um slot VAZIO
+            pendentes = pendentes[~achou & (estado != VAZIO)]
+            pos[pendentes] = (pos[pendentes] + 1) % self.capacity
+
+        self._contabilizar_lote(inicio, sondagens)
+        return posicoes, livres
+
+    def _colocar_lote(self, registros):
+        """Grava registros cujas chaves sabidamente não estão na tabela (nem repetidas no lote)."""
+        n = len(registros)
+        pos = registros[:, 0].astype(np.int64) % self.capacity
+        pendentes = np.arange(n)
+
+        while pendentes.size:
+            p = pos[pendentes]
+            livre = self.estados[p] != OCUPADO
+            # Várias chaves podem disputar o mesmo slot na mesma rodada: fica a primeira
+            candidatos = pendentes[livre]
+            slots, primeiro = np.unique(p[livre], return_index=True)
+            vencedores = candidatos[primeiro]
+
+            self.tombstones -= int(np.count_nonzero(self.estados[slots] == REMOVIDO))
+            self.dados[slots] = registros[vencedores]
+            self.estados[slots] = OCUPADO
+
+            colocados = np.zeros(n, dtype=bool)
+            colocados[vencedores] = True
+            pendentes = pendentes[~colocados[pendentes]]
+            pos[pendentes] = (pos[pendentes] + 1) % self.capacity
+
+        self.count += n
+        self.io.escritas += n
+
+    # *********************************************************************************
+    # OPERAÇÕES EM LOTE
+    # *********************************************************************************
+    def buscar_lote(self, chaves):
+        """
+        Busca um vetor de chaves de uma vez.
+        Retorna (encontrados, registros): máscara booleana e matriz int32
+        (len(chaves) x num_campos) com os registros; linhas não encontradas ficam zeradas.
+        """
+        self.io.iniciar_operacao()
+        chaves = np.asarray(chaves, dtype=np.int64).ravel()
+        posicoes, _ = self._sondar_lote(chaves)
+        encontrados = posicoes >= 0
+        registros = np.zeros((len(chaves), self.num_fields), dtype=np.int32)
+        registros[encontrados] = self.dados[posicoes[encontrados]]
+        return encontrados, registros
+
+    def inserir_lote(self, registros):
+        """
+        Insere uma matriz de registros (n x num_campos) de uma vez.
+        Chaves já existentes, ou repetidas dentro do lote (vale a primeira), são
+        ignoradas. Retorna a quantidade de registros inseridos.
+        """
+        self.io.iniciar_operacao()
+        try:
+            registros = np.asarray(registros, dtype=np.int32)
+        except (TypeError, ValueError, OverflowError):
+            print("Erro: Os campos do registro devem ser inteiros de 32 bits.")
+            return 0
+        if registros.ndim != 2 or registros.shape[1] != self.num_fields:
+            print(f"Erro: O lote deve ter forma (n, {self.num_fields}).")
+            return 0
+
+        _, primeiros = np.unique(registros[:, 0], return_index=True)
+        registros = registros[np.sort(primeiros)]
+        posicoes, _ = self._sondar_lote(registros[:, 0].astype(np.int64))
+        novos = registros[posicoes < 0]
+        if not len(novos):
+            return 0
+
+        self._garantir_espaco(self.count + len(novos))
+        if self.count + len(novos) > self.capacity:
+            print("Erro: Tabela Hash CHEIA (Overflow). O lote não cabe na tabela.")
+            return 0
+        self._colocar_lote(novos)
+        self._verificar_limites()
+        return len(novos)
+
+    # *********************************************************************************
+    # OPERAÇÕES INDIVIDUAIS (mesma interface da HashLinear)
+    # *********************************************************************************
+    def _sondar(self, chave):
+        posicoes, livres = self._sondar_lote(np.array([chave], dtype=np.int64))
+        return int(posicoes[0]), int(livres[0])
+
+    def inserir(self, registro):
+        self.io.iniciar_operacao()
+        if len(registro) != self.num_fields:
+            print(f"Erro: O registro deve ter exatamente {self.num_fields} campos.")
+            return False
+
+        try:
+            array('i', registro)  # O slot guarda int32: valida antes de sondar e gravar
+        except (TypeError, OverflowError):
+            print("Erro: Os campos do registro devem ser inteiros de 32 bits.")
+            return False
+
+        chave = registro[0]
+        idx, livre = self._sondar(chave)
+        if idx >= 0:
+            print(f"Erro: Chave {chave} já existe na posição {idx}.")
+            return False
+        if self.count + 1 > self.capacity or livre < 0:
+            self._garantir_espaco(self.count + 1)
+            if self.count + 1 > self.capacity:
+                print("Erro: Tabela Hash CHEIA (Overflow). Não é possível inserir.")
+                return False
+            _, livre = self._sondar(chave)
+
+        if self.estados[livre] == REMOVIDO:
+            self.tombstones -= 1
+        self.dados[livre] = registro
+        self.estados[livre] = OCUPADO
+        self.count += 1
+        self.io.escritas += 1
+        self._verificar_limites()
+        return True
+
+    def remover(self, chave):
+        self.io.iniciar_operacao()
+        idx, _ = self._sondar(chave)
+        if idx < 0:
+            return False
+        self.estados[idx] = REMOVIDO
+        self.count -= 1
+        self.tombstones += 1
+        self.io.escritas += 1
+        self._verificar_limites()
+        return True
+
+    def buscar(self, chave):
+        self.io.iniciar_operacao()
+        idx, _ = self._sondar(chave)
+        if idx < 0:
+            return None
+        return tuple(int(campo) for campo in self.dados[idx])
+
+    # *********************************************************************************
+    # MANUTENÇÃO: CRESCIMENTO E COMPACTAÇÃO (Rehash vetorizado)
+    # *********************************************************************************
+    def _garantir_espaco(self, ocupacao):
+        # Dobra a capacidade até 'ocupacao' registros respeitarem o fator de carga
+        if self.fator_carga_max is None:
+            return
+        nova_capacidade = self.capacity
+        while ocupacao > self.fator_carga_max * nova_capacidade:
+            nova_capacidade *= 2
+        if nova_capacidade != self.capacity:
+            self._reconstruir(nova_capacidade)
+
+    def _verificar_limites(self):
+        if self.fator_carga_max is not None and self.count > self.fator_carga_max * self.capacity:
+            self._reconstruir(self.capacity * 2)
+        elif self.limite_tombstones is not None and self.tombstones > self.limite_tombstones * self.capacity:
+            self._reconstruir(self.capacity)
+
+    def _reconstruir(self, nova_capacidade):
+        ocupados = self.dados[self.estados == OCUPADO]
+        self.capacity = nova_capacidade
+        self.total_bytes = nova_capacidade * self.record_size
+        self.dados = np.zeros((nova_capacidade, self.num_fields), dtype=np.int32)
+        self.estados = np.zeros(nova_capacidade, dtype=np.uint8)
+        self.count = 0
+        self.tombstones = 0
+        self.rehashes += 1
+        if len(ocupados):
+            self._colocar_lote(ocupados)
+
+    def compactar(self):
+        """Reconstrói a tabela imediatamente, eliminando todas as remoções lógicas."""
+        self._reconstruir(self.capacity)
+        self._garantir_espaco(self.count)
+
+    def memoria_bytes(self):
+        """Bytes ocupados pelos vetores da tabela (registros + estados)."""
+        return self.dados.nbytes + self.estados.nbytes
+
+    def exibir(self, mostrar_tudo=False):
+        print("\n--- Estrutura da Tabela Hash (NumPy) ---")
+        print(f"Ocupação: {self.count}/{self.capacity}")
+        print(f"Taxa de ocupação: {(self.count/self.capacity)*100:.2f}%")
+        print(f"Tombstones: {self.tombstones} | Rehashes realizados: {self.rehashes}")
+        print(f"Memória da tabela: {self.memoria_bytes()} bytes\n")
+
+        limite = self.capacity if mostrar_tudo else 50
+        ocupadas = np.flatnonzero(self.estados == OCUPADO)
+        print("Posições OCUPADAS:")
+        for i in ocupadas[:limite]:
+            print(f"[{i:04d}]: {tuple(int(campo) for campo in self.dados[i])}")
+        if len(ocupadas) > limite:
+            print(f"... (mostrando primeiros {limite} registros ocupados)")
+        if not len(ocupadas):
+            print("(Tabela vazia)")
+        print("\n")
@@ -1,22 +1,150 @@
 import math
-import csv
+import os
+import functools
+import heapq
+import threading
 import time
+from array import array
+from operator import itemgetter
+from bisect import bisect_left, bisect_right
+from collections import deque
+from itertools import chain, islice
+
+from paginacao_bd import (ArquivoPaginas, BufferPool, PaginasMapeadas, SEM_PAGINA,
+                          MENOR_INTEIRO, MAIOR_INTEIRO, inteiros_para_bytes, bytes_para_inteiros)
+from instrumentacao_bd import ContadorIO
+from replay_bd import processar_csv
+from concorrencia_bd import LatchLeituraEscrita
 
 # --- Constantes de Configuração ---
 INT_SIZE = 4      # Tamanho de um inteiro em bytes
 POINTER_SIZE = 4  # Tamanho de um ponteiro em bytes
 
+# Layout das páginas da árvore no modo em disco (inteiros de 4 bytes):
+# cabeçalho [tipo, num_chaves, pai, próxima folha, folha anterior] seguido das chaves e do corpo
+CAMPOS_CABECALHO = 5
+CABECALHO_PAGINA = CAMPOS_CABECALHO * INT_SIZE
+PAGINA_FOLHA = 1
+PAGINA_INTERNA = 2
+
+# Quantos palpites de interpolação são tentados antes de cair na busca binária.
+# Protege contra distribuições muito enviesadas, onde a interpolação degeneraria em O(m).
+MAX_PASSOS_INTERPOLACAO = 4
+
+# --- Estratégias de busca dentro de um nó ---
+# Todas seguem a semântica do módulo bisect:
+#   - posição à esquerda: primeiro índice i tal que keys[i] >= chave
+#   - posição à direita:  primeiro índice i tal que keys[i] > chave
+
+def _linear_esquerda(keys, chave):
+    idx = 0
+    while idx < len(keys) and keys[idx] < chave:
+        idx += 1
+    return idx
+
+def _linear_direita(keys, chave):
+    idx = 0
+    while idx < len(keys) and keys[idx] <= chave:
+        idx += 1
+    return idx
+
+def _interpolacao(keys, chave, direita):
+    """
+    Busca por interpolação para chaves inteiras bem espalhadas.
+    Estima a posição pela proporção (chave - menor) / (maior - menor) e estreita o
+    intervalo [lo, hi] a cada palpite. Após MAX_PASSOS_INTERPOLACAO palpites, termina
+    com bisect no intervalo restante, garantindo O(log m) no pior caso.
+    """
+    bisect_fn = bisect_right if direita else bisect_left
+    if not isinstance(chave, int):
+        return bisect_fn(keys, chave)
+
+    lo, hi = 0, len(keys)
+    for _ in range(MAX_PASSOS_INTERPOLACAO):
+        if lo >= hi:
+            return lo
+        menor = keys[lo]
+        maior = keys[hi - 1]
+        # Casos de borda: a resposta está em um dos extremos do intervalo
+        if chave < menor or (not direita and chave == menor):
+            return lo
+        if chave > maior or (direita and chave == maior):
+            return hi
+        # Aqui menor < maior, pois a chave ficou estritamente entre os extremos
+        pos = lo + (chave - menor) * (hi - 1 - lo) // (maior - menor)
+        if keys[pos] < chave or (direita and keys[pos] == chave):
+            lo = pos + 1
+        else:
+            hi = pos
+    return bisect_fn(keys, chave, lo, hi)
+
+def _interpolacao_esquerda(keys, chave):
+    return _interpolacao(keys, chave, direita=False)
+
+def _interpolacao_direita(keys, chave):
+    return _interpolacao(keys, chave, direita=True)
+
+# Modos de busca disponíveis: nome -> (posição à esquerda, posição à direita)
+MODOS_BUSCA = {
+    'linear': (_linear_esquerda, _linear_direita),
+    'binaria': (bisect_left, bisect_right),
+    'interpolacao': (_interpolacao_esquerda, _interpolacao_direita),
+}
+
+# Fração da folha que fica à esquerda num split durante inserções sequenciais (chaves
+# sempre no fim da folha mais à direita): a folha da esquerda, que não recebe mais
+# chaves, sai quase cheia; a nova folha, a mais à direita, pode ficar abaixo do mínimo
+FRACAO_SPLIT_SEQUENCIAL = 0.9
+
+# Políticas para chave repetida na inserção:
+# - 'permitir': o registro entra depois dos de mesma chave (comportamento original)
+# - 'rejeitar': a inserção é recusada e o registro existente fica
+# - 'substituir': o registro existente é sobrescrito (inserir vira upsert)
+POLITICAS_DUPLICADAS = ('permitir', 'rejeitar', 'substituir')
+
+def _inteiros_32_bits(registro):
+    # Todos os campos são inteiros de 32 bits (o que cabe numa folha compacta ou numa página)?
+    try:
+        array('i', registro)
+    except (TypeError, OverflowError):
+        return False
+    return True
+
+def _limites_do_trecho(keys, inicio, fim, reverso, inclusivo, primeira, esquerda, direita):
+    # Fatia [i, j) das chaves de uma folha que cai no intervalo de uma varredura.
+    # O extremo por onde a varredura entra só é procurado na primeira folha e nas que
+    # ainda começam nele (chaves repetidas podem se estender por várias folhas).
+    inclui_inicio, inclui_fim = inclusivo
+    if reverso:
+        i = (esquerda if inclui_inicio else direita)(keys, inicio)
+        entra = primeira or (len(keys) and keys[-1] >= fim)
+        j = (direita if inclui_fim else esquerda)(keys, fim) if entra else len(keys)
+    else:
+        entra = primeira or (len(keys) and keys[0] <= inicio)
+        i = (esquerda if inclui_inicio else direita)(keys, inicio) if entra else 0
+        j = (direita if inclui_fim else esquerda)(keys, fim)
+    return i, j
+
 class No:
     """
     Representa uma 'Página' da árvore. 
     Pode ser uma folha (guarda registros) ou nó interno (guarda chaves e ponteiros).
+    No modo em disco, filhos, pai e folhas vizinhas guardam números de página em vez de nós.
+    Com folhas compactas, as chaves de uma folha ficam num array('i') e os registros numa
+    ColunaRegistros; os nós internos guardam sempre listas.
     """
+    __slots__ = ('keys', 'children', 'is_leaf', 'next_leaf', 'prev_leaf', 'parent', 'page_id',
+                 'latch', 'max_keys', 'min_keys')
+
     def __init__(self, eh_folha=False, max_keys=0, min_keys=0):
         self.keys = []        # Lista de chaves (ou índices)
         self.children = []    # Se folha: Lista de Registros. Se interno: Lista de Nós filhos.
         self.is_leaf = eh_folha
         self.next_leaf = None # Ponteiro para a próxima folha (lista encadeada no nível inferior)
+        self.prev_leaf = None # Ponteiro para a folha anterior (permite varreduras decrescentes)
         self.parent = None    # Referência para o pai (facilita o subir na árvore)
+        self.page_id = None   # Número da página no arquivo (somente no modo em disco)
+        self.latch = None     # Latch de leitura/escrita (somente no modo concorrente)
         
         # Limites calculados dinamicamente baseados no tamanho da página
         self.max_keys = max_keys
@@ -28,26 +156,397 @@ class No:
     def esta_com_underflow(self):
         return len(self.keys) < self.min_keys
 
+    # Nó "seguro": mais uma inserção não o faz dividir / mais uma remoção não o faz
+    # fundir ou emprestar, então nada acima dele muda (usado no latch crabbing)
+    def seguro_para_insercao(self):
+        return len(self.keys) < self.max_keys
+
+    def seguro_para_remocao(self):
+        return len(self.keys) > self.min_keys
+
+    def __repr__(self):
+        return f"Keys: {list(self.keys)}"
+
+class ColunaRegistros:
+    """
+    Registros de uma folha compacta: todos os campos num único array('i') contíguo,
+    'largura' inteiros por registro, sem uma tupla e um int por campo para cada registro.
+    Oferece a parte da interface de lista que a árvore usa (índice, fatia, insert, pop,
+    extend, iteração), devolvendo cada registro como tupla.
+    """
+    __slots__ = ('dados', 'largura')
+
+    def __init__(self, largura, registros=(), dados=None):
+        self.largura = largura
+        self.dados = array('i', chain.from_iterable(registros)) if dados is None else dados
+
+    def __len__(self):
+        return len(self.dados) // self.largura
+
+    def __iter__(self):
+        return zip(*[iter(self.dados)] * self.largura)
+
+    def _posicao(self, i):
+        # Deslocamento do registro i em 'dados' (aceita índices negativos, como uma lista)
+        p = i * self.largura
+        if p < 0:
+            p += len(self.dados)
+        if not 0 <= p < len(self.dados):
+            raise IndexError("índice de registro fora da folha")
+        return p
+
+    def __getitem__(self, i):
+        w = self.largura
+        if isinstance(i, slice):
+            inicio, fim, passo = i.indices(len(self))
+            if passo == 1:
+                return ColunaRegistros(w, dados=self.dados[inicio * w:max(inicio, fim) * w])
+            return [self[k] for k in range(inicio, fim, passo)]
+        p = self._posicao(i)
+        return tuple(self.dados[p:p + w])
+
+    def __setitem__(self, i, registros):
+        # Um registro (upsert) ou uma fatia contígua (o que _redistribuir usa para emprestar)
+        if not isinstance(i, slice):
+            p = self._posicao(i)
+            self.dados[p:p + self.largura] = array('i', registros)
+            return
+        inicio, fim, _ = i.indices(len(self))
+        novos = registros.dados if isinstance(registros, ColunaRegistros) else \
+            array('i', chain.from_iterable(registros))
+        self.dados[inicio * self.largura:max(inicio, fim) * self.largura] = novos
+
+    def __delitem__(self, i):
+        w = self.largura
+        if isinstance(i, slice):
+            inicio, fim, _ = i.indices(len(self))
+            del self.dados[inicio * w:max(inicio, fim) * w]
+            return
+        p = self._posicao(i)
+        del self.dados[p:p + w]
+
+    def append(self, registro):
+        self.dados.extend(array('i', registro))
+
+    def insert(self, i, registro):
+        # i em [0, len]: a árvore só insere em posições vindas da busca na folha
+        p = i * self.largura
+        self.dados[p:p] = array('i', registro)
+
+    def pop(self, i=-1):
+        p = self._posicao(i)
+        registro = tuple(self.dados[p:p + self.largura])
+        del self.dados[p:p + self.largura]
+        return registro
+
+    def extend(self, registros):
+        if isinstance(registros, ColunaRegistros):
+            self.dados.extend(registros.dados)
+        else:
+            self.dados.extend(array('i', chain.from_iterable(registros)))
+
+    def visao(self, inicio=0, fim=None):
+        """memoryview 2-D (registros x campos) dos registros [inicio, fim), não vazio, sem cópia."""
+        fim = len(self) if fim is None else fim
+        w = self.largura
+        return memoryview(self.dados)[inicio * w:fim * w].cast('B').cast('i', (fim - inicio, w))
+
+    def __repr__(self):
+        return f"ColunaRegistros({list(self)})"
+
+# Cabeçalho de cada coluna de uma folha comprimida: base (4 bytes) e largura em bits (1 byte)
+CABECALHO_COLUNA = INT_SIZE + 1
+
+def _empacotar(valores, base, largura):
+    # Concatena (v - base) em 'largura' bits cada; o valor i ocupa os bits [i*largura, (i+1)*largura)
+    if not largura or not valores:
+        return 0
+    formato = f'0{largura}b'
+    return int(''.join([format(v - base, formato) for v in reversed(valores)]), 2)
+
+class ColunaEmpacotada:
+    """
+    Coluna de inteiros em frame-of-reference com bit-packing: cada valor é guardado
+    como (valor - base) em 'largura' bits de um único inteiro Python. Ler a posição i
+    decodifica só os bits dela (a busca binária na folha decodifica O(log m) chaves).
+    Inserções e remoções deslocam os bits com operações sobre o inteiro inteiro; um
+    valor fora do frame [base, base + 2**largura) recodifica a coluna com o novo
+    intervalo. Oferece a mesma interface de lista que ColunaRegistros.
+    """
+    __slots__ = ('base', 'largura', 'n', 'bits')
+
+    def __init__(self, valores=()):
+        self._codificar(list(valores))
+
+    def _codificar(self, valores):
+        self.n = len(valores)
+        self.base = min(valores) if valores else 0
+        self.largura = (max(valores) - self.base).bit_length() if valores else 0
+        self.bits = _empacotar(valores, self.base, self.largura)
+
+    def _cabe(self, valores):
+        # Todos os valores cabem no frame atual (sem recodificar)?
+        limite = self.base + (1 << self.largura)
+        return all(self.base <= v < limite for v in valores)
+
+    def tamanho_bits(self):
+        """Bits ocupados na página: cabeçalho da coluna mais n valores de 'largura' bits."""
+        return CABECALHO_COLUNA * 8 + self.n * self.largura
+
+    def limites(self):
+        """Menor e maior valor representáveis pelo frame atual (None se a coluna está vazia)."""
+        if not self.n:
+            return None
+        return self.base, self.base + (1 << self.largura) - 1
+
+    def valores(self, inicio=0, fim=None):
+        """Decodifica os valores [inicio, fim) numa lista."""
+        fim = self.n if fim is None else fim
+        n = fim - inicio
+        if n <= 0:
+            return []
+        w = self.largura
+        if not w:
+            return [self.base] * n
+        trecho = (self.bits >> (inicio * w)) & ((1 << (n * w)) - 1)
+        texto = format(trecho, f'0{n * w}b')
+        base = self.base
+        # O texto começa pelos bits mais altos: o último valor vem primeiro
+        return [int(texto[k:k + w], 2) + base for k in range((n - 1) * w, -1, -w)]
+
+    def __len__(self):
+        return self.n
+
+    def __iter__(self):
+        return iter(self.valores())
+
+    def _indice(self, i):
+        if i < 0:
+            i += self.n
+        if not 0 <= i < self.n:
+            raise IndexError("índice fora da coluna")
+        return i
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            inicio, fim, passo = i.indices(self.n)
+            if passo == 1:
+                return ColunaEmpacotada(self.valores(inicio, max(inicio, fim)))
+            return self.valores()[i]
+        w = self.largura
+        return ((self.bits >> (self._indice(i) * w)) & ((1 << w) - 1)) + self.base
+
+    def __setitem__(self, i, valor):
+        if isinstance(i, slice):
+            # Fatia (empréstimo entre folhas irmãs): recodifica a coluna inteira
+            valores = self.valores()
+            valores[i] = list(valor)
+            self._codificar(valores)
+            return
+        i = self._indice(i)
+        if not self._cabe((valor,)):
+            valores = self.valores()
+            valores[i] = valor
+            self._codificar(valores)
+            return
+        w = self.largura
+        mascara = ((1 << w) - 1) << (i * w)
+        self.bits = (self.bits & ~mascara) | ((valor - self.base) << (i * w))
+
+    def __delitem__(self, i):
+        if isinstance(i, slice):
+            inicio, fim, passo = i.indices(self.n)
+            if passo != 1:
+                valores = self.valores()
+                del valores[i]
+                self._codificar(valores)
+                return
+            fim = max(inicio, fim)
+        else:
+            inicio = self._indice(i)
+            fim = inicio + 1
+        w = self.largura
+        baixo = self.bits & ((1 << (inicio * w)) - 1)
+        self.bits = baixo | ((self.bits >> (fim * w)) << (inicio * w))
+        self.n -= fim - inicio
+
+    def insert(self, i, valor):
+        # i em [0, len]: a árvore só insere em posições vindas da busca na folha
+        if not self._cabe((valor,)):
+            valores = self.valores()
+            valores.insert(i, valor)
+            self._codificar(valores)
+            return
+        w = self.largura
+        baixo = self.bits & ((1 << (i * w)) - 1)
+        alto = self.bits >> (i * w)
+        self.bits = baixo | ((valor - self.base) << (i * w)) | (alto << ((i + 1) * w))
+        self.n += 1
+
+    def append(self, valor):
+        self.insert(self.n, valor)
+
+    def pop(self, i=-1):
+        i = self._indice(i)
+        valor = self[i]
+        del self[i]
+        return valor
+
+    def extend(self, valores):
+        valores = list(valores)
+        if not self._cabe(valores):
+            self._codificar(self.valores() + valores)
+            return
+        self.bits |= _empacotar(valores, self.base, self.largura) << (self.n * self.largura)
+        self.n += len(valores)
+
+    def __repr__(self):
+        return f"ColunaEmpacotada({self.valores()})"
+
+class RegistrosEmpacotados:
+    """
+    Registros de uma folha comprimida: uma ColunaEmpacotada por campo, cada uma com o
+    seu próprio frame e largura. Mesma interface de lista que ColunaRegistros; ler um
+    registro decodifica só a sua posição em cada coluna.
+    """
+    __slots__ = ('colunas',)
+
+    def __init__(self, num_campos, registros=(), colunas=None):
+        if colunas is None:
+            registros = list(registros)
+            colunas = [ColunaEmpacotada([registro[c] for registro in registros])
+                       for c in range(num_campos)]
+        self.colunas = colunas
+
+    def __len__(self):
+        return len(self.colunas[0])
+
+    def __iter__(self):
+        return zip(*[coluna.valores() for coluna in self.colunas])
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            inicio, fim, passo = i.indices(len(self))
+            if passo == 1:
+                return RegistrosEmpacotados(0, colunas=[coluna[i] for coluna in self.colunas])
+            return list(self)[i]
+        return tuple([coluna[i] for coluna in self.colunas])
+
+    def __setitem__(self, i, registros):
+        if isinstance(i, slice):
+            registros = list(registros)
+            for c, coluna in enumerate(self.colunas):
+                coluna[i] = [registro[c] for registro in registros]
+            return
+        for coluna, valor in zip(self.colunas, registros):
+            coluna[i] = valor
+
+    def __delitem__(self, i):
+        for coluna in self.colunas:
+            del coluna[i]
+
+    def append(self, registro):
+        for coluna, valor in zip(self.colunas, registro):
+            coluna.append(valor)
+
+    def insert(self, i, registro):
+        for coluna, valor in zip(self.colunas, registro):
+            coluna.insert(i, valor)
+
+    def pop(self, i=-1):
+        return tuple([coluna.pop(i) for coluna in self.colunas])
+
+    def extend(self, registros):
+        registros = list(registros)
+        for c, coluna in enumerate(self.colunas):
+            coluna.extend([registro[c] for registro in registros])
+
     def __repr__(self):
-        return f"Keys: {self.keys}"
+        return f"RegistrosEmpacotados({list(self)})"
+
+class _EstadoOperacao(threading.local):
+    # Estado da operação em andamento, separado por thread (modo concorrente):
+    # profundidade de chamadas aninhadas e páginas lidas/escritas pela operação
+    def __init__(self):
+        self.profundidade = 0
+        self.lidas = set()
+        self.escritas = set()
+
+def _operacao(metodo):
+    """
+    Envolve uma operação pública da árvore. Na operação mais externa:
+    - zera os conjuntos de páginas lidas/escritas e, ao final, contabiliza-os em self.io
+    - no modo em disco, solta todas as páginas que a operação fixou no buffer pool
+    """
+    @functools.wraps(metodo)
+    def envolvido(self, *args, **kwargs):
+        op = self._op
+        if op.profundidade:
+            return metodo(self, *args, **kwargs)
+        op.profundidade = 1
+        self._contabilizar(iniciar=True)
+        op.lidas = set()
+        op.escritas = set()
+        try:
+            return metodo(self, *args, **kwargs)
+        finally:
+            op.profundidade = 0
+            self._contabilizar(len(op.lidas), len(op.escritas))
+            if self.pool is not None:
+                self._soltar_pinos()
+    return envolvido
 
 class BPlusTree:
 
-    def __init__(self, num_campos, tamanho_pagina):
+    def __init__(self, num_campos, tamanho_pagina, busca='binaria', verboso=True,
+                 arquivo=None, paginas_em_memoria=64, politica_buffer='lru', concorrente=False,
+                 folhas_compactas=False, duplicadas='permitir', folhas_comprimidas=False,
+                 insercao_sequencial=True):
         self.root = None
         self.num_fields = num_campos
         self.page_size = tamanho_pagina
+        self.verboso = verboso
+
+        # Folhas compactas: chaves em array('i') e registros em ColunaRegistros, ~4 bytes
+        # por campo em vez de uma tupla e um int por campo, mas só aceitam inteiros de
+        # 32 bits. O padrão (False) mantém listas de tuplas, que aceitam qualquer valor.
+        # Folhas comprimidas: cada coluna (chaves e cada campo) em frame-of-reference com
+        # bit-packing (ColunaEmpacotada). A capacidade de cada folha sai do tamanho
+        # codificado com as larguras atuais das suas colunas, e não de 4 bytes por inteiro.
+        # Também só aceitam inteiros de 32 bits, então implicam folhas compactas.
+        if folhas_comprimidas and (arquivo or concorrente):
+            raise ValueError("Folhas comprimidas exigem a árvore em memória e sem o modo concorrente.")
+        self.folhas_compactas = folhas_compactas or folhas_comprimidas
+        self.folhas_comprimidas = folhas_comprimidas
+
+        # Estratégia de busca dentro dos nós:
+        # 'binaria' (padrão, O(log m)), 'interpolacao' (chaves inteiras uniformes)
+        # ou 'linear' (varredura O(m), mantida para comparação didática)
+        if busca not in MODOS_BUSCA:
+            raise ValueError(f"Modo de busca inválido: '{busca}'. Opções: {', '.join(MODOS_BUSCA)}")
+        self.busca = busca
+        self._posicao_esquerda, self._posicao_direita = MODOS_BUSCA[busca]
+
+        # O que inserir() e inserir_lote() fazem com uma chave que já está na árvore
+        if duplicadas not in POLITICAS_DUPLICADAS:
+            raise ValueError(f"Política de duplicadas inválida: '{duplicadas}'. "
+                             f"Opções: {', '.join(POLITICAS_DUPLICADAS)}")
+        self.duplicadas = duplicadas
         
         # --- CÁLCULOS DE CAPACIDADE (Didático) ---
         # Tamanho do Registro = num_campos * 4 bytes
         self.record_size = num_campos * INT_SIZE
         self.key_size = INT_SIZE # Chave é o primeiro campo (int)
 
+        # Espaço da página que não guarda entradas: em memória, só o ponteiro de ligação
+        # das folhas; em disco, o cabeçalho completo gravado em toda página.
+        sobrecarga = CABECALHO_PAGINA if arquivo else POINTER_SIZE
+
         # CÁLCULO DE SEGURANÇA: Tamanho Mínimo da Página
         # Para evitar loops infinitos ou estouro de recursão, a página DEVE
         # ser capaz de conter pelo menos 2 registros/chaves para funcionar bem.
         # Custo de 1 entrada na folha = Ponteiro + Chave + Registro (aprox)
-        min_page_required = (POINTER_SIZE + self.key_size + self.record_size) * 2
+        min_page_required = (POINTER_SIZE + self.key_size + self.record_size) * 2 + sobrecarga - POINTER_SIZE
         
         if tamanho_pagina < min_page_required:
             print(f"AVISO: Tamanho da página ({tamanho_pagina}B) muito pequeno para {num_campos} campos.")
@@ -58,18 +557,26 @@ class BPlusTree:
         # 1. Capacidade do Nó Folha (Onde ficam os dados reais)
         entry_size_leaf = self.key_size + self.record_size
         # Quantos registros cabem na página descontando o ponteiro de ligação?
-        self.leaf_capacity = (tamanho_pagina - POINTER_SIZE) // entry_size_leaf
+        self.leaf_capacity = (tamanho_pagina - sobrecarga) // entry_size_leaf
         
         # Garante capacidade mínima de 1 para evitar erros de divisão por zero ou lógica
         if self.leaf_capacity < 1: self.leaf_capacity = 1
 
+        # Bits disponíveis para valores numa folha comprimida: a página, menos o ponteiro
+        # de ligação e os cabeçalhos das colunas (chaves e um por campo)
+        self._bits_folha = (tamanho_pagina - sobrecarga - (1 + num_campos) * CABECALHO_COLUNA) * 8
+        # Mínimo de uma folha comprimida: metade da capacidade no pior caso (colunas de
+        # 32 bits), fixo para que não mude quando um split ou uma remoção re-codifica a folha
+        self._min_folha_comprimida = math.ceil(self._capacidade_comprimida([32] * num_campos) / 2)
+
         self.leaf_max_keys = self.leaf_capacity
         self.leaf_min_keys = math.ceil(self.leaf_capacity / 2)
 
         # 2. Capacidade do Nó Interno (Onde ficam apenas referências de navegação)
-        # Ordem m: m * ponteiro + (m-1) * chave <= tamanho_pagina
+        # Ordem m: m * ponteiro + (m-1) * chave <= tamanho_pagina (- cabeçalho, em disco)
         denom = POINTER_SIZE + self.key_size
-        self.internal_order = (tamanho_pagina + self.key_size) // denom
+        cabecalho_interno = CABECALHO_PAGINA if arquivo else 0
+        self.internal_order = (tamanho_pagina - cabecalho_interno + self.key_size) // denom
         
         # Garante ordem mínima de 3 (min 2 chaves) para estabilidade
         if self.internal_order < 3: self.internal_order = 3
@@ -77,204 +584,919 @@ class BPlusTree:
         self.internal_max_keys = self.internal_order - 1 
         self.internal_min_keys = math.ceil(self.internal_order / 2) - 1
 
-        # Cria a raiz inicial (começa como folha vazia)
-        self.root = No(eh_folha=True, max_keys=self.leaf_max_keys, min_keys=self.leaf_min_keys)
+        # 3. Armazenamento: em memória (padrão) ou em arquivo de páginas com buffer pool
+        self.arquivo = arquivo
+        self.paginas = None
+        self.pool = None
+        self._pinados = []  # Páginas fixadas pela operação em andamento
+
+        # 4. Contabilidade de I/O lógico: páginas distintas lidas/escritas por operação
+        self.io = ContadorIO()
+        self._op = _EstadoOperacao()
+
+        # 5. Modo concorrente (somente em memória): buscas, inserções e remoções de várias
+        # threads, com latches por nó adquiridos "de mão em mão" (latch crabbing)
+        if concorrente and arquivo:
+            raise ValueError("O modo concorrente só é suportado com a árvore em memória (sem 'arquivo').")
+        self.concorrente = concorrente
+        self._latch_raiz = LatchLeituraEscrita() if concorrente else None  # Protege self.root
+        self._trava_io = threading.Lock() if concorrente else None
 
-        print(f"--- Árvore Inicializada ---")
-        print(f"Página Configurada: {tamanho_pagina} bytes | Campos por registro: {num_campos}")
-        print(f"Capacidade Folha: {self.leaf_max_keys} registros")
-        print(f"Ordem Interna: {self.internal_order} filhos (Máx {self.internal_max_keys} chaves)")
+        # 6. Estatísticas mantidas a cada inserção, remoção, split e merge (leitura em O(1)):
+        # registros nas folhas e nós por nível (índice 0 = folhas; o último nível é a raiz)
+        self.num_registros = 0
+        self._nos_por_nivel = [1]
+
+        # 7. Índices secundários: campo -> árvore de pares (valor do campo, chave primária),
+        # mantidos por inserir/remover (e pelas versões em lote). Árvores que aceitam
+        # chaves iguais (duplicadas='permitir' e as secundárias) descem pela esquerda nas
+        # varreduras, já que as repetições de uma chave podem ocupar várias folhas.
+        self.indices_secundarios = {}
+        self.chaves_duplicadas = duplicadas == 'permitir'
+
+        # 8. Caminho rápido para inserções sequenciais (fora do modo concorrente): a folha
+        # da última inserção e os separadores que a delimitam, [inferior, superior), que
+        # dispensam a descida se a próxima chave cair entre eles. Descartada a cada split,
+        # merge, redistribuição ou carga em lote. Duas inserções seguidas no fim da mesma
+        # folha, a mais à direita, caracterizam um padrão de anexação: o split dela passa a
+        # cortar em FRACAO_SPLIT_SEQUENCIAL (a nova folha recebe o resto e, enquanto as
+        # anexações continuarem nela, fica isenta do mínimo; ver _folha_com_underflow).
+        self.insercao_sequencial = insercao_sequencial and not concorrente
+        self._dica = None  # (folha, inferior, superior); None nos limites = sem limite
+        self._anexou = None  # Folha cujo fim recebeu a inserção anterior (ou None)
+
+        if arquivo:
+            self.paginas = ArquivoPaginas(arquivo, tamanho_pagina)
+            self.pool = BufferPool(self.paginas, paginas_em_memoria, self._desserializar,
+                                   self._serializar, politica_buffer)
+            if not self.paginas.novo:
+                # Reabre uma árvore já gravada: metadados = [num_campos, raiz, registros, nós por nível...]
+                campos_gravados, self.root = self.paginas.extras[:2]
+                if campos_gravados != num_campos:
+                    self.paginas.fechar()
+                    raise ValueError(f"'{arquivo}' guarda registros de {campos_gravados} campos, "
+                                     f"mas a árvore foi criada com {num_campos}.")
+                if len(self.paginas.extras) > 2:
+                    self.num_registros = self.paginas.extras[2]
+                    self._nos_por_nivel = list(self.paginas.extras[3:])
+                else:
+                    # Arquivo sem as estatísticas (gravado sem elas ou com a página 0 cheia
+                    # demais para guardá-las): uma varredura ao abrir (não entra no I/O)
+                    self._recontar()
+                    self.io.zerar()
+
+        if self.root is None:
+            # Cria a raiz inicial (começa como folha vazia)
+            raiz = self._novo_no(eh_folha=True)
+            self.root = self._ref(raiz)
+            self._soltar(raiz)
+            if self.pool is not None:
+                self.sincronizar()
+
+        if verboso:
+            print(f"--- Árvore Inicializada ---")
+            print(f"Página Configurada: {tamanho_pagina} bytes | Campos por registro: {num_campos}")
+            print(f"Capacidade Folha: {self.leaf_max_keys} registros")
+            print(f"Ordem Interna: {self.internal_order} filhos (Máx {self.internal_max_keys} chaves)")
+            print(f"Busca nos nós: {busca} | Chaves repetidas: {duplicadas}")
+            if arquivo:
+                print(f"Armazenamento: '{arquivo}' | Buffer: {paginas_em_memoria} páginas ({politica_buffer})")
+            if concorrente:
+                print("Modo concorrente: latches por nó (latch crabbing)")
+            if folhas_comprimidas:
+                print("Folhas: comprimidas (frame-of-reference + bit-packing por coluna)")
+            else:
+                print(f"Folhas: {'compactas (array de inteiros)' if folhas_compactas else 'listas de tuplas'}")
+
+    # *********************************************************************************
+    # ACESSO ÀS PÁGINAS
+    # Em memória, a referência de um nó é o próprio objeto No. Em disco, é o número
+    # da página: ler() fixa a página no buffer pool e devolve o nó desserializado.
+    # *********************************************************************************
+    def _ler(self, ref):
+        if ref is None:
+            return None
+        self._op.lidas.add(ref)
+        if self.pool is None:
+            return ref
+        no = self.pool.fixar(ref)
+        self._pinados.append(ref)
+        return no
+
+    def _ref(self, no):
+        return no if self.pool is None else no.page_id
+
+    def _sujo(self, no):
+        # Marca a página como modificada (será escrita ao sair do buffer pool)
+        self._op.escritas.add(self._ref(no))
+        if self.folhas_comprimidas and no.is_leaf:
+            self._ajustar_capacidade(no)
+        if self.pool is not None:
+            self.pool.marcar_sujo(no.page_id)
+
+    def _soltar(self, no):
+        # Solta antecipadamente uma página que a operação não usará mais
+        if self.pool is not None:
+            self.pool.soltar(no.page_id)
+            self._pinados.remove(no.page_id)
+
+    def _contabilizar(self, lidas=0, escritas=0, iniciar=False):
+        # Soma páginas lidas/escritas em self.io (sob trava, no modo concorrente).
+        # Os contadores estruturais (splits, merges...) não são travados e podem
+        # perder incrementos quando várias threads reorganizam a árvore ao mesmo tempo.
+        if self._trava_io is None:
+            if iniciar:
+                self.io.iniciar_operacao()
+            self.io.leituras += lidas
+            self.io.escritas += escritas
+            return
+        with self._trava_io:
+            if iniciar:
+                self.io.iniciar_operacao()
+            self.io.leituras += lidas
+            self.io.escritas += escritas
+
+    def _soltar_pinos(self):
+        for page_id in self._pinados:
+            self.pool.soltar(page_id)
+        self._pinados = []
+
+    def _novo_no(self, eh_folha):
+        if eh_folha:
+            no = No(eh_folha=True, max_keys=self.leaf_max_keys, min_keys=self.leaf_min_keys)
+            if self.folhas_comprimidas:
+                no.keys = ColunaEmpacotada()
+                no.children = RegistrosEmpacotados(self.num_fields)
+                self._ajustar_capacidade(no)
+            elif self.folhas_compactas:
+                no.keys = array('i')
+                no.children = ColunaRegistros(self.num_fields)
+        else:
+            no = No(eh_folha=False, max_keys=self.internal_max_keys, min_keys=self.internal_min_keys)
+        if self.pool is not None:
+            no.page_id = self.paginas.alocar()
+            self.pool.adicionar(no.page_id, no)
+            self._pinados.append(no.page_id)
+        if self.concorrente:
+            no.latch = LatchLeituraEscrita()
+        self._op.escritas.add(self._ref(no))
+        return no
+
+    def _preencher_folha(self, folha, chaves, registros):
+        # Substitui o conteúdo da folha (listas de chaves e registros já ordenadas)
+        if self.folhas_comprimidas:
+            folha.keys = ColunaEmpacotada(chaves)
+            folha.children = RegistrosEmpacotados(self.num_fields, registros)
+            self._ajustar_capacidade(folha)
+        elif self.folhas_compactas:
+            folha.keys = array('i', chaves)
+            folha.children = ColunaRegistros(self.num_fields, registros)
+        else:
+            folha.keys, folha.children = list(chaves), list(registros)
+
+    def _capacidade_comprimida(self, larguras):
+        # Registros que cabem numa folha comprimida cujas colunas têm essas larguras
+        # (a primeira é a dos campos-chave: a chave conta na coluna de chaves e no registro)
+        bits_por_registro = larguras[0] + sum(larguras)
+        return max(1, self._bits_folha // max(1, bits_por_registro))
+
+    def _ajustar_capacidade(self, folha):
+        # A capacidade de uma folha comprimida acompanha as larguras atuais das colunas;
+        # o mínimo não (senão as duas metades de um split nasceriam abaixo dele)
+        folha.max_keys = self._capacidade_comprimida([coluna.largura for coluna in folha.children.colunas])
+        folha.min_keys = self._min_folha_comprimida
+
+    def _cabem_juntos(self, no, irmao, separador):
+        # A fusão de 'no' com 'irmao' cabe numa página? Nas folhas comprimidas, a conta
+        # usa o frame que cobre as duas folhas (as larguras podem crescer na fusão).
+        total = len(no.keys) + len(irmao.keys) + separador
+        if not (self.folhas_comprimidas and no.is_leaf):
+            return total <= no.max_keys
+        larguras = []
+        for a, b in zip(no.children.colunas, irmao.children.colunas):
+            limites = [lim for lim in (a.limites(), b.limites()) if lim is not None]
+            menor = min(lim[0] for lim in limites)
+            maior = max(lim[1] for lim in limites)
+            larguras.append((maior - menor).bit_length())
+        return total <= self._capacidade_comprimida(larguras)
+
+    def _descartar(self, no):
+        # Devolve a página de um nó eliminado (após merge) à lista de páginas livres
+        if self.pool is not None:
+            self.pool.descartar(no.page_id)
+            self._pinados = [p for p in self._pinados if p != no.page_id]
+
+    def _definir_pai(self, ref_filho, ref_pai):
+        filho = self._ler(ref_filho)
+        filho.parent = ref_pai
+        self._sujo(filho)
+        self._soltar(filho)
+
+    def _definir_anterior(self, ref_folha, ref_anterior):
+        folha = self._ler(ref_folha)
+        folha.prev_leaf = ref_anterior
+        self._sujo(folha)
+        self._soltar(folha)
+
+    def _serializar(self, no):
+        # Layout da página: [tipo, num_chaves, pai, próxima folha, folha anterior] + chaves + corpo
+        # Corpo: registros achatados (folha) ou números das páginas filhas (interno)
+        if no.is_leaf:
+            tipo = PAGINA_FOLHA
+            if isinstance(no.children, ColunaRegistros):
+                corpo = no.children.dados
+            else:
+                corpo = [valor for registro in no.children for valor in registro]
+        else:
+            tipo = PAGINA_INTERNA
+            corpo = no.children
+        pai = SEM_PAGINA if no.parent is None else no.parent
+        proxima = SEM_PAGINA if no.next_leaf is None else no.next_leaf
+        anterior = SEM_PAGINA if no.prev_leaf is None else no.prev_leaf
+        return inteiros_para_bytes([tipo, len(no.keys), pai, proxima, anterior] + list(no.keys) + list(corpo))
+
+    def _desserializar(self, page_id, dados):
+        tipo, n, pai, proxima, anterior = bytes_para_inteiros(dados, CAMPOS_CABECALHO)
+        no = No(eh_folha=(tipo == PAGINA_FOLHA))
+        if no.is_leaf:
+            no.max_keys, no.min_keys = self.leaf_max_keys, self.leaf_min_keys
+            valores = bytes_para_inteiros(dados, n * (1 + self.num_fields), CABECALHO_PAGINA)
+            if self.folhas_compactas:
+                # A página já tem o layout da folha compacta: só fatia o array lido
+                no.keys = valores[:n]
+                no.children = ColunaRegistros(self.num_fields, dados=valores[n:])
+            else:
+                no.keys = valores[:n].tolist()
+                no.children = list(zip(*[iter(valores[n:])] * self.num_fields))
+        else:
+            no.max_keys, no.min_keys = self.internal_max_keys, self.internal_min_keys
+            valores = bytes_para_inteiros(dados, 2 * n + 1, CABECALHO_PAGINA)
+            no.children = valores[n:].tolist()
+            no.keys = valores[:n].tolist()
+        no.parent = None if pai == SEM_PAGINA else pai
+        no.next_leaf = None if proxima == SEM_PAGINA else proxima
+        no.prev_leaf = None if anterior == SEM_PAGINA else anterior
+        no.page_id = page_id
+        return no
+
+    def sincronizar(self):
+        """Modo em disco: grava as páginas sujas e os metadados e força a escrita (fsync)."""
+        if self.pool is None:
+            return
+        self.pool.descarregar()
+        metadados = [self.num_fields, self.root, self.num_registros] + self._nos_por_nivel
+        if len(metadados) > self.paginas.capacidade_extras():
+            # Árvore alta em página pequena: os nós por nível não cabem na página 0.
+            # Grava só o essencial; os contadores são recalculados ao reabrir.
+            metadados = metadados[:2]
+        self.paginas.escrever_metadados(metadados)
+        self.paginas.sincronizar()
+
+    def fechar(self):
+        """Modo em disco: sincroniza e fecha o arquivo de páginas."""
+        if self.pool is None:
+            return
+        self.sincronizar()
+        self.paginas.fechar()
+
+    # *********************************************************************************
+    # SNAPSHOT (salvar / abrir)
+    # O snapshot é um arquivo de páginas no mesmo formato do modo em disco, montado pela
+    # carga em lote com as folhas cheias: pode ser reaberto como árvore somente leitura
+    # mapeada em memória, carregado inteiro na memória ou usado como 'arquivo' da árvore.
+    # *********************************************************************************
+    def salvar(self, caminho):
+        """
+        Grava um snapshot compacto da árvore em 'caminho'. Retorna o número de registros.
+        As páginas guardam inteiros de 32 bits: se algum registro (possível com folhas em
+        listas) não couber, levanta ValueError antes de gravar qualquer coisa.
+        """
+        for registro in self.iterar_intervalo(-math.inf, math.inf):
+            if not _inteiros_32_bits(registro):
+                raise ValueError(f"O registro {registro} não cabe no snapshot: os campos "
+                                 f"devem ser inteiros de 32 bits.")
+        temporario = caminho + '.tmp'
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        copia = BPlusTree(self.num_fields, self.page_size, verboso=False, arquivo=temporario)
+        total = copia.carregar_em_lote(self.iterar_intervalo(MENOR_INTEIRO, MAIOR_INTEIRO))
+        copia.fechar()
+        # Substitui o snapshot anterior de uma só vez (nunca fica um arquivo pela metade)
+        os.replace(temporario, caminho)
+        return total
+
+    @staticmethod
+    def abrir(caminho, mmap=True, **opcoes):
+        """
+        Abre um snapshot gravado por salvar().
+        - mmap=True: retorna uma BPlusTreeMapeada (somente leitura, abertura imediata)
+        - mmap=False: reconstrói uma BPlusTree em memória com todos os registros
+        O snapshot guarda só os registros, o número de campos e o tamanho da página.
+        Com mmap=False, as demais opções do construtor (duplicadas, busca,
+        folhas_compactas, folhas_comprimidas...) vêm de 'opcoes', com os padrões do
+        construtor; índices secundários devem ser declarados de novo.
+        """
+        if mmap and opcoes:
+            raise ValueError("Opções do construtor só se aplicam com mmap=False.")
+        visao = BPlusTreeMapeada(caminho)
+        if mmap:
+            return visao
+        opcoes.setdefault('verboso', False)
+        arvore = BPlusTree(visao.num_fields, visao.page_size, **opcoes)
+        arvore.carregar_em_lote(visao.iterar_intervalo(MENOR_INTEIRO, MAIOR_INTEIRO))
+        visao.fechar()
+        return arvore
 
     # *********************************************************************************
     # MÉTODO DE INSERÇÃO
     # Insere um registro completo (tupla). Se a página encher, realiza o SPLIT.
     # *********************************************************************************
+    @_operacao
     def inserir(self, registro):
-        # Validação simples dos campos
-        if len(registro) != self.num_fields:
-            print(f"Erro: O registro deve ter exatamente {self.num_fields} campos.")
-            return
+        # Retorna True se o registro foi gravado; False se foi recusado (registro
+        # inválido ou, com duplicadas='rejeitar', chave já existente)
+        if not self._registro_valido(registro):
+            return False
 
         chave = registro[0] # A chave primária é o primeiro campo
-        
+        if self._gravar(registro, self.duplicadas) is not None and self.duplicadas == 'rejeitar':
+            print(f"Erro: Chave {chave} já existe.")
+            return False
+        return True
+
+    def _gravar(self, registro, se_existir):
+        # Uma única descida até a folha; a decisão (inserir, manter ou sobrescrever) é
+        # tomada lá. Retorna o registro que já existia com a chave, ou None.
+        chave = registro[0]
+        # Com chaves repetidas, cópias da chave podem ter ficado só em folhas à esquerda
+        # daquela a que a descida pela direita leva: a decisão começa na primeira delas
+        procurar_primeira = se_existir != 'permitir' and self.chaves_duplicadas
+        if self.concorrente:
+            if procurar_primeira:
+                # As descidas com latches não seguem os ponteiros entre folhas
+                raise ValueError("No modo concorrente, upsert, inserir_se_ausente e obter_ou_inserir "
+                                 "exigem duplicadas='rejeitar' ou 'substituir'.")
+            folha, retidos = self._descer_para_escrita(chave, insercao=True)
+            try:
+                return self._gravar_na_folha(folha, chave, registro, se_existir)
+            finally:
+                self._liberar_latches(retidos)
+
         # 1. Busca a folha correta onde a chave deveria estar
-        folha = self._buscar_folha(chave)
-        
+        if procurar_primeira:
+            folha = self._folha_da_primeira(chave)
+        elif not self.insercao_sequencial:
+            folha = self._buscar_folha(chave)
+        else:
+            folha = self._folha_da_dica(chave)
+            if folha is None:
+                folha, inferior, superior = self._buscar_folha_e_limites(chave)
+                self._dica = (self._ref(folha), inferior, superior)
+        return self._gravar_na_folha(folha, chave, registro, se_existir)
+
+    def _folha_da_dica(self, chave):
+        # Folha da última inserção, se a chave cair entre os separadores que a delimitam
+        if self._dica is None:
+            return None
+        ref, inferior, superior = self._dica
+        if (inferior is not None and chave < inferior) or (superior is not None and chave >= superior):
+            return None
+        return self._ler(ref)
+
+    def _folha_da_primeira(self, chave, folha=None):
+        # Folha da primeira ocorrência da chave ou, se ela não existir, uma folha onde pode
+        # ser inserida: desce pela esquerda (ou parte de 'folha', já obtida assim) e passa
+        # à vizinha enquanto a folha atual termina antes da chave e a seguinte começa por ela
+        if folha is None:
+            folha = self._buscar_folha(chave, a_esquerda=True)
+        while folha.next_leaf is not None and (not folha.keys or folha.keys[-1] < chave):
+            seguinte = self._ler(folha.next_leaf)
+            if not seguinte.keys or seguinte.keys[0] != chave:
+                break
+            folha = seguinte
+        return folha
+
+    def _gravar_na_folha(self, folha, chave, registro, se_existir):
+        # se_existir segue POLITICAS_DUPLICADAS. A folha recebida é a única que pode
+        # conter a chave ou, com chaves repetidas, a da sua primeira ocorrência.
+        if se_existir != 'permitir':
+            idx = self._posicao_esquerda(folha.keys, chave)
+            if idx < len(folha.keys) and folha.keys[idx] == chave:
+                anterior = folha.children[idx]
+                if se_existir == 'substituir':
+                    self._substituir_na_folha(folha, idx, anterior, registro)
+                    if folha.esta_cheio():
+                        self._dividir_folha(folha)
+                return anterior
+        self._inserir_registro(folha, chave, registro)
+        return None
+
+    def _substituir_na_folha(self, folha, idx, anterior, registro):
+        # Sobrescreve o registro no lugar: a folha não cresce, mas numa folha comprimida
+        # valores fora do frame alargam as colunas e reduzem a capacidade; quem chama
+        # divide a folha se ela ficar cheia
+        folha.children[idx] = registro
+        self._sujo(folha)
+        for campo, indice in self.indices_secundarios.items():
+            if anterior[campo] != registro[campo]:
+                indice._remover_exato((anterior[campo], registro[0]))
+                indice.inserir((registro[campo], registro[0]))
+
+    # *********************************************************************************
+    # UPSERT E INSERÇÃO CONDICIONAL
+    # Cada operação desce uma única vez e decide na folha, em vez de buscar, remover e
+    # inserir de novo (três descidas e, às vezes, um merge seguido de um split).
+    # Independem da política 'duplicadas' da árvore; com chaves repetidas, valem para a
+    # primeira ocorrência da chave.
+    # *********************************************************************************
+    @_operacao
+    def upsert(self, registro):
+        """Insere ou sobrescreve o registro da chave; retorna o registro anterior (ou None)."""
+        if not self._registro_valido(registro):
+            return None
+        return self._gravar(registro, 'substituir')
+
+    @_operacao
+    def inserir_se_ausente(self, registro):
+        """Insere só se a chave não existir; retorna True se o registro foi inserido."""
+        if not self._registro_valido(registro):
+            return False
+        return self._gravar(registro, 'rejeitar') is None
+
+    @_operacao
+    def obter_ou_inserir(self, registro):
+        """Retorna o registro já gravado com a chave ou, se não houver, insere e retorna 'registro'."""
+        if not self._registro_valido(registro):
+            return None
+        anterior = self._gravar(registro, 'rejeitar')
+        return registro if anterior is None else anterior
+
+    def _inserir_registro(self, folha, chave, registro):
         # 2. Insere o registro na folha de forma ordenada
-        self._inserir_na_folha(folha, chave, registro)
+        no_fim = self._inserir_na_folha(folha, chave, registro)
+        ref = self._ref(folha)
+        anexou = self._anexou
+        sequencial = no_fim and anexou == ref
+        self._anexou = ref if no_fim else None
+        self._sujo(folha)
+        self._contar(registros=1)
+        for campo, indice in self.indices_secundarios.items():
+            indice.inserir((registro[campo], chave))
 
         # 3. Verifica se houve estouro da capacidade (Overflow)
         if folha.esta_cheio():
             # **************************************************************
             # A página encheu! Precisamos dividir (Split) e promover chaves.
             # **************************************************************
-            chave_sobe, novo_no = self._split(folha)
-            
-            if folha == self.root:
-                # Se a raiz estourou, a árvore cresce em altura
-                nova_raiz = No(eh_folha=False, max_keys=self.internal_max_keys, min_keys=self.internal_min_keys)
-                nova_raiz.keys = [chave_sobe]
-                nova_raiz.children = [folha, novo_no]
-                folha.parent = nova_raiz
-                novo_no.parent = nova_raiz
-                self.root = nova_raiz
+            if self.folhas_comprimidas:
+                # Se o registro alargou as colunas, a folha pode precisar de mais de um corte
+                self._dividir_folha(folha)
             else:
-                # Propaga a divisão para o pai
-                self._inserir_no_pai(folha.parent, chave_sobe, novo_no)
+                ponto = None
+                if sequencial and self.insercao_sequencial and folha.next_leaf is None:
+                    # Anexação na folha mais à direita: a da esquerda fica quase cheia; a
+                    # nova, que continua sendo a mais à direita, recebe as próximas chaves
+                    ponto = min(len(folha.keys) - 1, max(1, int(len(folha.keys) * FRACAO_SPLIT_SEQUENCIAL)))
+                chave_sobe, novo_no = self._split(folha, ponto)
+                self._promover(folha, chave_sobe, novo_no)
+                if ponto is not None:
+                    # O registro anexado foi para a nova folha, que segue recebendo as anexações
+                    self._anexou = self._ref(novo_no)
+
+        if self.insercao_sequencial and anexou is not None and anexou != self._anexou:
+            self._encerrar_anexacao(anexou)
+
+    def _encerrar_anexacao(self, ref):
+        # Fim de um padrão de anexação: a folha que o recebia deixa de ser isenta do
+        # mínimo e, se for a mais à direita e o split sequencial a tiver deixado abaixo
+        # dele, pega registros da vizinha da esquerda ou é fundida a ela
+        folha = self._ler(ref)
+        if folha.next_leaf is None and ref != self.root and folha.esta_com_underflow():
+            self._tratar_underflow(folha)
+
+    def _folha_com_underflow(self, folha):
+        # Durante um padrão de anexação, a folha mais à direita fica abaixo do mínimo (o
+        # split sequencial a deixa com poucas chaves, à espera das próximas): enquanto a
+        # última inserção tiver ido para o fim dela, só é tratada ao esvaziar
+        if self.insercao_sequencial and folha.next_leaf is None and self._anexou == self._ref(folha):
+            return not folha.keys
+        return folha.esta_com_underflow()
+
+    def _contar(self, registros=0, nivel=None, nos=0):
+        # Atualiza as estatísticas (sob trava no modo concorrente: várias threads podem
+        # inserir ou dividir nós de um mesmo nível ao mesmo tempo)
+        if self._trava_io is None:
+            self.num_registros += registros
+            if nivel is not None:
+                self._nos_por_nivel[nivel] += nos
+            return
+        with self._trava_io:
+            self.num_registros += registros
+            if nivel is not None:
+                self._nos_por_nivel[nivel] += nos
 
     def _inserir_na_folha(self, folha, chave, registro):
-        # Insere mantendo a ordenação
-        if not folha.keys:
+        # Insere mantendo a ordenação, direto nas listas da própria folha
+        # (sem reordenar nem recriar as listas de chaves e registros).
+        # Retorna True se o registro foi para o fim da folha.
+        if not folha.keys or chave >= folha.keys[-1]:
+            # Caminho rápido: chave maior ou igual à maior da folha vai para o fim
             folha.keys.append(chave)
             folha.children.append(registro)
-        else:
-            # Combina chaves e registros existentes com o novo
-            pares_existentes = list(zip(folha.keys, folha.children))
-            pares_existentes.append((chave, registro))
-            # Ordena todos os pares pela chave
-            pares_ordenados = sorted(pares_existentes, key=lambda x: x[0])
-            # Separa novamente em chaves e registros
-            folha.keys = [p[0] for p in pares_ordenados]
-            folha.children = [p[1] for p in pares_ordenados]
-
-    def _split(self, no):
+            return True
+        # Acha o slot (após chaves iguais, preservando a ordem de chegada) e insere
+        idx = self._posicao_direita(folha.keys, chave)
+        folha.keys.insert(idx, chave)
+        folha.children.insert(idx, registro)
+        return False
+
+    def _split(self, no, ponto_medio=None):
         # Divide o nó em dois.
-        # ponto_medio define onde cortamos a lista de chaves
-        ponto_medio = len(no.keys) // 2
+        # ponto_medio define onde cortamos a lista de chaves (padrão: o meio)
+        if ponto_medio is None:
+            ponto_medio = len(no.keys) // 2
+        self.io.splits += 1
+        self._dica = None
         
-        novo_no = No(eh_folha=no.is_leaf, max_keys=no.max_keys, min_keys=no.min_keys)
+        novo_no = self._novo_no(no.is_leaf)
         novo_no.parent = no.parent
 
-        chave_sobe = no.keys[ponto_medio]
-
         if no.is_leaf:
             # Na folha, a chave "que sobe" permanece na direita (cópia) pois é onde está o dado
             novo_no.keys = no.keys[ponto_medio:]
             novo_no.children = no.children[ponto_medio:]
-            no.keys = no.keys[:ponto_medio]
-            no.children = no.children[:ponto_medio]
+            del no.keys[ponto_medio:]
+            del no.children[ponto_medio:]
             
-            # Atualiza a lista encadeada de folhas
-            no.next_leaf, novo_no.next_leaf = novo_no, no.next_leaf
+            # Atualiza a lista duplamente encadeada de folhas
+            if no.next_leaf is not None:
+                self._definir_anterior(no.next_leaf, self._ref(novo_no))
+            no.next_leaf, novo_no.next_leaf = self._ref(novo_no), no.next_leaf
+            novo_no.prev_leaf = self._ref(no)
             chave_sobe = novo_no.keys[0] # Cópia para o índice
         else:
             # No nó interno, a chave sobe e DESAPARECE do nível atual (ela vira o separador no pai)
+            chave_sobe = no.keys[ponto_medio]
             novo_no.keys = no.keys[ponto_medio + 1:]
             novo_no.children = no.children[ponto_medio + 1:]
-            no.keys = no.keys[:ponto_medio]
+            del no.keys[ponto_medio:]
             
             # Move os filhos para o novo pai
-            filhos_movidos = no.children[ponto_medio + 1:]
-            no.children = no.children[:ponto_medio + 1]
+            del no.children[ponto_medio + 1:]
             
             for filho in novo_no.children:
-                filho.parent = novo_no
+                self._definir_pai(filho, self._ref(novo_no))
 
+        self._sujo(no)
         return chave_sobe, novo_no
 
-    def _inserir_no_pai(self, pai, chave_sobe, novo_filho):
-        # Tenta inserir a chave promovida no pai
+    def _promover(self, no, chave_sobe, novo_no, nivel=0):
+        # Registra no pai o irmão criado pelo split de 'no' ('nivel' de 'no': 0 nas folhas)
+        self._contar(nivel=nivel, nos=1)
+        if self._ref(no) == self.root:
+            # Se a raiz estourou, a árvore cresce em altura
+            nova_raiz = self._novo_no(eh_folha=False)
+            nova_raiz.keys = [chave_sobe]
+            nova_raiz.children = [self._ref(no), self._ref(novo_no)]
+            no.parent = novo_no.parent = self._ref(nova_raiz)
+            self._sujo(no)
+            self._sujo(novo_no)
+            self.root = self._ref(nova_raiz)
+            self._nos_por_nivel.append(1)  # (A raiz só muda com o seu latch retido)
+        else:
+            # Propaga a divisão para o pai
+            self._inserir_no_pai(self._ler(no.parent), no, chave_sobe, novo_no, nivel + 1)
+
+    def _inserir_no_pai(self, pai, no, chave_sobe, novo_filho, nivel):
+        # Insere a chave promovida no pai ('nivel' do pai); se ele estourar, divide-o recursivamente
+        self._inserir_no_pai_simples(pai, no, chave_sobe, novo_filho)
         if pai.esta_cheio():
-            # Se o pai também estiver cheio, recursivamente divide o pai
             chave_pai_sobe, novo_pai = self._split(pai)
-            
-            # Descobre onde inserir a nova chave (no original ou no novo irmão do pai)
-            if chave_sobe < chave_pai_sobe:
-                alvo = pai
-            else:
-                alvo = novo_pai
-            
-            self._inserir_no_pai_simples(alvo, chave_sobe, novo_filho)
-            
-            # Verifica se precisa criar nova raiz
-            if pai == self.root:
-                nova_raiz = No(eh_folha=False, max_keys=self.internal_max_keys, min_keys=self.internal_min_keys)
-                nova_raiz.keys = [chave_pai_sobe]
-                nova_raiz.children = [pai, novo_pai]
-                pai.parent = nova_raiz
-                novo_pai.parent = nova_raiz
-                self.root = nova_raiz
+            self._promover(pai, chave_pai_sobe, novo_pai, nivel)
+
+    def _inserir_no_pai_simples(self, pai, no, chave, filho):
+        # Insere o novo filho logo à direita de 'no' (o nó que foi dividido). A posição
+        # vem de 'no', e não da chave: com chaves repetidas, vários separadores podem
+        # ser iguais à chave promovida.
+        idx = self._indice_filho(pai, no)
+        pai.keys.insert(idx, chave)
+        pai.children.insert(idx + 1, self._ref(filho))
+        filho.parent = self._ref(pai)
+        self._sujo(pai)
+        self._sujo(filho)
+
+    # *********************************************************************************
+    # CARGA EM LOTE (Bulk Loading)
+    # Constrói a árvore de baixo para cima: empacota os registros ordenados em folhas,
+    # encadeia as folhas e monta cada nível interno a partir do nível de baixo.
+    # *********************************************************************************
+    @_operacao
+    def carregar_em_lote(self, registros, fill_factor=1.0):
+        """
+        Carrega um iterável de registros (pode ser um gerador) em uma árvore vazia.
+        fill_factor define a fração da capacidade ocupada em cada página (0 < f <= 1).
+        A entrada é consumida uma única vez: se já vier ordenada pela chave, as folhas
+        são montadas em fluxo; ao detectar desordem, os registros são reunidos em uma
+        única lista, ordenados no lugar e as folhas são remontadas.
+        Chaves repetidas seguem a política 'duplicadas', como em inserir(): com
+        'rejeitar' fica o primeiro registro de cada chave; com 'substituir', o último.
+        Retorna a quantidade de registros carregados.
+        """
+        if not 0 < fill_factor <= 1:
+            raise ValueError(f"fill_factor deve estar em (0, 1], recebido {fill_factor}")
+        raiz = self._ler(self.root)
+        if not raiz.is_leaf or raiz.keys:
+            print("Erro: A carga em lote exige uma árvore vazia.")
+            return 0
+
+        por_folha = min(self.leaf_max_keys, max(self.leaf_min_keys, int(self.leaf_capacity * fill_factor), 1))
+        por_no = min(self.internal_order, max(self.internal_min_keys + 1, int(self.internal_order * fill_factor), 2))
+
+        entrada = iter(registros)
+        desordem = []  # Recebe o primeiro registro fora de ordem, se houver
+        nivel, total = self._montar_folhas(self._sem_repetidas(self._registros_ordenados(entrada, desordem)),
+                                           por_folha, fill_factor)
+
+        if desordem:
+            # Entrada não ordenada: junta o que já foi lido com o restante e ordena uma vez
+            todos = []
+            for ref, _ in nivel:
+                # Libera as folhas provisórias à medida que os registros são recolhidos
+                folha = self._ler(ref)
+                todos.extend(folha.children)
+                self._descartar(folha)
+            todos.extend(desordem)
+            todos.extend(r for r in entrada if self._registro_valido(r))
+            todos.sort(key=lambda r: r[0])  # Estável: chaves iguais na ordem de chegada
+            nivel, total = self._montar_folhas(self._sem_repetidas(todos), por_folha, fill_factor)
+
+        if not nivel:
+            return 0
+
+        # A folha vazia que era a raiz é substituída pela nova estrutura
+        self._dica = self._anexou = None
+        self._descartar(raiz)
+
+        # Monta os níveis internos: cada item é (nó, menor chave da sua subárvore)
+        self.num_registros = total
+        self._nos_por_nivel = [len(nivel)]
+        while len(nivel) > 1:
+            proximo = []
+            for grupo in self._agrupar_em_lote(nivel, por_no, self.internal_min_keys + 1, self.internal_order):
+                no = self._novo_no(eh_folha=False)
+                no.children = [filho for filho, _ in grupo]
+                no.keys = [menor for _, menor in grupo[1:]]
+                for filho in no.children:
+                    self._definir_pai(filho, self._ref(no))
+                proximo.append((self._ref(no), grupo[0][1]))
+                self._soltar(no)
+            nivel = proximo
+            self._nos_por_nivel.append(len(nivel))
+
+        self.root = nivel[0][0]
+        self._definir_pai(self.root, None)
+        for campo in list(self.indices_secundarios):
+            self.criar_indice_secundario(campo)
+        return total
+
+    def _registro_valido(self, registro):
+        if len(registro) != self.num_fields:
+            print(f"Erro: O registro deve ter exatamente {self.num_fields} campos.")
+            return False
+        # Folhas compactas e páginas em disco guardam inteiros de 32 bits: o registro é
+        # recusado aqui, e não só quando a página for escrita (num despejo do buffer pool)
+        if (self.folhas_compactas or self.pool is not None) and not _inteiros_32_bits(registro):
+            print("Erro: Os campos do registro devem ser inteiros de 32 bits.")
+            return False
+        return True
+
+    def _sem_repetidas(self, registros):
+        # Aplica a política 'duplicadas' a um fluxo ordenado pela chave (as repetições
+        # de uma chave chegam juntas, na ordem de chegada)
+        if self.duplicadas == 'permitir':
+            yield from registros
+            return
+        anterior = None
+        for registro in registros:
+            if anterior is not None and registro[0] == anterior[0]:
+                if self.duplicadas == 'substituir':
+                    anterior = registro
+                continue
+            if anterior is not None:
+                yield anterior
+            anterior = registro
+        if anterior is not None:
+            yield anterior
+
+    def _registros_ordenados(self, entrada, desordem):
+        # Repassa os registros enquanto estiverem em ordem crescente de chave.
+        # Ao encontrar um fora de ordem, guarda-o em 'desordem' e para.
+        ultima = None
+        for registro in entrada:
+            if not self._registro_valido(registro):
+                continue
+            if ultima is not None and registro[0] < ultima:
+                desordem.append(registro)
+                return
+            ultima = registro[0]
+            yield registro
+
+    def _montar_folhas(self, registros, por_folha, fill_factor=1.0):
+        # Cria as folhas em sequência, encadeando cada uma à anterior.
+        # Retorna a lista [(folha, menor chave)] e o total de registros empacotados.
+        nivel = []
+        total = 0
+        anterior = None
+        if self.folhas_comprimidas:
+            grupos = self._agrupar_comprimido(registros, fill_factor)
+        else:
+            grupos = self._agrupar_em_lote(registros, por_folha, self.leaf_min_keys, self.leaf_max_keys)
+        for grupo in grupos:
+            folha = self._novo_no(eh_folha=True)
+            self._preencher_folha(folha, [registro[0] for registro in grupo], grupo)
+            if anterior is not None:
+                anterior.next_leaf = self._ref(folha)
+                folha.prev_leaf = self._ref(anterior)
+                self._soltar(anterior)
+            nivel.append((self._ref(folha), folha.keys[0]))
+            total += len(grupo)
+            anterior = folha
+        if anterior is not None:
+            self._soltar(anterior)
+        return nivel, total
+
+    @staticmethod
+    def _agrupar_em_lote(itens, por_grupo, minimo, maximo):
+        # Divide a sequência em grupos de 'por_grupo' itens. Se o último grupo ficar
+        # abaixo do mínimo, ele é combinado com o anterior (fusão ou divisão ao meio).
+        anterior = None
+        atual = []
+        for item in itens:
+            atual.append(item)
+            if len(atual) == por_grupo:
+                if anterior is not None:
+                    yield anterior
+                anterior, atual = atual, []
+
+        if atual and anterior is not None and len(atual) < minimo:
+            combinado = anterior + atual
+            if len(combinado) <= maximo:
+                yield combinado
             else:
-                self._inserir_no_pai(pai.parent, chave_pai_sobe, novo_pai)
+                meio = len(combinado) // 2
+                yield combinado[:meio]
+                yield combinado[meio:]
         else:
-            self._inserir_no_pai_simples(pai, chave_sobe, novo_filho)
+            if anterior is not None:
+                yield anterior
+            if atual:
+                yield atual
 
-    def _inserir_no_pai_simples(self, pai, chave, filho):
-        # Insere ordenado na lista do pai
-        idx = 0
-        while idx < len(pai.keys) and chave > pai.keys[idx]:
-            idx += 1
-        pai.keys.insert(idx, chave)
-        pai.children.insert(idx + 1, filho)
-        filho.parent = pai
+    def _agrupar_comprimido(self, registros, fill_factor):
+        # Versão de _agrupar_em_lote para folhas comprimidas: cada grupo cresce enquanto
+        # o seu tamanho codificado (larguras do menor ao maior valor de cada campo) couber
+        # na fração fill_factor da página. Um último grupo abaixo da metade da própria
+        # capacidade é equilibrado com o anterior, se as duas metades couberem.
+        anterior = None
+        atual = []
+        menores = maiores = None
+        for registro in registros:
+            if atual:
+                novos_menores = [min(a, b) for a, b in zip(menores, registro)]
+                novos_maiores = [max(a, b) for a, b in zip(maiores, registro)]
+                larguras = [(b - a).bit_length() for a, b in zip(novos_menores, novos_maiores)]
+                if len(atual) + 1 > max(1, int(self._capacidade_comprimida(larguras) * fill_factor)):
+                    if anterior is not None:
+                        yield anterior
+                    anterior, atual = atual, []
+                    menores = maiores = registro
+                else:
+                    menores, maiores = novos_menores, novos_maiores
+            else:
+                menores = maiores = registro
+            atual.append(registro)
+
+        if atual and anterior is not None and \
+                len(atual) < math.ceil(self._capacidade_do_grupo(atual) / 2):
+            combinado = anterior + atual
+            meio = len(combinado) // 2
+            metades = (combinado[:meio], combinado[meio:])
+            if all(len(metade) <= self._capacidade_do_grupo(metade) for metade in metades):
+                yield from metades
+                return
+        if anterior is not None:
+            yield anterior
+        if atual:
+            yield atual
+
+    def _capacidade_do_grupo(self, registros):
+        # Capacidade de uma folha comprimida que guardasse exatamente esses registros
+        colunas = list(zip(*registros))
+        return self._capacidade_comprimida([(max(c) - min(c)).bit_length() for c in colunas])
 
     # *********************************************************************************
     # MÉTODO DE REMOÇÃO
     # Remove a chave. Se houver Underflow (poucas chaves), faz Merge ou Empréstimo.
     # *********************************************************************************
+    @_operacao
     def remover(self, chave):
-        folha = self._buscar_folha(chave)
-        
-        if chave not in folha.keys:
+        if self.concorrente:
+            folha, retidos = self._descer_para_escrita(chave, insercao=False)
+            try:
+                return self._remover_da_folha(folha, chave)
+            finally:
+                self._liberar_latches(retidos)
+        return self._remover_da_folha(self._folha_da_chave(chave), chave)
+
+    def _remover_da_folha(self, folha, chave):
+        idx = self._posicao_esquerda(folha.keys, chave)
+        if idx == len(folha.keys) or folha.keys[idx] != chave:
             return False # Valor não encontrado
         
         # Remove o item
-        idx = folha.keys.index(chave)
         folha.keys.pop(idx)
-        folha.children.pop(idx)
+        registro = folha.children.pop(idx)
+        self._sujo(folha)
+        self._contar(registros=-1)
+        for campo, indice in self.indices_secundarios.items():
+            indice._remover_exato((registro[campo], chave))
 
-        # Se for a raiz e ficou vazia
-        if folha == self.root:
-            if len(folha.keys) == 0:
-                # Reinicia a árvore se acabou tudo
-                self.root = No(eh_folha=True, max_keys=self.leaf_max_keys, min_keys=self.leaf_min_keys)
-        
-        # Verifica Underflow (se ficou abaixo do mínimo)
-        elif folha.esta_com_underflow():
+        # Verifica Underflow (se ficou abaixo do mínimo).
+        # A raiz folha é isenta: vazia, ela representa a árvore vazia.
+        if self._ref(folha) != self.root and self._folha_com_underflow(folha):
             self._tratar_underflow(folha)
         
         return True
 
-    def _tratar_underflow(self, no):
-        if no == self.root:
+    def _tratar_underflow(self, no, nivel=0):
+        # 'nivel' de 'no': 0 nas folhas
+        if self._ref(no) == self.root:
             # Se a raiz ficou sem chaves mas tem filho, o filho vira a nova raiz (diminui altura)
             if len(no.keys) == 0 and len(no.children) > 0:
                 self.root = no.children[0]
-                self.root.parent = None
+                self._definir_pai(self.root, None)
+                self._descartar(no)
+                self._nos_por_nivel.pop()
             return
 
-        pai = no.parent
-        idx = pai.children.index(no)
+        pai = self._ler(no.parent)
+        idx = self._indice_filho(pai, no)
         
         # Tenta pegar irmão da esquerda ou direita
         irmao = None
         eh_irmao_esq = False
         
         if idx > 0:
-            irmao = pai.children[idx - 1]
+            irmao = self._ler(pai.children[idx - 1])
             eh_irmao_esq = True
         elif idx < len(pai.children) - 1:
-            irmao = pai.children[idx + 1]
+            irmao = self._ler(pai.children[idx + 1])
             eh_irmao_esq = False
         
         if not irmao: return 
 
-        # Decisão: Fusão (Merge) ou Redistribuição (Empréstimo)?
-        if len(no.keys) + len(irmao.keys) <= no.max_keys:
-            self._merge(no, irmao, pai, idx, eh_irmao_esq)
-        else:
-            self._redistribuir(no, irmao, pai, idx, eh_irmao_esq)
+        # No modo concorrente, o irmão também é travado para escrita (o pai já está)
+        if self.concorrente:
+            irmao.latch.adquirir_escrita()
+        try:
+            # Decisão: Fusão (Merge) ou Redistribuição (Empréstimo)?
+            # Na fusão de nós internos, o separador do pai também desce para o nó fundido.
+            separador = 0 if no.is_leaf else 1
+            if self._cabem_juntos(no, irmao, separador):
+                self._merge(no, irmao, pai, idx, eh_irmao_esq, nivel)
+            else:
+                self._redistribuir(no, irmao, pai, idx, eh_irmao_esq)
+                if no.esta_cheio():
+                    # Folha comprimida: os registros emprestados alargaram as colunas
+                    self._dividir_folha(no)
+        finally:
+            if self.concorrente:
+                irmao.latch.liberar_escrita()
+
+    def _indice_filho(self, pai, no):
+        # Localiza o nó entre os filhos do pai pela sua primeira chave (busca no nó),
+        # confirmando pela identidade. Nós vazios ou chaves duplicadas caem no index().
+        ref = self._ref(no)
+        if no.keys:
+            idx = self._posicao_direita(pai.keys, no.keys[0])
+            if idx < len(pai.children) and pai.children[idx] == ref:
+                return idx
+        return pai.children.index(ref)
 
-    def _merge(self, no, irmao, pai, idx, eh_irmao_esq):
+    def _merge(self, no, irmao, pai, idx, eh_irmao_esq, nivel=0):
         # **************************************************************
         # Fusão: Junta o nó atual com o irmão e remove a entrada do pai
         # **************************************************************
+        self.io.merges += 1
+        self._dica = None
         if eh_irmao_esq:
             esq, dir = irmao, no
             idx_sep = idx - 1
         else:
             esq, dir = no, irmao
             idx_sep = idx
+        if self._anexou == self._ref(dir):
+            self._anexou = None  # A folha das anexações vai ser descartada
 
         chave_sep = pai.keys[idx_sep]
 
@@ -282,38 +1504,56 @@ class BPlusTree:
             esq.keys.extend(dir.keys)
             esq.children.extend(dir.children)
             esq.next_leaf = dir.next_leaf
+            if dir.next_leaf is not None:
+                self._definir_anterior(dir.next_leaf, self._ref(esq))
+            if self.concorrente:
+                # Folha descartada: uma varredura que chegue a ela por um ponteiro
+                # antigo percebe que ela saiu da lista e desce de novo
+                dir.next_leaf = dir.prev_leaf = None
         else:
             esq.keys.append(chave_sep)
             esq.keys.extend(dir.keys)
             esq.children.extend(dir.children)
             for filho in dir.children:
-                filho.parent = esq
+                self._definir_pai(filho, self._ref(esq))
 
         # Remove do pai
         pai.keys.pop(idx_sep)
         pai.children.pop(idx_sep + 1)
+        self._sujo(esq)
+        self._sujo(pai)
+        self._descartar(dir)
+        self._contar(nivel=nivel, nos=-1)
 
         if pai.esta_com_underflow():
-            self._tratar_underflow(pai)
+            self._tratar_underflow(pai, nivel + 1)
 
     def _redistribuir(self, no, irmao, pai, idx, eh_irmao_esq):
         # **************************************************************
         # Empréstimo: Pega uma chave do irmão rico para o pobre
         # **************************************************************
+        self.io.redistribuicoes += 1
+        self._dica = None
         if no.is_leaf:
+            # Quantos registros faltam para o mínimo (1 na remoção individual; pode ser
+            # mais após uma remoção em lote). Como a fusão não coube, o irmão tem de sobra.
+            qtd = max(1, no.min_keys - len(no.keys))
+            if self.folhas_comprimidas:
+                # A capacidade varia entre folhas comprimidas: não leva mais que a metade da diferença
+                qtd = max(1, min(qtd, (len(irmao.keys) - len(no.keys)) // 2))
             if eh_irmao_esq:
-                # Pega o último do irmão esquerdo
-                chave = irmao.keys.pop()
-                val = irmao.children.pop()
-                no.keys.insert(0, chave)
-                no.children.insert(0, val)
+                # Pega os últimos do irmão esquerdo
+                no.keys[0:0] = irmao.keys[-qtd:]
+                no.children[0:0] = irmao.children[-qtd:]
+                del irmao.keys[-qtd:]
+                del irmao.children[-qtd:]
                 pai.keys[idx - 1] = no.keys[0] # Atualiza índice no pai
             else:
-                # Pega o primeiro do irmão direito
-                chave = irmao.keys.pop(0)
-                val = irmao.children.pop(0)
-                no.keys.append(chave)
-                no.children.append(val)
+                # Pega os primeiros do irmão direito
+                no.keys.extend(irmao.keys[:qtd])
+                no.children.extend(irmao.children[:qtd])
+                del irmao.keys[:qtd]
+                del irmao.children[:qtd]
                 pai.keys[idx] = irmao.keys[0] # Atualiza índice no pai
         else:
             # Empréstimo para nós internos (Índices)
@@ -328,7 +1568,7 @@ class BPlusTree:
                 
                 no.keys.insert(0, chave_pai)
                 no.children.insert(0, filho_irmao)
-                filho_irmao.parent = no # Atualiza pai do filho movido
+                self._definir_pai(filho_irmao, self._ref(no)) # Atualiza pai do filho movido
                 
                 pai.keys[separator_idx] = chave_irmao
             else:
@@ -342,262 +1582,841 @@ class BPlusTree:
                 
                 no.keys.append(chave_pai)
                 no.children.append(filho_irmao)
-                filho_irmao.parent = no # Atualiza pai do filho movido
+                self._definir_pai(filho_irmao, self._ref(no)) # Atualiza pai do filho movido
                 
                 pai.keys[separator_idx] = chave_irmao
 
+        self._sujo(no)
+        self._sujo(irmao)
+        self._sujo(pai)
+
     # *********************************************************************************
     # MÉTODOS DE BUSCA
     # *********************************************************************************
+    @_operacao
     def buscar(self, chave):
-        folha = self._buscar_folha(chave)
-        # Procura linearmente na página (poderia ser binária)
-        for i, k in enumerate(folha.keys):
-            if k == chave:
-                return folha.children[i] # Retorna o registro completo
+        if self.concorrente:
+            folha, _, _ = self._descer_para_leitura(chave, self._op.lidas)
+            try:
+                return self._buscar_na_folha(folha, chave)
+            finally:
+                folha.latch.liberar_leitura()
+        return self._buscar_na_folha(self._folha_da_chave(chave), chave)
+
+    def _folha_da_chave(self, chave):
+        # Folha onde buscar/remover procuram a chave: com chaves repetidas, a da primeira
+        # ocorrência (as cópias podem ter ficado só em folhas à esquerda da descida pela direita)
+        if self.chaves_duplicadas:
+            return self._folha_da_primeira(chave)
+        return self._buscar_folha(chave)
+
+    def _buscar_na_folha(self, folha, chave):
+        # Procura a posição da chave na página com a estratégia de busca configurada
+        i = self._posicao_esquerda(folha.keys, chave)
+        if i < len(folha.keys) and folha.keys[i] == chave:
+            return folha.children[i] # Retorna o registro completo
         return None
 
     def buscar_intervalo(self, inicio, fim):
         """Retorna todos os registros cuja chave está entre inicio e fim."""
-        resultados = []
-        # 1. Encontra a folha onde começa o intervalo
-        no_atual = self._buscar_folha(inicio)
-        
-        # 2. Navega pela lista encadeada de folhas (Next Leaf)
-        while no_atual is not None:
-            for i, k in enumerate(no_atual.keys):
-                if k >= inicio:
-                    if k <= fim:
-                        resultados.append(no_atual.children[i])
-                    else:
-                        # Passou do fim do intervalo
-                        return resultados
-            
-            # Se a maior chave dessa página ainda é menor que o fim, vai para a próxima
-            if len(no_atual.keys) > 0 and no_atual.keys[-1] <= fim:
-                no_atual = no_atual.next_leaf
-            else:
-                break
-        return resultados
+        return list(self.iterar_intervalo(inicio, fim))
 
-    def _buscar_folha(self, chave):
-        # Desce na árvore até achar a folha
-        atual = self.root
+    def iterar_intervalo(self, inicio, fim, limite=None, reverso=False, inclusivo=True):
+        """
+        Gerador dos registros com chave entre inicio e fim, uma folha por vez.
+        - limite: para após entregar esse número de registros
+        - reverso: percorre em ordem decrescente (de fim até inicio)
+        - inclusivo: bool para os dois extremos ou tupla (inclui_inicio, inclui_fim)
+        Só a folha corrente é lida a cada passo e nenhuma página fica fixada entre um
+        registro e outro. Alterar a árvore durante a iteração não é suportado, exceto
+        no modo concorrente: lá cada folha é lida sob latch e o passo seguinte desce de
+        novo a partir da última chave entregue (cada folha é um retrato consistente,
+        mas a varredura como um todo não é um snapshot).
+        """
+        if isinstance(inclusivo, bool):
+            inclusivo = (inclusivo, inclusivo)
+        if (limite is not None and limite <= 0) or inicio > fim:
+            return
+
+        trecho, proxima = self._iniciar_intervalo(inicio, fim, reverso, inclusivo)
+        entregues = 0
+        while True:
+            for registro in trecho:
+                yield registro
+                entregues += 1
+                if entregues == limite:
+                    return
+            if proxima is None:
+                return
+            if self.concorrente:
+                lidas = set()
+                trecho, proxima = self._trecho_concorrente(lidas, inicio, fim, reverso, inclusivo, proxima)
+                self._contabilizar(len(lidas))
+                continue
+            folha = self._ler_folha_avulsa(proxima)
+            trecho, proxima = self._trecho_da_folha(folha, inicio, fim, reverso, inclusivo, False)
+
+    @_operacao
+    def _iniciar_intervalo(self, inicio, fim, reverso, inclusivo):
+        # A descida até a primeira folha é contabilizada como a operação da varredura
+        if self.concorrente:
+            return self._trecho_concorrente(self._op.lidas, inicio, fim, reverso, inclusivo)
+        if reverso:
+            folha = self._buscar_folha(fim)
+        else:
+            folha = self._buscar_folha(inicio, a_esquerda=self.chaves_duplicadas)
+        return self._trecho_da_folha(folha, inicio, fim, reverso, inclusivo, True)
+
+    def _ler_folha_avulsa(self, ref):
+        # Lê uma folha fora de uma operação (iteradores): conta a leitura na operação
+        # corrente do contador e não deixa a página fixada no buffer pool
+        self.io.leituras += 1
+        if self.pool is None:
+            return ref
+        folha = self.pool.fixar(ref)
+        self.pool.soltar(ref)
+        return folha
+
+    def _trecho_da_folha(self, folha, inicio, fim, reverso, inclusivo, primeira):
+        # Devolve os registros da folha dentro do intervalo (já na ordem da varredura)
+        # e a próxima folha a visitar, ou None se o intervalo termina nesta folha.
+        i, j = _limites_do_trecho(folha.keys, inicio, fim, reverso, inclusivo, primeira,
+                                  self._posicao_esquerda, self._posicao_direita)
+        if reverso:
+            return folha.children[i:j][::-1], (folha.prev_leaf if i == 0 else None)
+        return folha.children[i:j], (folha.next_leaf if j == len(folha.keys) else None)
+
+    def varrer_colunas(self, inicio, fim, inclusivo=True):
+        """
+        Varredura crescente de [inicio, fim] que entrega, folha a folha, o par
+        (chaves, registros) como memoryview do próprio armazenamento da folha: chaves
+        1-D e registros 2-D (registros x campos), sem cópia e sem montar tuplas (prontos
+        para numpy.asarray ou somas por coluna). Cada par só vale até o passo seguinte,
+        quando é liberado. Com folhas em listas ou comprimidas, ou no modo concorrente,
+        cada trecho é copiado para arrays antes de ser entregue.
+        """
+        if isinstance(inclusivo, bool):
+            inclusivo = (inclusivo, inclusivo)
+        if inicio > fim:
+            return
+        if self.concorrente or not self.folhas_compactas or self.folhas_comprimidas:
+            # Sem acesso direto às folhas: blocos do tamanho de uma folha, copiados
+            registros = self.iterar_intervalo(inicio, fim, inclusivo=inclusivo)
+            while True:
+                bloco = list(islice(registros, self.leaf_max_keys))
+                if not bloco:
+                    return
+                chaves = array('i', (registro[0] for registro in bloco))
+                yield memoryview(chaves), ColunaRegistros(self.num_fields, bloco).visao()
+
+        folha = self._primeira_folha(inicio)
+        primeira = True
+        while True:
+            i, j = _limites_do_trecho(folha.keys, inicio, fim, False, inclusivo, primeira,
+                                      self._posicao_esquerda, self._posicao_direita)
+            if i < j:
+                chaves, registros = memoryview(folha.keys)[i:j], folha.children.visao(i, j)
+                try:
+                    yield chaves, registros
+                finally:
+                    # Enquanto exportado, o array da folha não pode crescer nem encolher
+                    chaves.release()
+                    registros.release()
+            if j < len(folha.keys) or folha.next_leaf is None:
+                return
+            folha = self._ler_folha_avulsa(folha.next_leaf)
+            primeira = False
+
+    @_operacao
+    def _primeira_folha(self, chave):
+        # A descida até a primeira folha é contabilizada como a operação da varredura
+        return self._buscar_folha(chave, a_esquerda=self.chaves_duplicadas)
+
+    def _buscar_folha(self, chave, a_esquerda=False):
+        # Desce na árvore até achar a folha. Com a_esquerda, para na folha mais à esquerda
+        # que pode conter a chave (a primeira de uma sequência de chaves iguais).
+        posicao = self._posicao_esquerda if a_esquerda else self._posicao_direita
+        if self.pool is None:
+            atual = self.root
+            lidas = self._op.lidas
+            lidas.add(atual)
+            while not atual.is_leaf:
+                # Na B+ Tree, se chave >= separador, vamos para a direita (índice+1)
+                # Ex: Chaves [10]. Filhos [Esq, Dir]. Se chave 10, vai para Dir.
+                # Logo, o filho é a quantidade de separadores <= chave (bisect à direita).
+                idx = posicao(atual.keys, chave)
+                atual = atual.children[idx]
+                lidas.add(atual)
+            return atual
+
+        # Em disco: cada nível é uma página lida pelo buffer pool; o nó pai é solto
+        # assim que o filho é localizado (só a folha permanece fixada)
+        atual = self._ler(self.root)
         while not atual.is_leaf:
-            idx = 0
-            # Na B+ Tree, se chave >= separador, vamos para a direita (índice+1)
-            # Ex: Chaves [10]. Filhos [Esq, Dir]. Se chave 10, vai para Dir.
-            while idx < len(atual.keys) and chave >= atual.keys[idx]:
-                idx += 1
-            atual = atual.children[idx]
+            filho = atual.children[posicao(atual.keys, chave)]
+            self._soltar(atual)
+            atual = self._ler(filho)
         return atual
 
+    # *********************************************************************************
+    # LATCH CRABBING (modo concorrente)
+    # Cada nó tem um latch de leitura/escrita e self._latch_raiz protege o ponteiro da
+    # raiz. A descida trava o filho antes de soltar o pai ("de mão em mão"):
+    # - leitura: latch compartilhado, no máximo dois nós travados por vez
+    # - escrita: latch exclusivo; os ancestrais só são soltos quando o nó atual é seguro,
+    #   pois só nós que podem dividir ou fundir precisam continuar travados
+    # Os ponteiros entre folhas não são seguidos nesse modo: as varreduras descem de novo
+    # a cada folha, então split e merge não precisam travar as folhas vizinhas.
+    # *********************************************************************************
+    def _descer_para_leitura(self, chave, lidas, a_esquerda=False, atravessar=False):
+        # Devolve a folha (travada para leitura) e os separadores que a delimitam:
+        # suas chaves estão em [inferior, superior) (None quando não há limite).
+        # Com atravessar, se o pai das folhas tiver um separador igual à chave logo ao
+        # lado do caminho, desce para a folha do outro lado dele (a seguinte, pela
+        # esquerda; a anterior, pela direita).
+        posicao = self._posicao_esquerda if a_esquerda else self._posicao_direita
+        self._latch_raiz.adquirir_leitura()
+        atual = self.root
+        atual.latch.adquirir_leitura()
+        self._latch_raiz.liberar_leitura()
+        lidas.add(atual)
+        inferior = superior = None
+        while not atual.is_leaf:
+            idx = posicao(atual.keys, chave)
+            if atravessar and atual.children[0].is_leaf:
+                if a_esquerda and idx < len(atual.keys) and atual.keys[idx] == chave:
+                    idx += 1
+                elif not a_esquerda and idx > 0 and atual.keys[idx - 1] == chave:
+                    idx -= 1
+            if idx > 0:
+                inferior = atual.keys[idx - 1]
+            if idx < len(atual.keys):
+                superior = atual.keys[idx]
+            filho = atual.children[idx]
+            filho.latch.adquirir_leitura()
+            atual.latch.liberar_leitura()
+            atual = filho
+            lidas.add(atual)
+        return atual, inferior, superior
+
+    def _descer_para_escrita(self, chave, insercao):
+        # Devolve a folha e a lista de latches exclusivos ainda retidos (de cima para
+        # baixo), que o chamador solta com _liberar_latches() ao fim da operação
+        lidas = self._op.lidas
+        self._latch_raiz.adquirir_escrita()
+        retidos = [self._latch_raiz]
+        atual = self.root
+        while True:
+            atual.latch.adquirir_escrita()
+            lidas.add(atual)
+            if insercao:
+                seguro = atual.seguro_para_insercao()
+            elif atual is self.root:
+                # A raiz não tem mínimo: só deixa de existir (e a altura diminui) se for
+                # um nó interno que perde a última chave
+                seguro = atual.is_leaf or len(atual.keys) > 1
+            else:
+                seguro = atual.seguro_para_remocao()
+            if seguro:
+                self._liberar_latches(retidos)
+                retidos = []
+            retidos.append(atual.latch)
+            if atual.is_leaf:
+                return atual, retidos
+            atual = atual.children[self._posicao_direita(atual.keys, chave)]
+
+    @staticmethod
+    def _liberar_latches(retidos):
+        for latch in retidos:
+            latch.liberar_escrita()
+        retidos.clear()
+
+    def _trecho_concorrente(self, lidas, inicio, fim, reverso, inclusivo, cursor=None):
+        # Como _trecho_da_folha, mas descendo da raiz com latches. A continuação é um
+        # cursor (chave, entregues, fronteira): a última chave entregue, quantas entradas
+        # com essa chave já foram entregues e o separador onde a última folha termina
+        # (None se desconhecido). Chaves repetidas podem ocupar várias folhas, que não se
+        # distinguem pela chave na descida: o passo seguinte desce até a primeira folha
+        # que pode conter a chave, pula as entradas já entregues e, se esgotar a folha,
+        # passa à vizinha pelo ponteiro, com o latch da folha atual ainda retido.
+        if cursor is None:
+            # Primeiro passo: um extremo exclusivo pula todas as entradas iguais a ele
+            inclui = inclusivo[1] if reverso else inclusivo[0]
+            cursor = (fim if reverso else inicio, 0 if inclui else math.inf, None)
+        while True:
+            resultado = self._passo_concorrente(lidas, inicio, fim, reverso, inclusivo, *cursor)
+            if resultado is not None:
+                return resultado
+            # A folha vizinha estava com um escritor: desce de novo pelo mesmo cursor
+            time.sleep(0)
+
+    def _passo_concorrente(self, lidas, inicio, fim, reverso, inclusivo, chave, entregues, fronteira):
+        # Um passo de _trecho_concorrente; retorna None se precisar recomeçar
+        inclui_inicio, inclui_fim = inclusivo
+        esquerda, direita = self._posicao_esquerda, self._posicao_direita
+        # Se a última chave entregue não é a da fronteira, nada igual a ela resta adiante:
+        # a descida vai direto à folha do outro lado da fronteira
+        if fronteira is not None and (chave > fronteira if reverso else chave < fronteira):
+            folha, inferior, superior = self._descer_para_leitura(
+                fronteira, lidas, a_esquerda=not reverso, atravessar=True)
+        else:
+            folha, inferior, superior = self._descer_para_leitura(chave, lidas, a_esquerda=not reverso)
+
+        # Pula as entradas já entregues (e as de fora do intervalo), folha a folha
+        pular = entregues
+        while True:
+            if reverso:
+                j = direita(folha.keys, chave)
+                iguais = j - esquerda(folha.keys, chave)
+                j -= min(pular, iguais)
+                if j > 0:
+                    break
+                vizinha = folha.prev_leaf
+            else:
+                i = esquerda(folha.keys, chave)
+                iguais = direita(folha.keys, chave) - i
+                i += min(pular, iguais)
+                if i < len(folha.keys):
+                    break
+                vizinha = folha.next_leaf
+            pular -= min(pular, iguais)
+            if vizinha is None:
+                folha.latch.liberar_leitura()
+                return [], None
+            # Nunca espera por um latch com outro retido (sem risco de deadlock). A folha
+            # anterior é confirmada pelo seu próximo: o ponteiro prev_leaf muda sem o
+            # latch da folha atual (split ou merge da vizinha)
+            if not vizinha.latch.tentar_leitura():
+                folha.latch.liberar_leitura()
+                return None
+            if reverso and vizinha.next_leaf is not folha:
+                vizinha.latch.liberar_leitura()
+                folha.latch.liberar_leitura()
+                return None
+            folha.latch.liberar_leitura()
+            folha = vizinha
+            lidas.add(folha)
+            inferior = superior = None  # Limites desconhecidos: não houve descida
+
+        try:
+            keys = folha.keys
+            if reverso:
+                i = esquerda(keys, inicio) if inclui_inicio else direita(keys, inicio)
+                if i >= j:
+                    return [], None
+                trecho = folha.children[i:j][::-1]
+                ultima = keys[i]
+                iguais = min(j, direita(keys, ultima)) - i
+                continua = i == 0 and folha.prev_leaf is not None and (
+                    inferior is None or inferior > inicio or
+                    (inclui_inicio and inferior == inicio and self.chaves_duplicadas))
+                proxima = inferior
+            else:
+                j = direita(keys, fim) if inclui_fim else esquerda(keys, fim)
+                if j <= i:
+                    return [], None
+                trecho = folha.children[i:j]
+                ultima = keys[j - 1]
+                iguais = j - max(i, esquerda(keys, ultima))
+                continua = j == len(keys) and folha.next_leaf is not None and (
+                    superior is None or superior < fim or (inclui_fim and superior == fim))
+                proxima = superior
+            if not continua:
+                return trecho, None
+            if ultima == chave:
+                iguais += entregues
+            return trecho, (ultima, iguais, proxima)
+        finally:
+            folha.latch.liberar_leitura()
+
+    def _buscar_folha_e_limites(self, chave, a_esquerda=False):
+        # Como _buscar_folha, mas devolve também os limites [inferior, superior) das chaves
+        # que pertencem à folha: os separadores mais próximos à esquerda e à direita do
+        # caminho (None na primeira / na última folha). Com a_esquerda, os limites são
+        # (inferior, superior]: a folha pode conter chaves iguais ao separador da direita.
+        posicao = self._posicao_esquerda if a_esquerda else self._posicao_direita
+        inferior = superior = None
+        if self.pool is None:
+            atual = self.root
+            lidas = self._op.lidas
+            lidas.add(atual)
+            while not atual.is_leaf:
+                idx = posicao(atual.keys, chave)
+                if idx > 0:
+                    inferior = atual.keys[idx - 1]
+                if idx < len(atual.keys):
+                    superior = atual.keys[idx]
+                atual = atual.children[idx]
+                lidas.add(atual)
+            return atual, inferior, superior
+
+        atual = self._ler(self.root)
+        while not atual.is_leaf:
+            idx = posicao(atual.keys, chave)
+            if idx > 0:
+                inferior = atual.keys[idx - 1]
+            if idx < len(atual.keys):
+                superior = atual.keys[idx]
+            filho = atual.children[idx]
+            self._soltar(atual)
+            atual = self._ler(filho)
+        return atual, inferior, superior
+
+    # *********************************************************************************
+    # OPERAÇÕES EM LOTE
+    # As chaves do lote são ordenadas e agrupadas por folha: a árvore é percorrida uma
+    # única vez por folha distinta, todas as chaves daquela folha são tratadas juntas e
+    # só então o split (ou underflow) da folha é resolvido. Os resultados voltam na
+    # ordem da entrada. Com chaves repetidas, buscas e remoções agrupam pela descida à
+    # esquerda e continuam nas folhas seguintes as chaves que se repetem além da folha.
+    # *********************************************************************************
+    def _folhas_do_lote(self, chaves, a_esquerda=False):
+        # Percorre as chaves ordenadas produzindo (folha, i, j): chaves[i:j] pertencem à folha.
+        # Cada grupo desce a partir da raiz, então o consumidor pode alterar a árvore entre
+        # um grupo e outro; no modo em disco, as páginas do grupo são soltas ao final dele.
+        i, n = 0, len(chaves)
+        fatiar = bisect_right if a_esquerda else bisect_left
+        while i < n:
+            folha, _, limite = self._buscar_folha_e_limites(chaves[i], a_esquerda)
+            j = n if limite is None else fatiar(chaves, limite, i, n)
+            yield folha, i, j
+            if self.pool is not None:
+                self._soltar_pinos()
+            i = j
+
+    @staticmethod
+    def _ordenar_lote(chaves):
+        # Índices da entrada em ordem de chave (estável) e as chaves já ordenadas
+        ordem = sorted(range(len(chaves)), key=chaves.__getitem__)
+        return ordem, [chaves[k] for k in ordem]
+
+    @_operacao
+    def buscar_lote(self, chaves):
+        """Busca várias chaves; retorna a lista de registros (ou None) na ordem da entrada."""
+        chaves = list(chaves)
+        resultados = [None] * len(chaves)
+        ordem, ordenadas = self._ordenar_lote(chaves)
+        for folha, i, j in self._folhas_do_lote(ordenadas, self.chaves_duplicadas):
+            for k in range(i, j):
+                pos = self._posicao_esquerda(folha.keys, ordenadas[k])
+                if pos == len(folha.keys) and self.chaves_duplicadas:
+                    # A primeira ocorrência pode estar no início da folha seguinte
+                    proxima = self._folha_da_primeira(ordenadas[k], folha)
+                    if proxima is not folha:
+                        resultados[ordem[k]] = proxima.children[0]
+                elif pos < len(folha.keys) and folha.keys[pos] == ordenadas[k]:
+                    resultados[ordem[k]] = folha.children[pos]
+        return resultados
+
+    @_operacao
+    def inserir_lote(self, registros):
+        """
+        Insere vários registros; retorna uma lista de booleanos na ordem da entrada
+        (False para registros inválidos: número de campos errado ou, com folhas
+        compactas ou em disco, campos que não são inteiros de 32 bits; e, com duplicadas='rejeitar',
+        para chaves já existentes ou repetidas no lote, onde vale a primeira).
+        Com duplicadas='substituir', a última ocorrência de cada chave prevalece.
+        """
+        registros = list(registros)
+        resultados = [False] * len(registros)
+        validos = []
+        for k, registro in enumerate(registros):
+            if not self._registro_valido(registro):
+                continue
+            validos.append(k)
+            resultados[k] = True
+
+        # Ordenação estável: chaves iguais mantêm a ordem de chegada, como em inserir()
+        validos.sort(key=lambda k: registros[k][0])
+        ordenadas = [registros[k][0] for k in validos]
+        inseridos = []
+        for folha, i, j in self._folhas_do_lote(ordenadas):
+            novos = validos[i:j]
+            if self.duplicadas != 'permitir':
+                novos = self._filtrar_existentes(folha, novos, registros, resultados)
+            if novos:
+                self._mesclar_na_folha(folha, [registros[k][0] for k in novos], [registros[k] for k in novos])
+                self._sujo(folha)
+                self._contar(registros=len(novos))
+                inseridos.extend(novos)
+            # Também depois só de sobrescritas, que podem alargar uma folha comprimida
+            if folha.esta_cheio():
+                self._dividir_folha(folha)
+        for campo, indice in self.indices_secundarios.items():
+            indice.inserir_lote([(registros[k][campo], registros[k][0]) for k in inseridos])
+        return resultados
+
+    def _filtrar_existentes(self, folha, lote, registros, resultados):
+        # Aplica a política de duplicadas às entradas do lote (índices em ordem de chave)
+        # que caem nesta folha; devolve só as que ainda precisam ser intercaladas nela
+        novos = []
+        for k in lote:
+            chave = registros[k][0]
+            idx = self._posicao_esquerda(folha.keys, chave)
+            if idx < len(folha.keys) and folha.keys[idx] == chave:
+                if self.duplicadas == 'rejeitar':
+                    print(f"Erro: Chave {chave} já existe.")
+                    resultados[k] = False
+                else:
+                    self._substituir_na_folha(folha, idx, folha.children[idx], registros[k])
+            elif novos and registros[novos[-1]][0] == chave:
+                # Chave repetida dentro do próprio lote
+                if self.duplicadas == 'rejeitar':
+                    print(f"Erro: Chave {chave} já existe.")
+                    resultados[k] = False
+                else:
+                    novos[-1] = k
+            else:
+                novos.append(k)
+        return novos
+
+    def _mesclar_na_folha(self, folha, chaves, registros):
+        # Intercala entradas ordenadas na folha; com chaves iguais, as novas ficam depois
+        if not folha.keys or chaves[0] >= folha.keys[-1]:
+            folha.keys.extend(chaves)
+            folha.children.extend(registros)
+            return
+        pares = list(heapq.merge(zip(folha.keys, folha.children), zip(chaves, registros),
+                                 key=itemgetter(0)))
+        self._preencher_folha(folha, [p[0] for p in pares], [p[1] for p in pares])
+
+    def _dividir_folha(self, folha):
+        # Divide uma folha que recebeu um lote inteiro no menor número de páginas que o
+        # comporta, com ocupação equilibrada; os pedaços são cortados a partir da direita
+        partes = -(-len(folha.keys) // folha.max_keys)
+        for restantes in range(partes, 1, -1):
+            ponto = len(folha.keys) - len(folha.keys) // restantes
+            chave_sobe, novo_no = self._split(folha, ponto)
+            self._promover(folha, chave_sobe, novo_no)
+
+    @_operacao
+    def remover_lote(self, chaves):
+        """
+        Remove várias chaves (uma ocorrência por chave informada, a partir da primeira);
+        retorna uma lista de booleanos na ordem da entrada indicando se cada chave foi
+        encontrada.
+        """
+        chaves = list(chaves)
+        resultados = [False] * len(chaves)
+        removidos = []  # Registros retirados, para atualizar os índices secundários
+        restantes = []  # Posições do lote cujas chaves podem se repetir além da folha
+        ordem, ordenadas = self._ordenar_lote(chaves)
+        for folha, i, j in self._folhas_do_lote(ordenadas, self.chaves_duplicadas):
+            if self.chaves_duplicadas:
+                # Chaves a partir da última da folha podem ter cópias nas folhas seguintes
+                inicio = bisect_left(ordenadas, folha.keys[-1], i, j) if folha.keys else i
+                restantes.extend(range(inicio, j))
+            # Uma passada pela folha, descartando as entradas que casam com o lote
+            chaves_folha, registros_folha = [], []
+            k = i
+            for chave, registro in zip(folha.keys, folha.children):
+                while k < j and ordenadas[k] < chave:
+                    k += 1
+                if k < j and ordenadas[k] == chave:
+                    resultados[ordem[k]] = True
+                    if self.indices_secundarios:
+                        removidos.append(registro)
+                    k += 1
+                    continue
+                chaves_folha.append(chave)
+                registros_folha.append(registro)
+            if len(chaves_folha) == len(folha.keys):
+                continue
+
+            self._contar(registros=len(chaves_folha) - len(folha.keys))
+            self._preencher_folha(folha, chaves_folha, registros_folha)
+            self._sujo(folha)
+            if self._ref(folha) != self.root and self._folha_com_underflow(folha):
+                self._tratar_underflow(folha)
+        for k in restantes:
+            # Ocorrências que faltaram na folha do grupo: uma descida por cópia, já que as
+            # remoções do lote podem ter fundido ou redistribuído as folhas
+            if not resultados[ordem[k]]:
+                folha = self._folha_da_primeira(ordenadas[k])
+                resultados[ordem[k]] = self._remover_da_folha(folha, ordenadas[k])
+        for campo, indice in self.indices_secundarios.items():
+            for registro in removidos:
+                indice._remover_exato((registro[campo], registro[0]))
+        return resultados
+
+    # *********************************************************************************
+    # ÍNDICES SECUNDÁRIOS E CONSULTAS
+    # Cada índice secundário é uma árvore B+ de pares (valor do campo, chave primária),
+    # com chaves repetidas permitidas. consultar() escolhe o caminho pelo predicado:
+    # busca pela chave primária, sondagem de um índice secundário ou varredura das folhas.
+    # *********************************************************************************
+    def criar_indice_secundario(self, campo):
+        """
+        Declara (ou reconstrói) um índice secundário sobre registro[campo], campo > 0.
+        O índice é montado pela carga em lote a partir dos registros atuais e fica em
+        memória, mesmo com a árvore em disco (ao reabrir o arquivo, declare-o de novo).
+        Retorna o número de entradas indexadas.
+        """
+        if not 0 < campo < self.num_fields:
+            raise ValueError(f"Campo inválido para índice secundário: {campo} "
+                             f"(use de 1 a {self.num_fields - 1}; o campo 0 é a chave primária).")
+        if self.concorrente:
+            raise ValueError("Índices secundários não são suportados no modo concorrente.")
+        indice = BPlusTree(2, self.page_size, busca=self.busca, verboso=False,
+                           folhas_compactas=self.folhas_compactas,
+                           folhas_comprimidas=self.folhas_comprimidas)
+        pares = sorted((registro[campo], registro[0])
+                       for registro in self.iterar_intervalo(-math.inf, math.inf))
+        total = indice.carregar_em_lote(pares)
+        self.indices_secundarios[campo] = indice
+        return total
+
+    def remover_indice_secundario(self, campo):
+        """Descarta o índice secundário do campo; retorna False se ele não existia."""
+        return self.indices_secundarios.pop(campo, None) is not None
+
+    def plano_consulta(self, campo):
+        """Caminho que consultar() usa para o campo: 'primaria', 'secundaria' ou 'varredura'."""
+        if campo == 0:
+            return 'primaria'
+        if campo in self.indices_secundarios:
+            return 'secundaria'
+        return 'varredura'
+
+    def consultar(self, campo, inicio, fim=None):
+        """
+        Registros com inicio <= registro[campo] <= fim (igualdade se fim for omitido).
+        - campo 0: busca pela chave primária, em ordem de chave
+        - campo com índice secundário: sonda o índice e busca as chaves primárias em
+          lote, em ordem do campo (empates sem ordem definida)
+        - demais campos: varredura de todas as folhas, em ordem de chave primária
+        """
+        if fim is None:
+            fim = inicio
+        plano = self.plano_consulta(campo)
+        if plano == 'primaria':
+            return self.buscar_intervalo(inicio, fim)
+        if plano == 'secundaria':
+            chaves = [chave for _, chave in self.indices_secundarios[campo].iterar_intervalo(inicio, fim)]
+            if not self.chaves_duplicadas:
+                return self.buscar_lote(chaves)
+            # Com chaves primárias repetidas, o índice guarda só a chave: cada uma pode
+            # corresponder a vários registros, e nem todos satisfazem o filtro
+            registros = []
+            for chave in dict.fromkeys(chaves):
+                registros.extend(registro for registro in self.buscar_intervalo(chave, chave)
+                                 if inicio <= registro[campo] <= fim)
+            registros.sort(key=lambda registro: registro[campo])
+            return registros
+        return [registro for registro in self.iterar_intervalo(-math.inf, math.inf)
+                if inicio <= registro[campo] <= fim]
+
+    @_operacao
+    def _remover_exato(self, registro):
+        # Remove a entrada igual a 'registro' entre as de mesma chave (índices com chaves
+        # repetidas): parte da folha mais à esquerda e segue as vizinhas enquanto a chave se repete
+        chave = registro[0]
+        folha = self._buscar_folha(chave, a_esquerda=True)
+        i = self._posicao_esquerda(folha.keys, chave)
+        while True:
+            while i < len(folha.keys) and folha.keys[i] == chave:
+                if folha.children[i] == registro:
+                    folha.keys.pop(i)
+                    folha.children.pop(i)
+                    self._sujo(folha)
+                    self._contar(registros=-1)
+                    if self._ref(folha) != self.root and self._folha_com_underflow(folha):
+                        self._tratar_underflow(folha)
+                    return True
+                i += 1
+            if i < len(folha.keys) or folha.next_leaf is None:
+                return False
+            folha = self._ler(folha.next_leaf)
+            i = 0
+
+    # *********************************************************************************
+    # ESTATÍSTICAS
+    # Lidas em O(1): os contadores são atualizados pelas próprias operações (inserção,
+    # remoção, split, merge, carga em lote) em vez de percorrer a árvore.
+    # *********************************************************************************
+    def __len__(self):
+        return self.num_registros
+
+    def estatisticas(self):
+        """
+        Forma atual da árvore: registros, altura, nós por nível (da raiz às folhas),
+        ocupação média das folhas e dos nós internos e os splits/merges/redistribuições
+        contados em self.io (desde a criação ou io.zerar()).
+        """
+        niveis = list(self._nos_por_nivel)
+        folhas, internos = niveis[0], sum(niveis[1:])
+        filhos = sum(niveis[:-1])  # Cada nó abaixo da raiz é filho de um nó interno
+        return {
+            'registros': self.num_registros,
+            'altura': len(niveis),
+            'nos_por_nivel': niveis[::-1],
+            'folhas': folhas,
+            'nos_internos': internos,
+            'ocupacao_folhas': self.num_registros / (folhas * self.leaf_max_keys),
+            'ocupacao_internos': filhos / (internos * self.internal_order) if internos else 0.0,
+            'splits': self.io.splits,
+            'merges': self.io.merges,
+            'redistribuicoes': self.io.redistribuicoes,
+        }
+
+    @_operacao
+    def _recontar(self):
+        # Recalcula os contadores percorrendo a árvore nível a nível (só ao reabrir
+        # um arquivo gravado antes de as estatísticas fazerem parte dos metadados)
+        niveis, registros = [], 0
+        atual = [self.root]
+        while atual:
+            niveis.append(len(atual))
+            proximo = []
+            for ref in atual:
+                no = self._ler(ref)
+                if no.is_leaf:
+                    registros += len(no.keys)
+                else:
+                    proximo.extend(no.children)
+                self._soltar(no)
+            atual = proximo
+        self.num_registros = registros
+        self._nos_por_nivel = niveis[::-1]
+
+    @_operacao
     def exibir(self):
         print("\n--- Estrutura da Árvore (Nível a Nível) ---")
         if not self.root:
             print("Árvore vazia.")
             return
             
-        fila = [(self.root, 0)]
+        fila = deque([(self.root, 0)])
         ultimo_nivel = -1
         while fila:
-            atual, nivel = fila.pop(0)
+            ref, nivel = fila.popleft()
+            atual = self._ler(ref)
             if nivel != ultimo_nivel:
                 print(f"\n[Nível {nivel}]:", end=" ")
                 ultimo_nivel = nivel
             
             tipo = "Folha" if atual.is_leaf else "Índice"
-            print(f"({tipo}: {atual.keys})", end="  ")
+            print(f"({tipo}: {list(atual.keys)})", end="  ")
             
             if not atual.is_leaf:
                 for filho in atual.children:
                     fila.append((filho, nivel + 1))
+            self._soltar(atual)
         print("\n")
 
 #### fim da classe ####
 
-# --- FUNÇÃO PARA PROCESSAR CSV ---
-def processar_csv(arquivo_csv, arvore):
+class BPlusTreeMapeada:
     """
-    Lê o arquivo CSV e executa as operações automaticamente.
-    Formato esperado: OP,A1,A2,A3
-    - +,val1,val2,val3 (INSERÇÃO)
-    - -,chave (REMOÇÃO)
-    - ?,chave (BUSCA)
+    Árvore B+ somente leitura servida direto de um snapshot mapeado em memória.
+    Nada é desserializado na abertura: cada busca lê só as páginas do caminho, faz a
+    busca binária sobre as chaves na própria região mapeada e monta apenas as tuplas
+    dos registros devolvidos. Use fechar() ao terminar (ou o bloco 'with').
     """
-    # Variáveis para armazenar tempos
-    tempos_insercao = []
-    tempos_delecao = []
-    tempos_busca = []
-    
-    try:
-        with open(arquivo_csv, 'r', encoding='utf-8') as arquivo:
-            leitor = csv.reader(arquivo)
-            
-            # Pula o cabeçalho se existir
-            primeira_linha = next(leitor, None)
-            if primeira_linha and primeira_linha[0].strip().upper() == 'OP':
-                print(f"Cabeçalho detectado: {primeira_linha}\n")
-            else:
-                # Se não é cabeçalho, processa essa linha
-                if primeira_linha:
-                    processar_linha(primeira_linha, arvore, tempos_insercao, tempos_delecao, tempos_busca)
-            
-            # Contadores
-            insercoes = 0
-            deletes = 0
-            buscas = 0
-            
-            # Processa cada linha
-            for linha in leitor:
-                if not linha or not linha[0]:
-                    continue
-                
-                operacao = linha[0].strip()
-                
-                if operacao == '+':
-                    sucesso, tempo = processar_insercao(linha, arvore)
-                    insercoes += sucesso
-                    if sucesso:
-                        tempos_insercao.append(tempo)
-                elif operacao == '-':
-                    sucesso, tempo = processar_delete(linha, arvore)
-                    deletes += sucesso
-                    if sucesso:
-                        tempos_delecao.append(tempo)
-                elif operacao == '?':
-                    sucesso, tempo = processar_busca(linha, arvore)
-                    buscas += sucesso
-                    if sucesso:
-                        tempos_busca.append(tempo)
-            
-            # Resumo final com estatísticas de tempo
-            print("\n" + "="*60)
-            print("RESUMO DAS OPERAÇÕES")
-            print("="*60)
-            print(f"Total de Inserções: {insercoes}")
-            print(f"Total de Deleções: {deletes}")
-            print(f"Total de Buscas: {buscas}")
-            print("="*60)
-            
-            # Estatísticas de tempo
-            print("\nESTATÍSTICAS DE TEMPO DE EXECUÇÃO")
-            print("="*60)
-            
-            if tempos_insercao:
-                print(f"\nINSERÇÕES:")
-                print(f"  - Tempo total: {sum(tempos_insercao)*1000:.4f} ms")
-                print(f"  - Tempo médio: {(sum(tempos_insercao)/len(tempos_insercao))*1000:.4f} ms")
-                print(f"  - Tempo mínimo: {min(tempos_insercao)*1000:.4f} ms")
-                print(f"  - Tempo máximo: {max(tempos_insercao)*1000:.4f} ms")
-            
-            if tempos_delecao:
-                print(f"\nDELEÇÕES:")
-                print(f"  - Tempo total: {sum(tempos_delecao)*1000:.4f} ms")
-                print(f"  - Tempo médio: {(sum(tempos_delecao)/len(tempos_delecao))*1000:.4f} ms")
-                print(f"  - Tempo mínimo: {min(tempos_delecao)*1000:.4f} ms")
-                print(f"  - Tempo máximo: {max(tempos_delecao)*1000:.4f} ms")
-            
-            if tempos_busca:
-                print(f"\nBUSCAS:")
-                print(f"  - Tempo total: {sum(tempos_busca)*1000:.4f} ms")
-                print(f"  - Tempo médio: {(sum(tempos_busca)/len(tempos_busca))*1000:.4f} ms")
-                print(f"  - Tempo mínimo: {min(tempos_busca)*1000:.4f} ms")
-                print(f"  - Tempo máximo: {max(tempos_busca)*1000:.4f} ms")
-            
-            print("="*60)
-            
-    except FileNotFoundError:
-        print(f"ERRO: Arquivo '{arquivo_csv}' não encontrado!")
-    except Exception as e:
-        print(f"ERRO ao processar CSV: {e}")
-
-def processar_linha(linha, arvore, tempos_insercao, tempos_delecao, tempos_busca):
-    """Processa uma única linha do CSV"""
-    if not linha or not linha[0]:
-        return
-    
-    operacao = linha[0].strip()
-    
-    if operacao == '+':
-        sucesso, tempo = processar_insercao(linha, arvore)
-        if sucesso:
-            tempos_insercao.append(tempo)
-    elif operacao == '-':
-        sucesso, tempo = processar_delete(linha, arvore)
-        if sucesso:
-            tempos_delecao.append(tempo)
-    elif operacao == '?':
-        sucesso, tempo = processar_busca(linha, arvore)
-        if sucesso:
-            tempos_busca.append(tempo)
-
-def processar_insercao(linha, arvore):
-    """Processa uma operação de inserção (+,A1,A2,A3)"""
-    try:
-        valores = [int(v.strip()) for v in linha[1:] if v.strip()]
-        if len(valores) == arvore.num_fields:
-            registro = tuple(valores)
-            
-            # Marca o tempo de início
-            inicio = time.perf_counter()
-            arvore.inserir(registro)
-            # Marca o tempo de fim
-            fim = time.perf_counter()
-            tempo_execucao = fim - inicio
-            
-            print(f"✓ INSERÇÃO (+): {registro} - Tempo: {tempo_execucao*1000:.4f} ms")
-            return 1, tempo_execucao
-        else:
-            print(f"✗ INSERÇÃO (+): Número incorreto de campos. Esperado {arvore.num_fields}, recebido {len(valores)}")
-            return 0, 0
-    except ValueError as e:
-        print(f"✗ INSERÇÃO (+): Erro ao converter valores - {e}")
-        return 0, 0
-
-def processar_delete(linha, arvore):
-    """Processa uma operação de deleção (-,chave)"""
-    try:
-        chave = int(linha[1].strip())
-        
-        # Marca o tempo de início
-        inicio = time.perf_counter()
-        resultado = arvore.remover(chave)
-        # Marca o tempo de fim
-        fim = time.perf_counter()
-        tempo_execucao = fim - inicio
-        
-        if resultado:
-            print(f"✓ REMOÇÃO (-): Chave {chave} removida - Tempo: {tempo_execucao*1000:.4f} ms")
-            return 1, tempo_execucao
-        else:
-            print(f"✗ REMOÇÃO (-): Chave {chave} não encontrada")
-            return 0, 0
-    except (ValueError, IndexError) as e:
-        print(f"✗ REMOÇÃO (-): Erro - {e}")
-        return 0, 0
-
-def processar_busca(linha, arvore):
-    """Processa uma operação de busca (?,chave)"""
-    try:
-        chave = int(linha[1].strip())
-        
-        # Marca o tempo de início
-        inicio = time.perf_counter()
-        resultado = arvore.buscar(chave)
-        # Marca o tempo de fim
-        fim = time.perf_counter()
-        tempo_execucao = fim - inicio
-        
-        if resultado:
-            print(f"✓ BUSCA (?): Chave {chave} -> {resultado} - Tempo: {tempo_execucao*1000:.4f} ms")
-            return 1, tempo_execucao
+    def __init__(self, caminho):
+        self.paginas = PaginasMapeadas(caminho)
+        extras = self.paginas.extras
+        # [num_campos, raiz] ou [num_campos, raiz, registros, nós por nível...] (a raiz é
+        # o único nó do último nível)
+        if not (len(extras) == 2 or (len(extras) >= 4 and extras[-1] == 1)):
+            self.paginas.fechar()
+            raise ValueError(f"'{caminho}' não é um snapshot de Árvore B+.")
+        self.num_fields, self.root = extras[:2]
+        self.page_size = self.paginas.page_size
+        self.io = ContadorIO()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *erro):
+        self.fechar()
+
+    def fechar(self):
+        self.paginas.fechar()
+
+    def __len__(self):
+        # Conta os registros percorrendo as folhas (só os cabeçalhos), sem confiar
+        # no total gravado nos metadados
+        self.io.iniciar_operacao()
+        page_id, total, proxima, _ = self._buscar_folha(-math.inf, a_esquerda=True)
+        while proxima is not None:
+            _, n, proxima, _ = self._cabecalho(proxima)
+            total += n
+        return total
+
+    def _cabecalho(self, page_id):
+        self.io.leituras += 1
+        tipo, n, _, proxima, anterior = self.paginas.inteiros(page_id, 0, CAMPOS_CABECALHO)
+        return (tipo, n, None if proxima == SEM_PAGINA else proxima,
+                None if anterior == SEM_PAGINA else anterior)
+
+    def _buscar_folha(self, chave, a_esquerda=False):
+        # Desce da raiz até a folha: devolve (página, num_chaves, próxima, anterior).
+        # Pela direita, chega à última folha que pode conter a chave; com a_esquerda,
+        # à primeira (o snapshot pode guardar chaves repetidas em várias folhas).
+        posicao = bisect_left if a_esquerda else bisect_right
+        page_id = self.root
+        while True:
+            tipo, n, proxima, anterior = self._cabecalho(page_id)
+            if tipo == PAGINA_FOLHA:
+                return page_id, n, proxima, anterior
+            idx = posicao(self.paginas.inteiros(page_id, CABECALHO_PAGINA, n), chave)
+            page_id = self.paginas.inteiros(page_id, CABECALHO_PAGINA + (n + idx) * INT_SIZE, 1)[0]
+
+    def _registro(self, page_id, n, i):
+        deslocamento = CABECALHO_PAGINA + (n + i * self.num_fields) * INT_SIZE
+        return tuple(self.paginas.inteiros(page_id, deslocamento, self.num_fields))
+
+    def buscar(self, chave):
+        # Primeira ocorrência da chave, como em BPlusTree.buscar: pela esquerda, a folha
+        # pode terminar antes da chave, e então ela só pode estar no início da seguinte
+        self.io.iniciar_operacao()
+        page_id, n, proxima, _ = self._buscar_folha(chave, a_esquerda=True)
+        chaves = self.paginas.inteiros(page_id, CABECALHO_PAGINA, n)
+        i = bisect_left(chaves, chave)
+        if i == n and proxima is not None:
+            page_id, i = proxima, 0
+            _, n, _, _ = self._cabecalho(page_id)
+            chaves = self.paginas.inteiros(page_id, CABECALHO_PAGINA, n)
+        if i < n and chaves[i] == chave:
+            return self._registro(page_id, n, i)
+        return None
+
+    def buscar_intervalo(self, inicio, fim):
+        """Retorna todos os registros cuja chave está entre inicio e fim."""
+        return list(self.iterar_intervalo(inicio, fim))
+
+    def iterar_intervalo(self, inicio, fim, limite=None, reverso=False, inclusivo=True):
+        """Mesma semântica de BPlusTree.iterar_intervalo, lendo as folhas do mapeamento."""
+        if isinstance(inclusivo, bool):
+            inclusivo = (inclusivo, inclusivo)
+        if (limite is not None and limite <= 0) or inicio > fim:
+            return
+
+        self.io.iniciar_operacao()
+        if reverso:
+            page_id, n, proxima, anterior = self._buscar_folha(fim)
         else:
-            print(f"✗ BUSCA (?): Chave {chave} não encontrada")
-            return 0, 0
-    except (ValueError, IndexError) as e:
-        print(f"✗ BUSCA (?): Erro - {e}")
-        return 0, 0
+            page_id, n, proxima, anterior = self._buscar_folha(inicio, a_esquerda=True)
+        primeira = True
+        entregues = 0
+        while True:
+            i, j = _limites_do_trecho(self.paginas.inteiros(page_id, CABECALHO_PAGINA, n), inicio, fim,
+                                      reverso, inclusivo, primeira, bisect_left, bisect_right)
+            for k in (range(j - 1, i - 1, -1) if reverso else range(i, j)):
+                yield self._registro(page_id, n, k)
+                entregues += 1
+                if entregues == limite:
+                    return
+            if reverso:
+                seguinte = anterior if i == 0 else None
+            else:
+                seguinte = proxima if j == n else None
+            if seguinte is None:
+                return
+            page_id = seguinte
+            _, n, proxima, anterior = self._cabecalho(page_id)
+            primeira = False
 
 # --- PROGRAMA PRINCIPAL ---
 if __name__ == "__main__":
@@ -1,17 +1,76 @@
-import csv
-import time
+import os
+
+from paginacao_bd import ArquivoPaginas, PaginasMapeadas, inteiros_para_bytes
+from instrumentacao_bd import ContadorIO
+from replay_bd import processar_csv
 
 # --- Constantes de Configuração ---
 INT_SIZE = 4      # Tamanho de um inteiro em bytes
+TAMANHO_PAGINA_PADRAO = 4096  # Página usada para contabilizar o I/O da tabela
+LIMITE_SONDAGENS = 64  # Distribuição de sondagens: a última faixa junta as sequências >= 64
+
+# Políticas de colisão da HashLinear
+POLITICAS_COLISAO = ('linear', 'robin_hood')
+
+# Estado de cada posição da tabela quando gravada em bytes (snapshot, versão NumPy)
+VAZIO = 0
+OCUPADO = 1
+REMOVIDO = 2  # Remoção lógica (TOMBSTONE)
+
+# Snapshot da HashLinear: página 0 com os metadados do arquivo de páginas e os extras
+# [ESTRUTURA_HASH, num_campos, capacidade, count, tombstones, política, slots/página,
+#  tamanho_pagina]; cada página seguinte guarda um bloco de slots consecutivos:
+# [estado de cada slot (1 byte, completado até múltiplo de 4)] + [registros int32]
+ESTRUTURA_HASH = 0x31485348  # 'HSH1' em little-endian
+METADADOS_SNAPSHOT_MIN = 128  # Página mínima do snapshot (cabe a página de metadados)
+
+
+def _layout_snapshot(tamanho_registro, tamanho_pagina):
+    # Quantos slots cabem por página do snapshot e o tamanho de página efetivo
+    tamanho_pagina = max(tamanho_pagina, METADADOS_SNAPSHOT_MIN, INT_SIZE + tamanho_registro)
+    slots = tamanho_pagina // (tamanho_registro + 1)
+    while slots > 1 and _bytes_estados(slots) + slots * tamanho_registro > tamanho_pagina:
+        slots -= 1
+    return slots, tamanho_pagina
+
+
+def _bytes_estados(slots):
+    # Área de estados da página, alinhada para os inteiros que vêm depois
+    return -(-slots // INT_SIZE) * INT_SIZE
 
 class HashLinear:
     """
     Implementação de Tabela Hash com Tratamento de Colisão Linear (Linear Probing).
-    Simula um arquivo de tamanho fixo definido por bytes.
+    Simula um arquivo definido por bytes, dividido em páginas de 'tamanho_pagina'
+    bytes (usadas na contagem de I/O: sondar posições da mesma página custa uma
+    única leitura).
+
+    Manutenção automática (rehash incremental):
+    - Se a ocupação passar de 'fator_carga_max', a tabela dobra de capacidade.
+    - Se os TOMBSTONES passarem de 'limite_tombstones' da capacidade, a tabela é
+      compactada (reconstruída com a mesma capacidade, sem remoções lógicas).
+    Em ambos os casos uma nova tabela é criada e cada operação seguinte migra
+    'passos_rehash' posições da antiga, até esvaziá-la; enquanto isso, buscas e
+    remoções consultam as duas tabelas. Use None nos limites para desativá-los
+    (fator_carga_max=None mantém o tamanho fixo original).
+
+    Política de colisão ('politica'):
+    - 'linear': sondagem linear clássica com remoção lógica (TOMBSTONE).
+    - 'robin_hood': na inserção, o registro que está mais longe da sua posição ideal
+      toma o slot de quem está mais perto ("rouba dos ricos"); a busca termina cedo
+      ao passar por um registro mais perto de casa do que a distância já percorrida;
+      a remoção desloca os registros seguintes uma posição para trás (backward shift),
+      dispensando TOMBSTONES na tabela atual.
     """
-    def __init__(self, num_campos, tamanho_total_bytes):
+    def __init__(self, num_campos, tamanho_total_bytes, tamanho_pagina=TAMANHO_PAGINA_PADRAO,
+                 fator_carga_max=0.9, limite_tombstones=0.25, passos_rehash=8, politica='linear',
+                 verboso=True):
+        if politica not in POLITICAS_COLISAO:
+            raise ValueError(f"Política de colisão inválida: '{politica}'. Opções: {', '.join(POLITICAS_COLISAO)}")
+        self.politica = politica
         self.num_fields = num_campos
         self.total_bytes = tamanho_total_bytes
+        self.page_size = tamanho_pagina
         
         # Objeto sentinela para remoção lógica (Lazy Deletion)
         self.TOMBSTONE = object()
@@ -28,70 +87,275 @@ class HashLinear:
         if self.capacity < 1: 
             self.capacity = 1
 
+        # Quantos slots cabem em uma página (para a contagem de I/O)
+        self.slots_por_pagina = max(1, tamanho_pagina // self.record_size)
+
         # Inicializa a tabela com None
         self.table = [None] * self.capacity
         self.count = 0
+        self.tombstones = 0   # Remoções lógicas presentes na tabela atual
+
+        # Limites da manutenção automática
+        self.fator_carga_max = fator_carga_max
+        self.limite_tombstones = limite_tombstones
+        self.passos_rehash = max(1, passos_rehash)
+
+        # Estado do rehash incremental
+        self._antiga = None   # Tabela sendo esvaziada (None se não há rehash em andamento)
+        self._cursor = 0      # Próxima posição da tabela antiga a migrar
+        self.rehashes = 0
+
+        # Estatísticas mantidas pelas operações (estatisticas() em O(1)):
+        # slots não livres e agrupamentos (sequências de slots não livres) da tabela
+        # atual, e quantas sequências de sondagem examinaram n posições
+        self._ocupadas = 0
+        self.agrupamentos = 0
+        self.sondagens_por_busca = [0] * (LIMITE_SONDAGENS + 1)
+        self._soma_sondagens = 0
+
+        # Contadores de I/O lógico (páginas lidas/escritas e sondagens por operação)
+        self.io = ContadorIO()
+
+        if verboso:
+            print(f"--- Hash Linear Inicializada ---")
+            print(f"Espaço Total: {tamanho_total_bytes} bytes | Campos por registro: {num_campos}")
+            print(f"Capacidade da Tabela: {self.capacity} registros")
+            print(f"Política de colisão: {politica}")
+
+    def _hash(self, chave, capacidade):
+        return chave % capacidade
+
+    def fator_carga(self):
+        return self.count / self.capacity
+
+    def __len__(self):
+        return self.count
+
+    def _paginas(self, inicio, quantidade, capacidade):
+        # Quantas páginas distintas cobrem 'quantidade' posições consecutivas a partir
+        # de 'inicio' (a sequência pode dar a volta na tabela)
+        if not quantidade:
+            return 0
+        pagina_inicial = inicio // self.slots_por_pagina
+        pagina_final = (inicio + quantidade - 1) // self.slots_por_pagina
+        total_paginas = -(-capacidade // self.slots_por_pagina)
+        return min(pagina_final - pagina_inicial + 1, total_paginas)
+
+    def _contabilizar(self, inicio, sondagens, escrita, capacidade):
+        # Converte as 'sondagens' posições examinadas a partir de 'inicio' em páginas lidas
+        self.io.leituras += self._paginas(inicio, sondagens, capacidade)
+        self.io.sondagens += sondagens
+        self.sondagens_por_busca[min(sondagens, LIMITE_SONDAGENS)] += 1
+        self._soma_sondagens += sondagens
+        if escrita:
+            self.io.escritas += 1
+
+    def _sondar(self, tabela, chave):
+        # Percorre a sequência de sondagem da chave até um slot livre (None).
+        # Retorna (posição da chave ou None, 1ª posição reutilizável ou None).
+        # Um TOMBSTONE pode ser reutilizado, mas não encerra a busca: a chave
+        # pode estar mais adiante na sequência.
+        capacidade = len(tabela)
+        idx = self._hash(chave, capacidade)
+        start_idx = idx
+        livre = None
+        sondagens = 0
+
+        while True:
+            item = tabela[idx]
+            sondagens += 1
+            if item is None:
+                if livre is None:
+                    livre = idx
+                break
+            if item is self.TOMBSTONE:
+                if livre is None:
+                    livre = idx
+            elif item[0] == chave:
+                self._contabilizar(start_idx, sondagens, False, capacidade)
+                return idx, livre
+
+            # Sondagem Linear
+            idx = (idx + 1) % capacidade
+            if idx == start_idx:
+                break
+
+        self._contabilizar(start_idx, sondagens, False, capacidade)
+        return None, livre
+
+    def _contar_slot(self, idx, delta):
+        # O slot 'idx' da tabela atual passou de livre a ocupado (delta=1) ou de ocupado
+        # a livre (delta=-1). Com os dois vizinhos livres, o slot cria (ou desfaz) um
+        # agrupamento; com os dois ocupados, une dois agrupamentos (ou separa um).
+        tabela = self.table
+        self._ocupadas += delta
+        if self._ocupadas >= len(tabela) - (delta < 0):
+            # Tabela cheia (ou a um slot de cheia): um único agrupamento, que dá a volta
+            self.agrupamentos = 1 if self._ocupadas else 0
+            return
+        vizinhos = (tabela[idx - 1] is not None) + (tabela[(idx + 1) % len(tabela)] is not None)
+        self.agrupamentos += delta * (1 - vizinhos)
+
+    def _distancia(self, chave, idx, capacidade):
+        # Quantas posições o registro está deslocado da sua posição ideal
+        return (idx - self._hash(chave, capacidade)) % capacidade
+
+    def _sondar_robin_hood(self, tabela, chave):
+        # Busca com término antecipado: pelo invariante do Robin Hood, se o registro
+        # na posição atual está mais perto de casa do que a distância já percorrida,
+        # a chave não pode estar adiante. TOMBSTONES só existem na tabela antiga
+        # durante um rehash e são apenas saltados.
+        capacidade = len(tabela)
+        idx = self._hash(chave, capacidade)
+        start_idx = idx
+        distancia = 0
+
+        while distancia < capacidade:
+            item = tabela[idx]
+            if item is None:
+                break
+            if item is not self.TOMBSTONE:
+                if item[0] == chave:
+                    self._contabilizar(start_idx, distancia + 1, False, capacidade)
+                    return idx
+                if self._distancia(item[0], idx, capacidade) < distancia:
+                    break
+            idx = (idx + 1) % capacidade
+            distancia += 1
+
+        self._contabilizar(start_idx, min(distancia + 1, capacidade), False, capacidade)
+        return None
+
+    def _colocar_robin_hood(self, tabela, registro):
+        # Inserção Robin Hood de um registro que sabidamente não está na tabela
+        capacidade = len(tabela)
+        idx = self._hash(registro[0], capacidade)
+        start_idx = idx
+        distancia = 0
+        item = registro
+
+        while True:
+            atual = tabela[idx]
+            if atual is None:
+                tabela[idx] = item
+                if tabela is self.table:
+                    self._contar_slot(idx, 1)
+                break
+            distancia_atual = self._distancia(atual[0], idx, capacidade)
+            if distancia_atual < distancia:
+                # O residente está mais perto de casa: cede o slot e segue adiante
+                tabela[idx], item = item, atual
+                distancia = distancia_atual
+            idx = (idx + 1) % capacidade
+            distancia += 1
+
+        modificadas = (idx - start_idx) % capacidade + 1
+        self.io.escritas += self._paginas(start_idx, modificadas, capacidade)
+
+    def _remover_com_deslocamento(self, tabela, idx):
+        # Backward shift: puxa uma posição para trás os registros seguintes que não
+        # estão na sua posição ideal, até um slot livre ou um registro já em casa
+        capacidade = len(tabela)
+        start_idx = idx
+        proximo = (idx + 1) % capacidade
+        while True:
+            item = tabela[proximo]
+            if item is None or self._distancia(item[0], proximo, capacidade) == 0:
+                break
+            tabela[idx] = item
+            idx = proximo
+            proximo = (proximo + 1) % capacidade
+        tabela[idx] = None
+        self._contar_slot(idx, -1)  # (Só a tabela atual usa o backward shift)
+
+        modificadas = (idx - start_idx) % capacidade + 1
+        self.io.escritas += self._paginas(start_idx, modificadas, capacidade)
 
-        print(f"--- Hash Linear Inicializada ---")
-        print(f"Espaço Total: {tamanho_total_bytes} bytes | Campos por registro: {num_campos}")
-        print(f"Capacidade da Tabela: {self.capacity} registros")
+    def _ocupar(self, idx, registro):
+        # Grava o registro num slot livre (None) ou removido (TOMBSTONE) da tabela atual
+        anterior = self.table[idx]
+        self.table[idx] = registro
+        if anterior is self.TOMBSTONE:
+            self.tombstones -= 1
+        else:
+            self._contar_slot(idx, 1)
 
-    def _hash(self, chave):
-        return chave % self.capacity
+    def _procurar(self, tabela, chave):
+        if self.politica == 'robin_hood':
+            return self._sondar_robin_hood(tabela, chave)
+        return self._sondar(tabela, chave)[0]
 
     # *********************************************************************************
     # MÉTODO DE INSERÇÃO
     # *********************************************************************************
     def inserir(self, registro):
+        # Retorna True se o registro foi gravado e False se foi recusado
+        self.io.iniciar_operacao()
         # Validação simples dos campos
         if len(registro) != self.num_fields:
             print(f"Erro: O registro deve ter exatamente {self.num_fields} campos.")
-            return
+            return False
 
         if self.count >= self.capacity:
             print("Erro: Tabela Hash CHEIA (Overflow). Não é possível inserir.")
-            return
+            return False
 
+        self._migrar()
         chave = registro[0] # A chave primária é o primeiro campo
-        idx = self._hash(chave)
-        start_idx = idx
 
-        # Busca slot vazio ou verifica duplicata
-        while self.table[idx] is not None and self.table[idx] is not self.TOMBSTONE:
-            # Se encontrar a chave, atualiza (ou rejeita duplicata)
-            if self.table[idx][0] == chave:
+        # Verifica duplicata (também na tabela antiga, durante um rehash)
+        if self._antiga is not None and self._procurar(self._antiga, chave) is not None:
+            print(f"Erro: Chave {chave} já existe (tabela em rehash).")
+            return False
+
+        if self.politica == 'robin_hood':
+            idx = self._sondar_robin_hood(self.table, chave)
+            if idx is not None:
                 print(f"Erro: Chave {chave} já existe na posição {idx}.")
-                return
-            
-            # Sondagem Linear
-            idx = (idx + 1) % self.capacity
-            
-            # Se deu a volta completa (segurança, embora o check de count evite isso)
-            if idx == start_idx:
+                return False
+            self._colocar_robin_hood(self.table, registro)
+        else:
+            idx, livre = self._sondar(self.table, chave)
+            if idx is not None:
+                print(f"Erro: Chave {chave} já existe na posição {idx}.")
+                return False
+            if livre is None:
                 print("Erro crítico: Tabela cheia (loop detectado).")
-                return
+                return False
+
+            # Insere no slot encontrado (None ou Tombstone)
+            self._ocupar(livre, registro)
+            self.io.escritas += 1
 
-        # Insere no slot encontrado (None ou Tombstone)
-        self.table[idx] = registro
         self.count += 1
+        self._verificar_limites()
+        return True
 
     # *********************************************************************************
     # MÉTODO DE REMOÇÃO (Lazy Deletion)
     # *********************************************************************************
     def remover(self, chave):
-        idx = self._hash(chave)
-        start_idx = idx
+        self.io.iniciar_operacao()
+        self._migrar()
 
-        while self.table[idx] is not None:
-            # Se não é Tombstone e a chave bate
-            if self.table[idx] is not self.TOMBSTONE and self.table[idx][0] == chave:
-                self.table[idx] = self.TOMBSTONE # Marca como deletado logicamente
+        for tabela in (self.table, self._antiga):
+            if tabela is None:
+                continue
+            idx = self._procurar(tabela, chave)
+            if idx is not None:
+                if self.politica == 'robin_hood' and tabela is self.table:
+                    self._remover_com_deslocamento(tabela, idx)
+                else:
+                    # Marca como deletado logicamente. No Robin Hood isso só ocorre na
+                    # tabela antiga de um rehash, que não pode ter registros deslocados
+                    # para trás do cursor de migração.
+                    tabela[idx] = self.TOMBSTONE
+                    if tabela is self.table:
+                        self.tombstones += 1
+                    self.io.escritas += 1
                 self.count -= 1
+                self._verificar_limites()
                 return True
-            
-            idx = (idx + 1) % self.capacity
-            if idx == start_idx:
-                break
         
         return False # Não encontrado
 
@@ -99,23 +363,196 @@ class HashLinear:
     # MÉTODOS DE BUSCA
     # *********************************************************************************
     def buscar(self, chave):
-        idx = self._hash(chave)
-        start_idx = idx
+        self.io.iniciar_operacao()
+        self._migrar()
 
-        while self.table[idx] is not None:
-            if self.table[idx] is not self.TOMBSTONE and self.table[idx][0] == chave:
-                return self.table[idx]
-            
-            idx = (idx + 1) % self.capacity
-            if idx == start_idx:
-                break
+        for tabela in (self.table, self._antiga):
+            if tabela is None:
+                continue
+            idx = self._procurar(tabela, chave)
+            if idx is not None:
+                return tabela[idx]
         
         return None
 
+    # *********************************************************************************
+    # MANUTENÇÃO: COMPACTAÇÃO E CRESCIMENTO (Rehash Incremental)
+    # *********************************************************************************
+    def _verificar_limites(self):
+        acima_do_limite = self.fator_carga_max is not None and self.count > self.fator_carga_max * self.capacity
+        if self._antiga is not None:
+            if not acima_do_limite:
+                return  # Já existe um rehash em andamento
+            # A tabela nova encheu antes do fim da migração (uma compactação, que mantém
+            # a capacidade, ou passos_rehash pequeno): conclui a migração e dobra agora,
+            # em vez de recusar inserções por falta de espaço
+            self._migrar(len(self._antiga))
+        if acima_do_limite:
+            self._iniciar_rehash(self.capacity * 2)
+        elif self.limite_tombstones is not None and self.tombstones > self.limite_tombstones * self.capacity:
+            self._iniciar_rehash(self.capacity)
+
+    def _iniciar_rehash(self, nova_capacidade):
+        # A tabela atual passa a ser a "antiga" e será migrada aos poucos
+        self._antiga = self.table
+        self._cursor = 0
+        self.table = [None] * nova_capacidade
+        self.capacity = nova_capacidade
+        self.total_bytes = nova_capacidade * self.record_size
+        self.tombstones = 0
+        self._ocupadas = 0
+        self.agrupamentos = 0
+        self.rehashes += 1
+
+    def _migrar(self, passos=None):
+        # Move até 'passos' posições da tabela antiga para a atual.
+        # A posição migrada vira TOMBSTONE na antiga, preservando as sequências de
+        # sondagem dos registros que ainda não foram migrados.
+        if self._antiga is None:
+            return
+        antiga = self._antiga
+        fim = min(self._cursor + (self.passos_rehash if passos is None else passos), len(antiga))
+
+        for i in range(self._cursor, fim):
+            item = antiga[i]
+            if item is None or item is self.TOMBSTONE:
+                continue
+            if self.politica == 'robin_hood':
+                self._colocar_robin_hood(self.table, item)
+            else:
+                _, livre = self._sondar(self.table, item[0])
+                self._ocupar(livre, item)
+                self.io.escritas += 1
+            antiga[i] = self.TOMBSTONE
+
+        self._cursor = fim
+        if fim == len(antiga):
+            self._antiga = None
+            self._cursor = 0
+
+    def compactar(self):
+        """
+        Reconstrói a tabela imediatamente, eliminando todos os TOMBSTONES
+        (dobra a capacidade se a ocupação estiver acima de fator_carga_max).
+        Conclui antes qualquer rehash incremental em andamento.
+        """
+        if self._antiga is not None:
+            self._migrar(len(self._antiga))
+        nova_capacidade = self.capacity
+        if self.fator_carga_max is not None and self.count > self.fator_carga_max * self.capacity:
+            nova_capacidade *= 2
+        self._iniciar_rehash(nova_capacidade)
+        self._migrar(len(self._antiga))
+
+    # *********************************************************************************
+    # SNAPSHOT (salvar / abrir)
+    # *********************************************************************************
+    def salvar(self, caminho):
+        """
+        Grava um snapshot da tabela em 'caminho', slot a slot (a posição de cada registro
+        é preservada, então o arquivo pode ser consultado direto, sem reconstrução).
+        Um rehash em andamento é concluído antes. Retorna o número de registros.
+        """
+        if self._antiga is not None:
+            self._migrar(len(self._antiga))
+        slots, tamanho_pagina = _layout_snapshot(self.record_size, self.page_size)
+        area_estados = _bytes_estados(slots)
+        vazio = (0,) * self.num_fields
+
+        temporario = caminho + '.tmp'
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        arquivo = ArquivoPaginas(temporario, tamanho_pagina)
+        for inicio in range(0, self.capacity, slots):
+            bloco = self.table[inicio:inicio + slots]
+            estados = bytes(VAZIO if item is None else REMOVIDO if item is self.TOMBSTONE else OCUPADO
+                            for item in bloco)
+            valores = [campo for item in bloco
+                       for campo in (vazio if item is None or item is self.TOMBSTONE else item)]
+            arquivo.escrever(arquivo.alocar(), estados.ljust(area_estados, b'\0') + inteiros_para_bytes(valores))
+        arquivo.escrever_metadados([ESTRUTURA_HASH, self.num_fields, self.capacity, self.count, self.tombstones,
+                                    POLITICAS_COLISAO.index(self.politica), slots, self.page_size])
+        arquivo.sincronizar()
+        arquivo.fechar()
+        # Substitui o snapshot anterior de uma só vez (nunca fica um arquivo pela metade)
+        os.replace(temporario, caminho)
+        return self.count
+
+    @staticmethod
+    def abrir(caminho, mmap=True, **opcoes):
+        """
+        Abre um snapshot gravado por salvar().
+        - mmap=True: retorna uma HashLinearMapeada (somente leitura, abertura imediata)
+        - mmap=False: reconstrói a HashLinear em memória, com o mesmo layout de slots
+        O snapshot guarda a capacidade e a política de colisão; com mmap=False, as demais
+        opções do construtor (fator_carga_max, limite_tombstones...) vêm de 'opcoes'.
+        """
+        if mmap and opcoes:
+            raise ValueError("Opções do construtor só se aplicam com mmap=False.")
+        visao = HashLinearMapeada(caminho)
+        if mmap:
+            return visao
+        opcoes.setdefault('verboso', False)
+        opcoes['politica'] = visao.politica  # A posição de cada registro depende da política gravada
+        tabela = HashLinear(visao.num_fields, visao.capacity * visao.record_size, visao.page_size,
+                            **opcoes)
+        for idx in range(visao.capacity):
+            estado = visao._estado(idx)
+            if estado == OCUPADO:
+                tabela.table[idx] = visao._registro(idx)
+            elif estado == REMOVIDO:
+                tabela.table[idx] = tabela.TOMBSTONE
+        tabela.count, tabela.tombstones = visao.count, visao.tombstones
+        tabela._recontar_agrupamentos()
+        visao.fechar()
+        return tabela
+
+    def _recontar_agrupamentos(self):
+        # Recalcula slots ocupados e agrupamentos percorrendo a tabela (ao abrir um snapshot)
+        tabela = self.table
+        self._ocupadas = sum(1 for item in tabela if item is not None)
+        self.agrupamentos = sum(1 for i, item in enumerate(tabela)
+                                if item is not None and tabela[i - 1] is None)
+        if self._ocupadas and not self.agrupamentos:
+            self.agrupamentos = 1  # Tabela inteiramente ocupada: um único agrupamento circular
+
+    # *********************************************************************************
+    # ESTATÍSTICAS
+    # *********************************************************************************
+    def estatisticas(self):
+        """
+        Ocupação atual em O(1), a partir dos contadores mantidos pelas operações:
+        registros, capacidade, fator de carga, tombstones, agrupamentos de slots
+        ocupados (o que a sondagem linear percorre) e a distribuição do número de
+        posições examinadas por sequência de sondagem (desde a criação).
+        """
+        buscas = sum(self.sondagens_por_busca)
+        distribuicao = {n: c for n, c in enumerate(self.sondagens_por_busca) if c}
+        if self.sondagens_por_busca[LIMITE_SONDAGENS]:
+            distribuicao[f"{LIMITE_SONDAGENS}+"] = distribuicao.pop(LIMITE_SONDAGENS)
+        return {
+            'registros': self.count,
+            'capacidade': self.capacity,
+            'paginas': -(-self.capacity // self.slots_por_pagina),
+            'fator_carga': self.fator_carga(),
+            'tombstones': self.tombstones,
+            'taxa_tombstones': self.tombstones / self.capacity,
+            'agrupamentos': self.agrupamentos,
+            'agrupamento_medio': self._ocupadas / self.agrupamentos if self.agrupamentos else 0.0,
+            'sondagens_media': self._soma_sondagens / buscas if buscas else 0.0,
+            'distribuicao_sondagens': distribuicao,
+            'rehashes': self.rehashes,
+            'rehash_em_andamento': self._antiga is not None,
+        }
+
     def exibir(self, mostrar_tudo=False):
         print("\n--- Estrutura da Tabela Hash ---")
         print(f"Ocupação: {self.count}/{self.capacity}")
-        print(f"Taxa de ocupação: {(self.count/self.capacity)*100:.2f}%\n")
+        print(f"Taxa de ocupação: {(self.count/self.capacity)*100:.2f}%")
+        print(f"Tombstones: {self.tombstones} | Rehashes realizados: {self.rehashes}")
+        if self._antiga is not None:
+            print(f"Rehash em andamento: {self._cursor}/{len(self._antiga)} posições migradas")
+        print()
         
         if mostrar_tudo:
             # Mostra toda a tabela
@@ -154,207 +591,304 @@ class HashLinear:
         print("\n")
 
 
-# --- FUNÇÃO PARA PROCESSAR CSV ---
-def processar_csv(arquivo_csv, tabela):
+class HashLinearMapeada:
     """
-    Lê o arquivo CSV e executa as operações automaticamente.
-    Formato esperado: OP,A1,A2,A3
-    - +,val1,val2,val3 (INSERÇÃO)
-    - -,chave (REMOÇÃO)
-    - ?,chave (BUSCA)
+    HashLinear somente leitura servida direto de um snapshot mapeado em memória.
+    A abertura só lê os metadados; cada busca sonda os slots na própria região
+    mapeada (com o término antecipado do Robin Hood, se for a política gravada).
+    Use fechar() ao terminar (ou o bloco 'with').
     """
-    # Variáveis para armazenar tempos
-    tempos_insercao = []
-    tempos_delecao = []
-    tempos_busca = []
-    
-    try:
-        with open(arquivo_csv, 'r', encoding='utf-8') as arquivo:
-            leitor = csv.reader(arquivo)
-            
-            # Contadores
-            insercoes = 0
-            deletes = 0
-            buscas = 0
-            linha_num = 0
-            
-            # Pula o cabeçalho se existir
-            primeira_linha = next(leitor, None)
-            if primeira_linha and primeira_linha[0].strip().upper() == 'OP':
-                print(f"Cabeçalho detectado: {primeira_linha}\n")
-            else:
-                # Se não é cabeçalho, processa essa linha
-                if primeira_linha:
-                    linha_num += 1
-                    operacao = primeira_linha[0].strip()
-                    if operacao == '+':
-                        sucesso, tempo = processar_insercao(primeira_linha, tabela)
-                        insercoes += sucesso
-                        if sucesso:
-                            tempos_insercao.append(tempo)
-                    elif operacao == '-':
-                        sucesso, tempo = processar_delete(primeira_linha, tabela)
-                        deletes += sucesso
-                        if sucesso:
-                            tempos_delecao.append(tempo)
-                    elif operacao == '?':
-                        sucesso, tempo = processar_busca(primeira_linha, tabela)
-                        buscas += sucesso
-                        if sucesso:
-                            tempos_busca.append(tempo)
-            
-            # Processa cada linha
-            for linha in leitor:
-                if not linha or not linha[0]:
-                    continue
-                
-                linha_num += 1
-                operacao = linha[0].strip()
-                
-                if operacao == '+':
-                    sucesso, tempo = processar_insercao(linha, tabela)
-                    insercoes += sucesso
-                    if sucesso:
-                        tempos_insercao.append(tempo)
-                elif operacao == '-':
-                    sucesso, tempo = processar_delete(linha, tabela)
-                    deletes += sucesso
-                    if sucesso:
-                        tempos_delecao.append(tempo)
-                elif operacao == '?':
-                    sucesso, tempo = processar_busca(linha, tabela)
-                    buscas += sucesso
-                    if sucesso:
-                        tempos_busca.append(tempo)
-                else:
-                    print(f"⚠ Linha {linha_num}: Operação desconhecida '{operacao}'")
-            
-            # Resumo final
-            print("\n" + "="*60)
-            print("RESUMO DAS OPERAÇÕES")
-            print("="*60)
-            print(f"Total de linhas processadas: {linha_num}")
-            print(f"Total de Inserções: {insercoes}")
-            print(f"Total de Deleções: {deletes}")
-            print(f"Total de Buscas: {buscas}")
-            print(f"Registros atualmente na tabela: {tabela.count}")
-            print("="*60)
-            
-            # Estatísticas de tempo
-            print("\nESTATÍSTICAS DE TEMPO DE EXECUÇÃO")
-            print("="*60)
-            
-            if tempos_insercao:
-                print(f"\nINSERÇÕES:")
-                print(f"  - Tempo total: {sum(tempos_insercao)*1000:.4f} ms")
-                print(f"  - Tempo médio: {(sum(tempos_insercao)/len(tempos_insercao))*1000:.4f} ms")
-                print(f"  - Tempo mínimo: {min(tempos_insercao)*1000:.4f} ms")
-                print(f"  - Tempo máximo: {max(tempos_insercao)*1000:.4f} ms")
-            
-            if tempos_delecao:
-                print(f"\nDELEÇÕES:")
-                print(f"  - Tempo total: {sum(tempos_delecao)*1000:.4f} ms")
-                print(f"  - Tempo médio: {(sum(tempos_delecao)/len(tempos_delecao))*1000:.4f} ms")
-                print(f"  - Tempo mínimo: {min(tempos_delecao)*1000:.4f} ms")
-                print(f"  - Tempo máximo: {max(tempos_delecao)*1000:.4f} ms")
-            
-            if tempos_busca:
-                print(f"\nBUSCAS:")
-                print(f"  - Tempo total: {sum(tempos_busca)*1000:.4f} ms")
-                print(f"  - Tempo médio: {(sum(tempos_busca)/len(tempos_busca))*1000:.4f} ms")
-                print(f"  - Tempo mínimo: {min(tempos_busca)*1000:.4f} ms")
-                print(f"  - Tempo máximo: {max(tempos_busca)*1000:.4f} ms")
-            
-            print("="*60)
-            
-    except FileNotFoundError:
-        print(f"ERRO: Arquivo '{arquivo_csv}' não encontrado!")
-        print("Certifique-se de que o arquivo está no mesmo diretório do script.")
-    except Exception as e:
-        print(f"ERRO ao processar CSV: {e}")
-        import traceback
-        traceback.print_exc()
-
-def processar_linha(linha, tabela):
-    """Processa uma única linha do CSV"""
-    if not linha or not linha[0]:
-        return
-    
-    operacao = linha[0].strip()
-    
-    if operacao == '+':
-        processar_insercao(linha, tabela)
-    elif operacao == '-':
-        processar_delete(linha, tabela)
-    elif operacao == '?':
-        processar_busca(linha, tabela)
-
-def processar_insercao(linha, tabela):
-    """Processa uma operação de inserção (+,A1,A2,A3)"""
-    try:
-        valores = [int(v.strip()) for v in linha[1:] if v.strip()]
-        if len(valores) == tabela.num_fields:
-            registro = tuple(valores)
-            
-            # Marca o tempo de início
-            inicio = time.perf_counter()
-            tabela.inserir(registro)
-            # Marca o tempo de fim
-            fim = time.perf_counter()
-            tempo_execucao = fim - inicio
-            
-            print(f"✓ INSERÇÃO (+): {registro} - Tempo: {tempo_execucao*1000:.4f} ms")
-            return 1, tempo_execucao
-        else:
-            print(f"✗ INSERÇÃO (+): Número incorreto de campos. Esperado {tabela.num_fields}, recebido {len(valores)}")
-            return 0, 0
-    except ValueError as e:
-        print(f"✗ INSERÇÃO (+): Erro ao converter valores - {e}")
-        return 0, 0
-
-def processar_delete(linha, tabela):
-    """Processa uma operação de deleção (-,chave)"""
-    try:
-        chave = int(linha[1].strip())
-        
-        # Marca o tempo de início
-        inicio = time.perf_counter()
-        resultado = tabela.remover(chave)
-        # Marca o tempo de fim
-        fim = time.perf_counter()
-        tempo_execucao = fim - inicio
-        
-        if resultado:
-            print(f"✓ REMOÇÃO (-): Chave {chave} removida - Tempo: {tempo_execucao*1000:.4f} ms")
-            return 1, tempo_execucao
-        else:
-            print(f"✗ REMOÇÃO (-): Chave {chave} não encontrada")
-            return 0, 0
-    except (ValueError, IndexError) as e:
-        print(f"✗ REMOÇÃO (-): Erro - {e}")
-        return 0, 0
-
-def processar_busca(linha, tabela):
-    """Processa uma operação de busca (?,chave)"""
-    try:
-        chave = int(linha[1].strip())
-        
-        # Marca o tempo de início
-        inicio = time.perf_counter()
-        resultado = tabela.buscar(chave)
-        # Marca o tempo de fim
-        fim = time.perf_counter()
-        tempo_execucao = fim - inicio
-        
-        if resultado:
-            print(f"✓ BUSCA (?): Chave {chave} -> {resultado} - Tempo: {tempo_execucao*1000:.4f} ms")
-            return 1, tempo_execucao
-        else:
-            print(f"✗ BUSCA (?): Chave {chave} não encontrada")
-            return 0, 0
-    except (ValueError, IndexError) as e:
-        print(f"✗ BUSCA (?): Erro - {e}")
-        return 0, 0
+    def __init__(self, caminho):
+        self.paginas = PaginasMapeadas(caminho)
+        extras = self.paginas.extras
+        if len(extras) != 8 or extras[0] != ESTRUTURA_HASH:
+            self.paginas.fechar()
+            raise ValueError(f"'{caminho}' não é um snapshot de HashLinear.")
+        (_, self.num_fields, self.capacity, self.count, self.tombstones,
+         politica, self.slots_por_bloco, self.page_size) = extras
+        self.politica = POLITICAS_COLISAO[politica]
+        self.record_size = self.num_fields * INT_SIZE
+        self._area_estados = _bytes_estados(self.slots_por_bloco)
+        self.io = ContadorIO()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *erro):
+        self.fechar()
+
+    def fechar(self):
+        self.paginas.fechar()
+
+    def fator_carga(self):
+        return self.count / self.capacity
+
+    def __len__(self):
+        # Conta os slots ocupados pelos bytes de estado de cada página, sem confiar
+        # no total gravado nos metadados
+        total = 0
+        for inicio in range(0, self.capacity, self.slots_por_bloco):
+            slots = min(self.slots_por_bloco, self.capacity - inicio)
+            total += bytes(self.paginas.bytes(self._posicao(inicio)[0], 0, slots)).count(OCUPADO)
+        return total
+
+    def _posicao(self, idx):
+        # Página do snapshot e deslocamento do registro do slot 'idx'
+        pagina, slot = divmod(idx, self.slots_por_bloco)
+        return pagina + 1, slot
+
+    def _estado(self, idx):
+        pagina, slot = self._posicao(idx)
+        return self.paginas.bytes(pagina, slot, 1)[0]
+
+    def _chave(self, idx):
+        pagina, slot = self._posicao(idx)
+        return self.paginas.inteiros(pagina, self._area_estados + slot * self.record_size, 1)[0]
+
+    def _registro(self, idx):
+        pagina, slot = self._posicao(idx)
+        return tuple(self.paginas.inteiros(pagina, self._area_estados + slot * self.record_size,
+                                           self.num_fields))
+
+    def buscar(self, chave):
+        self.io.iniciar_operacao()
+        capacidade = self.capacity
+        idx = chave % capacidade
+        pagina_atual = None
+        for distancia in range(capacidade):
+            pagina = idx // self.slots_por_bloco
+            if pagina != pagina_atual:
+                self.io.leituras += 1
+                pagina_atual = pagina
+            self.io.sondagens += 1
+
+            estado = self._estado(idx)
+            if estado == VAZIO:
+                return None
+            if estado == OCUPADO:
+                residente = self._chave(idx)
+                if residente == chave:
+                    return self._registro(idx)
+                if self.politica == 'robin_hood' and (idx - residente % capacidade) % capacidade < distancia:
+                    return None
+            idx = (idx + 1) % capacidade
+        return None
+
+
+class PaginaBucket:
+    """
+    Uma página de bucket do Hash Linear: guarda até 'capacidade' registros e aponta
+    para a próxima página de overflow da cadeia (ou None).
+    """
+    def __init__(self):
+        self.registros = []
+        self.overflow = None
+
+    def __repr__(self):
+        return f"Registros: {self.registros}"
+
+class LinearHash:
+    """
+    Hash Linear de Litwin (hashing dinâmico).
+    A tabela começa com N buckets e cresce um bucket por vez: quando o fator de carga
+    ultrapassa o limite, o bucket apontado por 'next' é dividido (split) e seus registros
+    são redistribuídos entre ele e um novo bucket no fim da tabela, usando h_{level+1}.
+    Cada bucket é uma página; quando ela enche, novas páginas de overflow são encadeadas.
+    """
+    def __init__(self, num_campos, tamanho_pagina, buckets_iniciais=4, fator_carga_max=0.8, verboso=True):
+        if not 0 < fator_carga_max:
+            raise ValueError(f"fator_carga_max deve ser positivo, recebido {fator_carga_max}")
+        self.num_fields = num_campos
+        self.page_size = tamanho_pagina
+        self.fator_carga_max = fator_carga_max
+
+        # --- CÁLCULOS DE CAPACIDADE ---
+        # Tamanho do Registro = num_campos * 4 bytes
+        self.record_size = num_campos * INT_SIZE
+        # Página do bucket = cabeçalho (nº de registros + ponteiro de overflow) + registros
+        self.bucket_capacity = (tamanho_pagina - 2 * INT_SIZE) // self.record_size
+        if self.bucket_capacity < 1:
+            self.bucket_capacity = 1
+
+        # Estado do Hash Linear
+        self.n_inicial = max(1, buckets_iniciais)  # N
+        self.level = 0                              # Rodada atual de splits
+        self.next = 0                               # Próximo bucket a ser dividido
+        self.buckets = [PaginaBucket() for _ in range(self.n_inicial)]
+        self.count = 0
+        self.paginas_overflow = 0
+
+        # Contadores de I/O lógico (páginas lidas/escritas, splits e sondagens)
+        self.io = ContadorIO()
+
+        if verboso:
+            print(f"--- Hash Linear (Litwin) Inicializado ---")
+            print(f"Página Configurada: {tamanho_pagina} bytes | Campos por registro: {num_campos}")
+            print(f"Capacidade do Bucket: {self.bucket_capacity} registros por página")
+            print(f"Buckets iniciais: {self.n_inicial} | Fator de carga máximo: {fator_carga_max}")
+
+    def _endereco(self, chave):
+        # h_level(k) = k mod (N * 2^level); buckets antes de 'next' já foram
+        # divididos nesta rodada e usam a função da rodada seguinte, h_{level+1}
+        modulo = self.n_inicial * (2 ** self.level)
+        idx = chave % modulo
+        if idx < self.next:
+            idx = chave % (modulo * 2)
+        return idx
+
+    def fator_carga(self):
+        return self.count / (len(self.buckets) * self.bucket_capacity)
+
+    def _localizar(self, chave):
+        # Percorre a cadeia do bucket da chave.
+        # Retorna (página, posição) do registro ou (None, None), contabilizando as leituras.
+        pagina = self.buckets[self._endereco(chave)]
+        while pagina is not None:
+            self.io.leituras += 1
+            for pos, registro in enumerate(pagina.registros):
+                self.io.sondagens += 1
+                if registro[0] == chave:
+                    return pagina, pos
+            pagina = pagina.overflow
+        return None, None
+
+    # *********************************************************************************
+    # MÉTODO DE INSERÇÃO
+    # Insere na primeira página da cadeia com espaço; se o fator de carga passar
+    # do limite, divide o bucket 'next'.
+    # *********************************************************************************
+    def inserir(self, registro):
+        # Retorna True se o registro foi gravado e False se foi recusado
+        self.io.iniciar_operacao()
+        # Validação simples dos campos
+        if len(registro) != self.num_fields:
+            print(f"Erro: O registro deve ter exatamente {self.num_fields} campos.")
+            return False
+
+        chave = registro[0] # A chave primária é o primeiro campo
+        pagina, _ = self._localizar(chave)
+        if pagina is not None:
+            print(f"Erro: Chave {chave} já existe no bucket {self._endereco(chave)}.")
+            return False
+
+        self._adicionar_na_cadeia(self.buckets[self._endereco(chave)], registro)
+        self.count += 1
+
+        if self.fator_carga() > self.fator_carga_max:
+            self._split()
+        return True
+
+    def _adicionar_na_cadeia(self, pagina, registro):
+        # Procura espaço na cadeia (as páginas já foram lidas pela busca de duplicata)
+        while len(pagina.registros) >= self.bucket_capacity:
+            if pagina.overflow is None:
+                # Todas cheias: encadeia uma nova página de overflow
+                pagina.overflow = PaginaBucket()
+                self.paginas_overflow += 1
+                self.io.escritas += 1  # O ponteiro da página anterior mudou
+            pagina = pagina.overflow
+        pagina.registros.append(registro)
+        self.io.escritas += 1
+
+    def _split(self):
+        # **************************************************************
+        # Divide o bucket 'next': seus registros são redistribuídos entre
+        # ele e o novo bucket (next + N * 2^level) usando h_{level+1}.
+        # **************************************************************
+        self.io.splits += 1
+        modulo_seguinte = self.n_inicial * (2 ** (self.level + 1))
+
+        antigo = self.buckets[self.next]
+        registros = []
+        pagina = antigo
+        while pagina is not None:
+            self.io.leituras += 1
+            registros.extend(pagina.registros)
+            if pagina is not antigo:
+                self.paginas_overflow -= 1
+            pagina = pagina.overflow
+
+        self.buckets[self.next] = PaginaBucket()
+        self.buckets.append(PaginaBucket())
+        for registro in registros:
+            self._adicionar_na_cadeia(self.buckets[registro[0] % modulo_seguinte], registro)
+
+        # Avança o ponteiro; ao final da rodada, dobra o espaço de endereçamento
+        self.next += 1
+        if self.next == self.n_inicial * (2 ** self.level):
+            self.level += 1
+            self.next = 0
+
+    # *********************************************************************************
+    # MÉTODO DE REMOÇÃO
+    # Remove o registro e libera páginas de overflow que ficarem vazias.
+    # *********************************************************************************
+    def remover(self, chave):
+        self.io.iniciar_operacao()
+        pagina, pos = self._localizar(chave)
+        if pagina is None:
+            return False # Não encontrado
+
+        pagina.registros.pop(pos)
+        self.count -= 1
+        self.io.escritas += 1
+
+        if not pagina.registros:
+            self._liberar_overflow_vazia(self.buckets[self._endereco(chave)], pagina)
+        return True
+
+    def _liberar_overflow_vazia(self, primaria, vazia):
+        # A página primária permanece (é o bucket); páginas de overflow vazias saem da cadeia
+        anterior = primaria
+        while anterior.overflow is not None and anterior.overflow is not vazia:
+            anterior = anterior.overflow
+        if anterior.overflow is vazia:
+            anterior.overflow = vazia.overflow
+            self.paginas_overflow -= 1
+            self.io.escritas += 1
+
+    # *********************************************************************************
+    # MÉTODOS DE BUSCA
+    # *********************************************************************************
+    def buscar(self, chave):
+        self.io.iniciar_operacao()
+        pagina, pos = self._localizar(chave)
+        if pagina is None:
+            return None
+        return pagina.registros[pos]
+
+    def estatisticas(self):
+        """Forma atual em O(1): buckets, páginas de overflow, fator de carga e rodada de splits."""
+        return {
+            'registros': self.count,
+            'buckets': len(self.buckets),
+            'paginas_overflow': self.paginas_overflow,
+            'fator_carga': self.fator_carga(),
+            'level': self.level,
+            'next': self.next,
+            'splits': self.io.splits,
+        }
+
+    def exibir(self, mostrar_tudo=False):
+        print("\n--- Estrutura do Hash Linear (Litwin) ---")
+        print(f"Level: {self.level} | Next: {self.next} | Buckets: {len(self.buckets)}")
+        print(f"Registros: {self.count} | Páginas de overflow: {self.paginas_overflow}")
+        print(f"Fator de carga: {self.fator_carga()*100:.2f}%\n")
+
+        for i, primaria in enumerate(self.buckets):
+            if not primaria.registros and primaria.overflow is None and not mostrar_tudo:
+                continue
+            cadeia = []
+            pagina = primaria
+            while pagina is not None:
+                cadeia.append(str(pagina.registros))
+                pagina = pagina.overflow
+            print(f"[Bucket {i:04d}]: " + " -> ".join(cadeia))
+            if i >= 50 and not mostrar_tudo:  # Limita a 50 buckets mostrados
+                print(f"... (mostrando primeiros 50 buckets)")
+                break
+
+        print("\n")
 
 
 # --- PROGRAMA PRINCIPAL ---
@@ -0,0 +1,186 @@
+import math
+from operator import add, attrgetter, sub
+
+# Eventos contabilizados por operação:
+# - leituras / escritas: páginas lógicas distintas lidas / modificadas pela operação
+# - splits / merges / redistribuicoes: reorganizações estruturais da Árvore B+
+# - sondagens: posições examinadas pela Hash até resolver a chave
+CAMPOS_IO = ('leituras', 'escritas', 'splits', 'merges', 'redistribuicoes', 'sondagens')
+
+_LER_CAMPOS = attrgetter(*CAMPOS_IO)
+
+# Histogramas de latência: 2^(BITS_PRECISAO - 1) faixas lineares por potência de 2
+# (erro relativo < 1/128) e valores em nanossegundos até MAIOR_LATENCIA_NS (~18 min)
+BITS_PRECISAO = 8
+MAIOR_LATENCIA_NS = 1 << 40
+PERCENTIS = {'p50': 50, 'p90': 90, 'p99': 99, 'p999': 99.9}
+
+ROTULOS_IO = {
+    'leituras': 'Leituras de página',
+    'escritas': 'Escritas de página',
+    'splits': 'Splits',
+    'merges': 'Merges',
+    'redistribuicoes': 'Redistribuições',
+    'sondagens': 'Sondagens (hash)',
+}
+
+
+class ContadorIO:
+    """
+    Contadores de I/O lógico e eventos estruturais de uma estrutura de índice.
+    Os atributos (leituras, escritas, ...) acumulam desde a criação (ou zerar()).
+    iniciar_operacao() marca o início de uma operação; ultima_operacao() devolve
+    apenas o que foi contado desde essa marca.
+    """
+    def __init__(self):
+        self.zerar()
+
+    def zerar(self):
+        for campo in CAMPOS_IO:
+            setattr(self, campo, 0)
+        self.operacoes = 0
+        self._inicio = self._valores()
+
+    def _valores(self):
+        return _LER_CAMPOS(self)
+
+    def iniciar_operacao(self):
+        self.operacoes += 1
+        self._inicio = self._valores()
+
+    def ultima_operacao(self):
+        return dict(zip(CAMPOS_IO, map(sub, self._valores(), self._inicio)))
+
+    def acumular_ultima(self, acumulado):
+        """
+        Soma a última operação em 'acumulado', uma lista na ordem de CAMPOS_IO.
+        Equivale a somar_io(acumulado, ultima_operacao()) sem criar dicts (laços quentes).
+        """
+        acumulado[:] = map(add, acumulado, map(sub, self._valores(), self._inicio))
+
+    def totais(self):
+        return dict(zip(CAMPOS_IO, self._valores()))
+
+
+def somar_io(acumulado, contagem):
+    """Soma uma contagem (dict de CAMPOS_IO) em um acumulado (dict), no lugar."""
+    for campo in CAMPOS_IO:
+        acumulado[campo] = acumulado.get(campo, 0) + contagem.get(campo, 0)
+    return acumulado
+
+
+def resumo_io(contagem):
+    """Resumo curto para a linha de cada operação, ex.: 'I/O: 3L 1E | 1 split'."""
+    texto = f"I/O: {contagem['leituras']}L {contagem['escritas']}E"
+    eventos = [f"{contagem[c]} {c}" for c in ('splits', 'merges', 'redistribuicoes') if contagem[c]]
+    if contagem['sondagens']:
+        eventos.append(f"{contagem['sondagens']} sondagens")
+    if eventos:
+        texto += " | " + ", ".join(eventos)
+    return texto
+
+
+def imprimir_io(contagem, num_operacoes, titulo=None):
+    """Imprime o total e a média por operação de cada contador (no estilo do resumo de tempos)."""
+    if titulo:
+        print(f"\n{titulo}:")
+    for campo in CAMPOS_IO:
+        total = contagem.get(campo, 0)
+        if total or campo in ('leituras', 'escritas'):
+            media = total / num_operacoes if num_operacoes else 0
+            print(f"  - {ROTULOS_IO[campo]}: {total} (média {media:.2f}/op)")
+
+
+class HistogramaLatencia:
+    """
+    Histograma de latências em memória fixa, no estilo HDR: cada potência de 2 é
+    dividida em faixas lineares, então o erro relativo de qualquer percentil é menor
+    que 2^-(bits_precisao - 1), seja a latência de microssegundos ou de segundos.
+    Histogramas com a mesma precisão podem ser somados (replays, shards, conexões) e
+    exportados para dict/JSON (exportar/importar) para comparar versões.
+    """
+    def __init__(self, bits_precisao=BITS_PRECISAO):
+        if not 2 <= bits_precisao <= 16:
+            raise ValueError(f"bits_precisao deve estar entre 2 e 16, recebido {bits_precisao}")
+        self.bits_precisao = bits_precisao
+        self._bits_faixa = bits_precisao - 1
+        self._faixas = 1 << self._bits_faixa  # Faixas lineares por potência de 2
+        self.contagens = [0] * (self._indice(MAIOR_LATENCIA_NS - 1) + 1)
+        self.total = 0
+
+    def _indice(self, ns):
+        deslocamento = ns.bit_length() - self.bits_precisao
+        if deslocamento <= 0:
+            return ns  # Valores pequenos têm uma faixa cada (exatos)
+        return (deslocamento << self._bits_faixa) + (ns >> deslocamento)
+
+    def _valor(self, indice):
+        # Maior valor (ns) que cai na faixa 'indice'
+        if indice < 2 * self._faixas:
+            return indice
+        deslocamento = indice // self._faixas - 1
+        return ((indice - deslocamento * self._faixas) << deslocamento) + (1 << deslocamento) - 1
+
+    def registrar(self, segundos, vezes=1):
+        # (_indice repetido aqui: é chamado uma vez por operação nos laços de replay)
+        ns = int(segundos * 1e9) if segundos > 0 else 0
+        deslocamento = ns.bit_length() - self.bits_precisao
+        indice = ns if deslocamento <= 0 else (deslocamento << self._bits_faixa) + (ns >> deslocamento)
+        if indice >= len(self.contagens):
+            indice = len(self.contagens) - 1  # Acima de MAIOR_LATENCIA_NS: fica na última faixa
+        self.contagens[indice] += vezes
+        self.total += vezes
+
+    def percentil(self, p):
+        """Latência (s) abaixo da qual estão p% das amostras (0.0 se vazio)."""
+        return self.percentis({p: p})[p]
+
+    def percentis(self, percentis=None):
+        """Vários percentis numa única passada: {rótulo: segundos} (padrão: p50/p90/p99/p999)."""
+        percentis = percentis or PERCENTIS
+        resultado = dict.fromkeys(percentis, 0.0)
+        if not self.total:
+            return resultado
+        alvos = sorted((max(1, math.ceil(self.total * p / 100)), rotulo) for rotulo, p in percentis.items())
+        acumulado, proximo = 0, 0
+        for indice, contagem in enumerate(self.contagens):
+            if not contagem:
+                continue
+            acumulado += contagem
+            while proximo < len(alvos) and acumulado >= alvos[proximo][0]:
+                resultado[alvos[proximo][1]] = self._valor(indice) / 1e9
+                proximo += 1
+            if proximo == len(alvos):
+                break
+        return resultado
+
+    def maximo(self):
+        for indice in range(len(self.contagens) - 1, -1, -1):
+            if self.contagens[indice]:
+                return self._valor(indice) / 1e9
+        return 0.0
+
+    def somar(self, outro):
+        if outro.bits_precisao != self.bits_precisao:
+            raise ValueError("Só é possível somar histogramas com a mesma bits_precisao.")
+        self.contagens[:] = map(add, self.contagens, outro.contagens)
+        self.total += outro.total
+        return self
+
+    def exportar(self):
+        """Dict serializável em JSON, só com as faixas não vazias."""
+        return {'bits_precisao': self.bits_precisao, 'total': self.total,
+                'faixas': [[i, c] for i, c in enumerate(self.contagens) if c]}
+
+    @classmethod
+    def importar(cls, dados):
+        histograma = cls(dados['bits_precisao'])
+        for indice, contagem in dados['faixas']:
+            histograma.contagens[indice] = contagem
+        histograma.total = dados['total']
+        return histograma
+
+
+def resumo_percentis(histograma):
+    """Linha curta com os percentis em ms, ex.: 'p50 0.004 | p90 0.006 | ...'."""
+    return " | ".join(f"{rotulo} {segundos*1000:.4f}" for rotulo, segundos in histograma.percentis().items())
@@ -0,0 +1,315 @@
+import mmap
+import os
+import sys
+from array import array
+from collections import OrderedDict
+
+# --- Constantes de Configuração ---
+INT_SIZE = 4       # Tamanho de um inteiro em bytes
+SEM_PAGINA = -1    # Ponteiro nulo gravado dentro das páginas
+
+# Página 0 do arquivo guarda os metadados (inteiros de 4 bytes):
+# [assinatura, versão, tamanho_pagina, num_paginas, primeira_livre, extras...]
+# Os "extras" pertencem à estrutura que usa o arquivo (ex.: raiz da árvore).
+ASSINATURA = 0x31544250  # 'PBT1' em little-endian
+VERSAO_FORMATO = 2  # 2: folhas com ponteiro para a folha anterior
+CAMPOS_METADADOS = 5
+
+POLITICAS_BUFFER = ('lru', 'clock')
+
+# Faixa dos inteiros de 4 bytes gravados nas páginas (limites de varreduras completas)
+MENOR_INTEIRO = -2**31
+MAIOR_INTEIRO = 2**31 - 1
+
+
+def inteiros_para_bytes(valores):
+    """Converte uma sequência de inteiros em bytes little-endian de 4 bytes cada."""
+    dados = array('i', valores)
+    if sys.byteorder == 'big':
+        dados.byteswap()
+    return dados.tobytes()
+
+
+def bytes_para_inteiros(dados, quantidade=None, deslocamento=0):
+    """Lê 'quantidade' inteiros de 4 bytes a partir de 'deslocamento' (em bytes)."""
+    if quantidade is None:
+        quantidade = (len(dados) - deslocamento) // INT_SIZE
+    valores = array('i')
+    valores.frombytes(dados[deslocamento:deslocamento + quantidade * INT_SIZE])
+    if sys.byteorder == 'big':
+        valores.byteswap()
+    return valores
+
+
+def interpretar_metadados(dados, caminho):
+    """Lê a página 0: retorna (tamanho_pagina, num_paginas, primeira_livre, extras)."""
+    cabecalho = bytes_para_inteiros(dados, CAMPOS_METADADOS)
+    if len(cabecalho) < CAMPOS_METADADOS:
+        raise ValueError(f"'{caminho}' não é um arquivo de páginas válido.")
+    assinatura, versao, tamanho_pagina, num_paginas, primeira_livre = cabecalho
+    if assinatura != ASSINATURA or versao != VERSAO_FORMATO:
+        raise ValueError(f"'{caminho}' não é um arquivo de páginas válido.")
+    num_extras = bytes_para_inteiros(dados, 1, CAMPOS_METADADOS * INT_SIZE)[0]
+    extras = list(bytes_para_inteiros(dados, num_extras, (CAMPOS_METADADOS + 1) * INT_SIZE))
+    return tamanho_pagina, num_paginas, primeira_livre, extras
+
+
+class ArquivoPaginas:
+    """
+    Arquivo único dividido em páginas de tamanho fixo.
+    A página 0 guarda os metadados; as demais guardam os nós da estrutura.
+    Páginas liberadas formam uma lista encadeada (o 1º inteiro aponta para a próxima livre)
+    e são reaproveitadas antes de o arquivo crescer.
+    """
+    def __init__(self, caminho, tamanho_pagina):
+        self.caminho = caminho
+        self.page_size = tamanho_pagina
+        self.novo = not (os.path.exists(caminho) and os.path.getsize(caminho) > 0)
+        self.arquivo = open(caminho, 'w+b' if self.novo else 'r+b')
+
+        # Contadores de I/O físico (leituras/escritas reais no arquivo)
+        self.leituras = 0
+        self.escritas = 0
+
+        if self.novo:
+            self.num_paginas = 1  # A página 0 é reservada para os metadados
+            self.primeira_livre = SEM_PAGINA
+            self.extras = []
+            self.escrever_metadados([])
+        else:
+            self._carregar_metadados()
+
+    def _carregar_metadados(self):
+        self.arquivo.seek(0)
+        dados = self.arquivo.read(self.page_size)
+        tamanho_pagina, self.num_paginas, self.primeira_livre, self.extras = \
+            interpretar_metadados(dados, self.caminho)
+        if tamanho_pagina != self.page_size:
+            raise ValueError(f"'{self.caminho}' usa páginas de {tamanho_pagina} bytes, "
+                             f"mas foi aberto com {self.page_size} bytes.")
+
+    def capacidade_extras(self):
+        """Quantos inteiros extras cabem na página 0, depois do cabeçalho."""
+        return self.page_size // INT_SIZE - CAMPOS_METADADOS - 1
+
+    def escrever_metadados(self, extras):
+        self.extras = list(extras)
+        valores = [ASSINATURA, VERSAO_FORMATO, self.page_size, self.num_paginas,
+                   self.primeira_livre, len(self.extras)] + self.extras
+        self.escrever(0, inteiros_para_bytes(valores))
+
+    def ler(self, page_id):
+        self.arquivo.seek(page_id * self.page_size)
+        self.leituras += 1
+        return self.arquivo.read(self.page_size)
+
+    def escrever(self, page_id, dados):
+        if len(dados) > self.page_size:
+            raise ValueError(f"Conteúdo de {len(dados)} bytes não cabe na página de {self.page_size} bytes.")
+        self.arquivo.seek(page_id * self.page_size)
+        self.arquivo.write(dados.ljust(self.page_size, b'\0'))
+        self.escritas += 1
+
+    def alocar(self):
+        # Reaproveita uma página livre, se houver; senão, estende o arquivo
+        if self.primeira_livre != SEM_PAGINA:
+            page_id = self.primeira_livre
+            self.primeira_livre = bytes_para_inteiros(self.ler(page_id), 1)[0]
+            return page_id
+        page_id = self.num_paginas
+        self.num_paginas += 1
+        return page_id
+
+    def liberar(self, page_id):
+        self.escrever(page_id, inteiros_para_bytes([self.primeira_livre]))
+        self.primeira_livre = page_id
+
+    def sincronizar(self):
+        self.arquivo.flush()
+        os.fsync(self.arquivo.fileno())
+
+    def fechar(self):
+        if not self.arquivo.closed:
+            self.arquivo.close()
+
+
+class PaginasMapeadas:
+    """
+    Acesso somente leitura a um arquivo de páginas mapeado em memória (mmap).
+    Os inteiros de uma página são lidos direto da região mapeada: em máquinas
+    little-endian, sem cópia alguma (fatias de um memoryview); o sistema operacional
+    traz do disco apenas as páginas efetivamente tocadas.
+    """
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.arquivo = open(caminho, 'rb')
+        try:
+            self.mapa = mmap.mmap(self.arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self.arquivo.close()
+            raise ValueError(f"'{caminho}' não é um arquivo de páginas válido.")
+        self.memoria = memoryview(self.mapa)
+        self.page_size, self.num_paginas, _, self.extras = interpretar_metadados(self.mapa, caminho)
+
+        self._inteiros = None
+        if sys.byteorder == 'little':
+            self._inteiros = self.memoria[:len(self.memoria) // INT_SIZE * INT_SIZE].cast('i')
+
+    def inteiros(self, page_id, deslocamento, quantidade):
+        """'quantidade' inteiros a partir de 'deslocamento' bytes dentro da página."""
+        inicio = page_id * self.page_size + deslocamento
+        if self._inteiros is not None and inicio % INT_SIZE == 0:
+            return self._inteiros[inicio // INT_SIZE:inicio // INT_SIZE + quantidade]
+        return bytes_para_inteiros(self.mapa, quantidade, inicio)
+
+    def bytes(self, page_id, deslocamento, quantidade):
+        """'quantidade' bytes a partir de 'deslocamento' dentro da página (sem cópia)."""
+        inicio = page_id * self.page_size + deslocamento
+        return self.memoria[inicio:inicio + quantidade]
+
+    def fechar(self):
+        if self.mapa.closed:
+            return
+        # As visões precisam ser liberadas antes de fechar o mapeamento
+        if self._inteiros is not None:
+            self._inteiros.release()
+        self.memoria.release()
+        self.mapa.close()
+        self.arquivo.close()
+
+
+class Quadro:
+    """Um quadro (frame) do buffer pool: a página já desserializada e seu estado."""
+    def __init__(self, conteudo):
+        self.conteudo = conteudo
+        self.pinos = 0          # Quantos usuários estão com a página fixada
+        self.sujo = False       # Modificada desde a última escrita em disco?
+        self.referencia = True  # Bit de referência (política CLOCK)
+
+
+class BufferPool:
+    """
+    Mantém no máximo 'capacidade' páginas desserializadas em memória.
+    - fixar(page_id): traz a página para a memória (se preciso) e impede sua remoção
+    - soltar(page_id): libera a fixação; a página volta a ser candidata à remoção
+    - Páginas sujas são escritas no arquivo somente quando removidas ou no descarregar()
+    A política de substituição pode ser 'lru' (menos recentemente usada) ou 'clock'.
+    Se todas as páginas estiverem fixadas, o pool excede a capacidade temporariamente
+    e volta ao limite assim que houver páginas soltas.
+    """
+    def __init__(self, arquivo, capacidade, carregar, serializar, politica='lru'):
+        if politica not in POLITICAS_BUFFER:
+            raise ValueError(f"Política de buffer inválida: '{politica}'. Opções: {', '.join(POLITICAS_BUFFER)}")
+        self.arquivo = arquivo
+        self.capacidade = max(1, capacidade)
+        self.carregar = carregar        # (page_id, bytes) -> objeto
+        self.serializar = serializar    # objeto -> bytes
+        self.politica = politica
+
+        self.quadros = OrderedDict()    # page_id -> Quadro (ordem = recência, para LRU)
+        self.relogio = []               # Posições do relógio (CLOCK): page_id ou None (vaga)
+        self.ponteiro = 0               # Ponteiro do relógio
+        self._posicoes = {}             # page_id -> posição em self.relogio
+        self._vagas = []                # Posições vagas, reaproveitadas por novas páginas
+
+        # Estatísticas do buffer
+        self.acertos = 0
+        self.faltas = 0
+
+    def fixar(self, page_id):
+        quadro = self.quadros.get(page_id)
+        if quadro is None:
+            self.faltas += 1
+            self._abrir_espaco()
+            quadro = Quadro(self.carregar(page_id, self.arquivo.ler(page_id)))
+            self._registrar(page_id, quadro)
+        else:
+            self.acertos += 1
+            if self.politica == 'lru':
+                self.quadros.move_to_end(page_id)
+            quadro.referencia = True
+        quadro.pinos += 1
+        return quadro.conteudo
+
+    def soltar(self, page_id, sujo=False):
+        quadro = self.quadros[page_id]
+        quadro.pinos -= 1
+        if sujo:
+            quadro.sujo = True
+        if quadro.pinos == 0 and len(self.quadros) > self.capacidade:
+            self._abrir_espaco()
+
+    def marcar_sujo(self, page_id):
+        self.quadros[page_id].sujo = True
+
+    def adicionar(self, page_id, conteudo):
+        """Registra uma página recém-criada: já entra fixada e suja."""
+        self._abrir_espaco()
+        quadro = Quadro(conteudo)
+        quadro.pinos = 1
+        quadro.sujo = True
+        self._registrar(page_id, quadro)
+        return conteudo
+
+    def descartar(self, page_id):
+        """Remove a página do pool sem escrevê-la e devolve-a à lista de livres do arquivo."""
+        if page_id in self.quadros:
+            del self.quadros[page_id]
+            if self.politica == 'clock':
+                self._remover_do_relogio(page_id)
+        self.arquivo.liberar(page_id)
+
+    def descarregar(self):
+        """Escreve no arquivo todas as páginas sujas (sem removê-las do pool)."""
+        for page_id, quadro in self.quadros.items():
+            if quadro.sujo:
+                self.arquivo.escrever(page_id, self.serializar(quadro.conteudo))
+                quadro.sujo = False
+
+    def _registrar(self, page_id, quadro):
+        self.quadros[page_id] = quadro
+        if self.politica == 'clock':
+            if self._vagas:
+                pos = self._vagas.pop()
+                self.relogio[pos] = page_id
+            else:
+                pos = len(self.relogio)
+                self.relogio.append(page_id)
+            self._posicoes[page_id] = pos
+
+    def _remover_do_relogio(self, page_id):
+        # O(1): a posição fica vaga (o relógio não é deslocado) e será reaproveitada
+        pos = self._posicoes.pop(page_id)
+        self.relogio[pos] = None
+        self._vagas.append(pos)
+
+    def _abrir_espaco(self):
+        # Remove páginas soltas até haver espaço para mais uma
+        while len(self.quadros) >= self.capacidade:
+            vitima = self._escolher_vitima()
+            if vitima is None:
+                return  # Todas fixadas: excede a capacidade temporariamente
+            quadro = self.quadros.pop(vitima)
+            if self.politica == 'clock':
+                self._remover_do_relogio(vitima)
+            if quadro.sujo:
+                self.arquivo.escrever(vitima, self.serializar(quadro.conteudo))
+
+    def _escolher_vitima(self):
+        if self.politica == 'lru':
+            for page_id, quadro in self.quadros.items():
+                if quadro.pinos == 0:
+                    return page_id
+            return None
+
+        # CLOCK: dá no máximo duas voltas (a 1ª limpa os bits de referência)
+        for _ in range(2 * len(self.relogio)):
+            page_id = self.relogio[self.ponteiro]
+            if page_id is not None:
+                quadro = self.quadros[page_id]
+                if quadro.pinos == 0:
+                    if not quadro.referencia:
+                        return page_id
+                    quadro.referencia = False
+            self.ponteiro = (self.ponteiro + 1) % len(self.relogio)
+        return None
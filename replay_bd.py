@@ -0,0 +1,346 @@
+import contextlib
+import io
+import os
+import sys
+import time
+from itertools import islice
+
+from instrumentacao_bd import CAMPOS_IO, HistogramaLatencia, resumo_io, resumo_percentis, imprimir_io
+
+# --- Níveis de verbosidade do replay ---
+SILENCIOSO = 0  # Nada é impresso (apenas retorna as estatísticas)
+RESUMO = 1      # Só o resumo final
+AMOSTRA = 2     # Resumo + uma linha a cada 'amostragem' operações
+DETALHADO = 3   # Resumo + uma linha por operação (saída original de processar_csv)
+
+TAMANHO_BLOCO = 4096      # Linhas lidas e interpretadas de uma vez
+LINHAS_POR_ESCRITA = 1000  # Linhas de log acumuladas antes de cada escrita na saída
+
+TIPOS_OPERACAO = {'+': 'insercao', '-': 'delecao', '?': 'busca', '~': 'intervalo'}
+ROTULOS_OPERACAO = {'insercao': 'INSERÇÕES', 'delecao': 'DELEÇÕES', 'busca': 'BUSCAS',
+                    'intervalo': 'BUSCAS POR INTERVALO'}
+
+
+class EstatisticasReplay:
+    """
+    Estatísticas de um replay, acumuladas em tamanho constante (sem guardar o tempo
+    de cada operação): por tipo, quantidade, tempo total/mínimo/máximo, histograma de
+    latências (percentis) e I/O lógico das operações bem-sucedidas. Podem ser somadas
+    (somar) para juntar vários replays e exportadas (exportar) para comparar versões.
+    """
+    def __init__(self):
+        self.linhas = 0          # Linhas com operação reconhecida
+        self.invalidas = 0       # Operações com valores inválidos
+        self.desconhecidas = 0   # Linhas com operação desconhecida
+        self.nao_executadas = 0  # Operações válidas que o replay não executa (intervalos no paralelo)
+        self.sucessos = {tipo: 0 for tipo in ROTULOS_OPERACAO}
+        self.tempos = {tipo: [0.0, float('inf'), 0.0] for tipo in ROTULOS_OPERACAO}  # total, mín, máx
+        self.io = {tipo: [0] * len(CAMPOS_IO) for tipo in ROTULOS_OPERACAO}  # Na ordem de CAMPOS_IO
+        self.latencias = {tipo: HistogramaLatencia() for tipo in ROTULOS_OPERACAO}
+        self.duracao = 0.0
+
+    def somar(self, outra):
+        self.linhas += outra.linhas
+        self.invalidas += outra.invalidas
+        self.desconhecidas += outra.desconhecidas
+        self.nao_executadas += outra.nao_executadas
+        for tipo in ROTULOS_OPERACAO:
+            self.sucessos[tipo] += outra.sucessos[tipo]
+            total, minimo, maximo = outra.tempos[tipo]
+            acumulado = self.tempos[tipo]
+            acumulado[0] += total
+            acumulado[1] = min(acumulado[1], minimo)
+            acumulado[2] = max(acumulado[2], maximo)
+            self.io[tipo] = [a + b for a, b in zip(self.io[tipo], outra.io[tipo])]
+            self.latencias[tipo].somar(outra.latencias[tipo])
+        self.duracao = max(self.duracao, outra.duracao)  # Replays somados correm em paralelo
+        return self
+
+    def io_por_tipo(self, tipo):
+        return dict(zip(CAMPOS_IO, self.io[tipo]))
+
+    def ops_por_segundo(self):
+        return self.linhas / self.duracao if self.duracao else 0.0
+
+    def exportar(self):
+        """Dict serializável em JSON com contagens, I/O, tempos e histogramas por tipo."""
+        return {
+            'linhas': self.linhas, 'invalidas': self.invalidas, 'desconhecidas': self.desconhecidas,
+            'nao_executadas': self.nao_executadas, 'duracao': self.duracao,
+            'tipos': {tipo: {'sucessos': self.sucessos[tipo],
+                             'tempo_total': self.tempos[tipo][0],
+                             'io': self.io_por_tipo(tipo),
+                             'percentis': self.latencias[tipo].percentis(),
+                             'histograma': self.latencias[tipo].exportar()}
+                      for tipo in ROTULOS_OPERACAO},
+        }
+
+
+def _interpretar_lento(linha):
+    # Caminho geral (espaços, campos vazios): mesmo tratamento do csv.reader + strip
+    campos = linha.strip().split(',')
+    return campos[0].strip(), [int(v.strip()) for v in campos[1:] if v.strip()]
+
+
+def interpretar_bloco(linhas):
+    """
+    Converte linhas 'OP,A1,A2,...' em pares (op, valores). O caminho rápido confia no
+    formato que o gerador escreve ('+,1,2,3'): int() já ignora espaços e o '\\n' final,
+    então não há csv.reader nem strip por campo. Valores inválidos viram o ValueError.
+    """
+    operacoes = []
+    for linha in linhas:
+        op = linha[:1]
+        if op in TIPOS_OPERACAO and linha[1:2] == ',':
+            try:
+                operacoes.append((op, list(map(int, linha[2:].split(',')))))
+                continue
+            except ValueError:
+                pass
+        elif not linha.strip():
+            continue
+        try:
+            operacoes.append(_interpretar_lento(linha))
+        except ValueError as e:
+            operacoes.append((linha.strip().split(',', 1)[0].strip(), e))
+    return operacoes
+
+
+def executar_operacoes(linhas, estrutura, verbosidade=RESUMO, amostragem=1000,
+                       estatisticas=None, saida=None):
+    """
+    Executa as operações de um iterável de linhas de texto em 'estrutura' (BPlusTree,
+    HashLinear ou outra com inserir/remover/buscar e atributo io) e retorna as
+    EstatisticasReplay. O log por operação (níveis AMOSTRA e DETALHADO) é acumulado e
+    escrito em blocos em 'saida' (padrão: sys.stdout). Os avisos impressos pela própria
+    estrutura entram no log antes da linha da operação (DETALHADO) ou são descartados.
+    """
+    estatisticas = estatisticas or EstatisticasReplay()
+    saida = saida or sys.stdout
+    buffer = []
+    registrar = verbosidade >= AMOSTRA
+    passo = 1 if verbosidade >= DETALHADO else max(1, amostragem)
+    contador = estrutura.io
+    latencias = estatisticas.latencias
+    relogio = time.perf_counter
+
+    inicio_replay = relogio()
+    detalhado = verbosidade >= DETALHADO
+    with contextlib.ExitStack() as pilha:
+        avisos = io.StringIO() if detalhado else pilha.enter_context(open(os.devnull, 'w'))
+        pilha.enter_context(contextlib.redirect_stdout(avisos))
+        linhas = iter(linhas)
+        while True:
+            bloco = interpretar_bloco(islice(linhas, TAMANHO_BLOCO))
+            if not bloco:
+                break
+            for op, valores in bloco:
+                tipo = TIPOS_OPERACAO.get(op)
+                if tipo is None:
+                    estatisticas.desconhecidas += 1
+                    if registrar:
+                        buffer.append(f"⚠ Linha {estatisticas.linhas + estatisticas.desconhecidas}: "
+                                      f"Operação desconhecida '{op}'")
+                    continue
+                estatisticas.linhas += 1
+                mostrar = registrar and estatisticas.linhas % passo == 0
+
+                if isinstance(valores, ValueError):
+                    estatisticas.invalidas += 1
+                    if mostrar:
+                        buffer.append(_mensagem_erro(tipo, valores))
+                    continue
+                if tipo == 'insercao':
+                    if len(valores) != estrutura.num_fields:
+                        estatisticas.invalidas += 1
+                        if mostrar:
+                            buffer.append(f"✗ INSERÇÃO (+): Número incorreto de campos. "
+                                          f"Esperado {estrutura.num_fields}, recebido {len(valores)}")
+                        continue
+                    registro = tuple(valores)
+                    inicio = relogio()
+                    gravou = estrutura.inserir(registro)
+                    tempo = relogio() - inicio
+                    # Estruturas que não informam o resultado (None) contam como gravadas
+                    resultado = None if gravou is False else registro
+                elif not valores:
+                    estatisticas.invalidas += 1
+                    if mostrar:
+                        buffer.append(_mensagem_erro(tipo, IndexError("list index out of range")))
+                    continue
+                elif tipo == 'intervalo':
+                    if len(valores) != 2 or not hasattr(estrutura, 'buscar_intervalo'):
+                        estatisticas.invalidas += 1
+                        if mostrar:
+                            buffer.append(_mensagem_erro(tipo, ValueError(
+                                "esperado inicio,fim" if len(valores) != 2
+                                else "estrutura sem busca por intervalo")))
+                        continue
+                    inicio = relogio()
+                    resultado = estrutura.buscar_intervalo(valores[0], valores[1])
+                    tempo = relogio() - inicio
+                else:
+                    chave = valores[0]
+                    inicio = relogio()
+                    if tipo == 'delecao':
+                        resultado = estrutura.remover(chave)
+                    else:
+                        resultado = estrutura.buscar(chave)
+                    tempo = relogio() - inicio
+
+                if detalhado and avisos.tell():
+                    buffer.append(avisos.getvalue().rstrip('\n'))
+                    avisos.seek(0)
+                    avisos.truncate()
+                if resultado or tipo == 'intervalo':  # Um intervalo vazio também é uma resposta
+                    estatisticas.sucessos[tipo] += 1
+                    acumulado = estatisticas.tempos[tipo]
+                    acumulado[0] += tempo
+                    if tempo < acumulado[1]:
+                        acumulado[1] = tempo
+                    if tempo > acumulado[2]:
+                        acumulado[2] = tempo
+                    latencias[tipo].registrar(tempo)
+                    contador.acumular_ultima(estatisticas.io[tipo])
+                    if mostrar:
+                        buffer.append(_mensagem_sucesso(tipo, valores, resultado, tempo,
+                                                        contador.ultima_operacao()))
+                elif mostrar:
+                    buffer.append(_mensagem_falha(tipo, valores[0]))
+
+            if len(buffer) >= LINHAS_POR_ESCRITA:
+                saida.write('\n'.join(buffer) + '\n')
+                buffer.clear()
+
+    estatisticas.duracao += relogio() - inicio_replay
+    if buffer:
+        saida.write('\n'.join(buffer) + '\n')
+    return estatisticas
+
+
+def _mensagem_sucesso(tipo, valores, resultado, tempo, contagem):
+    sufixo = f"Tempo: {tempo*1000:.4f} ms - {resumo_io(contagem)}"
+    if tipo == 'insercao':
+        return f"✓ INSERÇÃO (+): {resultado} - {sufixo}"
+    if tipo == 'delecao':
+        return f"✓ REMOÇÃO (-): Chave {valores[0]} removida - {sufixo}"
+    if tipo == 'intervalo':
+        return f"✓ INTERVALO (~): [{valores[0]}, {valores[1]}] -> {len(resultado)} registros - {sufixo}"
+    return f"✓ BUSCA (?): Chave {valores[0]} -> {resultado} - {sufixo}"
+
+
+def _mensagem_falha(tipo, chave):
+    if tipo == 'insercao':
+        return f"✗ INSERÇÃO (+): Registro com chave {chave} recusado pela estrutura"
+    if tipo == 'delecao':
+        return f"✗ REMOÇÃO (-): Chave {chave} não encontrada"
+    return f"✗ BUSCA (?): Chave {chave} não encontrada"
+
+
+def _mensagem_erro(tipo, erro):
+    if tipo == 'insercao':
+        return f"✗ INSERÇÃO (+): Erro ao converter valores - {erro}"
+    if tipo == 'delecao':
+        return f"✗ REMOÇÃO (-): Erro - {erro}"
+    if tipo == 'intervalo':
+        return f"✗ INTERVALO (~): Erro - {erro}"
+    return f"✗ BUSCA (?): Erro - {erro}"
+
+
+def imprimir_resumo(estatisticas, estrutura=None, titulo="RESUMO DAS OPERAÇÕES"):
+    """Resumo final: contagens, vazão, tempos e I/O por tipo de operação."""
+    print("\n" + "="*60)
+    print(titulo)
+    print("="*60)
+    print(f"Total de linhas processadas: {estatisticas.linhas}")
+    print(f"Total de Inserções: {estatisticas.sucessos['insercao']}")
+    print(f"Total de Deleções: {estatisticas.sucessos['delecao']}")
+    print(f"Total de Buscas: {estatisticas.sucessos['busca']}")
+    if estatisticas.sucessos['intervalo']:
+        print(f"Total de Buscas por Intervalo: {estatisticas.sucessos['intervalo']}")
+    if estatisticas.invalidas or estatisticas.desconhecidas:
+        print(f"Linhas inválidas: {estatisticas.invalidas} | "
+              f"Operações desconhecidas: {estatisticas.desconhecidas}")
+    if estatisticas.nao_executadas:
+        print(f"Operações não executadas: {estatisticas.nao_executadas}")
+    if getattr(estrutura, 'count', None) is not None:
+        print(f"Registros atualmente na tabela: {estrutura.count}")
+    print(f"Tempo total do replay: {estatisticas.duracao:.4f} s | "
+          f"Vazão: {estatisticas.ops_por_segundo():.0f} ops/s")
+    print("="*60)
+
+    print("\nESTATÍSTICAS DE TEMPO DE EXECUÇÃO")
+    print("="*60)
+    for tipo, rotulo in ROTULOS_OPERACAO.items():
+        n = estatisticas.sucessos[tipo]
+        if not n:
+            continue
+        total, minimo, maximo = estatisticas.tempos[tipo]
+        print(f"\n{rotulo}:")
+        print(f"  - Tempo total: {total*1000:.4f} ms")
+        print(f"  - Tempo médio: {(total/n)*1000:.4f} ms")
+        print(f"  - Tempo mínimo: {minimo*1000:.4f} ms")
+        print(f"  - Tempo máximo: {maximo*1000:.4f} ms")
+        print(f"  - Percentis (ms): {resumo_percentis(estatisticas.latencias[tipo])}")
+        imprimir_io(estatisticas.io_por_tipo(tipo), n)
+
+    if estrutura is not None:
+        # I/O acumulado de todas as operações (inclusive as sem sucesso)
+        imprimir_io(estrutura.io.totais(), estrutura.io.operacoes, "I/O ACUMULADO (todas as operações)")
+        if getattr(estrutura, 'pool', None) is not None:
+            # No modo em disco, o buffer pool absorve parte das leituras lógicas
+            print(f"  - Leituras físicas: {estrutura.paginas.leituras} | Escritas físicas: {estrutura.paginas.escritas}")
+            print(f"  - Buffer pool: {estrutura.pool.acertos} acertos / {estrutura.pool.faltas} faltas")
+        if hasattr(estrutura, 'estatisticas'):
+            imprimir_estatisticas(estrutura.estatisticas())
+    print("="*60)
+
+
+def imprimir_estatisticas(estatisticas, titulo="ESTATÍSTICAS DA ESTRUTURA"):
+    """Imprime o dict de estatisticas() de uma estrutura, uma linha por item."""
+    print(f"\n{titulo}:")
+    for nome, valor in estatisticas.items():
+        if isinstance(valor, float):
+            valor = f"{valor:.4f}"
+        elif isinstance(valor, dict):
+            valor = ", ".join(f"{chave}: {quantidade}" for chave, quantidade in valor.items())
+        print(f"  - {nome}: {valor}")
+
+
+def processar_csv(arquivo_csv, estrutura, verbosidade=DETALHADO, amostragem=1000):
+    """
+    Lê o arquivo CSV e executa as operações automaticamente.
+    Formato esperado: OP,A1,A2,A3
+    - +,val1,val2,val3 (INSERÇÃO)
+    - -,chave (REMOÇÃO)
+    - ?,chave (BUSCA)
+    - ~,inicio,fim (BUSCA POR INTERVALO, somente em estruturas com buscar_intervalo)
+    verbosidade: SILENCIOSO, RESUMO, AMOSTRA (uma linha a cada 'amostragem'
+    operações) ou DETALHADO (uma linha por operação). Retorna as EstatisticasReplay.
+    """
+    try:
+        with open(arquivo_csv, 'r', encoding='utf-8') as arquivo:
+            # Pula o cabeçalho se existir
+            primeira_linha = arquivo.readline()
+            if primeira_linha.split(',', 1)[0].strip().upper() == 'OP':
+                if verbosidade >= RESUMO:
+                    print(f"Cabeçalho detectado: {primeira_linha.strip().split(',')}\n")
+                linhas = arquivo
+            else:
+                linhas = _encadear(primeira_linha, arquivo)
+            estatisticas = executar_operacoes(linhas, estrutura, verbosidade, amostragem)
+    except FileNotFoundError:
+        print(f"ERRO: Arquivo '{arquivo_csv}' não encontrado!")
+        return None
+    except Exception as e:
+        print(f"ERRO ao processar CSV: {e}")
+        return None
+
+    if verbosidade >= RESUMO:
+        imprimir_resumo(estatisticas, estrutura)
+    return estatisticas
+
+
+def _encadear(primeira_linha, arquivo):
+    yield primeira_linha
+    yield from arquivo
@@ -0,0 +1,234 @@
+import multiprocessing
+import os
+import random
+import sys
+import time
+from bisect import bisect_right
+
+from implementacao_btree_bd import BPlusTree
+from implementacao_linearhash_bd import HashLinear
+from instrumentacao_bd import somar_io, imprimir_io
+from replay_bd import (TIPOS_OPERACAO, SILENCIOSO, EstatisticasReplay, executar_operacoes,
+                       imprimir_resumo)
+
+# --- Constantes de Configuração ---
+PARTICOES = ('hash', 'intervalo')
+TAMANHO_LOTE = 2000       # Linhas enviadas de uma vez a cada processo
+LOTES_EM_ESPERA = 8       # Lotes na fila de cada processo antes de o leitor esperar
+AMOSTRA_INTERVALOS = 100000  # Chaves amostradas para calcular os limites da partição por intervalo
+
+
+# *********************************************************************************
+# PARTICIONAMENTO
+# Cada chave pertence sempre ao mesmo shard, e as linhas de um shard chegam ao seu
+# processo na ordem do arquivo: a ordem das operações de uma mesma chave é preservada.
+# *********************************************************************************
+def shard_por_hash(chave, num_shards):
+    # Hash multiplicativo (Fibonacci): espalha bem chaves sequenciais ou com passo fixo
+    return (((chave * 0x9E3779B1) & 0xFFFFFFFF) * num_shards) >> 32
+
+
+def limites_por_amostra(arquivo_csv, num_shards, tamanho_amostra=AMOSTRA_INTERVALOS, semente=42):
+    """
+    Limites da partição por intervalo: os quantis de uma amostra (reservoir sampling)
+    das chaves do arquivo, para que os shards recebam volumes parecidos.
+    """
+    rnd = random.Random(semente)
+    amostra = []
+    vistas = 0
+    with open(arquivo_csv, 'r', encoding='utf-8') as arquivo:
+        for linha in arquivo:
+            chave = _chave_da_linha(linha)
+            if chave is None:
+                continue
+            vistas += 1
+            if len(amostra) < tamanho_amostra:
+                amostra.append(chave)
+            else:
+                k = rnd.randrange(vistas)
+                if k < tamanho_amostra:
+                    amostra[k] = chave
+    amostra.sort()
+    if not amostra:
+        return [0] * (num_shards - 1)
+    return [amostra[len(amostra) * i // num_shards] for i in range(1, num_shards)]
+
+
+def _chave_da_linha(linha):
+    # (Apenas a chave: o processo dono do shard interpreta a linha completa)
+    # Buscas por intervalo podem atravessar shards e não são distribuídas (ver replay_paralelo)
+    campos = linha.split(',', 2)
+    if len(campos) < 2 or campos[0].strip() not in TIPOS_OPERACAO or campos[0].strip() == '~':
+        return None
+    try:
+        return int(campos[1])
+    except ValueError:
+        return None
+
+
+# *********************************************************************************
+# PROCESSO DE UM SHARD
+# *********************************************************************************
+def _resumo_estrutura(estrutura):
+    # Estatísticas da estrutura final do shard (I/O acumulado e estatisticas(), em O(1))
+    resumo = {'io_total': estrutura.io.totais(), 'operacoes': estrutura.io.operacoes}
+    resumo.update(estrutura.estatisticas())
+    return resumo
+
+
+def _trabalhador(indice, fila, resultados, classe, args, kwargs):
+    shard = {'linhas': 0}
+    estatisticas = EstatisticasReplay()
+    inicio = time.perf_counter()
+    lote = []
+    try:
+        estrutura = classe(*args, **dict(kwargs, verboso=False))
+        while True:
+            lote = fila.get()
+            if lote is None:
+                break
+            shard['linhas'] += len(lote)
+            executar_operacoes(lote, estrutura, SILENCIOSO, estatisticas=estatisticas)
+        shard['estrutura'] = _resumo_estrutura(estrutura)
+    except Exception as e:
+        # Esvazia a fila para o leitor não ficar bloqueado e reporta o erro
+        shard['erro'] = f"{type(e).__name__}: {e}"
+        while lote is not None:
+            lote = fila.get()
+    shard['tempo'] = time.perf_counter() - inicio
+    resultados.put((indice, estatisticas, shard))
+
+
+# *********************************************************************************
+# REPLAY PARALELO
+# *********************************************************************************
+def replay_paralelo(arquivo_csv, classe, *args, num_processos=None, particao='hash',
+                    limites=None, tamanho_lote=TAMANHO_LOTE, verboso=True, **kwargs):
+    """
+    Executa as operações de um CSV (mesmo formato de processar_csv) em 'num_processos'
+    processos, cada um dono de um shard: uma estrutura classe(*args, **kwargs) própria.
+    - particao='hash': shard escolhido pelo hash da chave
+    - particao='intervalo': shard escolhido pela faixa da chave ('limites' crescentes,
+      num_processos - 1 valores; por padrão, quantis de uma amostra do arquivo)
+    O processo principal só lê o arquivo e distribui as linhas em lotes; cada processo
+    executa o seu lote com executar_operacoes() (replay silencioso). Buscas por
+    intervalo (~) podem atravessar shards e não são executadas: são contadas em
+    nao_executadas, com um aviso. Retorna (EstatisticasReplay somadas, lista com
+    linhas/tempo/estrutura de cada shard).
+    """
+    if particao not in PARTICOES:
+        raise ValueError(f"Partição inválida: '{particao}'. Opções: {', '.join(PARTICOES)}")
+    num_processos = num_processos or os.cpu_count() or 1
+    if not os.path.exists(arquivo_csv):
+        print(f"ERRO: Arquivo '{arquivo_csv}' não encontrado!")
+        return None
+    if particao == 'intervalo':
+        if limites is None:
+            limites = limites_por_amostra(arquivo_csv, num_processos)
+        if len(limites) != num_processos - 1:
+            raise ValueError(f"São necessários {num_processos - 1} limites para {num_processos} shards.")
+        destino = lambda chave: bisect_right(limites, chave)
+    else:
+        destino = lambda chave: shard_por_hash(chave, num_processos)
+
+    resultados = multiprocessing.Queue()
+    filas = [multiprocessing.Queue(LOTES_EM_ESPERA) for _ in range(num_processos)]
+    processos = [multiprocessing.Process(target=_trabalhador,
+                                         args=(i, filas[i], resultados, classe, args, kwargs))
+                 for i in range(num_processos)]
+    for processo in processos:
+        processo.start()
+
+    inicio = time.perf_counter()
+    ignoradas = intervalos = 0
+    lotes = [[] for _ in range(num_processos)]
+    try:
+        with open(arquivo_csv, 'r', encoding='utf-8') as arquivo:
+            for linha in arquivo:
+                chave = _chave_da_linha(linha)
+                if chave is None:
+                    operacao = linha.split(',', 1)[0].strip()
+                    if operacao == '~':
+                        intervalos += 1
+                    elif linha.strip() and operacao.upper() != 'OP':
+                        # Linha vazia, malformada ou com operação desconhecida (o cabeçalho não conta)
+                        ignoradas += 1
+                    continue
+                shard = destino(chave)
+                lotes[shard].append(linha)
+                if len(lotes[shard]) >= tamanho_lote:
+                    filas[shard].put(lotes[shard])
+                    lotes[shard] = []
+    finally:
+        for shard, fila in enumerate(filas):
+            if lotes[shard]:
+                fila.put(lotes[shard])
+            fila.put(None)
+
+    total = EstatisticasReplay()
+    por_shard = [None] * num_processos
+    for _ in range(num_processos):
+        indice, estatisticas, shard = resultados.get()
+        total.somar(estatisticas)
+        por_shard[indice] = shard
+    for processo in processos:
+        processo.join()
+
+    falhas = [(i, shard['erro']) for i, shard in enumerate(por_shard) if 'erro' in shard]
+    for indice, erro in falhas:
+        print(f"ERRO no shard {indice}: {erro}")
+    if falhas:
+        return None
+
+    total.desconhecidas += ignoradas
+    total.nao_executadas += intervalos
+    if intervalos:
+        print(f"AVISO: {intervalos} buscas por intervalo (~) não foram executadas: podem "
+              f"atravessar shards, e o replay paralelo não as distribui.")
+    total.duracao = time.perf_counter() - inicio  # Tempo de parede, da leitura ao último shard
+    if verboso:
+        imprimir_resumo(total, titulo=f"RESUMO DAS OPERAÇÕES ({num_processos} processos, "
+                                      f"partição por {particao})")
+        imprimir_shards(por_shard)
+    return total, por_shard
+
+
+def imprimir_shards(por_shard):
+    """I/O acumulado de todos os shards e uma linha com a forma final de cada um."""
+    io_total, operacoes, registros = {}, 0, 0
+    for shard in por_shard:
+        somar_io(io_total, shard['estrutura']['io_total'])
+        operacoes += shard['estrutura']['operacoes']
+        registros += shard['estrutura']['registros']
+    imprimir_io(io_total, operacoes, "I/O ACUMULADO (todas as operações, soma dos shards)")
+
+    print(f"\nSHARDS ({registros} registros no total):")
+    for indice, shard in enumerate(por_shard):
+        estrutura = shard['estrutura']
+        forma = (f"altura {estrutura['altura']}" if 'altura' in estrutura
+                 else f"capacidade {estrutura['capacidade']}, {estrutura['rehashes']} rehashes")
+        print(f"  [{indice}] {shard['linhas']} linhas | {estrutura['registros']} registros | "
+              f"{forma} | {shard['tempo']:.4f} s")
+    print("="*60)
+
+
+# --- PROGRAMA PRINCIPAL ---
+if __name__ == "__main__":
+    # Uso: python replay_paralelo_bd.py arquivo.csv [btree|hash] [processos] [hash|intervalo]
+    if len(sys.argv) < 2:
+        print("Uso: python replay_paralelo_bd.py arquivo.csv [btree|hash] [processos] [hash|intervalo]")
+        sys.exit(1)
+    arquivo_csv = sys.argv[1]
+    nome = sys.argv[2] if len(sys.argv) > 2 else 'btree'
+    processos = int(sys.argv[3]) if len(sys.argv) > 3 else None
+    particao = sys.argv[4] if len(sys.argv) > 4 else 'hash'
+
+    NUM_CAMPOS = 3
+    if nome == 'btree':
+        replay_paralelo(arquivo_csv, BPlusTree, NUM_CAMPOS, 4096,
+                        num_processos=processos, particao=particao)
+    elif nome == 'hash':
+        replay_paralelo(arquivo_csv, HashLinear, NUM_CAMPOS, 1024 * 1024,
+                        num_processos=processos, particao=particao)
+    else:
+        print(f"ERRO: Estrutura '{nome}' desconhecida. Opções: btree, hash")
@@ -0,0 +1,395 @@
+import asyncio
+import random
+import sys
+import time
+from collections import deque
+
+from implementacao_btree_bd import BPlusTree
+from implementacao_linearhash_bd import HashLinear
+from instrumentacao_bd import HistogramaLatencia
+
+# --- Protocolo (texto, uma linha por requisição e uma por resposta) ---
+# Requisições, no mesmo formato das linhas do CSV:
+#   +,v1,v2,v3          inserção
+#   -,chave             remoção
+#   ?,chave             busca por igualdade
+#   ~,inicio,fim[,lim]  busca por intervalo (somente BPlusTree)
+# Respostas, na ordem das requisições de cada conexão:
+#   OK                  inserção/remoção feita
+#   NAO                 chave não encontrada (ou, na inserção, já existente)
+#   R,v1,v2,v3          registro encontrado
+#   I,v1,v2,v3;v1,...   registros do intervalo ('I,' se vazio)
+#   ERRO,mensagem       requisição inválida
+# O cliente pode enviar várias requisições sem esperar as respostas (pipelining).
+PORTA_PADRAO = 7070
+LOTE_MAXIMO_PADRAO = 1024
+# Maior linha de requisição aceita (bytes): uma linha maior, terminada ou não, recebe
+# ERRO e encerra a conexão, para que o buffer da linha incompleta não cresça sem limite
+TAMANHO_MAXIMO_LINHA = 64 * 1024
+
+RESPOSTA_OK = b'OK\n'
+RESPOSTA_NAO = b'NAO\n'
+
+
+def _codificar_registro(registro):
+    return ','.join(map(str, registro)).encode()
+
+
+def _resposta_registro(registro):
+    if registro is None:
+        return RESPOSTA_NAO
+    return b'R,' + _codificar_registro(registro) + b'\n'
+
+
+def _resposta_erro(mensagem):
+    return b'ERRO,' + mensagem.encode() + b'\n'
+
+
+def _resposta_falha(erro):
+    # Exceção ao executar uma requisição, em uma linha só
+    return _resposta_erro(f"falha interna: {' '.join(str(erro).split())}")
+
+
+class _ConexaoIndice(asyncio.Protocol):
+    # Uma conexão de cliente: separa o fluxo em linhas e as entrega ao servidor
+    def __init__(self, servidor):
+        self.servidor = servidor
+        self.transporte = None
+        self._resto = b''
+
+    def connection_made(self, transporte):
+        self.transporte = transporte
+
+    def data_received(self, dados):
+        linhas = (self._resto + dados).split(b'\n')
+        self._resto = linhas.pop()  # Linha ainda incompleta (sem '\n')
+        # Posição da primeira linha longa (len(linhas): a incompleta; None: nenhuma)
+        longa = next((k for k, linha in enumerate(linhas) if len(linha) > TAMANHO_MAXIMO_LINHA),
+                     len(linhas) if len(self._resto) > TAMANHO_MAXIMO_LINHA else None)
+        if longa is not None:
+            # Só as requisições anteriores à linha longa são executadas
+            del linhas[longa:]
+            self._resto = b''
+            self.transporte.pause_reading()
+        self.servidor._enfileirar(self, [linha.split(b',') for linha in linhas if linha.strip()])
+        if longa is not None:
+            # Agendado depois do processamento: o ERRO vem após as respostas anteriores
+            erro = _resposta_erro(f"linha maior que {TAMANHO_MAXIMO_LINHA} bytes")
+            asyncio.get_running_loop().call_soon(self._encerrar, erro)
+
+    def enviar(self, dados):
+        if not self.transporte.is_closing():
+            self.transporte.write(dados)
+
+    def _encerrar(self, resposta):
+        self.enviar(resposta)
+        self.transporte.close()  # Fecha depois de escrever o que está no buffer
+
+
+class ServidorIndice:
+    """
+    Serve uma BPlusTree ou HashLinear por TCP (asyncio), no protocolo descrito acima.
+    As requisições de todas as conexões que chegam numa mesma volta do laço de eventos
+    são executadas juntas, em ordem de chegada: buscas consecutivas (até 'lote_maximo')
+    viram uma única passada de buscar_lote() na BPlusTree (na HashLinear, um laço de
+    buscar() sem voltar ao laço de eventos), e cada conexão recebe as suas respostas
+    numa única escrita.
+    A estrutura só é acessada pela thread do laço de eventos, então não precisa do
+    modo concorrente.
+    """
+    def __init__(self, estrutura, lote_maximo=LOTE_MAXIMO_PADRAO):
+        if lote_maximo < 1:
+            raise ValueError(f"lote_maximo deve ser >= 1, recebido {lote_maximo}")
+        self.estrutura = estrutura
+        self.lote_maximo = lote_maximo
+        self._pendentes = []  # (conexão, campos) aguardando a próxima volta do laço
+        self._agendado = False
+
+        # Estatísticas do servidor
+        self.requisicoes = 0
+        self.lotes_busca = 0
+        self.buscas_em_lote = 0
+
+    async def iniciar(self, host='127.0.0.1', porta=PORTA_PADRAO):
+        """Abre o socket e retorna o asyncio.Server (porta=0 escolhe uma porta livre)."""
+        laco = asyncio.get_running_loop()
+        return await laco.create_server(lambda: _ConexaoIndice(self), host, porta)
+
+    def _enfileirar(self, conexao, requisicoes):
+        self._pendentes.extend((conexao, campos) for campos in requisicoes)
+        if self._pendentes and not self._agendado:
+            self._agendado = True
+            asyncio.get_running_loop().call_soon(self._processar)
+
+    # *********************************************************************************
+    # EXECUÇÃO DAS REQUISIÇÕES
+    # *********************************************************************************
+    def _processar(self):
+        pendentes, self._pendentes = self._pendentes, []
+        self._agendado = False
+        self.requisicoes += len(pendentes)
+
+        respostas = {}  # conexão -> respostas na ordem das suas requisições
+        i, n = 0, len(pendentes)
+        while i < n:
+            if pendentes[i][1][0].strip() == b'?':
+                # Junta as buscas consecutivas: nenhuma escrita fica entre elas
+                j = i + 1
+                while j < n and j - i < self.lote_maximo and pendentes[j][1][0].strip() == b'?':
+                    j += 1
+                try:
+                    self._buscar_em_lote(pendentes[i:j], respostas)
+                except Exception as erro:
+                    for conexao, _ in pendentes[i:j]:
+                        respostas.setdefault(conexao, []).append(_resposta_falha(erro))
+                i = j
+                continue
+            conexao, campos = pendentes[i]
+            try:
+                linha = self._executar(campos)
+            except Exception as erro:
+                # Uma falha responde só a sua requisição: as demais do lote seguem
+                linha = _resposta_falha(erro)
+            respostas.setdefault(conexao, []).append(linha)
+            i += 1
+
+        for conexao, linhas in respostas.items():
+            conexao.enviar(b''.join(linhas))
+
+    def _buscar_em_lote(self, requisicoes, respostas):
+        chaves, validas = [], []
+        for k, (_, campos) in enumerate(requisicoes):
+            try:
+                chaves.append(int(campos[1]))
+                validas.append(k)
+            except (IndexError, ValueError):
+                pass
+
+        self.lotes_busca += 1
+        self.buscas_em_lote += len(chaves)
+        if isinstance(self.estrutura, BPlusTree):
+            encontrados = self.estrutura.buscar_lote(chaves)
+        else:
+            encontrados = [self.estrutura.buscar(chave) for chave in chaves]
+
+        resultado = dict(zip(validas, encontrados))
+        for k, (conexao, _) in enumerate(requisicoes):
+            if k in resultado:
+                linha = _resposta_registro(resultado[k])
+            else:
+                linha = _resposta_erro("chave inválida")
+            respostas.setdefault(conexao, []).append(linha)
+
+    def _executar(self, campos):
+        operacao = campos[0].strip()
+        try:
+            valores = [int(campo) for campo in campos[1:] if campo.strip()]
+        except ValueError:
+            return _resposta_erro("valores devem ser inteiros")
+
+        if operacao == b'+':
+            if len(valores) != self.estrutura.num_fields:
+                return _resposta_erro(f"o registro deve ter {self.estrutura.num_fields} campos")
+            # Chave repetida é recusada, igual para as duas estruturas
+            registro = tuple(valores)
+            if isinstance(self.estrutura, BPlusTree):
+                # Uma descida só: a repetição é detectada na própria folha
+                if self.estrutura.inserir_se_ausente(registro):
+                    return RESPOSTA_OK
+            elif self.estrutura.buscar(valores[0]) is None and self.estrutura.inserir(registro):
+                return RESPOSTA_OK
+            if self.estrutura.buscar(valores[0]) is not None:
+                return RESPOSTA_NAO
+            # Recusado pela estrutura (tabela cheia, valor fora do suportado...)
+            return _resposta_erro("registro recusado pela estrutura")
+        if operacao == b'-':
+            if len(valores) != 1:
+                return _resposta_erro("remoção espera uma chave")
+            return RESPOSTA_OK if self.estrutura.remover(valores[0]) else RESPOSTA_NAO
+        if operacao == b'~':
+            if not isinstance(self.estrutura, BPlusTree):
+                return _resposta_erro("intervalo não suportado por esta estrutura")
+            if len(valores) not in (2, 3):
+                return _resposta_erro("intervalo espera inicio,fim[,limite]")
+            registros = self.estrutura.iterar_intervalo(*valores)
+            return b'I,' + b';'.join(map(_codificar_registro, registros)) + b'\n'
+        return _resposta_erro(f"operação desconhecida '{operacao.decode(errors='replace')}'")
+
+
+# *********************************************************************************
+# CLIENTE
+# *********************************************************************************
+class ErroServidor(Exception):
+    """Resposta ERRO do servidor: a requisição era inválida ou foi recusada."""
+
+
+class ClienteIndice:
+    """
+    Cliente assíncrono do ServidorIndice. Cada chamada envia a requisição na hora e
+    aguarda a sua resposta; chamadas simultâneas na mesma conexão (ex.: asyncio.gather)
+    ficam em pipeline e as respostas são casadas pela ordem de envio.
+    Uma resposta ERRO levanta ErroServidor com a mensagem do servidor (None fica
+    só para NAO: chave não encontrada ou, na inserção, já existente).
+    Uso: cliente = await ClienteIndice.conectar('127.0.0.1', 7070)
+    """
+    def __init__(self, leitor, escritor):
+        self._leitor = leitor
+        self._escritor = escritor
+        self._esperando = deque()  # Futures das requisições enviadas, em ordem
+        self._tarefa_leitura = asyncio.get_running_loop().create_task(self._ler_respostas())
+
+    @classmethod
+    async def conectar(cls, host='127.0.0.1', porta=PORTA_PADRAO):
+        leitor, escritor = await asyncio.open_connection(host, porta)
+        return cls(leitor, escritor)
+
+    async def _ler_respostas(self):
+        try:
+            while True:
+                linha = await self._leitor.readline()
+                if not linha:
+                    break
+                futuro = self._esperando.popleft()
+                if not futuro.done():
+                    futuro.set_result(linha.rstrip(b'\n'))
+        finally:
+            while self._esperando:
+                futuro = self._esperando.popleft()
+                if not futuro.done():
+                    futuro.set_exception(ConnectionError("Conexão encerrada pelo servidor."))
+
+    async def _requisitar(self, *campos):
+        futuro = asyncio.get_running_loop().create_future()
+        self._esperando.append(futuro)
+        self._escritor.write(','.join(map(str, campos)).encode() + b'\n')
+        await self._escritor.drain()
+        return self._interpretar(await futuro)
+
+    @staticmethod
+    def _interpretar(resposta):
+        if resposta == b'OK':
+            return True
+        if resposta == b'NAO':
+            return None
+        tipo, _, corpo = resposta.partition(b',')
+        if tipo == b'R':
+            return tuple(int(valor) for valor in corpo.split(b','))
+        if tipo == b'I':
+            return [tuple(int(valor) for valor in registro.split(b','))
+                    for registro in corpo.split(b';') if registro]
+        if tipo == b'ERRO':
+            raise ErroServidor(corpo.decode(errors='replace'))
+        raise ErroServidor(f"resposta inesperada: {resposta.decode(errors='replace')}")
+
+    async def inserir(self, registro):
+        """Retorna True se inseriu, None se a chave já existia (ErroServidor se recusado)."""
+        return await self._requisitar('+', *registro)
+
+    async def remover(self, chave):
+        """Retorna True se removeu, None se a chave não existia."""
+        return await self._requisitar('-', chave)
+
+    async def buscar(self, chave):
+        return await self._requisitar('?', chave)
+
+    async def buscar_intervalo(self, inicio, fim, limite=None):
+        if limite is None:
+            return await self._requisitar('~', inicio, fim)
+        return await self._requisitar('~', inicio, fim, limite)
+
+    async def fechar(self):
+        self._escritor.close()
+        await self._escritor.wait_closed()
+        await self._tarefa_leitura
+
+
+# *********************************************************************************
+# GERADOR DE CARGA
+# *********************************************************************************
+async def gerar_carga(host='127.0.0.1', porta=PORTA_PADRAO, conexoes=4, janela=32,
+                      requisicoes=20000, fracao_escritas=0.1, num_campos=3, faixa_chaves=100000,
+                      semente=42, verboso=True):
+    """
+    Dispara 'requisicoes' contra o servidor por 'conexoes' conexões, cada uma com até
+    'janela' requisições em pipeline (janela=1: sem pipelining). Escritas são metade
+    inserções e metade remoções; o restante são buscas. Retorna um dict com a vazão
+    (requisições/s), os percentis de latência (ms) e as respostas ERRO ('erros').
+    """
+    rnd = random.Random(semente)
+    latencias = HistogramaLatencia()
+    por_fluxo = max(1, requisicoes // (conexoes * janela))
+    erros = 0
+
+    async def fluxo(cliente, r):
+        # Um "usuário" da conexão: envia a próxima requisição quando recebe a resposta
+        nonlocal erros
+        for _ in range(por_fluxo):
+            chave = r.randrange(faixa_chaves)
+            sorteio = r.random()
+            inicio = time.perf_counter()
+            try:
+                if sorteio < fracao_escritas / 2:
+                    await cliente.inserir((chave,) + (chave,) * (num_campos - 1))
+                elif sorteio < fracao_escritas:
+                    await cliente.remover(chave)
+                else:
+                    await cliente.buscar(chave)
+            except ErroServidor:
+                erros += 1  # Respondida (entra na latência), mas não conta como NAO
+            latencias.registrar(time.perf_counter() - inicio)
+
+    clientes = [await ClienteIndice.conectar(host, porta) for _ in range(conexoes)]
+    inicio = time.perf_counter()
+    await asyncio.gather(*(fluxo(cliente, random.Random(rnd.random()))
+                           for cliente in clientes for _ in range(janela)))
+    duracao = time.perf_counter() - inicio
+    for cliente in clientes:
+        await cliente.fechar()
+
+    resultado = {'requisicoes': latencias.total, 'erros': erros, 'vazao': latencias.total / duracao}
+    resultado.update({rotulo: segundos * 1000 for rotulo, segundos in latencias.percentis().items()})
+    resultado['max'] = latencias.maximo() * 1000
+    if verboso:
+        print(f"Requisições: {resultado['requisicoes']} | Conexões: {conexoes} | Janela: {janela}")
+        if erros:
+            print(f"Respostas ERRO: {erros}")
+        print(f"Vazão: {resultado['vazao']:.0f} req/s")
+        print(f"Latência (ms): p50 {resultado['p50']:.3f} | p90 {resultado['p90']:.3f} | "
+              f"p99 {resultado['p99']:.3f} | p99.9 {resultado['p999']:.3f} | máx {resultado['max']:.3f}")
+    return resultado
+
+
+def criar_estrutura(nome, num_campos=3, tamanho_pagina=4096, tamanho_hash=1024 * 1024):
+    if nome == 'btree':
+        return BPlusTree(num_campos, tamanho_pagina, verboso=False)
+    if nome == 'hash':
+        return HashLinear(num_campos, tamanho_hash, verboso=False)
+    raise ValueError(f"Estrutura inválida: '{nome}'. Opções: btree, hash")
+
+
+async def servir(estrutura, host='127.0.0.1', porta=PORTA_PADRAO):
+    servidor = ServidorIndice(estrutura)
+    soquete = await servidor.iniciar(host, porta)
+    print(f"Servindo {type(estrutura).__name__} em {host}:{porta} (Ctrl+C para encerrar)")
+    async with soquete:
+        await soquete.serve_forever()
+
+
+# --- PROGRAMA PRINCIPAL ---
+if __name__ == "__main__":
+    # Uso:
+    #   python servidor_bd.py servidor [btree|hash] [porta]   inicia o servidor
+    #   python servidor_bd.py carga [porta]                   gera carga contra ele
+    modo = sys.argv[1] if len(sys.argv) > 1 else 'servidor'
+    if modo == 'servidor':
+        nome = sys.argv[2] if len(sys.argv) > 2 else 'btree'
+        porta = int(sys.argv[3]) if len(sys.argv) > 3 else PORTA_PADRAO
+        try:
+            asyncio.run(servir(criar_estrutura(nome), porta=porta))
+        except KeyboardInterrupt:
+            pass
+    elif modo == 'carga':
+        porta = int(sys.argv[2]) if len(sys.argv) > 2 else PORTA_PADRAO
+        asyncio.run(gerar_carga(porta=porta))
+    else:
+        print(f"ERRO: Modo '{modo}' desconhecido. Opções: servidor, carga")
@@ -0,0 +1,55 @@
+from collections import Counter
+
+import pytest
+
+from gerador_carga_bd import DISTRIBUICOES, MISTURAS, GeradorCarga, gerar_csv
+from implementacao_btree_bd import BPlusTree
+from replay_bd import SILENCIOSO, processar_csv
+
+
+@pytest.mark.parametrize('distribuicao', DISTRIBUICOES)
+def test_mistura_segue_as_proporcoes_pedidas(distribuicao):
+    gerador = GeradorCarga(distribuicao=distribuicao, faixa_chaves=200000, semente=1)
+    list(gerador.operacoes(2000, 'carga'))
+    quantidade = 20000
+    contagem = Counter(linha[0] for linha in gerador.operacoes(quantidade, 'balanceada'))
+    for op, fracao in MISTURAS['balanceada'].items():
+        assert abs(contagem[op] / quantidade - fracao) < 0.02
+    assert set(contagem) == set(MISTURAS['balanceada'])
+
+
+def test_mesma_semente_gera_a_mesma_carga():
+    def carga(semente):
+        gerador = GeradorCarga(distribuicao='zipf', faixa_chaves=5000, semente=semente)
+        return list(gerador.operacoes(3000, 'balanceada'))
+    assert carga(7) == carga(7)
+    assert carga(7) != carga(8)
+
+
+def test_mistura_invalida_e_recusada():
+    gerador = GeradorCarga()
+    with pytest.raises(ValueError, match="Mistura inválida"):
+        list(gerador.operacoes(1, 'nenhuma'))
+    with pytest.raises(ValueError, match="pesos positivos"):
+        list(gerador.operacoes(1, {'*': 1.0}))
+
+
+@pytest.mark.parametrize('distribuicao', DISTRIBUICOES)
+def test_csv_gerado_roda_sem_falhas_no_replay(distribuicao, tmp_path):
+    caminho = str(tmp_path / 'carga.csv')
+    gerador = gerar_csv(caminho, 3000, distribuicao=distribuicao, mistura='balanceada',
+                        carga_inicial=500, fracao_acertos=1.0, semente=3)
+    with open(caminho, encoding='utf-8') as arquivo:
+        linhas = arquivo.readlines()
+    assert linhas[0] == "OP,A1,A2,A3\n" and len(linhas) == 3501
+
+    arvore = BPlusTree(3, 256, verboso=False)
+    estatisticas = processar_csv(caminho, arvore, SILENCIOSO)
+    # Inserções usam chaves novas, remoções atingem chaves presentes e, com
+    # fracao_acertos=1, toda busca encontra a chave: nenhuma operação falha
+    contagem = Counter(linha[0] for linha in linhas[1:])
+    assert estatisticas.linhas == 3500
+    assert estatisticas.invalidas == estatisticas.desconhecidas == 0
+    assert estatisticas.sucessos == {'insercao': contagem['+'], 'delecao': contagem['-'],
+                                     'busca': contagem['?'], 'intervalo': contagem['~']}
+    assert sorted(gerador.presentes) == [registro[0] for registro in arvore.buscar_intervalo(0, 10**9)]
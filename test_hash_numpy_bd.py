@@ -0,0 +1,81 @@
+import random
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from hash_numpy_bd import HashLinearNumPy
+from implementacao_linearhash_bd import HashLinear, OCUPADO, REMOVIDO
+
+
+def _tabela(capacidade=8, **kwargs):
+    kwargs.setdefault('fator_carga_max', None)
+    kwargs.setdefault('limite_tombstones', None)
+    return HashLinearNumPy(2, 2 * 4 * capacidade, verboso=False, **kwargs)
+
+
+def test_lote_bate_com_a_hash_linear(capsys):
+    # Lotes com chaves repetidas no próprio lote e chaves já inseridas, intercalados
+    # com remoções; a HashLinear, registro a registro, é o modelo de referência
+    rnd = random.Random(3)
+    tabela = HashLinearNumPy(2, 2 * 4 * 16, verboso=False)
+    referencia = HashLinear(2, 2 * 4 * 16, verboso=False)
+    for rodada in range(60):
+        lote = [(rnd.randrange(400), rodada * 100 + i) for i in range(rnd.randrange(1, 40))]
+        esperados = sum(referencia.inserir(registro) for registro in lote)
+        assert tabela.inserir_lote(np.array(lote)) == esperados
+        for chave in rnd.sample(range(400), 15):
+            assert tabela.remover(chave) == referencia.remover(chave)
+
+        chaves = np.array(rnd.sample(range(400), 50))
+        encontrados, registros = tabela.buscar_lote(chaves)
+        for chave, achou, registro in zip(chaves.tolist(), encontrados, registros):
+            esperado = referencia.buscar(chave)
+            assert bool(achou) == (esperado is not None)
+            assert tuple(registro.tolist()) == (esperado or (0, 0))
+        assert len(referencia) == tabela.count
+    assert tabela.rehashes
+    capsys.readouterr()
+
+
+def test_inserir_lote_ignora_repetidas_e_existentes():
+    tabela = _tabela(16)
+    assert tabela.inserir((5, 50))
+    assert tabela.inserir_lote(np.array([[7, 1], [5, 2], [7, 3], [9, 4], [9, 5]])) == 2
+    # Vale o primeiro registro de cada chave do lote; o 5 já existia e fica intacto
+    assert tabela.buscar(7) == (7, 1) and tabela.buscar(9) == (9, 4) and tabela.buscar(5) == (5, 50)
+    assert tabela.count == 3
+    assert tabela.inserir_lote(np.array([[7, 8], [9, 9]])) == 0
+    assert tabela.count == 3
+
+
+def test_inserir_lote_que_nao_cabe_nao_altera_a_tabela(capsys):
+    tabela = _tabela(8)
+    assert tabela.inserir_lote(np.array([[k, k] for k in range(6)])) == 6
+    # Só 2 slots livres: o lote inteiro é recusado, mesmo com chaves já existentes nele
+    assert tabela.inserir_lote(np.array([[k, -k] for k in range(3, 10)])) == 0
+    assert 'CHEIA' in capsys.readouterr().out
+    assert tabela.count == 6 and int(np.count_nonzero(tabela.estados == OCUPADO)) == 6
+    assert tabela.inserir_lote(np.array([[3, 0], [8, 8], [9, 9]])) == 2
+    assert tabela.count == 8
+
+
+def test_inserir_lote_cresce_em_vez_de_transbordar():
+    tabela = _tabela(8, fator_carga_max=0.75)
+    assert tabela.inserir_lote(np.array([[k, k] for k in range(20)])) == 20
+    assert tabela.capacity == 32 and tabela.count == 20
+    encontrados, _ = tabela.buscar_lote(np.arange(20))
+    assert encontrados.all()
+
+
+def test_colocar_lote_resolve_disputa_pelo_mesmo_slot():
+    tabela = _tabela(8)
+    assert tabela.inserir((4, 0))
+    assert tabela.remover(4)  # slot 4 fica REMOVIDO e deve ser reaproveitado
+    # 3, 11 e 19 disputam o slot 3 na primeira rodada; 12 disputa o 4 com os perdedores
+    assert tabela.inserir_lote(np.array([[3, 1], [11, 2], [12, 3], [19, 4]])) == 4
+    assert tabela.dados[3:7, 0].tolist() == [3, 12, 11, 19]
+    assert tabela.estados[3:7].tolist() == [OCUPADO] * 4
+    assert tabela.tombstones == 0 and REMOVIDO not in tabela.estados.tolist()
+    for chave, valor in ((3, 1), (11, 2), (12, 3), (19, 4)):
+        assert tabela.buscar(chave) == (chave, valor)
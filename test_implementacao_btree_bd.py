@@ -0,0 +1,803 @@
+import random
+import sys
+import threading
+from bisect import bisect_left, bisect_right
+
+import pytest
+
+from implementacao_btree_bd import CABECALHO_COLUNA, MODOS_BUSCA, BPlusTree
+
+
+def _verificar_estrutura(arvore):
+    # Invariantes de uma árvore em memória: folhas no mesmo nível, chaves ordenadas e
+    # dentro dos separadores do pai, ponteiros pai/vizinhas coerentes, ocupação entre o
+    # mínimo e o máximo (a raiz é isenta) e contadores iguais ao conteúdo
+    niveis = []
+    folhas = []
+
+    def visitar(no, pai, inferior, superior, profundidade):
+        assert no.parent is pai
+        chaves = list(no.keys)
+        assert chaves == sorted(chaves)
+        assert all((inferior is None or inferior <= c) and (superior is None or c <= superior)
+                   for c in chaves)
+        assert not no.esta_cheio()
+        if pai is not None:
+            abaixo = arvore._folha_com_underflow(no) if no.is_leaf else no.esta_com_underflow()
+            assert not abaixo, f"nó abaixo do mínimo: {chaves}"
+        if len(niveis) <= profundidade:
+            niveis.append(0)
+        niveis[profundidade] += 1
+        if no.is_leaf:
+            assert len(no.children) == len(chaves)
+            folhas.append(no)
+            return
+        assert len(no.children) == len(chaves) + 1
+        limites = [inferior] + chaves + [superior]
+        for i, filho in enumerate(no.children):
+            visitar(filho, no, limites[i], limites[i + 1], profundidade + 1)
+
+    visitar(arvore.root, None, None, None, 0)
+    assert all(no.is_leaf for no in folhas) and len(niveis) == len(arvore._nos_por_nivel)
+    assert niveis[::-1] == arvore._nos_por_nivel
+    for esquerda, direita in zip(folhas, folhas[1:]):
+        assert esquerda.next_leaf is direita and direita.prev_leaf is esquerda
+    assert folhas[0].prev_leaf is None and folhas[-1].next_leaf is None
+    todas = [c for no in folhas for c in no.keys]
+    assert todas == sorted(todas)
+    assert len(todas) == len(arvore) == arvore.num_registros
+
+
+def _chaves_das_folhas(arvore):
+    # Chaves de cada folha, da esquerda para a direita (árvore em memória)
+    no = arvore.root
+    while not no.is_leaf:
+        no = no.children[0]
+    folhas = []
+    while no is not None:
+        folhas.append(list(no.keys))
+        no = no.next_leaf
+    return folhas
+
+
+def _arvore_com_chave_so_a_esquerda():
+    # Folhas [7, 7, 7] e [7, 8, 9] com separador 7; a remoção exata (a dos índices
+    # secundários) tira a cópia da direita, e a chave 7 fica só na folha à esquerda
+    # daquela a que a descida pela direita leva
+    arvore = BPlusTree(3, 64, verboso=False)
+    for i, chave in enumerate([7, 7, 7, 7, 8, 9]):
+        arvore.inserir((chave, i, 0))
+    assert _chaves_das_folhas(arvore) == [[7, 7, 7], [7, 8, 9]]
+    assert arvore._remover_exato((7, 3, 0))
+    assert _chaves_das_folhas(arvore) == [[7, 7, 7], [8, 9]]
+    return arvore
+
+
+def test_inserir_se_ausente_acha_chave_repetida_na_folha_a_esquerda():
+    arvore = _arvore_com_chave_so_a_esquerda()
+    assert arvore.inserir_se_ausente((7, 50, 50)) is False
+    assert arvore.obter_ou_inserir((7, 60, 60)) == (7, 0, 0)
+    assert len(arvore) == 5
+
+
+def test_upsert_sobrescreve_a_primeira_ocorrencia():
+    arvore = _arvore_com_chave_so_a_esquerda()
+    assert arvore.upsert((7, 70, 70)) == (7, 0, 0)
+    assert list(arvore.iterar_intervalo(7, 7)) == [(7, 70, 70), (7, 1, 0), (7, 2, 0)]
+    assert len(arvore) == 5
+
+
+def test_gravar_insere_chave_ausente_entre_folhas_com_repeticoes():
+    arvore = _arvore_com_chave_so_a_esquerda()
+    assert arvore.inserir_se_ausente((6, 0, 0)) is True
+    assert arvore.inserir_se_ausente((10, 0, 0)) is True
+    chaves = [registro[0] for registro in arvore.iterar_intervalo(0, 100)]
+    assert chaves == [6, 7, 7, 7, 8, 9, 10]
+
+
+def test_gravar_condicional_concorrente_exige_chaves_unicas():
+    arvore = BPlusTree(3, 64, verboso=False, concorrente=True)
+    with pytest.raises(ValueError):
+        arvore.inserir_se_ausente((1, 0, 0))
+    unica = BPlusTree(3, 64, verboso=False, concorrente=True, duplicadas='rejeitar')
+    assert unica.inserir_se_ausente((1, 0, 0)) is True
+    assert unica.inserir_se_ausente((1, 5, 5)) is False
+
+
+def test_remover_lote_retira_copias_em_varias_folhas():
+    arvore = BPlusTree(3, 64, verboso=False)
+    for i, chave in enumerate([7, 7, 7, 7, 8, 9]):
+        arvore.inserir((chave, i, 0))
+    assert arvore.remover_lote([7, 7, 9, 7, 7, 7]) == [True, True, True, True, True, False]
+    assert [registro[0] for registro in arvore.iterar_intervalo(0, 100)] == [8]
+    assert len(arvore) == 1
+
+
+def test_lote_acha_chave_que_ficou_so_na_folha_a_esquerda():
+    arvore = _arvore_com_chave_so_a_esquerda()
+    assert arvore.buscar_lote([9, 7, 6]) == [(9, 5, 0), (7, 0, 0), None]
+    assert arvore.remover_lote([7]) == [True]
+    assert list(arvore.iterar_intervalo(7, 7)) == [(7, 1, 0), (7, 2, 0)]
+
+
+def test_buscar_e_remover_acham_a_primeira_ocorrencia():
+    arvore = _arvore_com_chave_so_a_esquerda()
+    assert arvore.buscar(7) == (7, 0, 0)
+    assert arvore.remover(7) is True
+    assert arvore.buscar(7) == (7, 1, 0)
+    assert [registro[0] for registro in arvore.iterar_intervalo(0, 100)] == [7, 7, 8, 9]
+
+
+def _folhas_abaixo_do_minimo(arvore):
+    folhas = _chaves_das_folhas(arvore)
+    if len(folhas) == 1:
+        return []
+    return [chaves for chaves in folhas if len(chaves) < arvore.leaf_min_keys]
+
+
+def test_folha_mais_a_direita_so_fica_abaixo_do_minimo_durante_anexacoes():
+    arvore = BPlusTree(3, 256, verboso=False)
+    for chave in range(100):
+        arvore.inserir((chave, 0, 0))
+    # O split sequencial deixa a última folha com poucas chaves; as remoções nela não
+    # a fundem enquanto as anexações continuam
+    assert _folhas_abaixo_do_minimo(arvore) == [_chaves_das_folhas(arvore)[-1]]
+    ultima = _chaves_das_folhas(arvore)[-1]
+    arvore.remover(ultima[-1])
+    assert _chaves_das_folhas(arvore)[-1] == ultima[:-1]
+
+    # Uma inserção fora do fim encerra o padrão: a próxima remoção aplica o mínimo
+    arvore.inserir((-1, 0, 0))
+    arvore.remover(ultima[0])
+    assert _folhas_abaixo_do_minimo(arvore) == []
+
+
+def test_folha_mais_a_direita_respeita_o_minimo_sem_anexacoes():
+    arvore = BPlusTree(3, 256, verboso=False)
+    chaves = [(i * 37) % 101 for i in range(40)]
+    for chave in chaves:
+        arvore.inserir((chave, 0, 0))
+    assert _folhas_abaixo_do_minimo(arvore) == []
+    for chave in sorted(chaves, reverse=True)[:10]:
+        arvore.remover(chave)
+        assert _folhas_abaixo_do_minimo(arvore) == []
+
+
+@pytest.mark.parametrize('busca', sorted(MODOS_BUSCA))
+@pytest.mark.parametrize('tamanho_pagina', [64, 256])
+def test_operacoes_batem_com_dicionario_em_cada_modo_de_busca(busca, tamanho_pagina):
+    rnd = random.Random(f"{busca}-{tamanho_pagina}")
+    arvore = BPlusTree(3, tamanho_pagina, busca=busca, verboso=False)
+    modelo = {}
+    for passo in range(1500):
+        chave = rnd.randrange(300)
+        if rnd.random() < 0.6:
+            if chave not in modelo:
+                modelo[chave] = (chave, passo, -passo)
+                assert arvore.inserir(modelo[chave]) is True
+        else:
+            assert arvore.remover(chave) == (modelo.pop(chave, None) is not None)
+        if passo % 100 == 0:
+            _verificar_estrutura(arvore)
+    _verificar_estrutura(arvore)
+    for chave in range(-1, 301):
+        assert arvore.buscar(chave) == modelo.get(chave)
+    assert arvore.buscar_intervalo(-1, 300) == [modelo[c] for c in sorted(modelo)]
+
+
+@pytest.mark.parametrize('ordenada', [True, False])
+@pytest.mark.parametrize('fill_factor', [1.0, 0.7])
+def test_carga_em_lote_monta_arvore_valida(ordenada, fill_factor):
+    registros = [(chave, chave * 2, -chave) for chave in range(0, 3000, 3)]
+    entrada = list(registros)
+    if not ordenada:
+        random.Random(3).shuffle(entrada)
+    arvore = BPlusTree(3, 128, verboso=False)
+    assert arvore.carregar_em_lote(iter(entrada), fill_factor=fill_factor) == len(registros)
+    _verificar_estrutura(arvore)
+    assert arvore.buscar_intervalo(-1, 3000) == registros
+    ocupacao = arvore.estatisticas()['ocupacao_folhas']
+    assert ocupacao == pytest.approx(fill_factor, abs=0.15)
+
+    # A árvore carregada segue aceitando inserções e remoções
+    for chave in range(1, 3000, 3):
+        arvore.inserir((chave, 0, 0))
+    for chave in range(0, 3000, 6):
+        assert arvore.remover(chave)
+    _verificar_estrutura(arvore)
+    assert len(arvore) == 2 * len(registros) - len(range(0, 3000, 6))
+
+
+@pytest.mark.parametrize('duplicadas, esperado', [
+    ('permitir', [(1, 'a'), (1, 'b'), (2, 'c'), (2, 'd')]),
+    ('rejeitar', [(1, 'a'), (2, 'c')]),
+    ('substituir', [(1, 'b'), (2, 'd')]),
+])
+def test_carga_em_lote_aplica_politica_de_duplicadas(duplicadas, esperado):
+    arvore = BPlusTree(2, 64, verboso=False, duplicadas=duplicadas)
+    arvore.carregar_em_lote([(2, 'c'), (1, 'a'), (2, 'd'), (1, 'b')])
+    assert arvore.buscar_intervalo(0, 10) == esperado
+    _verificar_estrutura(arvore)
+
+
+def test_carga_em_lote_exige_arvore_vazia(capsys):
+    arvore = BPlusTree(3, 64, verboso=False)
+    arvore.inserir((1, 1, 1))
+    assert arvore.carregar_em_lote([(2, 2, 2)]) == 0
+    assert "árvore vazia" in capsys.readouterr().out
+    with pytest.raises(ValueError):
+        BPlusTree(3, 64, verboso=False).carregar_em_lote([], fill_factor=0)
+
+
+def test_carga_em_lote_em_disco_sobrevive_a_reabertura(tmp_path):
+    caminho = str(tmp_path / 'arvore.bin')
+    registros = [(chave, chave, chave) for chave in range(500)]
+    arvore = BPlusTree(3, 128, verboso=False, arquivo=caminho)
+    assert arvore.carregar_em_lote(reversed(registros)) == 500
+    arvore.fechar()
+    reaberta = BPlusTree(3, 128, verboso=False, arquivo=caminho)
+    assert len(reaberta) == 500
+    assert reaberta.buscar_intervalo(-1, 1000) == registros
+    reaberta.fechar()
+
+
+@pytest.mark.parametrize('duplicadas', ['permitir', 'rejeitar', 'substituir'])
+@pytest.mark.parametrize('em_disco', [False, True])
+def test_operacoes_em_lote_equivalem_as_individuais(duplicadas, em_disco, tmp_path, capsys):
+    rnd = random.Random(duplicadas)
+    opcoes = {'verboso': False, 'duplicadas': duplicadas}
+    lote = BPlusTree(3, 96, arquivo=str(tmp_path / 'lote.bin') if em_disco else None, **opcoes)
+    individual = BPlusTree(3, 96, **opcoes)
+    for rodada in range(30):
+        registros = [(rnd.randrange(120), rodada, i) for i in range(rnd.randrange(40))]
+        assert lote.inserir_lote(registros) == [individual.inserir(r) for r in registros]
+        chaves = [rnd.randrange(130) for _ in range(rnd.randrange(40))]
+        assert lote.buscar_lote(chaves) == [individual.buscar(c) for c in chaves]
+        chaves = [rnd.randrange(130) for _ in range(rnd.randrange(30))]
+        assert lote.remover_lote(chaves) == [individual.remover(c) for c in chaves]
+        assert lote.buscar_intervalo(-1, 200) == individual.buscar_intervalo(-1, 200)
+    if not em_disco:
+        _verificar_estrutura(lote)
+    assert len(lote) == len(individual)
+    capsys.readouterr()  # Avisos de chave repetida ('rejeitar')
+
+
+def test_inserir_lote_recusa_registros_invalidos():
+    arvore = BPlusTree(3, 64, verboso=False, folhas_compactas=True)
+    assert arvore.inserir_lote([(1, 1, 1), (2, 2), (3, 2 ** 40, 0), (4, 4, 4)]) == [True, False, False, True]
+    assert arvore.buscar_intervalo(0, 10) == [(1, 1, 1), (4, 4, 4)]
+
+
+def _no_intervalo(chave, inicio, fim, inclusivo):
+    inclui_inicio, inclui_fim = inclusivo
+    return ((inicio < chave or (inclui_inicio and chave == inicio))
+            and (chave < fim or (inclui_fim and chave == fim)))
+
+
+@pytest.mark.parametrize('em_disco', [False, True])
+def test_iterar_intervalo_bate_com_lista_ordenada(em_disco, tmp_path):
+    rnd = random.Random(11)
+    arvore = BPlusTree(3, 80, verboso=False, arquivo=str(tmp_path / 'a.bin') if em_disco else None)
+    modelo = []  # Ordem das folhas: por chave e, entre iguais, por chegada
+    for i in range(600):
+        registro = (rnd.randrange(150), i, 0)
+        arvore.inserir(registro)
+        modelo.append(registro)
+    for chave in rnd.sample(range(150), 40):
+        while arvore.remover(chave):
+            modelo.remove(next(r for r in modelo if r[0] == chave))
+    modelo.sort(key=lambda r: r[0])
+
+    for _ in range(200):
+        inicio, fim = sorted(rnd.randrange(-5, 160) for _ in range(2))
+        inclusivo = (rnd.random() < 0.5, rnd.random() < 0.5)
+        reverso = rnd.random() < 0.5
+        limite = rnd.choice([None, 1, 7, 50])
+        esperado = [r for r in modelo if _no_intervalo(r[0], inicio, fim, inclusivo)]
+        if reverso:
+            esperado.reverse()
+        obtido = list(arvore.iterar_intervalo(inicio, fim, limite=limite, reverso=reverso,
+                                              inclusivo=inclusivo))
+        assert obtido == esperado[:limite]
+    assert list(arvore.iterar_intervalo(10, 5)) == []
+    assert list(arvore.iterar_intervalo(0, 200, limite=0)) == []
+
+
+def test_iterar_intervalo_le_uma_folha_por_vez():
+    arvore = BPlusTree(3, 4096, verboso=False)
+    arvore.carregar_em_lote((chave, chave, chave) for chave in range(100000))
+    arvore.io.zerar()
+    varredura = arvore.iterar_intervalo(0, 10 ** 6)
+    assert [next(varredura)[0] for _ in range(5)] == [0, 1, 2, 3, 4]
+    assert arvore.io.leituras <= len(arvore._nos_por_nivel)
+
+
+def _arvore_aleatoria(semente, quantidade=800, faixa=300, **opcoes):
+    # Árvore com chaves repetidas, montada por inserções e remoções aleatórias
+    rnd = random.Random(semente)
+    arvore = BPlusTree(3, opcoes.pop('tamanho_pagina', 96), verboso=False, **opcoes)
+    for i in range(quantidade):
+        arvore.inserir((rnd.randrange(faixa), i, rnd.randrange(-1000, 1000)))
+    for _ in range(quantidade // 4):
+        arvore.remover(rnd.randrange(faixa))
+    return arvore
+
+
+def test_snapshot_mapeado_e_reconstruido_batem_com_a_arvore(tmp_path):
+    arvore = _arvore_aleatoria(12)
+    caminho = str(tmp_path / 'snapshot.bin')
+    assert arvore.salvar(caminho) == len(arvore)
+    registros = arvore.buscar_intervalo(-1, 400)
+
+    with BPlusTree.abrir(caminho) as visao:
+        assert len(visao) == len(arvore)
+        assert visao.buscar_intervalo(-1, 400) == registros
+        assert list(visao.iterar_intervalo(50, 80, reverso=True, limite=9)) == \
+            list(arvore.iterar_intervalo(50, 80, reverso=True, limite=9))
+        for chave in range(-1, 301):
+            assert visao.buscar(chave) == arvore.buscar(chave)
+
+    for opcoes in ({}, {'folhas_compactas': True}, {'duplicadas': 'rejeitar'}):
+        copia = BPlusTree.abrir(caminho, mmap=False, **opcoes)
+        _verificar_estrutura(copia)
+        if opcoes.get('duplicadas') == 'rejeitar':
+            assert [r[0] for r in copia.buscar_intervalo(-1, 400)] == sorted({r[0] for r in registros})
+        else:
+            assert copia.buscar_intervalo(-1, 400) == registros
+
+    # O snapshot também serve de arquivo de uma árvore em disco
+    em_disco = BPlusTree(3, arvore.page_size, verboso=False, arquivo=caminho)
+    assert em_disco.buscar_intervalo(-1, 400) == registros
+    em_disco.fechar()
+
+
+def test_snapshot_recusa_registro_fora_de_32_bits(tmp_path):
+    arvore = BPlusTree(3, 64, verboso=False)
+    arvore.inserir((1, 2 ** 40, 0))
+    caminho = str(tmp_path / 'snapshot.bin')
+    with pytest.raises(ValueError):
+        arvore.salvar(caminho)
+    assert not (tmp_path / 'snapshot.bin').exists()
+    with pytest.raises(ValueError):
+        BPlusTree.abrir(caminho, mmap=True, duplicadas='rejeitar')
+
+
+@pytest.mark.parametrize('duplicadas', ['permitir', 'rejeitar'])
+def test_modo_concorrente_com_escritoras_e_leitoras_simultaneas(duplicadas):
+    # Cada escritora cuida das chaves de um resto módulo 4: insere todas, confere as
+    # suas e remove parte delas, enquanto leitoras buscam e varrem a árvore inteira
+    intervalo = sys.getswitchinterval()
+    sys.setswitchinterval(1e-5)  # Troca de thread frequente: mais intercalações
+    arvore = BPlusTree(3, 64, concorrente=True, duplicadas=duplicadas, verboso=False)
+    escritoras, chaves_por_escritora = 4, 600
+    finais = [None] * escritoras
+    falhas = []
+    terminou = threading.Event()
+
+    def escritora(indice):
+        try:
+            rnd = random.Random(indice)
+            chaves = list(range(indice, escritoras * chaves_por_escritora, escritoras))
+            rnd.shuffle(chaves)
+            for chave in chaves:
+                assert arvore.inserir((chave, indice, 0)) is not False
+            assert all(arvore.buscar(chave) == (chave, indice, 0) for chave in chaves)
+            removidas = set(rnd.sample(chaves, len(chaves) // 3))
+            for chave in removidas:
+                assert arvore.remover(chave)
+            assert all(arvore.buscar(chave) is None for chave in removidas)
+            finais[indice] = {c: (c, indice, 0) for c in chaves if c not in removidas}
+        except Exception as erro:
+            falhas.append(erro)
+
+    def leitora(semente):
+        try:
+            rnd = random.Random(semente)
+            while not terminou.is_set():
+                chave = rnd.randrange(escritoras * chaves_por_escritora)
+                registro = arvore.buscar(chave)
+                assert registro is None or registro == (chave, chave % escritoras, 0)
+                inicio = rnd.randrange(escritoras * chaves_por_escritora)
+                trecho = [r[0] for r in arvore.iterar_intervalo(inicio, inicio + 200)]
+                assert trecho == sorted(trecho) and len(set(trecho)) == len(trecho)
+                assert all(inicio <= c <= inicio + 200 for c in trecho)
+        except Exception as erro:
+            falhas.append(erro)
+
+    try:
+        threads = [threading.Thread(target=escritora, args=(i,)) for i in range(escritoras)]
+        leitoras = [threading.Thread(target=leitora, args=(100 + i,)) for i in range(3)]
+        for thread in threads + leitoras:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        terminou.set()
+        for thread in leitoras:
+            thread.join()
+    finally:
+        sys.setswitchinterval(intervalo)
+
+    assert not falhas, falhas
+    modelo = {}
+    for parte in finais:
+        modelo.update(parte)
+    todos = list(arvore.iterar_intervalo(0, escritoras * chaves_por_escritora))
+    assert todos == [modelo[c] for c in sorted(modelo)]
+    _verificar_estrutura(arvore)
+
+
+@pytest.mark.parametrize('opcoes', [
+    {},
+    {'folhas_compactas': False},
+    {'folhas_comprimidas': True},
+    {'duplicadas': 'substituir', 'insercao_sequencial': False},
+    {'arquivo': True},
+])
+def test_estatisticas_incrementais_batem_com_recontagem(opcoes, tmp_path, capsys):
+    rnd = random.Random(20)
+    opcoes = dict(opcoes, verboso=False)
+    if opcoes.get('arquivo'):
+        opcoes['arquivo'] = str(tmp_path / 'arvore.bin')
+    arvore = BPlusTree(3, 96, **opcoes)
+    arvore.carregar_em_lote([(rnd.randrange(500), 0, i) for i in range(300)], fill_factor=0.8)
+
+    proxima = 10_000  # Próxima chave anexada no fim
+
+    def conferir():
+        esperado = arvore.estatisticas()
+        arvore._recontar()
+        assert arvore.estatisticas() == esperado
+
+    for rodada in range(40):
+        operacao = rnd.choice(['inserir', 'sequencia', 'remover', 'upsert', 'lotes'])
+        if operacao == 'inserir':
+            for i in range(20):
+                arvore.inserir((rnd.randrange(500), rodada, i))
+        elif operacao == 'sequencia':
+            # Anexações no fim: caminho rápido e splits 90/10
+            for chave in range(proxima, proxima + 30):
+                arvore.inserir((chave, rodada, 0))
+            proxima += 30
+        elif operacao == 'remover':
+            for _ in range(40):
+                arvore.remover(rnd.randrange(500))
+        elif operacao == 'upsert':
+            for i in range(20):
+                arvore.upsert((rnd.randrange(500), rodada, i))
+        else:
+            arvore.inserir_lote([(rnd.randrange(500), rodada, i) for i in range(30)])
+            arvore.remover_lote([rnd.randrange(500) for _ in range(30)])
+        conferir()
+
+    if 'arquivo' in opcoes:
+        # Os contadores vão nos metadados do arquivo; os de self.io recomeçam do zero
+        esperado = dict(arvore.estatisticas(), splits=0, merges=0, redistribuicoes=0)
+        arvore.fechar()
+        reaberta = BPlusTree(3, 96, **opcoes)
+        assert reaberta.estatisticas() == esperado
+        reaberta.fechar()
+    else:
+        _verificar_estrutura(arvore)
+    capsys.readouterr()  # Avisos impressos pelas operações
+
+
+@pytest.mark.parametrize('duplicadas', ['permitir', 'substituir'])
+def test_folhas_compactas_equivalem_as_folhas_em_listas(duplicadas, capsys):
+    # Mesma sequência de operações nas duas representações das folhas, com valores
+    # nos extremos dos inteiros de 32 bits
+    rnd = random.Random(21)
+    opcoes = {'verboso': False, 'duplicadas': duplicadas}
+    compacta = BPlusTree(4, 128, folhas_compactas=True, **opcoes)
+    listas = BPlusTree(4, 128, **opcoes)
+    extremos = [-2 ** 31, 2 ** 31 - 1]
+
+    def registro():
+        return (rnd.randrange(-200, 200), rnd.choice(extremos), rnd.randrange(-9, 9),
+                rnd.randrange(2 ** 31))
+
+    for rodada in range(60):
+        for _ in range(15):
+            r = registro()
+            assert compacta.inserir(r) == listas.inserir(r)
+        for _ in range(5):
+            r = registro()
+            assert compacta.upsert(r) == listas.upsert(r)
+        chaves = [rnd.randrange(-210, 210) for _ in range(10)]
+        assert [compacta.remover(c) for c in chaves] == [listas.remover(c) for c in chaves]
+        lote = [registro() for _ in range(10)]
+        assert compacta.inserir_lote(lote) == listas.inserir_lote(lote)
+        assert compacta.buscar_lote(chaves) == listas.buscar_lote(chaves)
+
+        inicio = rnd.randrange(-220, 200)
+        fim = inicio + rnd.randrange(60)
+        reverso, limite = rnd.random() < 0.5, rnd.choice([None, 1, 7])
+        assert list(compacta.iterar_intervalo(inicio, fim, limite=limite, reverso=reverso)) == \
+            list(listas.iterar_intervalo(inicio, fim, limite=limite, reverso=reverso))
+        colunas = [(c, tuple(r)) for chaves_folha, registros in compacta.varrer_colunas(inicio, fim)
+                   for c, r in zip(chaves_folha.tolist(), registros.tolist())]
+        assert colunas == [(r[0], r) for r in listas.buscar_intervalo(inicio, fim)]
+
+    assert compacta.inserir((1, 2 ** 31, 0, 0)) is False
+    assert compacta.inserir((1, 0, 0, 1.5)) is False
+    assert listas.inserir((1, 2 ** 31, 0, 0)) is True  # Listas aceitam qualquer valor
+    _verificar_estrutura(compacta)
+    capsys.readouterr()
+
+
+@pytest.mark.parametrize('duplicadas', ['permitir', 'rejeitar', 'substituir'])
+@pytest.mark.parametrize('folhas_compactas', [False, True])
+def test_consultas_por_indice_secundario_batem_com_filtro(duplicadas, folhas_compactas, capsys):
+    rnd = random.Random(22)
+    arvore = BPlusTree(3, 96, verboso=False, duplicadas=duplicadas, folhas_compactas=folhas_compactas)
+
+    def registro(rodada):
+        return (rnd.randrange(150), rnd.randrange(40), rodada)
+
+    arvore.carregar_em_lote([registro(0) for _ in range(200)])
+    assert arvore.criar_indice_secundario(1) == len(arvore)
+    for rodada in range(1, 50):
+        if rodada == 25:
+            assert arvore.criar_indice_secundario(2) == len(arvore)
+        for _ in range(8):
+            arvore.inserir(registro(rodada))
+        for _ in range(4):
+            arvore.upsert(registro(rodada))
+        for _ in range(6):
+            arvore.remover(rnd.randrange(160))
+        arvore.inserir_lote([registro(rodada) for _ in range(6)])
+        arvore.remover_lote([rnd.randrange(160) for _ in range(4)])
+
+        todos = arvore.buscar_intervalo(-1, 200)
+        for campo, indice in arvore.indices_secundarios.items():
+            assert len(indice) == len(todos)
+            inicio = rnd.randrange(45)
+            fim = inicio + rnd.choice([0, 3, 20])
+            esperado = [r for r in todos if inicio <= r[campo] <= fim]
+            obtido = arvore.consultar(campo, inicio, fim)
+            assert sorted(obtido) == sorted(esperado)
+            assert [r[campo] for r in obtido] == sorted(r[campo] for r in esperado)
+            assert sorted(arvore.consultar(campo, inicio)) == sorted(r for r in obtido if r[campo] == inicio)
+
+    assert arvore.plano_consulta(0) == 'primaria' and arvore.plano_consulta(1) == 'secundaria'
+    assert arvore.remover_indice_secundario(1) and not arvore.remover_indice_secundario(1)
+    assert arvore.plano_consulta(1) == 'varredura'
+    assert arvore.consultar(1, 5, 9) == [r for r in arvore.buscar_intervalo(-1, 200) if 5 <= r[1] <= 9]
+    with pytest.raises(ValueError):
+        arvore.criar_indice_secundario(0)
+    _verificar_estrutura(arvore)
+    capsys.readouterr()
+
+
+class _ModeloDuplicadas:
+    # Referência: lista ordenada de forma estável pela chave (cópias repetidas na
+    # ordem de chegada); as operações por chave valem para a primeira ocorrência
+    def __init__(self, duplicadas):
+        self.duplicadas = duplicadas
+        self.registros = []
+        self.chaves = []
+
+    def _primeira(self, chave):
+        i = bisect_left(self.chaves, chave)
+        return i if i < len(self.chaves) and self.chaves[i] == chave else None
+
+    def _acrescentar(self, registro):
+        i = bisect_right(self.chaves, registro[0])
+        self.chaves.insert(i, registro[0])
+        self.registros.insert(i, registro)
+
+    def _gravar(self, registro, se_existir):
+        i = self._primeira(registro[0])
+        if i is None or se_existir == 'permitir':
+            self._acrescentar(registro)
+            return None
+        anterior = self.registros[i]
+        if se_existir == 'substituir':
+            self.registros[i] = registro
+        return anterior
+
+    def inserir(self, registro):
+        return self._gravar(registro, self.duplicadas) is None or self.duplicadas != 'rejeitar'
+
+    def upsert(self, registro):
+        return self._gravar(registro, 'substituir')
+
+    def inserir_se_ausente(self, registro):
+        return self._gravar(registro, 'rejeitar') is None
+
+    def obter_ou_inserir(self, registro):
+        anterior = self._gravar(registro, 'rejeitar')
+        return registro if anterior is None else anterior
+
+    def remover(self, chave):
+        i = self._primeira(chave)
+        if i is None:
+            return False
+        del self.chaves[i], self.registros[i]
+        return True
+
+    def buscar(self, chave):
+        i = self._primeira(chave)
+        return None if i is None else self.registros[i]
+
+    def buscar_intervalo(self, inicio, fim):
+        return self.registros[bisect_left(self.chaves, inicio):bisect_right(self.chaves, fim)]
+
+
+@pytest.mark.parametrize('duplicadas', ['permitir', 'rejeitar', 'substituir'])
+@pytest.mark.parametrize('opcoes', [{}, {'folhas_comprimidas': True}, {'arquivo': True}])
+def test_operacoes_batem_com_modelo_de_cada_politica(duplicadas, opcoes, tmp_path, capsys):
+    rnd = random.Random(duplicadas)
+    if 'arquivo' in opcoes:
+        opcoes = {'arquivo': str(tmp_path / 'arvore.bin'), 'paginas_em_memoria': 8}
+    arvore = BPlusTree(3, 96, verboso=False, duplicadas=duplicadas, **opcoes)
+    modelo = _ModeloDuplicadas(duplicadas)
+    operacoes = ['inserir', 'upsert', 'inserir_se_ausente', 'obter_ou_inserir', 'remover', 'buscar']
+    proxima = 1000  # Chaves anexadas no fim, para o caminho das inserções sequenciais
+    for i in range(3000):
+        operacao = rnd.choice(operacoes)
+        if operacao in ('remover', 'buscar'):
+            argumento = rnd.randrange(-5, 90)
+        elif rnd.random() < 0.1:
+            argumento, proxima = (proxima, i, 1), proxima + 1
+        else:
+            argumento = (rnd.randrange(80), i, rnd.randrange(-50, 50))
+        obtido, esperado = getattr(arvore, operacao)(argumento), getattr(modelo, operacao)(argumento)
+        assert obtido == esperado or (operacao == 'remover' and bool(obtido) == esperado), \
+            (i, operacao, argumento)
+        if i % 250 == 0:
+            assert arvore.buscar_intervalo(-10, 10 ** 6) == modelo.registros
+    assert len(arvore) == len(modelo.registros)
+    for _ in range(50):
+        inicio = rnd.randrange(-5, 90)
+        fim = inicio + rnd.randrange(15)
+        assert arvore.buscar_intervalo(inicio, fim) == modelo.buscar_intervalo(inicio, fim)
+    if 'arquivo' in opcoes:
+        arvore.fechar()
+    else:
+        _verificar_estrutura(arvore)
+    capsys.readouterr()
+
+
+def _folhas(arvore):
+    no = arvore.root
+    while not no.is_leaf:
+        no = no.children[0]
+    while no is not None:
+        yield no
+        no = no.next_leaf
+
+
+@pytest.mark.parametrize('carga_inicial', [False, True])
+def test_folhas_comprimidas_cabem_na_pagina_quando_as_larguras_mudam(carga_inicial, capsys):
+    # Fases com valores estreitos e largos: as colunas são recodificadas com larguras
+    # maiores (e menores, após splits e fusões) e cada folha precisa continuar na página
+    rnd = random.Random(24)
+    comprimida = BPlusTree(3, 128, verboso=False, folhas_comprimidas=True)
+    listas = BPlusTree(3, 128, verboso=False)
+    # Bits de valores mais os cabeçalhos da coluna de chaves e de cada campo
+    bits_pagina = comprimida._bits_folha + (1 + comprimida.num_fields) * CABECALHO_COLUNA * 8
+    if carga_inicial:
+        registros = [(chave, chave % 4, 0) for chave in range(0, 3000, 3)]
+        assert comprimida.carregar_em_lote(registros, fill_factor=0.9) == len(registros)
+        listas.carregar_em_lote(registros)
+        assert comprimida.estatisticas()['folhas'] < listas.estatisticas()['folhas'] / 2
+
+    fases = [(3000, 8), (3000, 2 ** 31), (100, 4), (2 ** 31, 2)]  # (faixa das chaves, dos campos)
+    for fase, (faixa_chaves, faixa_campos) in enumerate(fases):
+        for _ in range(600):
+            chave = rnd.randrange(-faixa_chaves, faixa_chaves)
+            registro = (chave, rnd.randrange(faixa_campos), fase)
+            assert comprimida.inserir(registro) == listas.inserir(registro)
+        for _ in range(300):
+            chave = rnd.randrange(-3000, 3000)
+            assert comprimida.remover(chave) == listas.remover(chave)
+        todos = comprimida.buscar_intervalo(-2 ** 31, 2 ** 31)
+        assert todos == listas.buscar_intervalo(-2 ** 31, 2 ** 31)
+        for folha in _folhas(comprimida):
+            bits = folha.keys.tamanho_bits() + sum(c.tamanho_bits() for c in folha.children.colunas)
+            assert bits <= bits_pagina
+        _verificar_estrutura(comprimida)
+
+    assert comprimida.inserir((1, -2 ** 31 - 1, 0)) is False
+    with pytest.raises(ValueError):
+        BPlusTree(3, 128, verboso=False, folhas_comprimidas=True, concorrente=True)
+    capsys.readouterr()
+
+
+@pytest.mark.parametrize('em_disco', [False, True])
+def test_anexacoes_enchem_as_folhas_e_evitam_a_descida(em_disco, tmp_path):
+    ocupacao, leituras = {}, {}
+    for sequencial in (True, False):
+        arquivo = str(tmp_path / f'{sequencial}.bin') if em_disco else None
+        arvore = BPlusTree(3, 512, verboso=False, arquivo=arquivo, insercao_sequencial=sequencial)
+        arvore.io.zerar()
+        for chave in range(10000):
+            arvore.inserir((chave, chave, 0))
+        ocupacao[sequencial] = arvore.estatisticas()['ocupacao_folhas']
+        leituras[sequencial] = arvore.io.leituras / 10000
+        assert arvore.buscar_intervalo(-1, 10000) == [(c, c, 0) for c in range(10000)]
+        if em_disco:
+            arvore.fechar()
+        else:
+            _verificar_estrutura(arvore)
+    # Splits 90/10 em vez de ao meio; a dica dispensa a descida exceto nos splits
+    assert ocupacao[True] > 0.85 and ocupacao[False] < 0.6
+    assert leituras[True] < 1.5 and leituras[True] < leituras[False] / 2
+
+
+def test_dica_de_anexacao_com_insercoes_misturadas_bate_com_a_descida(capsys):
+    # Anexações intercaladas com chaves dentro e fora da última folha, remoções e
+    # repetições: a árvore com a dica deve terminar igual à que sempre desce da raiz
+    rnd = random.Random(25)
+    com_dica = BPlusTree(3, 96, verboso=False)
+    sem_dica = BPlusTree(3, 96, verboso=False, insercao_sequencial=False)
+    proxima = 0
+    for i in range(6000):
+        sorteio = rnd.random()
+        if sorteio < 0.6:
+            chave = proxima
+            proxima += rnd.choice([0, 1, 1, 2])  # Às vezes repete a última chave
+        elif sorteio < 0.8:
+            chave = proxima - rnd.randrange(1, 20)  # Perto do fim: dentro da folha da dica
+        elif sorteio < 0.9:
+            chave = rnd.randrange(proxima + 1)
+        else:
+            chave = proxima - rnd.randrange(1, 30)
+            assert com_dica.remover(chave) == sem_dica.remover(chave)
+            continue
+        assert com_dica.inserir((chave, i, 0)) == sem_dica.inserir((chave, i, 0))
+        if i % 500 == 0:
+            _verificar_estrutura(com_dica)
+    assert com_dica.buscar_intervalo(-100, proxima) == sem_dica.buscar_intervalo(-100, proxima)
+    _verificar_estrutura(com_dica)
+    capsys.readouterr()
+
+
+@pytest.mark.parametrize('via', ['upsert', 'inserir', 'inserir_lote'])
+def test_sobrescrita_que_alarga_folha_comprimida_divide_a_folha(via):
+    # Folhas cheias com valores estreitos; sobrescrever cada registro com valores largos
+    # reduz a capacidade das folhas, que precisam ser divididas
+    arvore = BPlusTree(3, 64, verboso=False, folhas_comprimidas=True, duplicadas='substituir')
+    arvore.carregar_em_lote([(chave, chave % 3, 0) for chave in range(200)])
+    folhas_antes = arvore.estatisticas()['folhas']
+    largos = [(chave, 2 ** 30, -2 ** 30) for chave in range(200)]
+    if via == 'inserir_lote':
+        assert arvore.inserir_lote(largos) == [True] * 200
+    else:
+        for registro in largos:
+            getattr(arvore, via)(registro)
+            _verificar_estrutura(arvore)
+    _verificar_estrutura(arvore)
+    assert arvore.estatisticas()['folhas'] > folhas_antes
+    assert arvore.buscar_intervalo(-1, 300) == largos
+
+
+@pytest.mark.parametrize('semente', range(4))
+def test_fim_das_anexacoes_reequilibra_a_folha_mais_a_direita(semente, capsys):
+    # Rodadas de anexações (que deixam a última folha abaixo do mínimo após o split
+    # 90/10) intercaladas com inserções fora do fim e remoções: as invariantes valem a
+    # cada passo, e uma inserção fora do fim encerra a isenção da última folha
+    rnd = random.Random(semente)
+    arvore = BPlusTree(3, rnd.choice([96, 160, 256]), verboso=False,
+                       duplicadas=rnd.choice(['permitir', 'rejeitar', 'substituir']))
+    proxima = 0
+    for i in range(250):
+        sorteio = rnd.random()
+        if sorteio < 0.5:
+            for _ in range(rnd.randrange(1, 30)):
+                arvore.inserir((proxima, i, 0))
+                proxima += 1
+            _verificar_estrutura(arvore)
+        elif sorteio < 0.75:
+            registros = len(arvore)
+            arvore.inserir((rnd.randrange(proxima // 2 + 1), i, 0))
+            _verificar_estrutura(arvore)
+            if len(arvore) > registros:  # Sobrescritas e recusas não inserem nada
+                assert _folhas_abaixo_do_minimo(arvore) == []
+        elif sorteio < 0.95:
+            arvore.remover(rnd.randrange(proxima + 1))
+            _verificar_estrutura(arvore)
+        else:
+            arvore.remover_lote([rnd.randrange(proxima + 1) for _ in range(10)])
+            _verificar_estrutura(arvore)
+    capsys.readouterr()
@@ -0,0 +1,300 @@
+import random
+
+import pytest
+
+from implementacao_linearhash_bd import HashLinear, LinearHash
+
+
+def _tabela_aleatoria(politica, semente=7, operacoes=3000, faixa=2000):
+    # Tabela pequena o bastante para crescer (rehash) e acumular tombstones
+    rnd = random.Random(semente)
+    tabela = HashLinear(3, 3 * 4 * 256, tamanho_pagina=120, politica=politica, verboso=False)
+    modelo = {}
+    for i in range(operacoes):
+        chave = rnd.randrange(faixa)
+        if rnd.random() < 0.65:
+            if chave not in modelo:
+                modelo[chave] = (chave, i, -i)
+                assert tabela.inserir(modelo[chave])
+        else:
+            assert bool(tabela.remover(chave)) == (modelo.pop(chave, None) is not None)
+    return tabela, modelo
+
+
+@pytest.mark.parametrize('politica', ['linear', 'robin_hood'])
+def test_snapshot_da_hash_preserva_registros(politica, tmp_path):
+    tabela, modelo = _tabela_aleatoria(politica)
+    caminho = str(tmp_path / 'hash.bin')
+    assert tabela.salvar(caminho) == len(modelo)
+
+    with HashLinear.abrir(caminho) as visao:
+        assert len(visao) == len(modelo)
+        for chave in range(-1, 2001):
+            assert visao.buscar(chave) == modelo.get(chave)
+
+    copia = HashLinear.abrir(caminho, mmap=False)
+    assert copia.politica == politica and len(copia) == len(modelo)
+    for chave in range(-1, 2001):
+        assert copia.buscar(chave) == modelo.get(chave)
+    # A cópia continua operável: remove metade e insere chaves novas
+    for chave in list(modelo)[::2]:
+        assert copia.remover(chave)
+        del modelo[chave]
+    for chave in range(5000, 5100):
+        assert copia.inserir((chave, 0, 0))
+        modelo[chave] = (chave, 0, 0)
+    assert all(copia.buscar(chave) == registro for chave, registro in modelo.items())
+
+    with pytest.raises(ValueError):
+        HashLinear.abrir(caminho, mmap=True, fator_carga_max=0.5)
+
+
+def _contagem_direta(tabela):
+    # Registros, tombstones e agrupamentos contados varrendo as listas da tabela
+    atual = tabela.table
+    vivos = [item for parte in (atual, tabela._antiga or []) for item in parte
+             if item is not None and item is not tabela.TOMBSTONE]
+    ocupados = [item is not None for item in atual]
+    agrupamentos = sum(1 for i, ocupado in enumerate(ocupados) if ocupado and not ocupados[i - 1])
+    if all(ocupados):
+        agrupamentos = 1
+    return {
+        'registros': len(vivos),
+        'tombstones': sum(1 for item in atual if item is tabela.TOMBSTONE),
+        'agrupamentos': agrupamentos,
+        'agrupamento_medio': sum(ocupados) / agrupamentos if agrupamentos else 0.0,
+        'capacidade': len(atual),
+        'rehash_em_andamento': tabela._antiga is not None,
+    }
+
+
+@pytest.mark.parametrize('politica', ['linear', 'robin_hood'])
+def test_estatisticas_batem_com_contagem_direta(politica):
+    rnd = random.Random(3)
+    tabela = HashLinear(3, 3 * 4 * 16, tamanho_pagina=48, politica=politica, verboso=False)
+    presentes = set()
+    for i in range(4000):
+        chave = rnd.randrange(600)
+        if rnd.random() < 0.55:
+            if chave not in presentes:
+                assert tabela.inserir((chave, i, 0))
+                presentes.add(chave)
+        else:
+            tabela.remover(chave)
+            presentes.discard(chave)
+        if i % 997 == 0:
+            tabela.compactar()
+        if i % 10 == 0:
+            estatisticas = tabela.estatisticas()
+            assert {c: estatisticas[c] for c in _contagem_direta(tabela)} == _contagem_direta(tabela)
+            assert estatisticas['registros'] == len(presentes)
+    estatisticas = tabela.estatisticas()
+    assert estatisticas['rehashes'] > 0
+    assert sum(estatisticas['distribuicao_sondagens'].values()) > 0
+
+
+def _verificar_litwin(tabela, modelo):
+    # Invariantes do Hash Linear de Litwin: número de buckets dado por (level, next),
+    # cada registro no bucket do seu endereço, páginas dentro da capacidade, sem
+    # páginas de overflow vazias e contadores iguais ao conteúdo
+    rodada = tabela.n_inicial * 2 ** tabela.level
+    assert 0 <= tabela.next < rodada and len(tabela.buckets) == rodada + tabela.next
+    registros, overflow = {}, 0
+    for i, pagina in enumerate(tabela.buckets):
+        primaria = pagina
+        while pagina is not None:
+            assert len(pagina.registros) <= tabela.bucket_capacity
+            if pagina is not primaria:
+                overflow += 1
+                assert pagina.registros
+            for registro in pagina.registros:
+                assert tabela._endereco(registro[0]) == i
+                assert registro[0] not in registros
+                registros[registro[0]] = registro
+            pagina = pagina.overflow
+    assert registros == modelo
+    assert tabela.count == len(modelo) and tabela.paginas_overflow == overflow
+    assert tabela.fator_carga() <= tabela.fator_carga_max
+
+
+@pytest.mark.parametrize('buckets_iniciais, tamanho_pagina', [(1, 32), (4, 44), (3, 128)])
+def test_litwin_bate_com_dicionario_ao_longo_de_varias_rodadas(buckets_iniciais, tamanho_pagina, capsys):
+    rnd = random.Random(buckets_iniciais)
+    tabela = LinearHash(3, tamanho_pagina, buckets_iniciais=buckets_iniciais, verboso=False)
+    modelo = {}
+    for i in range(4000):
+        # Metade das chaves são múltiplas de 64: caem nos mesmos buckets e formam cadeias
+        chave = rnd.randrange(1500) * (64 if rnd.random() < 0.5 else 1)
+        sorteio = rnd.random()
+        if sorteio < 0.6:
+            buckets, estado = len(tabela.buckets), (tabela.level, tabela.next)
+            assert tabela.inserir((chave, i, 0)) == (chave not in modelo)
+            modelo.setdefault(chave, (chave, i, 0))
+            if len(tabela.buckets) > buckets:
+                # Split: um bucket por vez, na ordem de 'next', e 'level' avança no fim da rodada
+                level, proximo = estado
+                assert len(tabela.buckets) == buckets + 1
+                if proximo + 1 == buckets_iniciais * 2 ** level:
+                    assert (tabela.level, tabela.next) == (level + 1, 0)
+                else:
+                    assert (tabela.level, tabela.next) == (level, proximo + 1)
+        elif sorteio < 0.85:
+            assert tabela.remover(chave) == (modelo.pop(chave, None) is not None)
+        else:
+            assert tabela.buscar(chave) == modelo.get(chave)
+        if i % 100 == 0:
+            _verificar_litwin(tabela, modelo)
+    _verificar_litwin(tabela, modelo)
+    estatisticas = tabela.estatisticas()
+    assert estatisticas['level'] >= 2 and estatisticas['paginas_overflow'] > 0
+
+    # Esvazia a tabela: as páginas de overflow são liberadas, os buckets permanecem
+    for chave in list(modelo):
+        assert tabela.remover(chave)
+        del modelo[chave]
+    _verificar_litwin(tabela, modelo)
+    assert tabela.paginas_overflow == 0 and len(tabela.buckets) == estatisticas['buckets']
+    assert tabela.inserir((1, 2)) is False
+    capsys.readouterr()
+
+
+def _buscar_sem_migrar(tabela, chave):
+    # Mesma busca de HashLinear.buscar, sem o passo de migração que ela executa
+    for parte in (tabela.table, tabela._antiga):
+        if parte is not None:
+            idx = tabela._procurar(parte, chave)
+            if idx is not None:
+                return parte[idx]
+    return None
+
+
+def _conferir_no_meio(tabela, modelo, faixa):
+    assert len(tabela) == len(modelo)
+    for chave in range(faixa):
+        assert _buscar_sem_migrar(tabela, chave) == modelo.get(chave)
+
+
+@pytest.mark.parametrize('politica', ['linear', 'robin_hood'])
+def test_operacoes_durante_o_rehash_incremental_batem_com_dicionario(politica, capsys):
+    # Um slot migrado por operação: cada rehash atravessa dezenas de operações
+    rnd = random.Random(7)
+    tabela = HashLinear(3, 3 * 4 * 32, politica=politica, passos_rehash=1, verboso=False)
+    modelo = {}
+    estados = {'crescimento': 0, 'compactacao': 0, 'no_meio': 0}
+    for i in range(3000):
+        capacidade, em_rehash = tabela.capacity, tabela._antiga is not None
+        chave = rnd.randrange(400)
+        sorteio = rnd.random()
+        if sorteio < 0.5:
+            assert tabela.inserir((chave, i, 0)) == (chave not in modelo)
+            modelo.setdefault(chave, (chave, i, 0))
+        elif sorteio < 0.85:
+            assert tabela.remover(chave) == (modelo.pop(chave, None) is not None)
+        else:
+            assert tabela.buscar(chave) == modelo.get(chave)
+        if tabela._antiga is not None:
+            estados['no_meio'] += 1
+            if not em_rehash:
+                # Rehash que começou nesta operação: dobra ou, por tombstones, só compacta
+                estados['crescimento' if tabela.capacity == 2 * capacidade else 'compactacao'] += 1
+            if estados['no_meio'] % 4 == 0:
+                _conferir_no_meio(tabela, modelo, 400)
+    assert estados['no_meio'] and estados['crescimento'], estados
+    # O Robin Hood remove por deslocamento, sem tombstones: só a sondagem linear compacta
+    assert bool(estados['compactacao']) == (politica == 'linear'), estados
+    tabela.compactar()
+    assert tabela._antiga is None and tabela.tombstones == 0
+    _conferir_no_meio(tabela, modelo, 400)
+    capsys.readouterr()
+
+
+def test_crescimento_durante_a_compactacao_conclui_a_migracao(capsys):
+    tabela = HashLinear(3, 3 * 4 * 100, passos_rehash=1, fator_carga_max=0.8,
+                        limite_tombstones=0.25, verboso=False)
+    modelo = {}
+    for chave in range(60):
+        assert tabela.inserir((chave, 0, 0))
+        modelo[chave] = (chave, 0, 0)
+    capacidade = tabela.capacity
+    # Remoções deixam tombstones até passar do limite: começa uma compactação
+    chave = 0
+    while tabela._antiga is None:
+        assert tabela.remover(chave)
+        del modelo[chave]
+        chave += 1
+    assert tabela.capacity == capacidade
+
+    # Inserções levam a ocupação além de fator_carga_max antes de a migração acabar,
+    # que é então concluída para o crescimento começar (antes, a tabela enchia e
+    # recusava inserções até a compactação terminar)
+    proxima = 1000
+    while tabela.capacity == capacidade:
+        assert tabela._antiga is not None
+        assert tabela.inserir((proxima, 1, 1))
+        modelo[proxima] = (proxima, 1, 1)
+        proxima += 1
+        _conferir_no_meio(tabela, modelo, proxima)
+    assert len(modelo) > 0.8 * capacidade
+    assert tabela.capacity == 2 * capacidade and tabela._antiga is not None
+    assert tabela.tombstones == 0
+    while tabela._antiga is not None:
+        assert tabela.buscar(proxima) is None
+    _conferir_no_meio(tabela, modelo, proxima)
+    capsys.readouterr()
+
+
+def _verificar_robin_hood(tabela):
+    # Invariante da tabela atual no Robin Hood: sem TOMBSTONES e, numa sequência de
+    # slots ocupados, a distância até a posição ideal cresce no máximo 1 por slot (um
+    # registro fora de casa tem sempre um vizinho anterior ocupado e não mais perto de casa)
+    atual, capacidade = tabela.table, len(tabela.table)
+    for idx, item in enumerate(atual):
+        assert item is not tabela.TOMBSTONE
+        if item is None:
+            continue
+        distancia = tabela._distancia(item[0], idx, capacidade)
+        if distancia:
+            anterior = atual[idx - 1]
+            assert anterior is not None and anterior is not tabela.TOMBSTONE
+            assert tabela._distancia(anterior[0], idx - 1, capacidade) >= distancia - 1
+
+
+def test_remocao_robin_hood_desloca_os_registros_seguintes_para_tras():
+    tabela = HashLinear(3, 3 * 4 * 8, politica='robin_hood', fator_carga_max=None, verboso=False)
+    for chave in (1, 9, 17, 2):  # 1, 9 e 17 moram no slot 1; o 2, no slot 2
+        assert tabela.inserir((chave, 0, 0))
+    assert [item and item[0] for item in tabela.table] == [None, 1, 9, 17, 2, None, None, None]
+    assert tabela.remover(9)
+    # O 17 e o 2 voltam uma posição cada; o 2 fica a uma posição de casa
+    assert [item and item[0] for item in tabela.table] == [None, 1, 17, 2, None, None, None, None]
+    assert tabela.remover(1)
+    assert [item and item[0] for item in tabela.table] == [None, 17, 2, None, None, None, None, None]
+    assert tabela.tombstones == 0 and tabela.buscar(2) == (2, 0, 0) and tabela.buscar(9) is None
+
+
+@pytest.mark.parametrize('passos_rehash', [1, 8])
+def test_robin_hood_bate_com_dicionario_e_mantem_as_distancias(passos_rehash, capsys):
+    # Chaves concentradas em poucos resíduos: sequências longas de colisões, e
+    # passos_rehash=1 mantém remoções acontecendo com a migração pela metade
+    rnd = random.Random(passos_rehash)
+    tabela = HashLinear(3, 3 * 4 * 16, politica='robin_hood', fator_carga_max=0.9,
+                        passos_rehash=passos_rehash, verboso=False)
+    modelo = {}
+    remocoes_no_meio = 0
+    for i in range(5000):
+        chave = rnd.randrange(60) * rnd.choice([1, 16, 64]) + rnd.choice([0, 0, 1])
+        sorteio = rnd.random()
+        if sorteio < 0.5:
+            assert tabela.inserir((chave, i, 0)) == (chave not in modelo)
+            modelo.setdefault(chave, (chave, i, 0))
+        elif sorteio < 0.85:
+            remocoes_no_meio += tabela._antiga is not None
+            assert tabela.remover(chave) == (modelo.pop(chave, None) is not None)
+            _verificar_robin_hood(tabela)
+        else:
+            assert tabela.buscar(chave) == modelo.get(chave)
+        assert len(tabela) == len(modelo)
+    _verificar_robin_hood(tabela)
+    assert all(tabela.buscar(chave) == registro for chave, registro in modelo.items())
+    assert tabela.rehashes and (remocoes_no_meio or passos_rehash == 8)
+    capsys.readouterr()
@@ -0,0 +1,146 @@
+import json
+import math
+import random
+
+import pytest
+
+from implementacao_btree_bd import BPlusTree
+from implementacao_linearhash_bd import HashLinear
+from instrumentacao_bd import (CAMPOS_IO, MAIOR_LATENCIA_NS, PERCENTIS, ContadorIO, HistogramaLatencia,
+                               resumo_io, somar_io)
+
+
+def _percentil_exato(amostras_ns, p):
+    # Critério do histograma: menor amostra com pelo menos p% das amostras até ela
+    ordenadas = sorted(amostras_ns)
+    return ordenadas[max(1, math.ceil(len(ordenadas) * p / 100)) - 1]
+
+
+def _amostras(semente, quantidade=5000):
+    # Latências log-normais de ~1 µs a alguns segundos, em ns inteiros
+    rnd = random.Random(semente)
+    return [int(rnd.lognormvariate(math.log(50_000), 3)) for _ in range(quantidade)]
+
+
+@pytest.mark.parametrize('bits_precisao', [2, 5, 8, 12])
+def test_percentis_ficam_dentro_do_erro_relativo(bits_precisao):
+    amostras = _amostras(bits_precisao)
+    histograma = HistogramaLatencia(bits_precisao)
+    for ns in amostras:
+        histograma.registrar(ns / 1e9)
+    assert histograma.total == len(amostras)
+
+    erro = 2 ** -(bits_precisao - 1)
+    percentis = dict(PERCENTIS, minimo=0.001, p25=25, maximo=100)
+    calculados = histograma.percentis(percentis)
+    for rotulo, p in percentis.items():
+        exato = _percentil_exato(amostras, p)
+        # Arredondamento de ponto flutuante em ns/1e9: tolera 1 ns para baixo
+        estimado = round(calculados[rotulo] * 1e9)
+        assert exato - 1 <= estimado <= exato * (1 + erro) + 1, rotulo
+        assert histograma.percentil(p) == calculados[rotulo]
+    assert histograma.maximo() == calculados['maximo']
+
+
+def test_valores_pequenos_sao_exatos_e_enormes_ficam_na_ultima_faixa():
+    histograma = HistogramaLatencia(8)
+    for ns in range(256):
+        histograma.registrar(ns / 1e9 + 1e-13)
+    estimados = [round(histograma.percentil(100 * (i + 1) / 256) * 1e9) for i in range(256)]
+    assert estimados == list(range(256))
+
+    histograma.registrar(-1.0)  # Negativa (relógio voltou): conta como 0
+    histograma.registrar(10 * MAIOR_LATENCIA_NS / 1e9)
+    assert histograma.total == 258
+    assert histograma.maximo() * 1e9 >= MAIOR_LATENCIA_NS - 1
+    assert HistogramaLatencia().percentis() == dict.fromkeys(PERCENTIS, 0.0)
+
+
+def test_soma_equivale_ao_histograma_da_uniao_e_exportacao_e_reversivel():
+    partes = [_amostras(semente, 1000) for semente in range(3)]
+    separados = []
+    for amostras in partes:
+        histograma = HistogramaLatencia()
+        for ns in amostras:
+            histograma.registrar(ns / 1e9)
+        separados.append(histograma)
+    uniao = HistogramaLatencia()
+    for ns in sum(partes, []):
+        uniao.registrar(ns / 1e9)
+
+    soma = HistogramaLatencia()
+    for histograma in separados:
+        assert soma.somar(histograma) is soma
+    assert soma.contagens == uniao.contagens and soma.total == uniao.total
+
+    importado = HistogramaLatencia.importar(json.loads(json.dumps(soma.exportar())))
+    assert importado.contagens == soma.contagens and importado.total == soma.total
+    assert importado.percentis() == soma.percentis()
+
+    with pytest.raises(ValueError):
+        soma.somar(HistogramaLatencia(6))
+    with pytest.raises(ValueError):
+        HistogramaLatencia(1)
+
+
+def test_contador_separa_a_ultima_operacao_dos_totais():
+    io = ContadorIO()
+    io.iniciar_operacao()
+    io.leituras += 3
+    io.escritas += 1
+    io.iniciar_operacao()
+    io.leituras += 2
+    io.splits += 1
+    assert io.ultima_operacao() == dict.fromkeys(CAMPOS_IO, 0) | {'leituras': 2, 'splits': 1}
+    assert io.totais() == dict.fromkeys(CAMPOS_IO, 0) | {'leituras': 5, 'escritas': 1, 'splits': 1}
+    assert io.operacoes == 2
+
+    acumulado = [0] * len(CAMPOS_IO)
+    io.acumular_ultima(acumulado)
+    io.acumular_ultima(acumulado)
+    assert acumulado == [4, 0, 2, 0, 0, 0]
+    assert somar_io({'leituras': 1}, io.ultima_operacao()) == \
+        dict.fromkeys(CAMPOS_IO, 0) | {'leituras': 3, 'splits': 1}
+    assert resumo_io(io.ultima_operacao()) == "I/O: 2L 0E | 1 splits"
+
+    io.zerar()
+    assert io.totais() == dict.fromkeys(CAMPOS_IO, 0) and io.operacoes == 0
+
+
+def test_io_da_arvore_em_busca_insercao_e_split():
+    # Folhas de 3 registros: a 4ª inserção divide a raiz-folha em duas folhas sob uma
+    # raiz interna (lê a folha; escreve as duas folhas e a nova raiz)
+    arvore = BPlusTree(3, 64, verboso=False, insercao_sequencial=False)
+    assert arvore.leaf_max_keys == 3
+    vazio = dict.fromkeys(CAMPOS_IO, 0)
+    for chave in (0, 10, 20):
+        arvore.inserir((chave, 0, 0))
+        assert arvore.io.ultima_operacao() == vazio | {'leituras': 1, 'escritas': 1}
+    arvore.inserir((30, 0, 0))
+    assert arvore.io.ultima_operacao() == vazio | {'leituras': 1, 'escritas': 3, 'splits': 1}
+
+    arvore.buscar(10)
+    assert arvore.io.ultima_operacao() == vazio | {'leituras': 2}
+    arvore.inserir((40, 0, 0))
+    assert arvore.io.ultima_operacao() == vazio | {'leituras': 2, 'escritas': 1}
+    # Split de folha sob a raiz: escreve as duas folhas e a raiz, que ganha um separador
+    arvore.inserir((50, 0, 0))
+    assert arvore.io.ultima_operacao() == vazio | {'leituras': 2, 'escritas': 3, 'splits': 1}
+    assert arvore.io.totais() == vazio | {'leituras': 10, 'escritas': 10, 'splits': 2}
+    assert arvore.io.operacoes == 7
+
+
+def test_io_da_hash_conta_sondagens_e_paginas():
+    # 8 slots, 2 por página; 1, 9 e 17 caem todas no slot 1 e ocupam os slots 1 a 3
+    tabela = HashLinear(3, 3 * 4 * 8, tamanho_pagina=24, verboso=False)
+    vazio = dict.fromkeys(CAMPOS_IO, 0)
+    for sondagens, chave in enumerate((1, 9, 17), start=1):
+        tabela.inserir((chave, 0, 0))
+        assert tabela.io.ultima_operacao() == vazio | {'leituras': min(sondagens, 2), 'escritas': 1,
+                                                      'sondagens': sondagens}
+    tabela.buscar(17)  # Slots 1, 2 e 3: páginas 0 e 1
+    assert tabela.io.ultima_operacao() == vazio | {'leituras': 2, 'sondagens': 3}
+    tabela.buscar(2)  # Ausente: slots 2, 3 e o livre 4 (páginas 1 e 2)
+    assert tabela.io.ultima_operacao() == vazio | {'leituras': 2, 'sondagens': 3}
+    tabela.remover(9)
+    assert tabela.io.ultima_operacao() == vazio | {'leituras': 2, 'escritas': 1, 'sondagens': 2}
@@ -0,0 +1,153 @@
+import random
+
+import pytest
+
+from paginacao_bd import SEM_PAGINA, ArquivoPaginas, BufferPool, bytes_para_inteiros, inteiros_para_bytes
+
+
+def _arquivo(tmp_path, paginas=0, tamanho_pagina=64):
+    # Arquivo com 'paginas' páginas de dados; a página i guarda o inteiro i
+    arquivo = ArquivoPaginas(str(tmp_path / 'paginas.bin'), tamanho_pagina)
+    for _ in range(paginas):
+        page_id = arquivo.alocar()
+        arquivo.escrever(page_id, inteiros_para_bytes([page_id]))
+    return arquivo
+
+
+def _pool(arquivo, capacidade, politica):
+    # Conteúdo de cada página: lista com o seu primeiro inteiro
+    return BufferPool(arquivo, capacidade, lambda page_id, dados: list(bytes_para_inteiros(dados, 1)),
+                      inteiros_para_bytes, politica)
+
+
+def _usar(pool, *paginas):
+    for page_id in paginas:
+        pool.fixar(page_id)
+        pool.soltar(page_id)
+
+
+def test_arquivo_reaproveita_paginas_livres_e_guarda_metadados(tmp_path):
+    arquivo = _arquivo(tmp_path, paginas=4)
+    assert arquivo.num_paginas == 5  # A página 0 é a dos metadados
+    arquivo.liberar(2)
+    arquivo.liberar(4)
+    assert arquivo.primeira_livre == 4
+    assert [arquivo.alocar(), arquivo.alocar(), arquivo.alocar()] == [4, 2, 5]
+    assert arquivo.primeira_livre == SEM_PAGINA
+    arquivo.liberar(3)
+    arquivo.escrever_metadados([7, 8, 9])
+    with pytest.raises(ValueError):
+        arquivo.escrever(1, b'\0' * 65)
+    arquivo.fechar()
+
+    reaberto = ArquivoPaginas(arquivo.caminho, 64)
+    assert (reaberto.num_paginas, reaberto.primeira_livre, reaberto.extras) == (6, 3, [7, 8, 9])
+    assert bytes_para_inteiros(reaberto.ler(1), 1)[0] == 1
+    reaberto.fechar()
+    with pytest.raises(ValueError):
+        ArquivoPaginas(arquivo.caminho, 128)
+
+
+def test_lru_remove_a_pagina_usada_ha_mais_tempo(tmp_path):
+    arquivo = _arquivo(tmp_path, paginas=5)
+    pool = _pool(arquivo, 3, 'lru')
+    _usar(pool, 1, 2, 3, 1)  # A página 1 volta a ser a mais recente
+    _usar(pool, 4)
+    assert list(pool.quadros) == [3, 1, 4]
+    _usar(pool, 3, 5)
+    assert list(pool.quadros) == [4, 3, 5]
+    assert (pool.acertos, pool.faltas) == (2, 5)
+
+
+def test_clock_da_segunda_chance_as_paginas_referenciadas(tmp_path):
+    arquivo = _arquivo(tmp_path, paginas=6)
+    pool = _pool(arquivo, 3, 'clock')
+    _usar(pool, 1, 2, 3)
+    # Todas com o bit de referência ligado: a primeira volta o desliga e a página 1 sai
+    _usar(pool, 4)
+    assert set(pool.quadros) == {2, 3, 4}
+    _usar(pool, 2)  # Religa o bit da página 2: a próxima vítima é a 3
+    _usar(pool, 5)
+    assert set(pool.quadros) == {2, 4, 5}
+    # A página 4 já teve o bit desligado nesta volta; a 5 ganha a segunda chance
+    _usar(pool, 6)
+    assert set(pool.quadros) == {2, 5, 6}
+    assert pool.relogio == [6, 2, 5]  # As novas páginas ocupam as posições vagas
+
+
+@pytest.mark.parametrize('politica', ['lru', 'clock'])
+def test_paginas_fixadas_nunca_sao_removidas(tmp_path, politica):
+    arquivo = _arquivo(tmp_path, paginas=4)
+    pool = _pool(arquivo, 2, politica)
+    pool.fixar(1)
+    pool.fixar(2)
+    assert pool._escolher_vitima() is None
+    pool.fixar(3)  # Sem vítima possível: o pool excede a capacidade
+    assert set(pool.quadros) == {1, 2, 3}
+    pool.soltar(2)  # Ao ser solta, a página em excesso é a única candidata
+    assert set(pool.quadros) == {1, 3}
+    pool.soltar(1)
+    pool.soltar(3)
+    _usar(pool, 4)
+    assert len(pool.quadros) == 2 and 4 in pool.quadros
+
+
+@pytest.mark.parametrize('politica', ['lru', 'clock'])
+def test_paginas_sujas_sao_escritas_so_ao_sair_ou_no_descarregar(tmp_path, politica):
+    arquivo = _arquivo(tmp_path, paginas=4)
+    pool = _pool(arquivo, 2, politica)
+    pool.fixar(1)[0] = 100
+    pool.soltar(1, sujo=True)
+    _usar(pool, 2)
+    escritas = arquivo.escritas
+    _usar(pool, 3, 4)  # Remove a 1 (suja) e a 2 (limpa)
+    assert arquivo.escritas == escritas + 1
+    assert bytes_para_inteiros(arquivo.ler(1), 1)[0] == 100
+
+    pool.fixar(3)[0] = 300
+    pool.soltar(3)
+    pool.marcar_sujo(3)
+    pool.descarregar()
+    assert 3 in pool.quadros and not pool.quadros[3].sujo
+    assert bytes_para_inteiros(arquivo.ler(3), 1)[0] == 300
+
+
+@pytest.mark.parametrize('politica', ['lru', 'clock'])
+def test_descartar_devolve_a_pagina_a_lista_de_livres(tmp_path, politica):
+    arquivo = _arquivo(tmp_path, paginas=3)
+    pool = _pool(arquivo, 4, politica)
+    _usar(pool, 1, 2, 3)
+    pool.descartar(2)
+    assert 2 not in pool.quadros and arquivo.primeira_livre == 2
+    page_id = arquivo.alocar()
+    assert page_id == 2
+    pool.adicionar(page_id, [22])
+    pool.soltar(page_id)
+    pool.descarregar()
+    assert bytes_para_inteiros(arquivo.ler(2), 1)[0] == 22
+
+
+def test_relogio_continua_coerente_com_remocoes_aleatorias(tmp_path):
+    # Remoções de posições arbitrárias (descartar e despejos) intercaladas com fixações
+    rnd = random.Random(4)
+    arquivo = _arquivo(tmp_path, paginas=40)
+    pool = _pool(arquivo, 8, 'clock')
+    livres = []
+    for _ in range(2000):
+        if rnd.random() < 0.1 and pool.quadros:
+            page_id = rnd.choice(list(pool.quadros))
+            if pool.quadros[page_id].pinos == 0:
+                pool.descartar(page_id)
+                livres.append(page_id)
+        elif livres and rnd.random() < 0.1:
+            page_id = arquivo.alocar()
+            assert page_id == livres.pop()
+            pool.adicionar(page_id, [page_id])
+            pool.soltar(page_id)
+        else:
+            candidatas = [p for p in range(1, 41) if p not in livres]
+            _usar(pool, rnd.choice(candidatas))
+        assert len(pool.quadros) <= pool.capacidade
+        ocupadas = {p: i for i, p in enumerate(pool.relogio) if p is not None}
+        assert ocupadas == pool._posicoes and set(ocupadas) == set(pool.quadros)
+        assert sorted(pool._vagas) == [i for i, p in enumerate(pool.relogio) if p is None]
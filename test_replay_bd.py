@@ -0,0 +1,105 @@
+import io
+
+import pytest
+
+from implementacao_btree_bd import BPlusTree
+from implementacao_linearhash_bd import HashLinear
+from instrumentacao_bd import CAMPOS_IO
+from replay_bd import (DETALHADO, SILENCIOSO, EstatisticasReplay, executar_operacoes,
+                       interpretar_bloco, processar_csv)
+
+
+def test_interpretar_bloco_aceita_espacos_e_guarda_o_erro_das_linhas_invalidas():
+    operacoes = interpretar_bloco(["+,1,2,3\n", " ? , 4 \n", "\n", "-,5,\n", "+,6,x,1\n", "*,7\n"])
+    assert operacoes[:3] == [('+', [1, 2, 3]), ('?', [4]), ('-', [5])]
+    assert operacoes[3][0] == '+' and isinstance(operacoes[3][1], ValueError)
+    assert operacoes[4] == ('*', [7])
+    assert len(operacoes) == 5  # A linha em branco não vira operação
+
+
+def test_executar_operacoes_conta_cada_tipo_de_linha(capsys):
+    linhas = [
+        "+,1,10,100\n", "+,2,20,200\n", "+,1,11,111\n",  # A terceira repete a chave 1
+        "?,1\n", "?,9\n", "-,2\n", "-,2\n",
+        "~,0,5\n",                                        # A HashLinear não busca intervalos
+        "+,3,1\n", "+,4,x,1\n", "?,\n",                   # Campos faltando / não inteiros / sem chave
+        "OP,A1,A2,A3\n", "*,1\n",                          # Cabeçalho e operação desconhecida
+    ]
+    estatisticas = executar_operacoes(linhas, HashLinear(3, 4096, verboso=False), SILENCIOSO)
+    assert estatisticas.linhas == 11
+    assert estatisticas.invalidas == 4
+    assert estatisticas.desconhecidas == 2
+    assert estatisticas.sucessos == {'insercao': 2, 'delecao': 1, 'busca': 1, 'intervalo': 0}
+    assert estatisticas.latencias['insercao'].total == 2
+    assert capsys.readouterr().out == ""  # Avisos da estrutura não vazam no modo silencioso
+
+
+def test_executar_operacoes_executa_intervalos_na_arvore():
+    linhas = [f"+,{k},0,0\n" for k in range(10)] + ["~,3,6\n", "~,50,60\n", "~,1\n"]
+    estatisticas = executar_operacoes(linhas, BPlusTree(3, 256, verboso=False), SILENCIOSO)
+    # Um intervalo vazio também é uma resposta; o de um só valor é inválido
+    assert estatisticas.sucessos['intervalo'] == 2
+    assert estatisticas.invalidas == 1
+
+
+def test_io_acumulado_so_das_operacoes_bem_sucedidas():
+    linhas = ["+,1,0,0\n", "+,17,0,0\n", "+,1,0,0\n", "?,17\n", "?,33\n", "-,1\n", "-,1\n"]
+    estatisticas = executar_operacoes(linhas, HashLinear(3, 3 * 4 * 16, verboso=False), SILENCIOSO)
+
+    # Referência: a mesma sequência numa tabela gêmea, somando só as operações que deram certo
+    gemea = HashLinear(3, 3 * 4 * 16, verboso=False)
+    esperado = {tipo: dict.fromkeys(CAMPOS_IO, 0) for tipo in ('insercao', 'busca', 'delecao')}
+    for tipo, metodo, argumento in (('insercao', gemea.inserir, (1, 0, 0)),
+                                    ('insercao', gemea.inserir, (17, 0, 0)),
+                                    ('insercao', gemea.inserir, (1, 0, 0)),
+                                    ('busca', gemea.buscar, 17), ('busca', gemea.buscar, 33),
+                                    ('delecao', gemea.remover, 1), ('delecao', gemea.remover, 1)):
+        if metodo(argumento):
+            for campo, valor in gemea.io.ultima_operacao().items():
+                esperado[tipo][campo] += valor
+    for tipo, contagem in esperado.items():
+        assert estatisticas.io_por_tipo(tipo) == contagem
+    assert estatisticas.io_por_tipo('busca')['sondagens'] > 0
+
+
+def test_somar_junta_contagens_tempos_e_histogramas():
+    estrutura = HashLinear(3, 4096, verboso=False)
+    primeira = executar_operacoes(["+,1,0,0\n", "?,1\n", "*,2\n"], estrutura, SILENCIOSO)
+    segunda = executar_operacoes(["+,2,0,0\n", "?,2\n", "?,3\n", "+,4\n"], estrutura, SILENCIOSO)
+    primeira.duracao, segunda.duracao = 2.0, 3.0
+    minimos = [min(primeira.tempos[t][1], segunda.tempos[t][1]) for t in ('insercao', 'busca')]
+    io_buscas = [a + b for a, b in zip(primeira.io['busca'], segunda.io['busca'])]
+
+    total = EstatisticasReplay().somar(primeira).somar(segunda)
+    assert (total.linhas, total.invalidas, total.desconhecidas) == (6, 1, 1)
+    assert total.sucessos == {'insercao': 2, 'delecao': 0, 'busca': 2, 'intervalo': 0}
+    assert [total.tempos[t][1] for t in ('insercao', 'busca')] == minimos
+    assert total.tempos['delecao'][1] == float('inf')
+    assert total.io['busca'] == io_buscas
+    assert total.latencias['busca'].total == 2
+    assert total.duracao == 3.0  # Replays somados correm em paralelo: vale o mais longo
+    assert total.exportar()['tipos']['insercao']['sucessos'] == 2
+
+
+def test_log_detalhado_inclui_avisos_e_linhas_desconhecidas():
+    saida = io.StringIO()
+    executar_operacoes(["+,1,0,0\n", "+,1,0,0\n", "*,5\n", "-,8\n"],
+                       HashLinear(3, 4096, verboso=False), DETALHADO, saida=saida)
+    log = saida.getvalue().splitlines()
+    assert log[0].startswith("✓ INSERÇÃO (+): (1, 0, 0)")
+    assert log[1].startswith("Erro: Chave 1 já existe")  # Aviso da estrutura antes da operação
+    assert log[2] == "✗ INSERÇÃO (+): Registro com chave 1 recusado pela estrutura"
+    assert log[3] == "⚠ Linha 3: Operação desconhecida '*'"
+    assert log[4] == "✗ REMOÇÃO (-): Chave 8 não encontrada"
+
+
+@pytest.mark.parametrize('cabecalho', [True, False])
+def test_processar_csv_pula_so_o_cabecalho(cabecalho, tmp_path):
+    caminho = tmp_path / 'carga.csv'
+    caminho.write_text(("OP,A1,A2,A3\n" if cabecalho else "") + "+,1,0,0\n+,2,0,0\n?,2\n",
+                       encoding='utf-8')
+    estatisticas = processar_csv(str(caminho), HashLinear(3, 4096, verboso=False), SILENCIOSO)
+    assert estatisticas.linhas == 3 and estatisticas.desconhecidas == 0
+    assert estatisticas.sucessos['insercao'] == 2 and estatisticas.sucessos['busca'] == 1
+    assert processar_csv(str(tmp_path / 'nao_existe.csv'), HashLinear(3, 4096, verboso=False),
+                         SILENCIOSO) is None
@@ -0,0 +1,103 @@
+import random
+
+import pytest
+
+from implementacao_btree_bd import BPlusTree
+from implementacao_linearhash_bd import HashLinear
+from replay_bd import SILENCIOSO, processar_csv
+from replay_paralelo_bd import limites_por_amostra, replay_paralelo, shard_por_hash
+
+
+def _csv(caminho, operacoes=1500, faixa=300, semente=5):
+    # Carga mista com cabeçalho, intervalos (~), linhas malformadas e uma operação desconhecida
+    rnd = random.Random(semente)
+    linhas = ["OP,A1,A2,A3\n"]
+    for i in range(operacoes):
+        chave = rnd.randrange(faixa)
+        sorteio = rnd.random()
+        if sorteio < 0.45:
+            linhas.append(f"+,{chave},{i},{-i}\n")
+        elif sorteio < 0.65:
+            linhas.append(f"-,{chave}\n")
+        elif sorteio < 0.9:
+            linhas.append(f"?,{chave}\n")
+        else:
+            linhas.append(f"~,{chave},{chave + 20}\n")
+    linhas += ["+,7,1\n", "+,8,x,3\n", "*,9\n", "\n"]
+    caminho.write_text("".join(linhas), encoding='utf-8')
+    return str(caminho)
+
+
+class _EstruturaQuebrada(HashLinear):
+    def inserir(self, registro):
+        raise RuntimeError("disco cheio")
+
+
+@pytest.mark.parametrize('particao', ['hash', 'intervalo'])
+def test_replay_paralelo_soma_o_mesmo_que_o_serial(particao, tmp_path, capsys):
+    arquivo = _csv(tmp_path / 'carga.csv')
+    serial = processar_csv(arquivo, BPlusTree(3, 256, verboso=False), SILENCIOSO)
+    total, por_shard = replay_paralelo(arquivo, BPlusTree, 3, 256, num_processos=2,
+                                       particao=particao, tamanho_lote=64, verboso=False)
+
+    # Cada chave vive num só shard e as suas operações chegam em ordem: os resultados
+    # batem com o serial, exceto os intervalos, que o paralelo não executa
+    for tipo in ('insercao', 'delecao', 'busca'):
+        assert total.sucessos[tipo] == serial.sucessos[tipo]
+    assert total.sucessos['intervalo'] == 0
+    assert total.nao_executadas == serial.sucessos['intervalo'] > 0
+    assert total.linhas + total.nao_executadas == serial.linhas
+    assert (total.invalidas, total.desconhecidas) == (serial.invalidas, serial.desconhecidas) == (2, 1)
+    assert sum(shard['linhas'] for shard in por_shard) == total.linhas
+    assert all(shard['linhas'] for shard in por_shard)
+    assert "buscas por intervalo (~) não foram executadas" in capsys.readouterr().out
+
+
+def test_particao_por_intervalo_respeita_os_limites(tmp_path):
+    caminho = tmp_path / 'carga.csv'
+    caminho.write_text("OP,A1,A2,A3\n" + "".join(f"+,{k},0,0\n" for k in range(100)), encoding='utf-8')
+    assert limites_por_amostra(str(caminho), 2) == [50]
+    assert limites_por_amostra(str(caminho), 4) == [25, 50, 75]
+
+    total, por_shard = replay_paralelo(str(caminho), HashLinear, 3, 4096, num_processos=2,
+                                       particao='intervalo', limites=[30], verboso=False)
+    # Chaves < 30 no shard 0 e as demais no shard 1
+    assert [shard['linhas'] for shard in por_shard] == [30, 70]
+    assert [shard['estrutura']['registros'] for shard in por_shard] == [30, 70]
+    assert total.sucessos['insercao'] == 100
+
+
+def test_limites_por_amostra_ignora_cabecalho_intervalos_e_linhas_invalidas(tmp_path):
+    caminho = tmp_path / 'carga.csv'
+    caminho.write_text("OP,A1\n~,0,1000\n?,abc\n*,500\n\n" + "".join(f"?,{k}\n" for k in range(10, 20)),
+                       encoding='utf-8')
+    assert limites_por_amostra(str(caminho), 2) == [15]
+    assert limites_por_amostra(str(caminho), 2, tamanho_amostra=4) == sorted(
+        limites_por_amostra(str(caminho), 2, tamanho_amostra=4))
+    vazio = tmp_path / 'vazio.csv'
+    vazio.write_text("OP,A1\n", encoding='utf-8')
+    assert limites_por_amostra(str(vazio), 3) == [0, 0]
+
+
+def test_shard_por_hash_espalha_chaves_sequenciais():
+    for num_shards in (1, 2, 3, 8):
+        contagem = [0] * num_shards
+        for chave in range(8000):
+            shard = shard_por_hash(chave, num_shards)
+            assert 0 <= shard < num_shards
+            contagem[shard] += 1
+        assert min(contagem) > 0.8 * 8000 / num_shards
+    assert shard_por_hash(12345, 4) == shard_por_hash(12345, 4)
+
+
+def test_erro_num_trabalhador_vira_falha(tmp_path, capsys):
+    # Mais linhas que um lote: o trabalhador com erro precisa esvaziar a fila para o leitor terminar
+    arquivo = _csv(tmp_path / 'carga.csv', operacoes=3000)
+    assert replay_paralelo(arquivo, _EstruturaQuebrada, 3, 4096, num_processos=2,
+                           tamanho_lote=16, verboso=False) is None
+    saida = capsys.readouterr().out
+    assert "ERRO no shard 0: RuntimeError: disco cheio" in saida
+    assert "ERRO no shard 1: RuntimeError: disco cheio" in saida
+    with pytest.raises(ValueError, match="limites"):
+        replay_paralelo(arquivo, HashLinear, 3, 4096, num_processos=3, particao='intervalo',
+                        limites=[10])
@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+
+from implementacao_btree_bd import BPlusTree
+from implementacao_linearhash_bd import HashLinear
+from servidor_bd import TAMANHO_MAXIMO_LINHA, ClienteIndice, ErroServidor, ServidorIndice, gerar_carga
+
+
+def _com_servidor(estrutura, corrotina):
+    # Sobe um ServidorIndice numa porta livre, roda corrotina(servidor, porta) e o encerra
+    async def principal():
+        servidor = ServidorIndice(estrutura)
+        soquete = await servidor.iniciar(porta=0)
+        try:
+            return await corrotina(servidor, soquete.sockets[0].getsockname()[1])
+        finally:
+            soquete.close()
+            await soquete.wait_closed()
+    return asyncio.run(principal())
+
+
+@pytest.mark.parametrize('estrutura', [BPlusTree(3, 128, verboso=False),
+                                       HashLinear(3, 64, verboso=False)])
+def test_cliente_distingue_nao_de_erro(estrutura):
+    async def sessao(servidor, porta):
+        cliente = await ClienteIndice.conectar(porta=porta)
+        try:
+            assert await cliente.inserir((1, 2, 3)) is True
+            assert await cliente.inserir((1, 5, 5)) is None  # NAO: chave já existe
+            assert await cliente.buscar(1) == (1, 2, 3)
+            with pytest.raises(ErroServidor, match="3 campos"):
+                await cliente.inserir((2, 3))
+            assert await cliente.remover(1) is True
+            assert await cliente.remover(1) is None
+            assert await cliente.buscar(1) is None
+        finally:
+            await cliente.fechar()
+    _com_servidor(estrutura, sessao)
+
+
+def test_gerar_carga_conta_erros_a_parte():
+    async def carga(servidor, porta):
+        # Registros de 2 campos contra uma estrutura de 3: toda inserção responde ERRO
+        return await gerar_carga(porta=porta, conexoes=2, janela=4, requisicoes=400,
+                                 fracao_escritas=1.0, num_campos=2, faixa_chaves=50,
+                                 verboso=False)
+    resultado = _com_servidor(BPlusTree(3, 128, verboso=False), carga)
+    assert resultado['requisicoes'] == 400
+    assert 0 < resultado['erros'] < 400
+
+
+@pytest.mark.parametrize('final', [b'', b'\n'])
+def test_linha_longa_recebe_erro_e_encerra_a_conexao(final):
+    async def sessao(servidor, porta):
+        leitor, escritor = await asyncio.open_connection('127.0.0.1', porta)
+        escritor.write(b'+,1,2,3\n?,' + b'1' * (TAMANHO_MAXIMO_LINHA + 1) + final)
+        respostas = await leitor.read()  # Até o servidor fechar a conexão
+        escritor.close()
+        return respostas, servidor.estrutura.buscar(1)
+    respostas, registro = _com_servidor(BPlusTree(3, 128, verboso=False), sessao)
+    assert respostas == f"OK\nERRO,linha maior que {TAMANHO_MAXIMO_LINHA} bytes\n".encode()
+    assert registro == (1, 2, 3)
@@ -0,0 +1,125 @@
+import os
+import random
+import stat
+
+import pytest
+
+from implementacao_btree_bd import BPlusTree
+from implementacao_linearhash_bd import HashLinear
+from wal_bd import IndiceDuravel
+
+
+def test_remover_recusa_chave_fora_de_32_bits_sem_gravar_no_log(tmp_path):
+    indice = IndiceDuravel(str(tmp_path), BPlusTree, 3, 4096, lote_commit=100)
+    assert indice.inserir((1, 2, 3)) is True
+    assert indice.remover(2 ** 40) is False
+    assert indice.remover('1') is False
+    assert len(indice.log._pendentes) == 1
+    indice.fechar(checkpoint=False)
+
+    reaberto = IndiceDuravel(str(tmp_path), BPlusTree, 3, 4096)
+    assert reaberto.recuperadas == 1
+    assert reaberto.buscar(1) == (1, 2, 3)
+    reaberto.fechar()
+
+
+def _derrubar(indice):
+    # Simula uma queda: o que ainda está no buffer do group commit nunca chega ao disco
+    indice.log._pendentes = []
+    indice.log.arquivo.close()
+
+
+def _conferir(indice, modelo, faixa):
+    assert len(indice.estrutura) == len(modelo)
+    for chave in range(faixa):
+        assert indice.buscar(chave) == modelo.get(chave)
+
+
+@pytest.mark.parametrize('classe, args, opcoes', [
+    (BPlusTree, (3, 4096), {'duplicadas': 'rejeitar'}),
+    (HashLinear, (3, 64), {}),
+])
+@pytest.mark.parametrize('intervalo_checkpoint', [0, 150])
+def test_queda_preserva_apenas_as_operacoes_confirmadas(tmp_path, classe, args, opcoes,
+                                                        intervalo_checkpoint):
+    rnd = random.Random(intervalo_checkpoint)
+    faixa = 300
+    diretorio = str(tmp_path)
+    modelo, confirmado = {}, {}
+    for rodada in range(3):
+        indice = IndiceDuravel(diretorio, classe, *args, lote_commit=16,
+                               intervalo_checkpoint=intervalo_checkpoint, **opcoes)
+        _conferir(indice, confirmado, faixa)
+        modelo = dict(confirmado)
+        for i in range(500):
+            chave = rnd.randrange(faixa)
+            if rnd.random() < 0.6:
+                registro = (chave, rodada, i)
+                assert indice.inserir(registro) == (chave not in modelo)
+                modelo.setdefault(chave, registro)
+            else:
+                assert bool(indice.remover(chave)) == (modelo.pop(chave, None) is not None)
+            if rnd.random() < 0.01:
+                indice.confirmar()
+            if not indice.log._pendentes:
+                confirmado = dict(modelo)
+        assert indice.log._pendentes  # A queda precisa perder alguma coisa
+        _derrubar(indice)
+
+    indice = IndiceDuravel(diretorio, classe, *args, **opcoes)
+    _conferir(indice, confirmado, faixa)
+    indice.fechar()
+    assert [nome for nome in os.listdir(diretorio) if nome.startswith('snapshot')]
+
+    reaberto = IndiceDuravel(diretorio, classe, *args, **opcoes)
+    assert reaberto.recuperadas == 0  # fechar() fez checkpoint: nada a reaplicar
+    _conferir(reaberto, confirmado, faixa)
+    reaberto.fechar()
+
+
+def test_cauda_rasgada_do_log_e_descartada(tmp_path):
+    diretorio = str(tmp_path)
+    indice = IndiceDuravel(diretorio, BPlusTree, 3, 4096, lote_commit=1)
+    for chave in range(10):
+        indice.inserir((chave, chave, chave))
+    caminho = indice.log.caminho
+    indice.fechar(checkpoint=False)
+
+    # Metade de um registro e depois lixo: escrita interrompida no meio
+    with open(caminho, 'ab') as arquivo:
+        arquivo.write(b'\x10\x00\x00\x00\xde\xad')
+    reaberto = IndiceDuravel(diretorio, BPlusTree, 3, 4096, lote_commit=1)
+    assert reaberto.recuperadas == 10
+    assert reaberto.inserir((10, 10, 10))
+    reaberto.fechar(checkpoint=False)
+
+    # O lixo foi cortado, então o acréscimo posterior continua legível
+    final = IndiceDuravel(diretorio, BPlusTree, 3, 4096)
+    assert final.recuperadas == 11
+    assert [final.buscar(chave) for chave in range(11)] == [(c, c, c) for c in range(11)]
+    final.fechar()
+
+
+def test_checkpoint_sincroniza_o_diretorio_antes_de_apagar_geracoes(tmp_path, monkeypatch):
+    indice = IndiceDuravel(str(tmp_path), BPlusTree, 3, 4096, intervalo_checkpoint=0)
+    indice.inserir((1, 2, 3))
+    indice.checkpoint()  # Primeira geração: ainda não há o que apagar
+    indice.inserir((2, 3, 4))
+
+    eventos = []
+    fsync, remove = os.fsync, os.remove
+
+    def registrar_fsync(descritor):
+        eventos.append('fsync-dir' if stat.S_ISDIR(os.fstat(descritor).st_mode) else 'fsync')
+        fsync(descritor)
+
+    def registrar_remove(caminho):
+        eventos.append('remove')
+        remove(caminho)
+
+    monkeypatch.setattr(os, 'fsync', registrar_fsync)
+    monkeypatch.setattr(os, 'remove', registrar_remove)
+    indice.checkpoint()
+    assert 'remove' in eventos
+    assert 'fsync-dir' in eventos[:eventos.index('remove')]
+    indice.fechar()
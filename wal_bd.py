@@ -0,0 +1,259 @@
+import contextlib
+import io
+import os
+import re
+import struct
+import zlib
+
+from paginacao_bd import INT_SIZE, inteiros_para_bytes, bytes_para_inteiros
+
+# --- Formato do log (Write-Ahead Log) ---
+# Cabeçalho do arquivo: [assinatura, versão] (inteiros de 4 bytes)
+# Cada registro de log: [tamanho do conteúdo, crc32 do conteúdo] + conteúdo
+# Conteúdo: [operação] + campos do registro (inserção) ou [operação, chave] (remoção)
+ASSINATURA_WAL = 0x314C4157  # 'WAL1' em little-endian
+VERSAO_WAL = 1
+CABECALHO_WAL = 2 * INT_SIZE
+CABECALHO_REGISTRO = struct.Struct('<II')
+
+OP_INSERIR = 1
+OP_REMOVER = 2
+
+# Arquivos do diretório de um índice durável (o número é a geração)
+PADRAO_ARQUIVO = re.compile(r'^(snapshot|wal)-(\d{6})\.(bin|log)$')
+
+
+class LogEscrita:
+    """
+    Log de operações somente de acréscimo, com group commit: as operações vão para
+    um buffer e só a cada 'lote_commit' operações (ou em confirmar()) o buffer é
+    escrito e sincronizado com um único fsync. Até lá, as operações ainda não
+    confirmadas podem ser perdidas numa queda (as confirmadas, nunca).
+    """
+    def __init__(self, caminho, lote_commit=32):
+        if lote_commit < 1:
+            raise ValueError(f"lote_commit deve ser >= 1, recebido {lote_commit}")
+        self.caminho = caminho
+        self.lote_commit = lote_commit
+        novo = not (os.path.exists(caminho) and os.path.getsize(caminho) > 0)
+        self.arquivo = open(caminho, 'ab')
+        if novo:
+            self.arquivo.write(inteiros_para_bytes([ASSINATURA_WAL, VERSAO_WAL]))
+            self._sincronizar()
+
+        self._pendentes = []  # Registros já codificados aguardando o próximo commit
+        self.sincronizacoes = 0
+
+    def registrar(self, operacao, valores):
+        conteudo = inteiros_para_bytes([operacao] + list(valores))
+        self._pendentes.append(CABECALHO_REGISTRO.pack(len(conteudo), zlib.crc32(conteudo)) + conteudo)
+        if len(self._pendentes) >= self.lote_commit:
+            self.confirmar()
+
+    def confirmar(self):
+        """Grava e sincroniza (fsync) todas as operações pendentes de uma vez."""
+        if not self._pendentes:
+            return
+        self.arquivo.write(b''.join(self._pendentes))
+        self._pendentes = []
+        self._sincronizar()
+        self.sincronizacoes += 1
+
+    def _sincronizar(self):
+        self.arquivo.flush()
+        os.fsync(self.arquivo.fileno())
+
+    def fechar(self):
+        if not self.arquivo.closed:
+            self.confirmar()
+            self.arquivo.close()
+
+
+def ler_log(caminho):
+    """
+    Gera as operações (operação, valores) gravadas no log. Para no primeiro registro
+    incompleto ou corrompido (escrita interrompida por uma queda) e corta o arquivo
+    nesse ponto, para que novos acréscimos continuem a partir do último registro válido.
+    """
+    with open(caminho, 'rb') as arquivo:
+        dados = arquivo.read()
+    if len(dados) < CABECALHO_WAL:
+        # Nem o cabeçalho chegou ao disco: o log é recriado vazio
+        open(caminho, 'wb').close()
+        return
+    assinatura, versao = bytes_para_inteiros(dados, 2)
+    if assinatura != ASSINATURA_WAL or versao != VERSAO_WAL:
+        raise ValueError(f"'{caminho}' não é um log de escrita válido.")
+
+    posicao = CABECALHO_WAL
+    while posicao + CABECALHO_REGISTRO.size <= len(dados):
+        tamanho, crc = CABECALHO_REGISTRO.unpack_from(dados, posicao)
+        inicio = posicao + CABECALHO_REGISTRO.size
+        conteudo = dados[inicio:inicio + tamanho]
+        if len(conteudo) < tamanho or zlib.crc32(conteudo) != crc:
+            break
+        valores = bytes_para_inteiros(conteudo)
+        yield valores[0], tuple(valores[1:])
+        posicao = inicio + tamanho
+
+    if posicao < len(dados):
+        with open(caminho, 'r+b') as arquivo:
+            arquivo.truncate(posicao)
+
+
+class IndiceDuravel:
+    """
+    Envolve uma BPlusTree ou HashLinear tornando inserir/remover duráveis.
+    - Cada operação é gravada no log antes de ser aplicada (group commit: um fsync
+      a cada 'lote_commit' operações).
+    - A cada 'intervalo_checkpoint' operações, a estrutura é salva em um snapshot
+      (salvar()) e o log recomeça; snapshots e logs são numerados por geração.
+    - Ao abrir, carrega o snapshot mais recente e reaplica os logs posteriores a ele.
+    Uso: IndiceDuravel('dados/', BPlusTree, 3, 4096, lote_commit=64)
+    Os argumentos posicionais após a classe só são usados quando ainda não há
+    snapshot; o snapshot é recarregado com classe.abrir(caminho, mmap=False, **kwargs),
+    então as opções nomeadas (ex.: duplicadas='substituir') valem também na recuperação.
+    Índices secundários não entram no snapshot: declare-os de novo após abrir.
+    """
+    def __init__(self, diretorio, classe, *args, lote_commit=32, intervalo_checkpoint=10000, **kwargs):
+        self.diretorio = diretorio
+        self.classe = classe
+        self.lote_commit = lote_commit
+        self.intervalo_checkpoint = intervalo_checkpoint
+        os.makedirs(diretorio, exist_ok=True)
+
+        snapshots, logs = self._geracoes()
+        self.geracao = max(snapshots + logs, default=0)
+        base = max(snapshots, default=0)
+        kwargs.setdefault('verboso', False)
+        if base:
+            self.estrutura = classe.abrir(self._caminho('snapshot', base), mmap=False, **kwargs)
+        else:
+            self.estrutura = classe(*args, **kwargs)
+
+        # Recuperação: reaplica, em ordem, as operações dos logs mais novos que o snapshot
+        self.recuperadas = 0
+        with contextlib.redirect_stdout(io.StringIO()):  # Erros já vistos na execução original
+            for geracao in sorted(g for g in logs if g > base):
+                for operacao, valores in ler_log(self._caminho('wal', geracao)):
+                    self._aplicar(operacao, valores)
+                    self.recuperadas += 1
+
+        if self.geracao == base:
+            self.geracao += 1  # O snapshot já contém tudo: começa um log novo
+        self.log = LogEscrita(self._caminho('wal', self.geracao), lote_commit)
+        self._desde_checkpoint = self.recuperadas
+
+    def _caminho(self, tipo, geracao):
+        extensao = 'bin' if tipo == 'snapshot' else 'log'
+        return os.path.join(self.diretorio, f"{tipo}-{geracao:06d}.{extensao}")
+
+    def _geracoes(self):
+        snapshots, logs = [], []
+        for nome in os.listdir(self.diretorio):
+            casamento = PADRAO_ARQUIVO.match(nome)
+            if casamento:
+                (snapshots if casamento.group(1) == 'snapshot' else logs).append(int(casamento.group(2)))
+        return snapshots, logs
+
+    def _sincronizar_diretorio(self):
+        descritor = os.open(self.diretorio, os.O_RDONLY)
+        try:
+            os.fsync(descritor)
+        finally:
+            os.close(descritor)
+
+    def _aplicar(self, operacao, valores):
+        if operacao == OP_INSERIR:
+            return self.estrutura.inserir(valores)
+        return self.estrutura.remover(valores[0])
+
+    # *********************************************************************************
+    # OPERAÇÕES
+    # *********************************************************************************
+    def inserir(self, registro):
+        if len(registro) != self.estrutura.num_fields:
+            print(f"Erro: O registro deve ter exatamente {self.estrutura.num_fields} campos.")
+            return False
+        try:
+            self.log.registrar(OP_INSERIR, registro)
+        except (TypeError, OverflowError):
+            # O log grava inteiros de 32 bits: o registro é recusado antes de ser aplicado
+            print("Erro: Os campos do registro devem ser inteiros de 32 bits.")
+            return False
+        resultado = self.estrutura.inserir(registro)
+        self._contar_operacao()
+        return resultado
+
+    def remover(self, chave):
+        try:
+            self.log.registrar(OP_REMOVER, (chave,))
+        except (TypeError, OverflowError):
+            # Uma chave que o log não grava também não pode estar na estrutura
+            print("Erro: A chave deve ser um inteiro de 32 bits.")
+            return False
+        resultado = self.estrutura.remover(chave)
+        self._contar_operacao()
+        return resultado
+
+    def buscar(self, chave):
+        return self.estrutura.buscar(chave)
+
+    def _contar_operacao(self):
+        self._desde_checkpoint += 1
+        if self.intervalo_checkpoint and self._desde_checkpoint >= self.intervalo_checkpoint:
+            try:
+                self.checkpoint()
+            except ValueError as erro:
+                # O log segue valendo; tenta de novo depois de outro intervalo
+                print(f"Erro: {erro}")
+                self._desde_checkpoint = 0
+
+    def confirmar(self):
+        """Força o commit das operações pendentes no log."""
+        self.log.confirmar()
+
+    def checkpoint(self):
+        """
+        Salva a estrutura no snapshot da geração atual e inicia o log da próxima.
+        Uma queda em qualquer ponto deixa um snapshot completo e os logs posteriores
+        a ele (o snapshot é gravado em arquivo temporário e renomeado).
+        O snapshot é reaberto e conferido antes de descartar os arquivos anteriores: se
+        não guardar todos os registros (ou a estrutura não puder ser salva), levanta
+        ValueError e mantém o log atual e os snapshots e logs antigos.
+        """
+        self.log.confirmar()
+        caminho = self._caminho('snapshot', self.geracao)
+        self.estrutura.salvar(caminho)
+        with self.classe.abrir(caminho) as snapshot:
+            gravados = len(snapshot)
+        if gravados != len(self.estrutura):
+            os.remove(caminho)
+            raise ValueError(f"Checkpoint abortado: o snapshot guardou {gravados} de "
+                             f"{len(self.estrutura)} registros.")
+        self.log.fechar()
+        antiga = self.geracao
+        self.geracao += 1
+        self.log = LogEscrita(self._caminho('wal', self.geracao), self.lote_commit)
+        self._desde_checkpoint = 0
+
+        # O rename do snapshot e a criação do novo log só são duráveis depois do fsync
+        # do diretório; sem ele, uma queda poderia manter as remoções abaixo e perder o snapshot
+        self._sincronizar_diretorio()
+
+        # Remove o que o novo snapshot tornou desnecessário
+        snapshots, logs = self._geracoes()
+        for geracao in snapshots:
+            if geracao < antiga:
+                os.remove(self._caminho('snapshot', geracao))
+        for geracao in logs:
+            if geracao <= antiga:
+                os.remove(self._caminho('wal', geracao))
+
+    def fechar(self, checkpoint=True):
+        """Confirma o log; por padrão faz também um checkpoint (reabertura sem replay)."""
+        try:
+            if checkpoint and self._desde_checkpoint:
+                self.checkpoint()
+        finally:
+            self.log.fechar()